@@ -0,0 +1,530 @@
+"""
+Alert real-time buat kasus gizi buruk akut (perlu dirujuk dalam hitungan
+jam, bukan nunggu laporan akhir bulan).
+
+Tiap kunjungan yang disimpen (`simpan_data` di app, atau baris baru di
+jurnal kalo pake `watch`) diskoring lewat `pipeline` (Z-score + fuzzy),
+terus dicek:
+    - severe       : label 'Gizi Buruk (Sangat Kurus)' atau BB/TB <= -3 SD,
+                     dan kunjungan sebelumnya belum severe (kasus baru)
+    - deterioration: dibanding kunjungan sebelumnya anak yang sama, Z-score
+                     BB/TB atau BB/U turun >= DETERIORATION_Z_DROP, atau
+                     berat turun >= DETERIORATION_WEIGHT_LOSS
+    - severe_unverified: BB/TB <= -3 SD tapi barisnya ditandain gak wajar
+                     sama screening kualitas (misal Z-score diluar batas
+                     WHO). Tetep dikirim, bareng 'quality_issues', biar
+                     petugas ngukur ulang dan ngerujuk; yang di-skip cuma
+                     baris yang datanya sendiri gak masuk akal
+                     (UNVERIFIED_SKIP_FLAGS, misal periksa sebelum lahir)
+Riwayat per anak disimpen di memori, cuma WINDOW kunjungan terakhir dan
+maksimal MAX_CHILDREN anak (yang paling lama gak muncul dibuang duluan),
+jadi memorinya terbatas.
+
+Alert dikirim ke sink yang bisa diganti: file JSONL lokal atau webhook
+(POST JSON). Pemrosesan jalan di thread sendiri, jadi tombol simpan di app
+gak nunggu webhook. Kalo sink gagal, kirimnya dicoba ulang
+(PUBLISH_RETRIES kali); masih gagal, alert ditulis ke spool JSONL lokal.
+Riwayat anak baru dicatat setelah alert-nya beneran kekirim / ke-spool,
+jadi sink yang mati gak bikin rujukan ilang diam-diam.
+
+Contoh:
+    python alerts.py watch --journal data/journal.jsonl --sink data/alerts.jsonl
+    python alerts.py receive --port 8766
+    python alerts.py bench --visits 20000
+"""
+
+import argparse
+import json
+import logging
+import os
+import queue
+import tempfile
+import threading
+import time
+import urllib.request
+from bisect import insort
+from collections import OrderedDict
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+import capture
+import pipeline
+from registry import normalize
+
+SEVERE_LABEL = "Gizi Buruk (Sangat Kurus)"
+SEVERE_Z_BB_TB = -3.0
+
+# Baris gak wajar dengan flag ini gak dibikinin alert sama sekali
+UNVERIFIED_SKIP_FLAGS = ("flag_visit_before_dob", "flag_age")
+
+DETERIORATION_Z_DROP = 1.0
+DETERIORATION_WEIGHT_LOSS = 0.05
+
+WINDOW = 4
+MAX_CHILDREN = 200000
+QUEUE_SIZE = 10000
+MAX_BATCH = 500
+
+PUBLISH_RETRIES = 3
+PUBLISH_BACKOFF = 0.5
+
+DEFAULT_SINK = os.path.join(os.path.dirname(__file__), "data", "alerts.jsonl")
+DEFAULT_SPOOL = os.path.join(os.path.dirname(__file__), "data", "alerts_spool.jsonl")
+
+log = logging.getLogger(__name__)
+
+# Data anak yang ikut dikirim di alert (buat petugas yang mau ngerujuk)
+CHILD_FIELDS = ["nama", "nama_ortu", "dob", "gender", "posyandu", "region"]
+
+
+def child_key(record: dict) -> tuple:
+    """
+    Identitas anak: 'child_id' kalo ada, kalo gak (nama, tanggal lahir, gender).
+    """
+    if record.get("child_id"):
+        return ("id", str(record["child_id"]))
+    gender = pipeline.GENDER_CODES.get(record.get("gender"), record.get("gender"))
+    return (normalize(record.get("nama")), str(record.get("dob"))[:10], gender)
+
+
+def _float(value):
+    return None if value is None or pd.isna(value) else round(float(value), 2)
+
+
+class AlertDetector:
+    """
+    Skoring + deteksi per batch kunjungan, dengan window riwayat per anak.
+    """
+
+    def __init__(self, window: int = WINDOW, max_children: int = MAX_CHILDREN):
+        self.window = window
+        self.max_children = max_children
+        # child key -> list kunjungan terurut tanggal:
+        # (visit_date, key kunjungan, z_bb_tb, z_bb_u, weight, severe, verified)
+        self.children = OrderedDict()
+
+    def __len__(self):
+        return len(self.children)
+
+    def _history(self, key):
+        history = self.children.get(key)
+        if history is None:
+            history = self.children[key] = []
+            if len(self.children) > self.max_children:
+                self.children.popitem(last=False)
+        else:
+            self.children.move_to_end(key)
+        return history
+
+    def process(self, records: list) -> list:
+        """
+        Balikin list alert (dict) dari kunjungan-kunjungan `records`, riwayat
+        langsung dicatat.
+        """
+        alerts, staged = self.detect(records)
+        self.commit(staged)
+        return alerts
+
+    def commit(self, staged: dict):
+        """
+        Catat riwayat hasil `detect` (panggil setelah alert-nya kekirim).
+        """
+        for key, history in staged.items():
+            self._history(key)[:] = history
+
+    def detect(self, records: list) -> tuple:
+        """
+        Kayak `process`, tapi riwayat belum dicatat: balikin
+        (alerts, staged) dengan staged = {child key: riwayat baru}.
+        """
+        if not records:
+            return [], {}
+        batch = pd.DataFrame.from_records(records)
+        batch["alert_pos"] = np.arange(len(batch))
+        scored = [b for b in pipeline.score([batch]) if not b.empty]
+        if not scored:
+            return [], {}
+        scored = pd.concat(scored).sort_values(["visit_date", "alert_pos"], kind="stable")
+
+        alerts, staged = [], {}
+        for row in scored.itertuples(index=False):
+            verified = bool(row.plausible)
+            if not verified and any(getattr(row, flag) for flag in UNVERIFIED_SKIP_FLAGS):
+                continue  # Tanggal / umurnya sendiri salah, Z-score-nya gak bisa dipegang
+            record = records[row.alert_pos]
+            visit_date = row.visit_date.strftime("%Y-%m-%d")
+            z_bb_tb, z_bb_u = _float(row.z_bb_tb), _float(row.z_bb_u)
+            severe = row.label == SEVERE_LABEL or (
+                z_bb_tb is not None and z_bb_tb <= SEVERE_Z_BB_TB
+            )
+            if not verified and not severe:
+                continue  # Kemungkinan salah input, jangan bikin heboh
+            visit_key = str(record.get("key") or f"{visit_date}|{row.weight}|{row.height}")
+            entry = (visit_date, visit_key, z_bb_tb, z_bb_u, float(row.weight), severe, verified)
+
+            key = child_key(record)
+            if key not in staged:
+                staged[key] = list(self.children.get(key, ()))
+            history = staged[key]
+            if any(h[1] == visit_key for h in history):
+                continue  # Kunjungan yang sama kekirim dua kali
+            insort(history, entry)
+            position = history.index(entry)
+            # Pembanding cuma kunjungan yang lolos screening
+            previous = next((h for h in reversed(history[:position]) if h[6]), None)
+            del history[: max(0, len(history) - self.window)]
+
+            base = {
+                "child": {f: _json_value(record.get(f)) for f in CHILD_FIELDS},
+                "visit_date": visit_date,
+                "label": row.label,
+                "score": _float(row.score),
+                "z_bb_tb": z_bb_tb,
+                "z_bb_u": z_bb_u,
+                "weight": float(row.weight),
+                "received_at": record.get("_received_at"),
+            }
+            if not verified:
+                # Belum pasti (bisa salah ukur), tapi kalo bener harus dirujuk hari ini
+                alerts.append(
+                    {
+                        "type": "severe_unverified",
+                        "reason": f"BB/TB {z_bb_tb} SD, ukur ulang: {row.quality_issues}",
+                        "quality_issues": row.quality_issues,
+                        **base,
+                    }
+                )
+                continue
+
+            if severe and (previous is None or not previous[5]):
+                reason = (
+                    f"Label {row.label}" if row.label == SEVERE_LABEL
+                    else f"BB/TB {z_bb_tb} SD"
+                )
+                alerts.append({"type": "severe", "reason": reason, **base})
+
+            if previous is not None:
+                reasons = _deterioration(previous, entry)
+                if reasons:
+                    alerts.append(
+                        {
+                            "type": "deterioration",
+                            "reason": "; ".join(reasons),
+                            "previous": {
+                                "visit_date": previous[0],
+                                "z_bb_tb": previous[2],
+                                "z_bb_u": previous[3],
+                                "weight": previous[4],
+                            },
+                            **base,
+                        }
+                    )
+        return alerts, staged
+
+
+def _deterioration(previous, current) -> list:
+    reasons = []
+    for i, name in ((2, "BB/TB"), (3, "BB/U")):
+        if previous[i] is not None and current[i] is not None:
+            drop = previous[i] - current[i]
+            if drop >= DETERIORATION_Z_DROP:
+                reasons.append(f"Z {name} turun {drop:.2f} SD")
+    loss = (previous[4] - current[4]) / previous[4]
+    if loss >= DETERIORATION_WEIGHT_LOSS:
+        reasons.append(f"Berat turun {loss:.0%}")
+    return reasons
+
+
+def _json_value(value):
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+
+# --- Sink ---
+
+
+class FileSink:
+    """
+    Tulis alert ke file JSONL lokal (append, satu alert satu baris).
+    """
+
+    def __init__(self, path: str = DEFAULT_SINK):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def publish(self, alerts: list):
+        with open(self.path, "a", encoding="utf-8") as f:
+            for alert in alerts:
+                f.write(json.dumps(alert, ensure_ascii=False) + "\n")
+
+
+class WebhookSink:
+    """
+    POST list alert (JSON) ke URL webhook.
+    """
+
+    def __init__(self, url: str, timeout: float = 10):
+        self.url = url
+        self.timeout = timeout
+
+    def publish(self, alerts: list):
+        request = urllib.request.Request(
+            self.url,
+            data=json.dumps(alerts, ensure_ascii=False).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+
+def make_sink(target: str):
+    """
+    'http://...' / 'https://...' -> WebhookSink, selain itu path FileSink.
+    """
+    if target.startswith(("http://", "https://")):
+        return WebhookSink(target)
+    return FileSink(target)
+
+
+def make_receiver(host: str = "127.0.0.1", port: int = 8766, received: list = None):
+    """
+    Server stand-in buat webhook: alert yang masuk ditambahin ke `received`.
+    """
+    received = received if received is not None else []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            try:
+                alerts = json.loads(self.rfile.read(length))
+            except ValueError:
+                self.send_error(400)
+                return
+            received.extend(alerts)
+            self.send_response(204)
+            self.end_headers()
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.received = received
+    return server
+
+
+# --- Stream ---
+
+
+class AlertStream:
+    """
+    Thread yang nerima kunjungan (`submit`), ngumpulin jadi batch kecil,
+    deteksi, terus kirim alert ke `sink`. Antriannya dibatesin (QUEUE_SIZE);
+    kalo penuh, kunjungan dibuang dan dihitung di `stats['dropped']`
+    (gak nahan yang nyimpen data). Alert yang gagal dikirim ke `sink`
+    ditulis ke `spool` (dihitung di `stats['spooled']`).
+    """
+
+    def __init__(
+        self, sink, detector: AlertDetector = None, queue_size: int = QUEUE_SIZE, spool=None
+    ):
+        self.sink = sink
+        self.spool = spool if spool is not None else FileSink(DEFAULT_SPOOL)
+        self.detector = detector or AlertDetector()
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.stats = {"visits": 0, "alerts": 0, "spooled": 0, "dropped": 0, "errors": 0}
+        self.latencies = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, record: dict) -> bool:
+        record = dict(record, _received_at=time.time())
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.stats["dropped"] += 1
+            return False
+        return True
+
+    def _run(self):
+        while not self._stop.is_set() or not self.queue.empty():
+            try:
+                records = [self.queue.get(timeout=0.1)]
+            except queue.Empty:
+                continue
+            while len(records) < MAX_BATCH:
+                try:
+                    records.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                alerts, staged = self.detector.detect(records)
+                if alerts:
+                    now = time.time()
+                    for alert in alerts:
+                        alert["detected_at"] = datetime.now().isoformat(timespec="seconds")
+                        if alert.get("received_at"):
+                            self.latencies.append(now - alert["received_at"])
+                    del self.latencies[:-10000]
+                    self._publish(alerts)
+                # Riwayat baru dicatat kalo alert-nya udah aman (kekirim / ke-spool)
+                self.detector.commit(staged)
+                self.stats["alerts"] += len(alerts)
+            except Exception:
+                log.exception("Gagal proses %d kunjungan, alert-nya gak kekirim", len(records))
+                self.stats["errors"] += 1
+            self.stats["visits"] += len(records)
+            for _ in records:
+                self.queue.task_done()
+
+    def _publish(self, alerts: list):
+        """
+        Kirim ke sink, dicoba ulang PUBLISH_RETRIES kali; masih gagal, tulis
+        ke spool. Error cuma naik kalo spool-nya juga gagal.
+        """
+        for attempt in range(PUBLISH_RETRIES):
+            try:
+                self.sink.publish(alerts)
+                return
+            except Exception:
+                log.exception(
+                    "Gagal kirim %d alert (percobaan %d/%d)", len(alerts), attempt + 1, PUBLISH_RETRIES
+                )
+                if attempt + 1 < PUBLISH_RETRIES:
+                    time.sleep(PUBLISH_BACKOFF * 2**attempt)
+        self.spool.publish(alerts)
+        self.stats["spooled"] += len(alerts)
+        log.warning("%d alert ditulis ke spool %s", len(alerts), getattr(self.spool, "path", self.spool))
+
+    def flush(self):
+        """
+        Tunggu semua kunjungan yang udah di-submit selesai diproses.
+        """
+        self.queue.join()
+
+    def close(self):
+        self._stop.set()
+        self._thread.join()
+
+
+def watch(journal_path: str, stream: AlertStream, poll: float = 0.2, from_start: bool = False):
+    """
+    Ikutin jurnal (kayak `tail -f`): tiap baris baru dikirim ke `stream`.
+    """
+    offset = 0 if from_start or not os.path.exists(journal_path) else os.path.getsize(journal_path)
+    while True:
+        if os.path.exists(journal_path):
+            with open(journal_path, "rb") as f:
+                f.seek(offset)
+                for raw in f:
+                    if not raw.endswith(b"\n"):
+                        break  # Baris yang lagi ditulis
+                    offset += len(raw)
+                    try:
+                        record = json.loads(raw)
+                    except ValueError:
+                        continue
+                    if isinstance(record, dict):
+                        stream.submit(record)
+        time.sleep(poll)
+
+
+def bench(visits: int = 20000, rate: float = 200, seed: int = 0) -> dict:
+    """
+    Kirim `visits` kunjungan (`rate` per detik) ke stream dengan FileSink,
+    ukur latency dari submit sampai alert ditulis.
+    """
+    rng = np.random.default_rng(seed)
+    children = max(visits // 4, 1)
+    with tempfile.TemporaryDirectory() as tmp:
+        stream = AlertStream(FileSink(os.path.join(tmp, "alerts.jsonl")))
+        start = time.perf_counter()
+        for i in range(visits):
+            child = int(rng.integers(0, children))
+            height = 60 + child % 40
+            # Sebagian kecil anak beratnya jauh dibawah normal
+            weight = height * (0.09 if child % 50 == 0 else 0.14) + rng.normal(0, 0.3)
+            stream.submit(
+                {
+                    "nama": f"Balita {child}",
+                    "dob": "2023-01-01",
+                    "gender": "L" if child % 2 else "P",
+                    "weight": round(float(weight), 2),
+                    "height": float(height),
+                    "measure_mode": "recumbent",
+                    "visit_date": f"2024-{1 + i * 12 // visits:02d}-15",
+                }
+            )
+            delay = start + (i + 1) / rate - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        stream.flush()
+        stream.close()
+
+    latencies = np.array(stream.latencies) * 1000
+    return {
+        "visits": visits,
+        "alerts": stream.stats["alerts"],
+        "dropped": stream.stats["dropped"],
+        "children": len(stream.detector),
+        "p50_ms": float(np.percentile(latencies, 50)) if len(latencies) else None,
+        "p99_ms": float(np.percentile(latencies, 99)) if len(latencies) else None,
+        "max_ms": float(latencies.max()) if len(latencies) else None,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Alert gizi buruk akut")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_watch = sub.add_parser("watch", help="Ikutin jurnal, kirim alert")
+    p_watch.add_argument("--journal", default=capture.DEFAULT_JOURNAL)
+    p_watch.add_argument("--sink", default=DEFAULT_SINK, help="Path file JSONL atau URL webhook")
+    p_watch.add_argument("--from-start", action="store_true", help="Proses jurnal dari awal")
+
+    p_receive = sub.add_parser("receive", help="Server stand-in webhook (cetak alert)")
+    p_receive.add_argument("--host", default="127.0.0.1")
+    p_receive.add_argument("--port", type=int, default=8766)
+
+    p_bench = sub.add_parser("bench", help="Ukur latency deteksi")
+    p_bench.add_argument("--visits", type=int, default=20000)
+    p_bench.add_argument("--rate", type=float, default=200)
+    args = parser.parse_args()
+
+    if args.command == "watch":
+        stream = AlertStream(make_sink(args.sink))
+        print(f"Ngikutin {args.journal}, alert ke {args.sink} (Ctrl+C buat berhenti)")
+        try:
+            watch(args.journal, stream, from_start=args.from_start)
+        except KeyboardInterrupt:
+            stream.close()
+
+    elif args.command == "receive":
+
+        class PrintList(list):
+            def extend(self, alerts):
+                for alert in alerts:
+                    print(alert["type"], alert["child"].get("nama"), alert["reason"], flush=True)
+
+        server = make_receiver(args.host, args.port, PrintList())
+        print(f"Webhook stand-in di http://{args.host}:{args.port}/")
+        server.serve_forever()
+
+    else:
+        result = bench(args.visits, args.rate)
+        print(
+            f"{result['visits']} kunjungan, {result['alerts']} alert, "
+            f"{result['children']} anak di memori, {result['dropped']} dibuang"
+        )
+        if result["p50_ms"] is not None:
+            print(
+                f"  latency deteksi (ms): p50={result['p50_ms']:.1f}  "
+                f"p99={result['p99_ms']:.1f}  max={result['max_ms']:.1f}"
+            )
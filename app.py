@@ -1,15 +1,46 @@
+import os
+import shutil
+import time
+import uuid
 import gradio as gr
 from datetime import datetime, date
 from dateutil.relativedelta import relativedelta
 import plotly.graph_objects as go
 import utils
-from fuzzy_logic import fuzzy_system
+import alerts
+import capture
+import cohort_charts
+import export
+import jobs
+from fuzzy_logic import fuzzy_system, get_recommendation, status_label
+from registry import VisitRegistry
+
+journal = capture.Journal()
+registry = VisitRegistry(journal.path)
+job_store = None
+# Stream alert gizi buruk akut, di-start dari __main__ (lihat alerts.py)
+alert_stream = None
+# Posyandu / wilayah default perangkat ini (buat routing shard di pusat)
+DEFAULT_POSYANDU = os.getenv("POSYANDU", "")
+DEFAULT_REGION = os.getenv("WILAYAH", "")
 
 
 def analyze_gizi(nama, dob_str, gender, weight, height, measure_mode):
     try:
         if dob_str is None:
-            return "Mohon masukkan tanggal lahir.", "Error", "", None
+            return (
+                None,
+                None,
+                [],
+                "Mohon masukkan tanggal lahir.",
+                "Input Error",
+                None,
+                None,
+                None,
+                None,
+                [],
+                [],
+            )
 
         dob = dob_str.date() if isinstance(dob_str, datetime) else dob_str
 
@@ -26,6 +57,9 @@ def analyze_gizi(nama, dob_str, gender, weight, height, measure_mode):
                 None,
                 None,
                 None,
+                None,
+                [],
+                [],
             )
 
         if weight > 100 or weight < 1:
@@ -38,6 +72,9 @@ def analyze_gizi(nama, dob_str, gender, weight, height, measure_mode):
                 None,
                 None,
                 None,
+                None,
+                [],
+                [],
             )
 
         # 1. Hitung-hitungan Backend atau apalah itu, keong
@@ -47,6 +84,8 @@ def analyze_gizi(nama, dob_str, gender, weight, height, measure_mode):
         z_bb_u = z_results["z_bb_u"]
         z_tb_u = z_results["z_tb_u"]
         z_bb_tb = z_results["z_bb_tb"]
+        z_imt_u = z_results["z_imt_u"]
+        imt = z_results["imt"]
         corrected_height = z_results["corrected_height"]
 
         # 2. Inferensi Fuzzy
@@ -60,27 +99,32 @@ def analyze_gizi(nama, dob_str, gender, weight, height, measure_mode):
                 None,
                 None,
                 None,
+                None,
+                [],
+                [],
             )
 
         # 4. Logika Fuzzy
         # Sekarang menggunakan 3 parameter: BB/U, TB/U, dan BB/TB
-        fuzzy_score, fuzzy_label = fuzzy_system.predict(z_bb_u, z_tb_u, z_bb_tb)
-
-        # 3. Logika Rekomendasi
-        rekomendasi = ""
-        if fuzzy_label.startswith("Gizi Buruk"):
-            rekomendasi = "SEGERA RUJUK KE PUSKESMAS/RS. Perlu penanganan medis segera."
-        elif fuzzy_label == "Gizi Kurang":
-            rekomendasi = "Perlu Pemberian Makanan Tambahan (PMT) pemulihan dan konseling gizi rutin."
-        elif fuzzy_label == "Gizi Baik":
-            rekomendasi = "Pertahankan pola asuh dan pola makan yang baik. Pantau pertumbuhan diposyandu setiap bulan."
-        elif fuzzy_label.startswith("Gizi Lebih"):
-            rekomendasi = "Konsultasikan diet seimbang. Kurangi makanan manis/berlemak, tingkatkan aktivitas fisik."
+        # Skor + penjelasan (derajat keanggotaan & aktivasi rule) dari satu pass
+        penjelasan = fuzzy_system.explain(z_bb_u, z_tb_u, z_bb_tb)
+        fuzzy_score, fuzzy_label = penjelasan["score"], penjelasan["label"]
+        membership_data = [
+            [name, term, round(degree, 3)]
+            for name, terms in penjelasan["memberships"].items()
+            for term, degree in terms.items()
+            if degree > 0
+        ]
+        rule_data = [[rule, round(strength, 3)] for rule, strength in penjelasan["rules"]]
+
+        # 3. Logika Rekomendasi (sama kayak laporan cetak, lihat reports.py)
+        rekomendasi = get_recommendation(fuzzy_label)
 
         z_score_data = [
             ["BB/U (Berat/Umur)", z_bb_u, "Indikator Berat Badan"],
             ["TB/U (Tinggi/Umur)", z_tb_u, "Indikator Stunting"],
             ["BB/TB (Berat/Tinggi)", z_bb_tb, "Indikator Wasting"],
+            ["IMT/U (IMT/Umur)", z_imt_u, f"Indikator Gizi Lebih (IMT {imt})"],
         ]
 
         status_output = f"{fuzzy_label} ({fuzzy_score}/100)"
@@ -347,6 +391,60 @@ def analyze_gizi(nama, dob_str, gender, weight, height, measure_mode):
             margin=dict(l=40, r=20, t=60, b=40),
         )
 
+        # 8. Visualisasi IMT/U (BMI-for-Age)
+        chart_data_imt = utils.get_imt_chart_data(gender_code)
+        fig4 = go.Figure()
+
+        if chart_data_imt:
+            for key, name, color, width in [
+                ("sd_n3", "-3 SD", "red", 1),
+                ("sd_n2", "-2 SD", "orange", 1),
+                ("median", "0 SD (Median)", "green", 2),
+                ("sd_p2", "+2 SD", "orange", 1),
+                ("sd_p3", "+3 SD", "red", 1),
+            ]:
+                fig4.add_trace(
+                    go.Scatter(
+                        x=chart_data_imt["age"],
+                        y=chart_data_imt[key],
+                        mode="lines",
+                        line=dict(color=color, width=width),
+                        name=name,
+                    )
+                )
+
+        # Plot Posisi Anak Saat Ini (IMT)
+        if imt is not None:
+            fig4.add_trace(
+                go.Scatter(
+                    x=[age_months],
+                    y=[imt],
+                    mode="markers+text",
+                    text=[nama],
+                    textposition="top center",
+                    marker=dict(
+                        size=12,
+                        color="teal",
+                        symbol="square",
+                        line=dict(width=2, color="white"),
+                    ),
+                    name="Posisi Anak",
+                )
+            )
+
+        fig4.update_layout(
+            xaxis_title="Umur (Bulan)",
+            yaxis_title="IMT (kg/m²)",
+            xaxis=dict(range=[0, 60], zeroline=False),
+            yaxis=dict(zeroline=False),
+            showlegend=True,
+            legend=dict(
+                orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1
+            ),
+            height=500,
+            margin=dict(l=40, r=20, t=60, b=40),
+        )
+
         return (
             age_months,
             corrected_height,
@@ -356,17 +454,175 @@ def analyze_gizi(nama, dob_str, gender, weight, height, measure_mode):
             fig,
             fig2,
             fig3,
+            fig4,
+            membership_data,
+            rule_data,
         )
 
     except Exception as e:
-        return None, None, [], f"Error: {str(e)}", "Error", None, None, None
-
-
-def simpan_data(nama, dob, gender, weight, height, status, recommendation):
-    # Placeholder buat simpen ke database
+        return None, None, [], f"Error: {str(e)}", "Error", None, None, None, None, [], []
+
+
+def simpan_data(
+    nama,
+    nama_ortu,
+    dob,
+    gender,
+    weight,
+    height,
+    measure_mode,
+    status,
+    recommendation,
+    posyandu=None,
+    region=None,
+):
+    # Dicatat ke jurnal lokal dulu (aman walau offline), sync ke pusat belakangan
     if not nama:
         return "Data kosong, tidak dapat disimpan."
-    return f"Data balita '{nama}' berhasil disimpan! (Placeholder)"
+
+    if isinstance(status, dict):
+        status = status.get("label")
+    # Yang disimpen label polos, tanpa skor tampilan '(63.41/100)'
+    status = status_label(status)
+    dob = dob.date() if isinstance(dob, datetime) else dob
+
+    record = {
+        "nama": nama,
+        "nama_ortu": nama_ortu,
+        "dob": dob,
+        "gender": gender,
+        "weight": weight,
+        "height": height,
+        "measure_mode": measure_mode,
+        "visit_date": date.today(),
+        "status": status,
+        "recommendation": recommendation,
+        # Kosong = masuk shard '_tanpa_wilayah' di pusat
+        "posyandu": (posyandu or "").strip() or None,
+        "region": (region or "").strip() or None,
+    }
+    try:
+        record["key"] = journal.append(record)
+        if registry.ready.is_set():
+            registry.refresh()
+    except OSError as e:
+        return f"Gagal menyimpan data: {str(e)}"
+    if alert_stream is not None:
+        alert_stream.submit(record)
+    return f"Data balita '{nama}' tersimpan di antrian lokal, menunggu sinkronisasi."
+
+
+def cari_riwayat(query):
+    # Index awal dibikin di thread latar pas app start (lihat __main__);
+    # abis itu tiap pencarian cuma nambah baris jurnal yang baru
+    if not query or not query.strip():
+        return [], "Ketik nama anak, nama orang tua, atau tanggal lahir."
+
+    start = time.perf_counter()
+    building = not registry.ready.is_set()
+    if not building:
+        registry.refresh()
+    results = registry.search(query)
+    elapsed = (time.perf_counter() - start) * 1000
+
+    rows = [
+        [
+            r.get("nama"),
+            r.get("nama_ortu"),
+            r.get("dob"),
+            r.get("visit_date"),
+            r.get("status"),
+            r["skor"],
+        ]
+        for r in results
+    ]
+    info = f"{len(rows)} hasil dari {len(registry)} kunjungan ({elapsed:.0f} ms)"
+    if building:
+        info += " - index masih dibangun, hasil belum lengkap"
+    return rows, info
+
+
+def _job_store():
+    # Dibuka pas pertama dipake aja, biar import app gak bikin file database
+    global job_store
+    if job_store is None:
+        job_store = jobs.JobStore()
+    return job_store
+
+
+def _job_rows():
+    return [
+        [
+            job["id"],
+            job["kind"],
+            job["status"],
+            f"{job['progress']:.0%}",
+            job["message"] or "",
+            job["created_at"],
+        ]
+        for job in _job_store().list()
+    ]
+
+
+def submit_score_job(file, fmt):
+    # File upload dicopy ke folder job biar tetep ada walau app restart
+    if file is None:
+        return None, "Mohon upload file data.", _job_rows()
+
+    path = file if isinstance(file, str) else file.name
+    ext = ".csv" if path.endswith(".csv") else ".jsonl"
+    upload_dir = os.path.join(_job_store().jobs_dir, "uploads")
+    os.makedirs(upload_dir, exist_ok=True)
+    source = os.path.join(upload_dir, f"{uuid.uuid4().hex}{ext}")
+    shutil.copyfile(path, source)
+
+    job_id = _job_store().submit("score", {"input": source, "format": fmt})
+    return job_id, f"Job {job_id} masuk antrian.", _job_rows()
+
+
+def cancel_job(job_id):
+    if not job_id:
+        return "Pilih job dulu.", _job_rows()
+    if _job_store().cancel(job_id.strip()):
+        return f"Job {job_id} dibatalkan.", _job_rows()
+    return f"Job {job_id} tidak bisa dibatalkan (sudah selesai / tidak ada).", _job_rows()
+
+
+def download_job(job_id):
+    job = _job_store().get(job_id.strip()) if job_id else None
+    if job is None:
+        return None, "Job tidak ditemukan."
+    if job["status"] != "done" or not job["result_path"]:
+        return None, f"Job {job['id']} belum selesai ({job['status']})."
+    return job["result_path"], f"Hasil job {job['id']} siap diunduh."
+
+
+def select_job(rows, evt: gr.SelectData):
+    # Klik baris di tabel job -> isi kotak ID job
+    return rows.iloc[evt.index[0], 0] if hasattr(rows, "iloc") else rows[evt.index[0]][0]
+
+
+def analyze_cohort(file, gender, measure_mode):
+    # Grafik satu kohort (posyandu / kecamatan) dari file JSONL atau CSV
+    if file is None:
+        return "Mohon upload file data kohort.", None, None, None
+
+    path = file if isinstance(file, str) else file.name
+    gender_code = "L" if gender == "Laki-laki" else "P"
+    mode_code = "standing" if measure_mode == "Berdiri" else "recumbent"
+
+    try:
+        cohort = cohort_charts.load_cohort(path)
+    except Exception as e:
+        return f"Error: {str(e)}", None, None, None
+
+    n = int((cohort["gender"] == gender_code).sum())
+    return (
+        f"{n} anak ({gender}) dari {len(cohort)} data valid.",
+        cohort_charts.cohort_height_chart(cohort, gender_code),
+        cohort_charts.cohort_weight_chart(cohort, gender_code),
+        cohort_charts.cohort_wfh_chart(cohort, gender_code, mode_code),
+    )
 
 
 # --- Layout UI ---
@@ -383,6 +639,9 @@ with gr.Blocks(title="Sistem Pakar Gizi Posyandu") as demo:
                         inp_nama = gr.Textbox(
                             label="Nama Balita", placeholder="Masukkan nama lengkap"
                         )
+                        inp_nama_ortu = gr.Textbox(
+                            label="Nama Orang Tua", placeholder="Nama ibu / ayah"
+                        )
                         inp_dob = gr.DateTime(
                             label="Tanggal Lahir", type="datetime", include_time=False
                         )
@@ -406,6 +665,14 @@ with gr.Blocks(title="Sistem Pakar Gizi Posyandu") as demo:
                             value="Terlentang",
                         )
 
+                        with gr.Row():
+                            inp_posyandu = gr.Textbox(
+                                label="Posyandu", value=DEFAULT_POSYANDU
+                            )
+                            inp_region = gr.Textbox(
+                                label="Wilayah (Kecamatan)", value=DEFAULT_REGION
+                            )
+
                     btn_analyze = gr.Button(
                         "🔍 Analisa Status Gizi", variant="primary", size="lg"
                     )
@@ -478,6 +745,20 @@ with gr.Blocks(title="Sistem Pakar Gizi Posyandu") as demo:
                         label="Rekomendasi Penanganan", lines=2, interactive=False
                     )
 
+                    with gr.Accordion("🔍 Kenapa label ini? (Penjelasan Fuzzy)", open=False):
+                        out_memberships = gr.Dataframe(
+                            headers=["Input", "Term", "Derajat Keanggotaan"],
+                            datatype=["str", "str", "number"],
+                            label="Derajat keanggotaan tiap term (yang > 0)",
+                            interactive=False,
+                        )
+                        out_rules = gr.Dataframe(
+                            headers=["Rule", "Aktivasi"],
+                            datatype=["str", "number"],
+                            label="Rule yang nyala (urut dari aktivasi terbesar)",
+                            interactive=False,
+                        )
+
                     with gr.Tabs():
                         with gr.TabItem("📏 Tinggi/Umur (TB/U)"):
                             out_plot_tb = gr.Plot(label="Kurva Pertumbuhan TB/U")
@@ -485,6 +766,8 @@ with gr.Blocks(title="Sistem Pakar Gizi Posyandu") as demo:
                             out_plot_bb = gr.Plot(label="Kurva Pertumbuhan BB/U")
                         with gr.TabItem("📐 Berat/Tinggi (BB/TB)"):
                             out_plot_wfh = gr.Plot(label="Kurva Pertumbuhan BB/TB")
+                        with gr.TabItem("🧮 IMT/Umur (IMT/U)"):
+                            out_plot_imt = gr.Plot(label="Kurva Pertumbuhan IMT/U")
 
                     with gr.Row():
                         btn_save = gr.Button(
@@ -494,12 +777,88 @@ with gr.Blocks(title="Sistem Pakar Gizi Posyandu") as demo:
                             label="Status Penyimpanan", visible=False
                         )
 
+        with gr.TabItem("👥 Grafik Kohort"):
+            gr.Markdown("### 👥 Grafik Pertumbuhan Kohort (Posyandu / Kecamatan)")
+            with gr.Row():
+                with gr.Column(scale=1):
+                    inp_cohort_file = gr.File(
+                        label="File Data Kohort (JSONL / CSV)",
+                        file_types=[".jsonl", ".csv"],
+                    )
+                    inp_cohort_gender = gr.Radio(
+                        ["Laki-laki", "Perempuan"],
+                        label="Jenis Kelamin",
+                        value="Laki-laki",
+                    )
+                    inp_cohort_mode = gr.Radio(
+                        ["Terlentang", "Berdiri"],
+                        label="Posisi Pengukuran (BB/TB)",
+                        value="Berdiri",
+                    )
+                    btn_cohort = gr.Button("📈 Tampilkan Grafik Kohort", variant="primary")
+                    out_cohort_info = gr.Textbox(label="Info Kohort", interactive=False)
+
+                with gr.Column(scale=2):
+                    with gr.Tabs():
+                        with gr.TabItem("📏 Tinggi/Umur (TB/U)"):
+                            out_cohort_tb = gr.Plot(label="Kohort TB/U")
+                        with gr.TabItem("⚖️ Berat/Umur (BB/U)"):
+                            out_cohort_bb = gr.Plot(label="Kohort BB/U")
+                        with gr.TabItem("📐 Berat/Tinggi (BB/TB)"):
+                            out_cohort_wfh = gr.Plot(label="Kohort BB/TB")
+
+        with gr.TabItem("⚙️ Job Latar"):
+            gr.Markdown("### ⚙️ Import & Skoring Massal (Job Latar)")
+            gr.Markdown(
+                "_File besar diproses di belakang layar. Halaman boleh ditutup, "
+                "job tetap jalan dan tetap ada walau aplikasi di-restart._"
+            )
+            with gr.Row():
+                with gr.Column(scale=1):
+                    inp_job_file = gr.File(
+                        label="File Data (JSONL / CSV)", file_types=[".jsonl", ".csv"]
+                    )
+                    # Parquet cuma ditawarin kalo pyarrow (opsional) terinstall
+                    inp_job_format = gr.Dropdown(
+                        ["jsonl", "csv"] + (["parquet"] if export.available() else []),
+                        value="csv",
+                        label="Format Hasil",
+                    )
+                    btn_job_submit = gr.Button("🚀 Jalankan Job", variant="primary")
+                    inp_job_id = gr.Textbox(label="ID Job (klik baris di tabel)")
+                    with gr.Row():
+                        btn_job_cancel = gr.Button("⛔ Batalkan", variant="stop")
+                        btn_job_download = gr.Button("⬇️ Unduh Hasil")
+                    out_job_msg = gr.Textbox(label="Status", interactive=False)
+                    out_job_file = gr.File(label="Hasil", interactive=False)
+
+                with gr.Column(scale=2):
+                    out_jobs = gr.Dataframe(
+                        headers=["ID", "Jenis", "Status", "Progress", "Pesan", "Dibuat"],
+                        interactive=False,
+                    )
+                    job_timer = gr.Timer(2)
+
         with gr.TabItem("📂 Riwayat Data"):
-            gr.Markdown("### 📂 Database Balita (Placeholder)")
-            gr.Markdown("_WEWLEWLE Data bakal dari MySQL/SQLite._")
-            gr.Dataframe(
-                headers=["ID", "Nama", "Tanggal Periksa", "Status Gizi"],
-                value=[["1", "Contoh Balita", "2024-01-05", "Gizi Baik"]],
+            gr.Markdown("### 📂 Riwayat Data Balita")
+            with gr.Row():
+                inp_cari = gr.Textbox(
+                    label="Cari",
+                    placeholder="Nama anak / nama orang tua / tanggal lahir (2023-01-05)",
+                    scale=4,
+                )
+                btn_cari = gr.Button("🔎 Cari", variant="primary", scale=1)
+            out_cari_info = gr.Markdown()
+            out_riwayat = gr.Dataframe(
+                headers=[
+                    "Nama",
+                    "Nama Orang Tua",
+                    "Tanggal Lahir",
+                    "Tanggal Periksa",
+                    "Status Gizi",
+                    "Skor Cocok",
+                ],
+                datatype=["str", "str", "str", "str", "str", "number"],
                 interactive=False,
             )
 
@@ -515,19 +874,55 @@ with gr.Blocks(title="Sistem Pakar Gizi Posyandu") as demo:
             out_plot_tb,
             out_plot_bb,
             out_plot_wfh,
+            out_plot_imt,
+            out_memberships,
+            out_rules,
         ],
     )
 
+    btn_cohort.click(
+        fn=analyze_cohort,
+        inputs=[inp_cohort_file, inp_cohort_gender, inp_cohort_mode],
+        outputs=[out_cohort_info, out_cohort_tb, out_cohort_bb, out_cohort_wfh],
+    )
+
+    btn_job_submit.click(
+        fn=submit_score_job,
+        inputs=[inp_job_file, inp_job_format],
+        outputs=[inp_job_id, out_job_msg, out_jobs],
+    )
+    btn_job_cancel.click(
+        fn=cancel_job, inputs=[inp_job_id], outputs=[out_job_msg, out_jobs]
+    )
+    btn_job_download.click(
+        fn=download_job, inputs=[inp_job_id], outputs=[out_job_file, out_job_msg]
+    )
+    out_jobs.select(fn=select_job, inputs=[out_jobs], outputs=[inp_job_id])
+    # Polling progress tiap 2 detik
+    job_timer.tick(fn=_job_rows, outputs=[out_jobs])
+    demo.load(fn=_job_rows, outputs=[out_jobs])
+
+    btn_cari.click(
+        fn=cari_riwayat, inputs=[inp_cari], outputs=[out_riwayat, out_cari_info]
+    )
+    inp_cari.submit(
+        fn=cari_riwayat, inputs=[inp_cari], outputs=[out_riwayat, out_cari_info]
+    )
+
     btn_save.click(
         fn=simpan_data,
         inputs=[
             inp_nama,
+            inp_nama_ortu,
             inp_dob,
             inp_gender,
             inp_weight,
             inp_height,
+            inp_mode,
             out_status,
             out_rekomendasi,
+            inp_posyandu,
+            inp_region,
         ],
         outputs=[out_save_msg],
     ).then(
@@ -537,7 +932,6 @@ with gr.Blocks(title="Sistem Pakar Gizi Posyandu") as demo:
     )
 
 if __name__ == "__main__":
-    import os
     import argparse
 
     share_link = False
@@ -545,10 +939,29 @@ if __name__ == "__main__":
 
     parser = argparse.ArgumentParser()
     parser.add_argument("--share", action="store_true", help="Meong")
+    parser.add_argument(
+        "--workers", type=int, default=1, help="Jumlah proses worker job latar"
+    )
+    parser.add_argument(
+        "--alerts",
+        default=alerts.DEFAULT_SINK,
+        help="Tujuan alert gizi buruk: file JSONL atau URL webhook ('' = mati)",
+    )
     args = parser.parse_args()
     if args.share:
         share_link = True
 
+    # Worker job latar (proses terpisah, prioritas rendah)
+    if args.workers > 0:
+        jobs.start_workers(args.workers)
+
+    # Index pencarian riwayat dibikin di latar, app gak nunggu
+    registry.start_background_refresh()
+
+    # Alert gizi buruk akut tiap data disimpan (thread sendiri)
+    if args.alerts:
+        alert_stream = alerts.AlertStream(alerts.make_sink(args.alerts))
+
     demo.launch(
         server_name="127.0.0.1",
         server_port=server_port,
@@ -0,0 +1,415 @@
+"""
+Antrian input offline buat posyandu yang sering gak ada sinyal.
+
+Alurnya:
+    1. `simpan_data` di app nulis tiap pengukuran ke jurnal lokal (JSONL,
+       append-only). Tiap baris dapet 'key' (idempotency key, UUID) pas dicatat.
+    2. `sync` baca jurnal mulai dari kursor terakhir, kirim ke server pusat
+       per batch gede (bukan satu-satu per record), terus geser kursor
+       setelah batch itu diterima.
+    3. Server pusat (`CentralStore`, SQLite) insert massal pake
+       `INSERT OR IGNORE`, jadi record yang kekirim dua kali (misal sync putus
+       di tengah terus diulang) otomatis dibuang di sisi server.
+
+Format baris jurnal sama kayak input `pipeline.py`, jadi jurnal bisa langsung
+diskoring: python pipeline.py data/journal.jsonl hasil.jsonl
+
+Contoh:
+    python capture.py serve --db pusat.db --port 8765
+    python capture.py serve --shards data/shards --shard-by region
+    python capture.py sync --journal data/journal.jsonl --url http://127.0.0.1:8765
+    python capture.py sync --shards data/shards --shard-by posyandu
+    python capture.py bench --visits 100000
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import urllib.request
+import uuid
+from datetime import date, datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_JOURNAL = os.path.join(os.path.dirname(__file__), "data", "journal.jsonl")
+DEFAULT_SYNC_BATCH = 5000
+BULK_PATH = "/visits/bulk"
+
+# Kolom yang disimpen di server pusat (sisanya di record diabaikan)
+STORE_COLUMNS = [
+    "key",
+    "nama",
+    "nama_ortu",
+    "dob",
+    "gender",
+    "weight",
+    "height",
+    "measure_mode",
+    "visit_date",
+    "posyandu",
+    "region",
+    "status",
+    "recommendation",
+    "captured_at",
+]
+
+
+def _json_default(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return str(value)
+
+
+# --- Jurnal Lokal ---
+
+
+class Journal:
+    """
+    Jurnal append-only di disk plus kursor (byte offset) sampai mana
+    yang udah diterima server. Kursor disimpen di file '<path>.cursor'.
+    """
+
+    def __init__(self, path: str = DEFAULT_JOURNAL, fsync: bool = False):
+        self.path = path
+        self.cursor_path = path + ".cursor"
+        self.fsync = fsync
+
+    def _line(self, record: dict) -> tuple:
+        record = dict(record)
+        record.setdefault("key", uuid.uuid4().hex)
+        record.setdefault("captured_at", datetime.now().isoformat(timespec="seconds"))
+        return record["key"], json.dumps(record, ensure_ascii=False, default=_json_default)
+
+    def append_many(self, records) -> list:
+        """
+        Catat beberapa record sekaligus (satu kali buka file), balikin key-nya.
+        """
+        keys, lines = [], []
+        for record in records:
+            key, line = self._line(record)
+            keys.append(key)
+            lines.append(line + "\n")
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.writelines(lines)
+            if self.fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        return keys
+
+    def append(self, record: dict) -> str:
+        return self.append_many([record])[0]
+
+    def cursor(self) -> int:
+        try:
+            with open(self.cursor_path, encoding="utf-8") as f:
+                return int(f.read().strip() or 0)
+        except FileNotFoundError:
+            return 0
+
+    def ack(self, offset: int):
+        """
+        Geser kursor ke `offset`. Ditulis ke file sementara dulu terus di-rename,
+        biar kursor gak pernah setengah jadi kalo proses mati.
+        """
+        tmp = self.cursor_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(str(offset))
+        os.replace(tmp, self.cursor_path)
+
+    def pending(self, batch_size: int = DEFAULT_SYNC_BATCH):
+        """
+        Generator (records, offset_akhir) buat record yang belum di-ack.
+        Baris terakhir yang belum ada newline-nya (lagi ditulis / kepotong)
+        gak diambil; baris JSON rusak dilewati.
+        """
+        if not os.path.exists(self.path):
+            return
+
+        with open(self.path, "rb") as f:
+            f.seek(self.cursor())
+            records = []
+            offset = f.tell()
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    break
+                offset += len(raw)
+                try:
+                    record = json.loads(raw)
+                except ValueError:
+                    continue
+                if isinstance(record, dict) and record.get("key"):
+                    records.append(record)
+                if len(records) >= batch_size:
+                    yield records, offset
+                    records = []
+            if records or offset != self.cursor():
+                yield records, offset
+
+    def pending_count(self) -> int:
+        return sum(len(records) for records, _ in self.pending())
+
+
+# --- Server Pusat ---
+
+
+class CentralStore:
+    """
+    Penyimpanan pusat (SQLite). Dedup di sisi server lewat PRIMARY KEY 'key'.
+    """
+
+    def __init__(self, path: str):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        columns = ", ".join(
+            "key TEXT PRIMARY KEY" if c == "key" else c for c in STORE_COLUMNS
+        )
+        self.conn.execute(
+            f"CREATE TABLE IF NOT EXISTS visits ({columns}, received_at TEXT)"
+        )
+        # Database lama: kolom yang ditambahin belakangan (misal nama_ortu)
+        existing = {row[1] for row in self.conn.execute("PRAGMA table_info(visits)")}
+        for column in STORE_COLUMNS:
+            if column not in existing:
+                self.conn.execute(f"ALTER TABLE visits ADD COLUMN {column}")
+        self.conn.commit()
+        self._lock = threading.Lock()
+        self._insert = (
+            f"INSERT OR IGNORE INTO visits ({', '.join(STORE_COLUMNS)}, received_at) "
+            f"VALUES ({', '.join('?' * (len(STORE_COLUMNS) + 1))})"
+        )
+
+    def bulk_insert(self, records: list) -> dict:
+        """
+        Insert satu batch dalam satu transaksi. Balikin jumlah yang baru masuk
+        dan yang dobel (key-nya udah ada).
+        """
+        received_at = datetime.now().isoformat(timespec="seconds")
+        rows = [
+            tuple(_sql_value(r.get(c)) for c in STORE_COLUMNS) + (received_at,)
+            for r in records
+        ]
+        with self._lock, self.conn:
+            before = self.conn.total_changes
+            self.conn.executemany(self._insert, rows)
+            inserted = self.conn.total_changes - before
+        return {"inserted": inserted, "duplicates": len(rows) - inserted}
+
+    def count(self) -> int:
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM visits").fetchone()[0]
+
+    def close(self):
+        self.conn.close()
+
+
+def _sql_value(value):
+    if value is None or isinstance(value, (int, float, str)):
+        return value
+    return json.dumps(value, ensure_ascii=False, default=_json_default)
+
+
+def make_server(store: CentralStore, host: str = "127.0.0.1", port: int = 8765):
+    """
+    Server HTTP pengganti server pusat: POST /visits/bulk isinya list record JSON.
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            if self.path != BULK_PATH:
+                self.send_error(404)
+                return
+            length = int(self.headers.get("Content-Length", 0))
+            try:
+                records = json.loads(self.rfile.read(length))
+                if not isinstance(records, list):
+                    raise ValueError("Body harus list record.")
+                result = store.bulk_insert(records)
+            except ValueError as e:
+                self.send_error(400, str(e))
+                return
+
+            body = json.dumps(result).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # Biar gak nyampah satu baris per request
+
+    return ThreadingHTTPServer((host, port), Handler)
+
+
+class HttpStore:
+    """
+    Client buat server pusat lewat HTTP, interface-nya sama kayak `CentralStore`.
+    """
+
+    def __init__(self, url: str, timeout: float = 60):
+        self.url = url.rstrip("/") + BULK_PATH
+        self.timeout = timeout
+
+    def bulk_insert(self, records: list) -> dict:
+        body = json.dumps(records, ensure_ascii=False, default=_json_default)
+        request = urllib.request.Request(
+            self.url,
+            data=body.encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return json.loads(response.read())
+
+
+# --- Sinkronisasi ---
+
+
+def sync(journal: Journal, store, batch_size: int = DEFAULT_SYNC_BATCH) -> dict:
+    """
+    Kirim semua record yang belum terkirim ke `store`, per batch.
+    Kursor digeser tiap batch sukses; kalo gagal di tengah, exception-nya
+    diterusin dan sync berikutnya lanjut dari batch yang gagal (aman diulang
+    karena server dedup berdasarkan key).
+    """
+    stats = {"sent": 0, "inserted": 0, "duplicates": 0, "batches": 0}
+    start = time.perf_counter()
+    for records, offset in journal.pending(batch_size):
+        if records:
+            result = store.bulk_insert(records)
+            stats["sent"] += len(records)
+            stats["inserted"] += result["inserted"]
+            stats["duplicates"] += result["duplicates"]
+            stats["batches"] += 1
+        journal.ack(offset)
+    stats["seconds"] = time.perf_counter() - start
+    return stats
+
+
+def _fake_visits(n: int):
+    for i in range(n):
+        yield {
+            "nama": f"Balita {i}",
+            "dob": "2023-01-01",
+            "gender": "L" if i % 2 else "P",
+            "weight": 8 + (i % 70) / 10,
+            "height": 70 + (i % 200) / 10,
+            "measure_mode": "standing",
+            "visit_date": "2025-01-01",
+            "posyandu": f"Posyandu {i % 50}",
+        }
+
+
+def bench(visits: int = 100000, batch_size: int = DEFAULT_SYNC_BATCH) -> dict:
+    """
+    Ukur throughput sync `visits` kunjungan ke server stand-in lokal lewat HTTP.
+    Sync kedua (kursor di-reset) ngukur jalur dedup.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        journal = Journal(os.path.join(tmp, "journal.jsonl"))
+        start = time.perf_counter()
+        journal.append_many(_fake_visits(visits))
+        capture_seconds = time.perf_counter() - start
+
+        store = CentralStore(os.path.join(tmp, "pusat.db"))
+        server = make_server(store, port=0)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            client = HttpStore(f"http://127.0.0.1:{server.server_address[1]}")
+            first = sync(journal, client, batch_size)
+            journal.ack(0)
+            again = sync(journal, client, batch_size)
+        finally:
+            server.shutdown()
+            server.server_close()
+        stored = store.count()
+        store.close()
+
+    return {
+        "visits": visits,
+        "capture_per_sec": visits / capture_seconds,
+        "sync": first,
+        "sync_per_sec": first["sent"] / first["seconds"],
+        "resync": again,
+        "stored": stored,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Antrian offline + sinkron massal")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_serve = sub.add_parser("serve", help="Jalanin server pusat stand-in (SQLite)")
+    p_serve.add_argument("--db", default="pusat.db")
+    p_serve.add_argument("--shards", help="Folder shard per wilayah (ganti --db)")
+    p_serve.add_argument("--shard-by", default="region", choices=("region", "posyandu"))
+    p_serve.add_argument("--host", default="127.0.0.1")
+    p_serve.add_argument("--port", type=int, default=8765)
+
+    p_sync = sub.add_parser("sync", help="Kirim jurnal lokal ke server pusat")
+    p_sync.add_argument("--journal", default=DEFAULT_JOURNAL)
+    target = p_sync.add_mutually_exclusive_group(required=True)
+    target.add_argument("--url", help="URL server pusat (capture.py serve)")
+    target.add_argument("--db", help="Langsung ke file SQLite (tanpa HTTP)")
+    target.add_argument("--shards", help="Langsung ke folder shard (lihat shards.py)")
+    p_sync.add_argument(
+        "--shard-by", default="region", choices=("region", "posyandu"),
+        help="Kolom routing shard (harus sama kayak waktu folder shard-nya dibikin)",
+    )
+    p_sync.add_argument("--batch-size", type=int, default=DEFAULT_SYNC_BATCH)
+
+    p_bench = sub.add_parser("bench", help="Ukur throughput sync")
+    p_bench.add_argument("--visits", type=int, default=100000)
+    p_bench.add_argument("--batch-size", type=int, default=DEFAULT_SYNC_BATCH)
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        if args.shards:
+            from shards import ShardedStore
+
+            store = ShardedStore(args.shards, args.shard_by)
+        else:
+            store = CentralStore(args.db)
+        server = make_server(store, args.host, args.port)
+        print(
+            f"Server pusat di http://{args.host}:{args.port}{BULK_PATH} "
+            f"({args.shards or args.db})"
+        )
+        server.serve_forever()
+
+    elif args.command == "sync":
+        if args.shards:
+            from shards import ShardedStore
+
+            store = ShardedStore(args.shards, args.shard_by)
+        else:
+            store = HttpStore(args.url) if args.url else CentralStore(args.db)
+        stats = sync(Journal(args.journal), store, args.batch_size)
+        print(
+            f"{stats['sent']} record dikirim dalam {stats['batches']} batch "
+            f"({stats['inserted']} baru, {stats['duplicates']} dobel), "
+            f"{stats['seconds']:.2f} detik"
+        )
+
+    else:
+        result = bench(args.visits, args.batch_size)
+        print(f"{result['visits']} kunjungan, batch {args.batch_size}")
+        print(f"  catat ke jurnal : {result['capture_per_sec']:,.0f} record/detik")
+        print(
+            f"  sync            : {result['sync_per_sec']:,.0f} record/detik "
+            f"({result['sync']['seconds']:.2f} detik, {result['sync']['batches']} batch)"
+        )
+        print(
+            f"  sync ulang      : {result['resync']['duplicates']} dobel dibuang, "
+            f"{result['resync']['seconds']:.2f} detik"
+        )
+        print(f"  total di pusat  : {result['stored']}")
@@ -0,0 +1,162 @@
+"""
+Grafik pertumbuhan satu kohort (satu posyandu / kecamatan) di atas kurva WHO.
+
+Biar tetep responsif walaupun datanya puluhan ribu anak, cara plot-nya
+ganti otomatis sesuai jumlah titik:
+    - <= SVG_MAX_POINTS      : go.Scatter biasa
+    - <= WEBGL_MAX_POINTS    : go.Scattergl (WebGL)
+    - lebih dari itu         : heatmap kepadatan (grid tetap) + sampel titik
+                               Scattergl, jadi ukuran payload ke browser tetap
+                               terbatas berapapun jumlah anaknya.
+"""
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+import pipeline
+import utils
+
+SVG_MAX_POINTS = 1000
+WEBGL_MAX_POINTS = 10000
+DENSITY_BINS = (60, 60)
+SAMPLE_POINTS = 2000
+
+# Kolom yang dibutuhin buat plot aja, biar kohort gede gak makan memori
+COHORT_COLUMNS = ["gender", "measure_mode", "age_months", "corrected_height", "weight"]
+
+SD_LINES = [
+    ("sd_n3", "-3 SD", "red", 1),
+    ("sd_n2", "-2 SD", "orange", 1),
+    ("median", "0 SD (Median)", "green", 2),
+    ("sd_p2", "+2 SD", "orange", 1),
+    ("sd_p3", "+3 SD", "red", 1),
+]
+
+
+def load_cohort(path: str, batch_size: int = 10000) -> pd.DataFrame:
+    """
+    Baca file kohort (JSONL atau CSV) dan hitung umur + tinggi terkoreksi.
+    Skoring fuzzy dilewati karena grafik cuma butuh posisi anak.
+    """
+    batches = pipeline.read_source(path, batch_size)
+    parts = [b[COHORT_COLUMNS] for b in pipeline.correct(pipeline.validate(batches))]
+    if not parts:
+        return pd.DataFrame(columns=COHORT_COLUMNS)
+    return pd.concat(parts, ignore_index=True)
+
+
+def _add_sd_curves(fig, x, chart_data):
+    for key, name, color, width in SD_LINES:
+        fig.add_trace(
+            go.Scatter(
+                x=x,
+                y=chart_data[key],
+                mode="lines",
+                line=dict(color=color, width=width),
+                name=name,
+            )
+        )
+
+
+def _add_cohort_points(fig, x, y, color: str, seed: int = 0):
+    """
+    Tambah posisi anak-anak di kohort, pilih jenis trace sesuai jumlah titik.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    marker = dict(size=5, color=color, opacity=0.5)
+
+    if n <= SVG_MAX_POINTS:
+        fig.add_trace(go.Scatter(x=x, y=y, mode="markers", marker=marker, name=f"Anak ({n})"))
+        return
+
+    if n <= WEBGL_MAX_POINTS:
+        fig.add_trace(go.Scattergl(x=x, y=y, mode="markers", marker=marker, name=f"Anak ({n})"))
+        return
+
+    # Kebanyakan titik: agregasi ke grid tetap, kirim hitungan per sel aja
+    counts, x_edges, y_edges = np.histogram2d(x, y, bins=DENSITY_BINS)
+    counts[counts == 0] = np.nan  # Sel kosong dibikin transparan
+    fig.add_trace(
+        go.Heatmap(
+            x=(x_edges[:-1] + x_edges[1:]) / 2,
+            y=(y_edges[:-1] + y_edges[1:]) / 2,
+            z=counts.T,
+            colorscale="Blues",
+            colorbar=dict(title="Jumlah Anak"),
+            name=f"Kepadatan ({n})",
+            hovertemplate="x=%{x:.1f}<br>y=%{y:.1f}<br>jumlah=%{z}<extra></extra>",
+        )
+    )
+
+    # Plus sampel acak biar sebaran individunya masih keliatan
+    idx = np.random.default_rng(seed).choice(n, SAMPLE_POINTS, replace=False)
+    fig.add_trace(
+        go.Scattergl(
+            x=x[idx],
+            y=y[idx],
+            mode="markers",
+            marker=dict(size=3, color=color, opacity=0.3),
+            name=f"Sampel ({SAMPLE_POINTS} dari {n})",
+        )
+    )
+
+
+def _layout(fig, x_title: str, y_title: str, x_range=None):
+    fig.update_layout(
+        xaxis_title=x_title,
+        yaxis_title=y_title,
+        xaxis=dict(range=x_range, zeroline=False),
+        yaxis=dict(zeroline=False),
+        showlegend=True,
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+        height=500,
+        margin=dict(l=40, r=20, t=60, b=40),
+    )
+    return fig
+
+
+def cohort_height_chart(cohort: pd.DataFrame, gender: str):
+    """
+    Grafik TB/U satu kohort (anak dengan gender yang sama).
+    """
+    fig = go.Figure()
+    chart_data = utils.get_growth_chart_data(gender)
+    if chart_data:
+        _add_sd_curves(fig, chart_data["age"], chart_data)
+
+    cohort = cohort[cohort["gender"] == gender]
+    _add_cohort_points(fig, cohort["age_months"], cohort["corrected_height"], "blue")
+    return _layout(fig, "Umur (Bulan)", "Tinggi Badan (cm)", [0, 60])
+
+
+def cohort_weight_chart(cohort: pd.DataFrame, gender: str):
+    """
+    Grafik BB/U satu kohort.
+    """
+    fig = go.Figure()
+    chart_data = utils.get_weight_chart_data(gender)
+    if chart_data:
+        _add_sd_curves(fig, chart_data["age"], chart_data)
+
+    cohort = cohort[cohort["gender"] == gender]
+    _add_cohort_points(fig, cohort["age_months"], cohort["weight"], "purple")
+    return _layout(fig, "Umur (Bulan)", "Berat Badan (kg)", [0, 60])
+
+
+def cohort_wfh_chart(cohort: pd.DataFrame, gender: str, mode: str):
+    """
+    Grafik BB/PB (mode 'recumbent') atau BB/TB (mode 'standing') satu kohort.
+    Cuma anak yang diukur dengan posisi yang sama yang diplot.
+    """
+    fig = go.Figure()
+    chart_data = utils.get_wfh_chart_data(gender, mode)
+    if chart_data:
+        _add_sd_curves(fig, chart_data["height"], chart_data)
+
+    cohort = cohort[(cohort["gender"] == gender) & (cohort["measure_mode"] == mode)]
+    _add_cohort_points(fig, cohort["corrected_height"], cohort["weight"], "magenta")
+    x_label = "Tinggi Badan (cm)" if mode == "standing" else "Panjang Badan (cm)"
+    return _layout(fig, x_label, "Berat Badan (kg)")
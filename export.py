@@ -0,0 +1,196 @@
+"""
+Export hasil skoring pipeline ke format kolumnar (Arrow / Parquet).
+
+Tiap batch dari `pipeline.score` langsung dikonversi kolom-per-kolom jadi
+Arrow RecordBatch (gak lewat dict per baris), terus ditulis sebagai satu
+record batch / row group. Buat dataset Parquet bisa dipartisi per bulan
+kunjungan dan wilayah (layout hive: visit_month=2025-01/region=.../),
+jadi query analitik cukup baca partisi yang dibutuhin aja.
+
+Butuh pyarrow, dependency opsional extra 'export' (gak masuk dependency
+utama, jadi app tanpa pyarrow cuma gak nawarin format parquet):
+    pip install -e ".[export]"      # atau: uv sync --extra export
+
+Contoh:
+    python pipeline.py input.jsonl hasil.parquet
+    python export.py input.jsonl hasil_dataset/ --batch-size 50000
+"""
+
+import argparse
+import importlib.util
+import uuid
+
+import pandas as pd
+
+import pipeline
+
+PARTITION_COLUMNS = ["visit_month", "region"]
+
+
+def available() -> bool:
+    """
+    True kalo pyarrow terinstall (dipake app buat nawarin format parquet).
+    """
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow as pa
+    except ImportError as e:
+        raise ImportError(
+            "Export Arrow/Parquet butuh pyarrow. Install dulu: pip install -e \".[export]\" "
+            "(atau pip install pyarrow)"
+        ) from e
+    return pa
+
+
+def export_schema():
+    """
+    Skema tetap buat hasil export, biar semua batch/partisi konsisten
+    (kolom yang gak ada di input diisi null).
+    """
+    pa = _require_pyarrow()
+    return pa.schema(
+        [
+            ("nama", pa.string()),
+            ("gender", pa.string()),
+            ("dob", pa.date32()),
+            ("visit_date", pa.date32()),
+            ("visit_month", pa.string()),
+            ("region", pa.string()),
+            ("posyandu", pa.string()),
+            ("weight", pa.float64()),
+            ("height", pa.float64()),
+            ("measure_mode", pa.string()),
+            ("age_months", pa.int32()),
+            ("corrected_height", pa.float64()),
+            ("imt", pa.float64()),
+            ("z_bb_u", pa.float64()),
+            ("z_tb_u", pa.float64()),
+            ("z_bb_tb", pa.float64()),
+            ("z_imt_u", pa.float64()),
+            ("score", pa.float64()),
+            ("label", pa.string()),
+            ("quality_issues", pa.string()),
+            ("ref_version", pa.string()),
+            ("ref_standard", pa.string()),
+            ("rule_version", pa.string()),
+        ]
+    )
+
+
+def to_record_batch(batch: pd.DataFrame, schema=None):
+    """
+    Konversi satu batch hasil skoring jadi Arrow RecordBatch sesuai `export_schema`.
+    """
+    pa = _require_pyarrow()
+    schema = schema or export_schema()
+
+    columns = []
+    for field in schema:
+        name = field.name
+        if name == "visit_month" and name not in batch.columns:
+            values = batch["visit_date"].dt.strftime("%Y-%m")
+        elif name in batch.columns:
+            values = batch[name]
+        else:
+            columns.append(pa.nulls(len(batch), type=field.type))
+            continue
+
+        if pa.types.is_date32(field.type):
+            array = pa.array(pd.to_datetime(values), from_pandas=True)
+            columns.append(array.cast(field.type, safe=False))
+            continue
+        if pa.types.is_string(field.type):
+            values = values.astype("string")
+        columns.append(pa.array(values, type=field.type, from_pandas=True))
+
+    return pa.RecordBatch.from_arrays(columns, schema=schema)
+
+
+def _record_batches(batches, schema):
+    for batch in batches:
+        if not batch.empty:
+            yield to_record_batch(batch, schema)
+
+
+def write_arrow(batches, dest) -> int:
+    """
+    Tulis batch ke file Arrow IPC (format stream), satu record batch per batch.
+    Returns: jumlah baris yang ditulis.
+    """
+    pa = _require_pyarrow()
+    schema = export_schema()
+    total = 0
+    with pa.OSFile(dest, "wb") as sink, pa.ipc.new_stream(sink, schema) as writer:
+        for record_batch in _record_batches(batches, schema):
+            writer.write_batch(record_batch)
+            total += record_batch.num_rows
+    return total
+
+
+def write_parquet(batches, dest) -> int:
+    """
+    Tulis batch ke satu file Parquet, satu row group per batch.
+    Returns: jumlah baris yang ditulis.
+    """
+    pa = _require_pyarrow()
+    import pyarrow.parquet as pq
+
+    schema = export_schema()
+    total = 0
+    with pq.ParquetWriter(dest, schema) as writer:
+        for record_batch in _record_batches(batches, schema):
+            writer.write_table(pa.Table.from_batches([record_batch], schema))
+            total += record_batch.num_rows
+    return total
+
+
+def write_parquet_dataset(batches, root_dir, partition_cols=PARTITION_COLUMNS) -> int:
+    """
+    Tulis batch ke dataset Parquet yang dipartisi (hive) di `root_dir`.
+    Data ditulis streaming, jadi cohort segede apapun gak perlu muat di memori.
+    Returns: jumlah baris yang ditulis.
+    """
+    _require_pyarrow()
+    import pyarrow.dataset as ds
+
+    schema = export_schema()
+    counter = {"rows": 0}
+
+    def counted():
+        for record_batch in _record_batches(batches, schema):
+            counter["rows"] += record_batch.num_rows
+            yield record_batch
+
+    partition_schema = schema.empty_table().select(partition_cols).schema
+    ds.write_dataset(
+        counted(),
+        root_dir,
+        schema=schema,
+        format="parquet",
+        partitioning=ds.partitioning(partition_schema, flavor="hive"),
+        # Nama file unik per run biar export berikutnya nambah, gak numpuk file lama
+        basename_template=f"part-{uuid.uuid4().hex[:8]}-{{i}}.parquet",
+        existing_data_behavior="overwrite_or_ignore",
+    )
+    return counter["rows"]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export skoring ke dataset Parquet")
+    parser.add_argument("input", help="File JSONL input ('-' buat stdin)")
+    parser.add_argument("output_dir", help="Folder dataset Parquet")
+    parser.add_argument("--batch-size", type=int, default=pipeline.DEFAULT_BATCH_SIZE)
+    parser.add_argument(
+        "--partition",
+        nargs="*",
+        default=PARTITION_COLUMNS,
+        help="Kolom partisi (default: visit_month region)",
+    )
+    args = parser.parse_args()
+
+    scored = pipeline.score(pipeline.read_jsonl(args.input, args.batch_size))
+    n = write_parquet_dataset(scored, args.output_dir, args.partition)
+    print(f"{n} record diexport ke {args.output_dir}")
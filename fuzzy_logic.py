@@ -1,145 +1,302 @@
+import copy
+import hashlib
+import json
+import re
+
 import numpy as np
 import skfuzzy as fuzz
 from skfuzzy import control as ctrl
 
+# --- Spesifikasi Sistem Fuzzy ---
+# Semua breakpoint membership function, rule, dan batas label ada di sini,
+# jadi bisa di-tuning (lihat `tuning.py`) atau di-load dari file JSON
+# tanpa ngubah kode. Format term: [nama_fungsi_skfuzzy, [parameter]].
+DEFAULT_SPEC = {
+    "antecedents": {
+        # 1. Status Berat Badan (Z-Score BB/U) - Indikator Umum
+        "bb_u": {
+            "universe": [-5, 5.1, 0.1],
+            "terms": {
+                # Extend sangat_kurang to -2.9 to catch -3.0 boundary cases better
+                "sangat_kurang": ["trapmf", [-5, -5, -3.0, -2.8]],
+                "kurang": ["trimf", [-3.5, -2.5, -1.5]],
+                "normal": ["trapmf", [-2.5, -1, 1, 2.5]],
+                "risiko_lebih": ["trapmf", [1.5, 3, 5, 5]],
+            },
+        },
+        # 2. Status Tinggi Badan (Z-Score TB/U) - Stunting (Kronis)
+        "tb_u": {
+            "universe": [-5, 5.1, 0.1],
+            "terms": {
+                "sangat_pendek": ["trapmf", [-5, -5, -3.5, -3]],
+                "pendek": ["trimf", [-3.5, -2.5, -1.5]],
+                "normal": ["trapmf", [-2.5, -1, 2, 3.5]],
+                "tinggi": ["trapmf", [2.5, 4, 5, 5]],
+            },
+        },
+        # 3. Status Berat-per-Tinggi (Z-Score BB/TB) - Wasting/Obesity (Akut)
+        # Sangat Kurus (<-3), Kurus (-3 s.d -2), Normal (-2 s.d +2), Gemuk (>+2)
+        "bb_tb": {
+            "universe": [-5, 5.1, 0.1],
+            "terms": {
+                "sangat_kurus": ["trapmf", [-5, -5, -3.5, -3]],
+                "kurus": ["trimf", [-3.5, -2.5, -1.5]],
+                "normal": ["trapmf", [-2.5, -1, 1, 2.5]],
+                "gemuk": ["trapmf", [1.5, 3, 5, 5]],
+            },
+        },
+    },
+    # Skor Kesehatan Gizi (0-100)
+    "consequent": {
+        "name": "score",
+        "universe": [0, 101, 1],
+        "terms": {
+            "gizi_buruk": ["trapmf", [0, 0, 15, 25]],
+            "gizi_kurang": ["trimf", [20, 35, 55]],
+            "gizi_baik": ["trimf", [50, 65, 85]],
+            "gizi_lebih": ["trapmf", [80, 90, 100, 100]],
+        },
+    },
+    # Prioritas:
+    # 1. BB/TB Sangat Kurus / Kurus -> Gizi Buruk / Kurang (Acute is dangerous)
+    # 2. BB/TB Gemuk -> Gizi Lebih
+    # 3. BB/TB Normal tapi TB/U Pendek -> Gizi Kurang (Stunting)
+    # Semua kondisi dalam satu rule digabung pake AND.
+    "rules": [
+        # -- Gizi Buruk / Kurang (Malnutrisi Akut/Wasting) --
+        # Kalau BB/TB Sangat Kurus, pasti Gizi Buruk, apapun TB-nya
+        {"if": {"bb_tb": "sangat_kurus"}, "then": "gizi_buruk"},
+        # BB/TB Kurus + BB/U Sangat Kurang -> double burden -> Gizi Buruk
+        {"if": {"bb_tb": "kurus", "bb_u": "sangat_kurang"}, "then": "gizi_buruk"},
+        # Jika BB/TB Kurus DAN BB/U juga Kurang/Normal -> Gizi Kurang
+        {"if": {"bb_tb": "kurus", "bb_u": "kurang"}, "then": "gizi_kurang"},
+        {"if": {"bb_tb": "kurus", "bb_u": "normal"}, "then": "gizi_kurang"},
+        # -- Gizi Lebih (Overweight) --
+        # Kalau BB/TB Gemuk, pasti Gizi Lebih
+        {"if": {"bb_tb": "gemuk"}, "then": "gizi_lebih"},
+        # Juga backup kalau BB/U berlebih
+        {"if": {"bb_u": "risiko_lebih", "bb_tb": "normal"}, "then": "gizi_lebih"},
+        # -- Kondisi Normal / Stunted (Kronis) --
+        # BB/TB Normal + TB/U Sangat Pendek (Stunting Parah) -> risiko tinggi
+        {"if": {"bb_tb": "normal", "tb_u": "sangat_pendek"}, "then": "gizi_buruk"},
+        # BB/TB Normal + TB/U Pendek (Stunted) -> Gizi Kurang
+        {"if": {"bb_tb": "normal", "tb_u": "pendek"}, "then": "gizi_kurang"},
+        # BB/TB Normal + TB/U Normal -> Gizi Baik (Ideal)
+        {
+            "if": {"bb_tb": "normal", "tb_u": "normal", "bb_u": "normal"},
+            "then": "gizi_baik",
+        },
+        # BB/TB Normal + TB/U Tinggi -> Gizi Baik (Tinggi)
+        {"if": {"bb_tb": "normal", "tb_u": "tinggi"}, "then": "gizi_baik"},
+        # Fallback aturan untuk kasus tepi (kombinasi tidak umum)
+        # Misal BB/U Kurang tapi BB/TB Normal (berarti dia pendek juga/proporsional kecil)
+        {
+            "if": {"bb_u": "kurang", "bb_tb": "normal", "tb_u": "normal"},
+            "then": "gizi_kurang",
+        },
+    ],
+    # Label dari skor crisp: skor <= batas -> label (batas null = sisanya)
+    "labels": [
+        [25, "Gizi Buruk"],
+        [50, "Gizi Kurang"],
+        [80, "Gizi Baik"],
+        [None, "Gizi Lebih"],
+    ],
+}
 
-class MalnutritionFuzzySystem:
-    def __init__(self):
-        # --- Antecedents (Input) ---
-        # 1. Status Berat Badan (Z-Score BB/U)
-        self.bb_u = ctrl.Antecedent(np.arange(-5, 5.1, 0.1), "bb_u")
+# Skor fallback kalo gak ada rule yang nyala sama sekali
+FALLBACK_SCORE = 50
 
-        # 2. Status Tinggi Badan (Z-Score TB/U)
-        self.tb_u = ctrl.Antecedent(np.arange(-5, 5.1, 0.1), "tb_u")
+# Rekomendasi tindak lanjut per label (prefix label, dicek urut)
+RECOMMENDATIONS = [
+    ("Gizi Buruk", "SEGERA RUJUK KE PUSKESMAS/RS. Perlu penanganan medis segera."),
+    ("Gizi Kurang", "Perlu Pemberian Makanan Tambahan (PMT) pemulihan dan konseling gizi rutin."),
+    (
+        "Gizi Baik",
+        "Pertahankan pola asuh dan pola makan yang baik. Pantau pertumbuhan diposyandu setiap bulan.",
+    ),
+    (
+        "Gizi Lebih",
+        "Konsultasikan diet seimbang. Kurangi makanan manis/berlemak, tingkatkan aktivitas fisik.",
+    ),
+]
 
-        # 3. Status Berat-per-Tinggi (Z-Score BB/TB) [BARU]
-        self.bb_tb = ctrl.Antecedent(np.arange(-5, 5.1, 0.1), "bb_tb")
+# Ukuran potongan buat inferensi vectorized (biar memori gak meledak)
+_CHUNK_SIZE = 1024
 
-        # --- Consequent (Output) ---
-        # Skor Kesehatan Gizi (0-100)
-        self.score = ctrl.Consequent(np.arange(0, 101, 1), "score")
 
-        # --- Membership Functions ---
+def load_spec(path: str) -> dict:
+    """
+    Load spesifikasi sistem fuzzy dari file JSON (format sama kayak DEFAULT_SPEC).
+    """
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
 
-        # 1. BB/U (Indikator Umum)
-        # Extend sangat_kurang to -2.9 to catch -3.0 boundary cases better
-        self.bb_u["sangat_kurang"] = fuzz.trapmf(
-            self.bb_u.universe, [-5, -5, -3.0, -2.8]
-        )
-        self.bb_u["kurang"] = fuzz.trimf(self.bb_u.universe, [-3.5, -2.5, -1.5])
-        self.bb_u["normal"] = fuzz.trapmf(self.bb_u.universe, [-2.5, -1, 1, 2.5])
-        self.bb_u["risiko_lebih"] = fuzz.trapmf(self.bb_u.universe, [1.5, 3, 5, 5])
 
-        # 2. TB/U (Stunting - Kronis)
-        self.tb_u["sangat_pendek"] = fuzz.trapmf(self.tb_u.universe, [-5, -5, -3.5, -3])
-        self.tb_u["pendek"] = fuzz.trimf(self.tb_u.universe, [-3.5, -2.5, -1.5])
-        self.tb_u["normal"] = fuzz.trapmf(self.tb_u.universe, [-2.5, -1, 2, 3.5])
-        self.tb_u["tinggi"] = fuzz.trapmf(self.tb_u.universe, [2.5, 4, 5, 5])
+def spec_version(spec: dict) -> str:
+    """
+    Versi rule base = hash spesifikasi (12 digit hex), dicatat di tiap hasil
+    skoring biar ketauan hasil mana yang basi kalo rule-nya diubah.
+    """
+    text = json.dumps(spec, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(text.encode()).hexdigest()[:12]
 
-        # 3. BB/TB (Wasting/Obesity - Akut)
-        # Sangat Kurus (<-3), Kurus (-3 s.d -2), Normal (-2 s.d +2), Gemuk (>+2)
-        # Kita simplifikasi jadi: Sangat Kurus, Kurus, Normal, Gemuk
-        self.bb_tb["sangat_kurus"] = fuzz.trapmf(
-            self.bb_tb.universe, [-5, -5, -3.5, -3]
-        )
-        self.bb_tb["kurus"] = fuzz.trimf(self.bb_tb.universe, [-3.5, -2.5, -1.5])
-        self.bb_tb["normal"] = fuzz.trapmf(self.bb_tb.universe, [-2.5, -1, 1, 2.5])
-        self.bb_tb["gemuk"] = fuzz.trapmf(self.bb_tb.universe, [1.5, 3, 5, 5])
 
-        # Skor Output
-        self.score["gizi_buruk"] = fuzz.trapmf(self.score.universe, [0, 0, 15, 25])
-        self.score["gizi_kurang"] = fuzz.trimf(self.score.universe, [20, 35, 55])
-        self.score["gizi_baik"] = fuzz.trimf(self.score.universe, [50, 65, 85])
-        self.score["gizi_lebih"] = fuzz.trapmf(self.score.universe, [80, 90, 100, 100])
+def get_recommendation(label) -> str:
+    """
+    Rekomendasi buat label fuzzy (string kosong kalo labelnya gak dikenal,
+    misal 'Tidak Dapat Dianalisa').
+    """
+    for prefix, recommendation in RECOMMENDATIONS:
+        if str(label or "").startswith(prefix):
+            return recommendation
+    return ""
+
+
+# Suffix skor di status tampilan app, misal 'Gizi Baik (63.41/100)'
+_SCORE_SUFFIX = re.compile(r"\s*\(\s*-?\d+(?:\.\d+)?\s*/\s*100\s*\)\s*$")
+
+
+def status_label(status):
+    """
+    Label fuzzy dari status yang disimpen: suffix skor '(63.41/100)' dibuang,
+    label kayak 'Gizi Buruk (Sangat Kurus)' tetep utuh. None tetep None.
+    """
+    if status is None:
+        return None
+    return _SCORE_SUFFIX.sub("", str(status)).strip()
+
+
+def _membership(universe, term):
+    mf_name, params = term
+    return getattr(fuzz, mf_name)(universe, np.asarray(params, dtype=np.float64))
 
-        # --- Rules ---
-        # Prioritas:
-        # 1. BB/TB Sangat Kurus / Kurus -> Gizi Buruk / Kurang (Acute is dangerous)
-        # 2. BB/TB Gemuk -> Gizi Lebih
-        # 3. BB/TB Normal tapi TB/U Pendek -> Gizi Kurang (Stunting)
 
+class MalnutritionFuzzySystem:
+    def __init__(self, spec: dict = None):
+        self.spec = copy.deepcopy(spec if spec is not None else DEFAULT_SPEC)
+        self.version = spec_version(self.spec)
+
+        # --- Antecedents (Input) & Consequent (Output) ---
+        self.variables = {}
+        for name, var in self.spec["antecedents"].items():
+            antecedent = ctrl.Antecedent(np.arange(*var["universe"]), name)
+            for term_name, term in var["terms"].items():
+                antecedent[term_name] = _membership(antecedent.universe, term)
+            self.variables[name] = antecedent
+
+        out = self.spec["consequent"]
+        consequent = ctrl.Consequent(np.arange(*out["universe"]), out["name"])
+        for term_name, term in out["terms"].items():
+            consequent[term_name] = _membership(consequent.universe, term)
+
+        # Atribut lama tetep ada (self.bb_u, self.tb_u, self.bb_tb, self.score)
+        for name, antecedent in self.variables.items():
+            setattr(self, name, antecedent)
+        self.score = consequent
+        self.output_name = out["name"]
+
+        # --- Rules ---
         rules = []
+        for rule in self.spec["rules"]:
+            terms = [self.variables[var][term] for var, term in rule["if"].items()]
+            antecedent = terms[0]
+            for term in terms[1:]:
+                antecedent = antecedent & term
+            rules.append(ctrl.Rule(antecedent, consequent[rule["then"]]))
 
-        # -- Gizi Buruk / Kurang (Malnutrisi Akut/Wasting) --
-        # Kalau BB/TB Sangat Kurus, pasti Gizi Buruk, apapun TB-nya
-        rules.append(ctrl.Rule(self.bb_tb["sangat_kurus"], self.score["gizi_buruk"]))
-
-        # Kalau BB/TB Kurus (-3 sd -2), cek BB/U
-        # Jika BB/U Sangat Kurang (<-3 SD), ini double burden (Kurus + Sangat Ringan) -> Gizi Buruk
-        rules.append(
-            ctrl.Rule(
-                self.bb_tb["kurus"] & self.bb_u["sangat_kurang"],
-                self.score["gizi_buruk"],
-            )
-        )
+        self.system = ctrl.ControlSystem(rules)
+        self.simulation = ctrl.ControlSystemSimulation(self.system)
 
-        # Jika BB/TB Kurus DAN BB/U juga Kurang/Normal -> Gizi Kurang
-        rules.append(
-            ctrl.Rule(
-                self.bb_tb["kurus"] & self.bb_u["kurang"], self.score["gizi_kurang"]
-            )
-        )
-        rules.append(
-            ctrl.Rule(
-                self.bb_tb["kurus"] & self.bb_u["normal"], self.score["gizi_kurang"]
-            )
-        )
+        self._compile()
 
-        # -- Gizi Lebih (Overweight) --
-        # Kalau BB/TB Gemuk, pasti Gizi Lebih
-        rules.append(ctrl.Rule(self.bb_tb["gemuk"], self.score["gizi_lebih"]))
-        # Juga backup kalau BB/U berlebih
-        rules.append(
-            ctrl.Rule(
-                self.bb_u["risiko_lebih"] & self.bb_tb["normal"],
-                self.score["gizi_lebih"],
-            )
-        )
+    def _compile(self):
+        """
+        Siapin array numpy buat inferensi vectorized (`predict_batch`).
+        Hasilnya sama kayak skfuzzy: AND = min, akumulasi = max, defuzzifikasi
+        centroid di universe yang di-upsample di titik potong tiap term.
+        """
+        self._input_universe = {}
+        self._input_mfs = {}
+        for name, antecedent in self.variables.items():
+            self._input_universe[name] = antecedent.universe.astype(np.float64)
+            for term_name, term in antecedent.terms.items():
+                self._input_mfs[(name, term_name)] = term.mf.astype(np.float64)
+        self.terms = list(self._input_mfs)
+        self._term_index = {key: i for i, key in enumerate(self.terms)}
 
-        # -- Kondisi Normal / Stunted (Kronis) --
-        # BB/TB Normal... cek TB/U
+        self._out_universe = self.score.universe.astype(np.float64)
+        term_names = list(self.score.terms)
+        self._rule_terms = [list(rule["if"].items()) for rule in self.spec["rules"]]
+        self._used_inputs = sorted({var for terms in self._rule_terms for var, _ in terms})
+        rule_outputs = [term_names.index(rule["then"]) for rule in self.spec["rules"]]
 
-        # 1. BB/TB Normal + TB/U Sangat Pendek (Stunting Parah) -> Masuk risiko tinggi -> Gizi Kurang/Buruk
-        rules.append(
-            ctrl.Rule(
-                self.bb_tb["normal"] & self.tb_u["sangat_pendek"],
-                self.score["gizi_buruk"],
-            )
+        # Term output yang gak dipake rule manapun di-skip (sama kayak skfuzzy)
+        self._out_used = sorted(set(rule_outputs))
+        self._out_mfs = np.stack(
+            [self.score.terms[term_names[k]].mf.astype(np.float64) for k in self._out_used]
         )
+        used_pos = {k: i for i, k in enumerate(self._out_used)}
+        self._rule_out = np.array([used_pos[k] for k in rule_outputs])
 
-        # 2. BB/TB Normal + TB/U Pendek (Stunted) -> Gizi Kurang
-        rules.append(
-            ctrl.Rule(
-                self.bb_tb["normal"] & self.tb_u["pendek"], self.score["gizi_kurang"]
+    def rule_signatures(self) -> list:
+        """
+        Bentuk kanonik tiap rule (term input + output lengkap sama parameter
+        membership-nya), buat bandingin dua rule base.
+        """
+        antecedents = self.spec["antecedents"]
+        out = self.spec["consequent"]
+        signatures = []
+        for rule in self.spec["rules"]:
+            terms = tuple(
+                sorted(
+                    (var, term, json.dumps(antecedents[var]["terms"][term]))
+                    for var, term in rule["if"].items()
+                )
             )
-        )
+            then = (rule["then"], json.dumps(out["terms"][rule["then"]]))
+            signatures.append((terms, then))
+        return signatures
 
-        # 3. BB/TB Normal + TB/U Normal -> Gizi Baik (Ideal)
-        rules.append(
-            ctrl.Rule(
-                self.bb_tb["normal"] & self.tb_u["normal"] & self.bb_u["normal"],
-                self.score["gizi_baik"],
-            )
-        )
+    def rule_supports(self) -> list:
+        """
+        Daerah input tempat tiap rule bisa nyala (aktivasi > 0):
+        list dict {input: (bawah, atas)} (interval terbuka), None kalo rule-nya
+        gak mungkin nyala. Term yang nempel ujung universe dianggap tak hingga
+        (input di-clip ke ujung).
+        """
+        supports = []
+        for terms in self._rule_terms:
+            box = {name: (-np.inf, np.inf) for name in self._input_universe}
+            for var, term in terms:
+                universe = self._input_universe[var]
+                nonzero = np.flatnonzero(self._input_mfs[(var, term)] > 0)
+                if len(nonzero) == 0:
+                    box = None
+                    break
+                lo = -np.inf if nonzero[0] == 0 else universe[nonzero[0] - 1]
+                hi = np.inf if nonzero[-1] == len(universe) - 1 else universe[nonzero[-1] + 1]
+                box[var] = (max(box[var][0], lo), min(box[var][1], hi))
+            supports.append(box)
+        return supports
 
-        # 4. BB/TB Normal + TB/U Tinggi -> Gizi Baik (Tinggi)
-        rules.append(
-            ctrl.Rule(
-                self.bb_tb["normal"] & self.tb_u["tinggi"], self.score["gizi_baik"]
-            )
-        )
+    def _label(self, score: float, bb_tb_val: float) -> str:
+        # Tentukan label dari skor crisp
+        label = "Tidak Diketahui"
+        for limit, name in self.spec["labels"]:
+            if limit is None or score <= limit:
+                label = name
+                break
 
-        # Fallback aturan untuk kasus tepi (kombinasi tidak umum)
-        # Misal BB/U Kurang tapi BB/TB Normal (berarti dia pendek juga/proporsional kecil)
-        rules.append(
-            ctrl.Rule(
-                self.bb_u["kurang"] & self.bb_tb["normal"] & self.tb_u["normal"],
-                self.score["gizi_kurang"],
-            )
-        )
+        # Override label manual buat kasus ekstrem biar ga aneh
+        # Kalo BB/TB <-3 (Sangat Kurus), paksa Gizi Buruk
+        if bb_tb_val <= -3:
+            label = "Gizi Buruk (Sangat Kurus)"
+        # Kalo BB/TB > 2 (Gemuk), paksa Gizi Lebih
+        if bb_tb_val >= 2:
+            label = "Gizi Lebih (Gemuk)"
 
-        self.system = ctrl.ControlSystem(rules)
-        self.simulation = ctrl.ControlSystemSimulation(self.system)
+        return label
 
     def predict(self, bb_u_val, tb_u_val, bb_tb_val):
         """
@@ -150,37 +307,187 @@ class MalnutritionFuzzySystem:
         tb_u_val = max(min(tb_u_val, 5), -5)
         bb_tb_val = max(min(bb_tb_val, 5), -5)
 
-        self.simulation.input["bb_u"] = bb_u_val
-        self.simulation.input["tb_u"] = tb_u_val
-        self.simulation.input["bb_tb"] = bb_tb_val
+        # Input yang gak dipake rule manapun ditolak skfuzzy, jadi di-skip
+        values = {"bb_u": bb_u_val, "tb_u": tb_u_val, "bb_tb": bb_tb_val}
+        for name in self._used_inputs:
+            self.simulation.input[name] = values[name]
 
         try:
             self.simulation.compute()
-            score = self.simulation.output["score"]
+            score = self.simulation.output[self.output_name]
         except:  # noqa: E722
             # Fallback kalo rule ga cover (harusnya cover semua sih)
-            score = 50
+            score = FALLBACK_SCORE
 
-        # Tentukan label dari skor crisp
-        label = "Tidak Diketahui"
-        if score <= 25:
-            label = "Gizi Buruk"
-        elif score <= 50:
-            label = "Gizi Kurang"
-        elif score <= 80:
-            label = "Gizi Baik"
-        else:
-            label = "Gizi Lebih"
+        return round(score, 2), self._label(score, bb_tb_val)
 
-        # Override label manual buat kasus ekstrem biar ga aneh
-        # Kalo BB/TB <-3 (Sangat Kurus), paksa Gizi Buruk
-        if bb_tb_val <= -3:
-            label = "Gizi Buruk (Sangat Kurus)"
-        # Kalo BB/TB > 2 (Gemuk), paksa Gizi Lebih
-        if bb_tb_val >= 2:
-            label = "Gizi Lebih (Gemuk)"
+    def _memberships(self, inputs: dict) -> np.ndarray:
+        """
+        Derajat keanggotaan tiap term input, bentuknya (N, jumlah term),
+        urutan kolomnya sama kayak `self.terms`.
+        """
+        # Input di-clip ke ujung universe (kayak clip_to_bounds di skfuzzy)
+        inputs = {
+            name: np.clip(inputs[name], universe.min(), universe.max())
+            for name, universe in self._input_universe.items()
+        }
+
+        n = len(next(iter(inputs.values())))
+        memberships = np.empty((n, len(self.terms)))
+        for i, (name, term_name) in enumerate(self.terms):
+            memberships[:, i] = np.interp(
+                inputs[name],
+                self._input_universe[name],
+                self._input_mfs[(name, term_name)],
+                left=0.0,
+                right=0.0,
+            )
+        return memberships
+
+    def _firing_strengths(self, inputs: dict, memberships: np.ndarray = None) -> np.ndarray:
+        """
+        Derajat aktivasi tiap rule, bentuknya (N, jumlah rule).
+        """
+        if memberships is None:
+            memberships = self._memberships(inputs)
+
+        strengths = np.empty((len(memberships), len(self._rule_terms)))
+        for r, terms in enumerate(self._rule_terms):
+            strength = memberships[:, self._term_index[terms[0]]]
+            for term in terms[1:]:
+                strength = np.fmin(strength, memberships[:, self._term_index[term]])
+            strengths[:, r] = strength
+        return strengths
+
+    def rule_names(self) -> list:
+        """
+        Teks tiap rule buat ditampilin, misal
+        "bb_tb kurus DAN bb_u kurang -> gizi_kurang" (urutan sama kayak spec).
+        """
+        return [
+            " DAN ".join(f"{var} {term}" for var, term in rule["if"].items()) + f" -> {rule['then']}"
+            for rule in self.spec["rules"]
+        ]
+
+    def _defuzz(self, cuts: np.ndarray) -> np.ndarray:
+        """
+        Centroid vectorized. `cuts` bentuknya (N, jumlah term output yang dipake).
+        """
+        x, mfs = self._out_universe, self._out_mfs
+        n = len(cuts)
+        dx = np.diff(x)
+
+        # Titik potong tiap term di level aktivasinya (_interp_universe_fast di skfuzzy)
+        points = [np.broadcast_to(x, (n, len(x)))]
+        for k in range(len(mfs)):
+            y = cuts[:, k : k + 1]
+            mf = mfs[k]
+            above = np.where(y == 0, mf > y, mf >= y)
+            crossing = above[:, 1:] != above[:, :-1]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                xx = x[:-1] + (y - mf[:-1]) * dx / np.diff(mf)
+            # Titik yang bukan potongan dibikin duplikat x[0] (lebarnya nol, gak ngaruh)
+            points.append(np.where(crossing, xx, x[0]))
+        xs = np.sort(np.concatenate(points, axis=1), axis=1)
+
+        # Agregasi output: max dari tiap term yang dipotong di level aktivasinya
+        agg = np.zeros_like(xs)
+        for k in range(len(mfs)):
+            upsampled = np.interp(xs.ravel(), x, mfs[k]).reshape(xs.shape)
+            np.maximum(agg, np.minimum(cuts[:, k : k + 1], upsampled), out=agg)
+
+        # Luas dan momen tiap segmen trapesium (rumus sama kayak skfuzzy.centroid)
+        x1, x2 = xs[:, :-1], xs[:, 1:]
+        y1, y2 = agg[:, :-1], agg[:, 1:]
+        area = 0.5 * (x2 - x1) * (y1 + y2)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            moment = x1 + (x2 - x1) * (y1 + 2 * y2) / (3 * (y1 + y2))
+        moment = np.where(area > 0, moment, 0.0)
+
+        total = area.sum(axis=1)
+        score = (moment * area).sum(axis=1) / np.fmax(total, np.finfo(float).eps)
+        return np.where(agg.sum(axis=1) == 0, FALLBACK_SCORE, score)
+
+    def predict_batch(self, bb_u_vals, tb_u_vals, bb_tb_vals, explain: bool = False):
+        """
+        Versi vectorized dari `predict` buat banyak record sekaligus.
+        Returns: (array skor, array label). Kalo `explain`, ditambah dict
+        {"memberships": (N, term) kolomnya `self.terms`,
+         "strengths": (N, rule) kolomnya `rule_names()`} dari pass yang sama.
+        """
+        inputs = {
+            "bb_u": np.clip(np.asarray(bb_u_vals, dtype=np.float64), -5, 5),
+            "tb_u": np.clip(np.asarray(tb_u_vals, dtype=np.float64), -5, 5),
+            "bb_tb": np.clip(np.asarray(bb_tb_vals, dtype=np.float64), -5, 5),
+        }
+        n = len(inputs["bb_u"])
+
+        scores = np.empty(n)
+        if explain:
+            all_memberships = np.empty((n, len(self.terms)))
+            all_strengths = np.empty((n, len(self._rule_terms)))
+        for start in range(0, n, _CHUNK_SIZE):
+            chunk = {k: v[start : start + _CHUNK_SIZE] for k, v in inputs.items()}
+            memberships = self._memberships(chunk)
+            strengths = self._firing_strengths(chunk, memberships)
+            if explain:
+                all_memberships[start : start + _CHUNK_SIZE] = memberships
+                all_strengths[start : start + _CHUNK_SIZE] = strengths
+
+            # Akumulasi aktivasi rule per term output (max)
+            cuts = np.zeros((len(strengths), len(self._out_used)))
+            for r, k in enumerate(self._rule_out):
+                np.fmax(cuts[:, k], strengths[:, r], out=cuts[:, k])
+            scores[start : start + _CHUNK_SIZE] = self._defuzz(cuts)
+
+        labels = self.labels_batch(scores, inputs["bb_tb"])
+        if explain:
+            explanation = {"memberships": all_memberships, "strengths": all_strengths}
+            return np.round(scores, 2), labels, explanation
+        return np.round(scores, 2), labels
+
+    def explain(self, bb_u_val, tb_u_val, bb_tb_val) -> dict:
+        """
+        Penjelasan satu kasus (buat UI): skor, label, derajat keanggotaan
+        tiap term input ({input: {term: derajat}}), dan daftar rule
+        [(rule, aktivasi)] yang nyala, urut dari aktivasi paling gede.
+        """
+        scores, labels, explanation = self.predict_batch(
+            [bb_u_val], [tb_u_val], [bb_tb_val], explain=True
+        )
+        memberships = {}
+        for (name, term_name), degree in zip(self.terms, explanation["memberships"][0]):
+            memberships.setdefault(name, {})[term_name] = float(degree)
+        rules = [
+            (rule, float(strength))
+            for rule, strength in zip(self.rule_names(), explanation["strengths"][0])
+            if strength > 0
+        ]
+        rules.sort(key=lambda item: -item[1])
+        return {
+            "score": float(scores[0]),
+            "label": labels[0],
+            "memberships": memberships,
+            "rules": rules,
+        }
+
+    def labels_batch(self, scores, bb_tb_vals) -> np.ndarray:
+        """
+        Versi vectorized dari penentuan label (termasuk override BB/TB ekstrem).
+        """
+        scores = np.asarray(scores, dtype=np.float64)
+        bb_tb_vals = np.clip(np.asarray(bb_tb_vals, dtype=np.float64), -5, 5)
+
+        labels = np.full(len(scores), "Tidak Diketahui", dtype=object)
+        assigned = np.zeros(len(scores), dtype=bool)
+        for limit, name in self.spec["labels"]:
+            hit = ~assigned if limit is None else ~assigned & (scores <= limit)
+            labels[hit] = name
+            assigned |= hit
 
-        return round(score, 2), label
+        labels[bb_tb_vals <= -3] = "Gizi Buruk (Sangat Kurus)"
+        labels[bb_tb_vals >= 2] = "Gizi Lebih (Gemuk)"
+        return labels
 
 
 fuzzy_system = MalnutritionFuzzySystem()
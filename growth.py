@@ -0,0 +1,263 @@
+"""
+Analisa pertumbuhan longitudinal per anak (dari riwayat kunjungan), buat
+nangkep growth faltering yang gak keliatan dari Z-score satu kunjungan.
+
+Metrik tiap kunjungan dibanding kunjungan sebelumnya anak yang sama:
+    - kecepatan berat (kg/bulan) dan panjang/tinggi (cm/bulan)
+    - perubahan Z-score BB/U, TB/U, BB/TB
+    - garis SD (-3..+3) yang dilewati, bertanda (negatif = turun garis)
+    - status timbang KMS: 'N' (naik, kenaikan >= KBM) atau 'T' (tidak naik);
+      None kalo kunjungan pertama atau jaraknya lebih dari MAX_GAP_DAYS
+      (bulan lalu gak ditimbang, rantainya putus)
+    - 2T: 'T' dua kali berturut-turut -> perlu dirujuk ke tenaga kesehatan
+
+KBM (Kenaikan Berat badan Minimal) per umur dari tabel KMS.
+
+Dua cara hitung, hasilnya sama:
+    - `GrowthTracker`: incremental, tiap kunjungan baru cuma butuh state
+      ringkas kunjungan terakhir (`ChildState`), O(1) per kunjungan.
+    - `trajectory`: bulk (vectorized) buat satu kohort penuh, misal output
+      `pipeline.py`.
+
+Contoh:
+    python growth.py hasil.jsonl pertumbuhan.csv
+"""
+
+import argparse
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+import pipeline
+import quality
+import utils
+
+# KBM (gram) per umur bulan ke-1..11, umur 12 bulan ke atas 200 g
+KBM_GRAMS = np.array([800, 800, 900, 800, 600, 500, 400, 400, 300, 300, 300, 200, 200])
+
+# Bulan rata-rata (hari), buat kecepatan per bulan
+DAYS_PER_MONTH = 30.4375
+# Lebih dari ini dianggap bulan lalu gak ditimbang
+MAX_GAP_DAYS = 62
+
+Z_INDEXES = ("bb_u", "tb_u", "bb_tb")
+SD_LINES = np.arange(-3, 4)
+
+METRIC_COLUMNS = [
+    "days_since_last",
+    "weight_velocity",
+    "height_velocity",
+    "dz_bb_u",
+    "dz_tb_u",
+    "dz_bb_tb",
+    "sd_lines_bb_u",
+    "sd_lines_tb_u",
+    "sd_lines_bb_tb",
+    "kbm_g",
+    "weight_gain_g",
+    "growth_status",
+    "t_streak",
+    "flag_2t",
+]
+
+
+def kbm_grams(age_months) -> np.ndarray:
+    """
+    KBM (gram per bulan) buat umur `age_months`.
+    """
+    age = np.clip(np.asarray(age_months, dtype=np.int64), 0, len(KBM_GRAMS) - 1)
+    return KBM_GRAMS[age]
+
+
+def _lines_below(z) -> np.ndarray:
+    # Jumlah garis SD (-3..+3) yang ada di bawah / pas di z
+    z = np.asarray(z, dtype=np.float64)
+    return np.clip(np.floor(z) + 4, 0, len(SD_LINES))
+
+
+def lines_crossed(z_prev, z_now) -> np.ndarray:
+    """
+    Jumlah garis SD yang dilewati dari `z_prev` ke `z_now`, bertanda
+    (negatif = turun). NaN kalo salah satu Z-nya gak ada.
+    """
+    return _lines_below(z_now) - _lines_below(z_prev)
+
+
+def _growth_status(days, gain_g, kbm_g):
+    """
+    Vectorized: 'N' / 'T' / None (lihat docstring modul).
+    """
+    days = np.asarray(days, dtype=np.float64)
+    months = np.maximum(np.round(days / DAYS_PER_MONTH), 1)
+    valid = (days > 0) & (days <= MAX_GAP_DAYS) & ~np.isnan(gain_g)
+    status = np.full(len(days), None, dtype=object)
+    status[valid] = np.where(gain_g[valid] >= kbm_g[valid] * months[valid], "N", "T")
+    return status
+
+
+class ChildState:
+    """
+    Ringkasan kunjungan terakhir satu anak (cukup buat hitung metrik kunjungan
+    berikutnya).
+    """
+
+    __slots__ = (
+        "visit_date",
+        "weight",
+        "height",
+        "z_bb_u",
+        "z_tb_u",
+        "z_bb_tb",
+        "t_streak",
+        "visits",
+    )
+
+    def __init__(self, visit: dict, t_streak: int = 0, visits: int = 1):
+        self.visit_date = pd.Timestamp(visit["visit_date"])
+        self.weight = float(visit["weight"])
+        self.height = float(visit["corrected_height"])
+        for name in Z_INDEXES:
+            value = visit.get(f"z_{name}")
+            setattr(self, f"z_{name}", np.nan if value is None else float(value))
+        self.t_streak = t_streak
+        self.visits = visits
+
+
+def step(state, visit: dict):
+    """
+    Metrik `visit` dibanding `state` (None = kunjungan pertama).
+    `visit` butuh visit_date, age_months, weight, corrected_height, z_bb_u,
+    z_tb_u, z_bb_tb. Balikin (metrik, state baru).
+    """
+    if state is None:
+        metrics = {c: np.nan for c in METRIC_COLUMNS}
+        metrics.update(growth_status=None, t_streak=0, flag_2t=False)
+        metrics["kbm_g"] = float(kbm_grams([visit["age_months"]])[0])
+        return metrics, ChildState(visit)
+
+    new = ChildState(visit, visits=state.visits + 1)
+    days = (new.visit_date - state.visit_date).days
+    if days < 0:
+        raise ValueError("Kunjungan lebih lama dari kunjungan terakhir anak ini.")
+
+    months = days / DAYS_PER_MONTH
+    gain_g = (new.weight - state.weight) * 1000
+    kbm_g = float(kbm_grams([visit["age_months"]])[0])
+    status = _growth_status(np.array([days]), np.array([gain_g]), np.array([kbm_g]))[0]
+    new.t_streak = state.t_streak + 1 if status == "T" else 0
+
+    metrics = {
+        "days_since_last": float(days),
+        "weight_velocity": (new.weight - state.weight) / months if days else np.nan,
+        "height_velocity": (new.height - state.height) / months if days else np.nan,
+        "kbm_g": kbm_g,
+        "weight_gain_g": gain_g,
+        "growth_status": status,
+        "t_streak": new.t_streak,
+        "flag_2t": new.t_streak >= 2,
+    }
+    for name in Z_INDEXES:
+        prev, now = getattr(state, f"z_{name}"), getattr(new, f"z_{name}")
+        metrics[f"dz_{name}"] = now - prev
+        metrics[f"sd_lines_{name}"] = float(lines_crossed([prev], [now])[0])
+    return metrics, new
+
+
+class GrowthTracker:
+    """
+    Metrik pertumbuhan incremental: cuma nyimpen `ChildState` per anak.
+    Kunjungan tiap anak harus dateng urut tanggal.
+    """
+
+    def __init__(self):
+        self.children = {}
+
+    def __len__(self):
+        return len(self.children)
+
+    def add(self, child_key, visit: dict) -> dict:
+        """
+        Tambah satu kunjungan (udah ada Z-score-nya), balikin metriknya.
+        """
+        metrics, self.children[child_key] = step(self.children.get(child_key), visit)
+        return metrics
+
+    def add_measurement(
+        self, child_key, gender, dob, weight, height, measure_mode, visit_date=None
+    ) -> dict:
+        """
+        Kayak `add`, tapi dari data mentah (Z-score dihitung `get_z_scores`).
+        """
+        visit_date = visit_date or date.today()
+        z = utils.get_z_scores(gender, dob, weight, height, measure_mode, visit_date)
+        return self.add(child_key, {"visit_date": visit_date, "weight": weight, **z})
+
+
+def trajectory(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Versi bulk: metrik semua kunjungan `df` (output pipeline: visit_date,
+    age_months, weight, corrected_height, z_bb_u, z_tb_u, z_bb_tb, plus kolom
+    identitas anak kayak di `quality`). Index hasil sama kayak `df`.
+    """
+    keys = quality._child_keys(df)
+    if not keys:
+        raise ValueError("Butuh kolom identitas anak (child_id, atau nama/dob/gender).")
+    d = df.assign(_date=pd.to_datetime(df["visit_date"]))
+    d = d.sort_values(keys + ["_date"], kind="stable")
+    by_child = [d[k] for k in keys]
+    first = d.groupby(by_child, sort=False, dropna=False).cumcount().to_numpy() == 0
+
+    def prev(values):
+        series = pd.Series(np.asarray(values, dtype=np.float64), index=d.index)
+        return series.groupby(by_child, sort=False, dropna=False).shift().to_numpy()
+
+    day_number = d["_date"].to_numpy(dtype="datetime64[D]").astype(np.int64).astype(np.float64)
+    days = day_number - prev(day_number)
+    weight = d["weight"].to_numpy(dtype=np.float64)
+    height = d["corrected_height"].to_numpy(dtype=np.float64)
+    months = days / DAYS_PER_MONTH
+    with np.errstate(divide="ignore", invalid="ignore"):
+        weight_velocity = np.where(days > 0, (weight - prev(weight)) / months, np.nan)
+        height_velocity = np.where(days > 0, (height - prev(height)) / months, np.nan)
+
+    gain_g = (weight - prev(weight)) * 1000
+    kbm_g = kbm_grams(d["age_months"].to_numpy()).astype(np.float64)
+    status = _growth_status(days, gain_g, kbm_g)
+    status[first] = None
+
+    # Panjang rentetan 'T': reset tiap ketemu selain 'T' atau anak baru
+    is_t = status == "T"
+    run_id = np.cumsum(~is_t | first)
+    t_streak = pd.Series(is_t.astype(np.int64)).groupby(run_id).cumsum().to_numpy()
+
+    out = pd.DataFrame(index=d.index)
+    out["days_since_last"] = days
+    out["weight_velocity"] = weight_velocity
+    out["height_velocity"] = height_velocity
+    for name in Z_INDEXES:
+        z = d[f"z_{name}"].to_numpy(dtype=np.float64)
+        out[f"dz_{name}"] = z - prev(z)
+        out[f"sd_lines_{name}"] = lines_crossed(prev(z), z)
+    out["kbm_g"] = kbm_g
+    out["weight_gain_g"] = gain_g
+    out["growth_status"] = status
+    out["t_streak"] = t_streak
+    out["flag_2t"] = t_streak >= 2
+    return out[METRIC_COLUMNS].reindex(df.index)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Kecepatan pertumbuhan + 2T per anak")
+    parser.add_argument("input", help="File hasil pipeline (JSONL / CSV)")
+    parser.add_argument("output", help="File output (.csv atau .jsonl)")
+    args = parser.parse_args()
+
+    df = pd.concat(pipeline.read_source(args.input, 100000), ignore_index=True)
+    df = df.join(trajectory(df))
+    if args.output.endswith(".csv"):
+        pipeline.write_csv([df], args.output)
+    else:
+        pipeline.write_jsonl([df], args.output)
+    flagged = df["flag_2t"].sum()
+    print(f"{len(df)} kunjungan, {flagged} kunjungan 2T (perlu dirujuk)")
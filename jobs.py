@@ -0,0 +1,511 @@
+"""
+Job latar (background) buat kerjaan massal: import + skoring file gede,
+skoring ulang, bikin laporan, dll. Biar gak nahan worker Gradio / bikin
+browser timeout.
+
+    - Tabel job disimpen di SQLite (data/jobs.db), jadi antrian tetep ada
+      walau app di-restart. Job yang lagi jalan dipegang worker-nya pake
+      lease (diperpanjang heartbeat tiap HEARTBEAT_SECONDS); kalo lease-nya
+      lewat (worker mati / macet) atau PID-nya udah gak hidup, job dibalikin
+      ke antrian. Dicek ulang tiap REQUEUE_SECONDS sama worker yang nganggur
+      (handler harus aman diulang).
+    - Worker = proses terpisah (`python jobs.py run`, cuma import modul ini,
+      bukan app.py) dengan prioritas CPU rendah (nice), jadi `analyze_gizi`
+      yang interaktif tetep dapet CPU duluan. Worker berhenti sendiri kalo
+      proses yang nyalain-nya mati.
+    - Handler lapor progress lewat `JobContext.progress`, sekalian cek
+      apakah job-nya dibatalin.
+
+Jenis job baru didaftarin pake dekorator `@job_kind("nama")`.
+
+Jalanin worker terpisah dari app:
+    python jobs.py worker --workers 2
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+DEFAULT_DB = os.path.join(DATA_DIR, "jobs.db")
+
+STATUSES = ("queued", "running", "done", "failed", "cancelled")
+FINISHED = ("done", "failed", "cancelled")
+
+# Prioritas proses worker (0 = normal, 19 = paling rendah)
+WORKER_NICE = 19
+POLL_SECONDS = 1.0
+
+# Lease job yang lagi jalan: diperpanjang heartbeat, lewat = dianggap yatim
+LEASE_SECONDS = 60.0
+HEARTBEAT_SECONDS = 10.0
+REQUEUE_SECONDS = 30.0
+
+_HANDLERS = {}
+
+
+class JobCancelled(Exception):
+    pass
+
+
+def job_kind(name: str):
+    """
+    Daftarin fungsi `handler(params, ctx) -> path hasil (atau None)`.
+    """
+
+    def register(fn):
+        _HANDLERS[name] = fn
+        return fn
+
+    return register
+
+
+def _now() -> str:
+    return datetime.now().isoformat(timespec="seconds")
+
+
+def _pid_alive(pid) -> bool:
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class JobStore:
+    """
+    Tabel job di SQLite. Aman dipake dari beberapa thread (app) dan beberapa
+    proses (worker) sekaligus.
+    """
+
+    def __init__(self, path: str = DEFAULT_DB, jobs_dir: str = None):
+        self.path = path
+        self.jobs_dir = jobs_dir or os.path.join(os.path.dirname(path) or ".", "jobs")
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(
+            path, timeout=30, check_same_thread=False, isolation_level=None
+        )
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                params TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'queued',
+                progress REAL NOT NULL DEFAULT 0,
+                message TEXT,
+                result_path TEXT,
+                cancel_requested INTEGER NOT NULL DEFAULT 0,
+                worker_pid INTEGER,
+                lease_owner TEXT,
+                lease_until REAL,
+                created_at TEXT NOT NULL,
+                started_at TEXT,
+                finished_at TEXT
+            )
+            """
+        )
+        columns = {row["name"] for row in self.conn.execute("PRAGMA table_info(jobs)")}
+        for column, kind in (("lease_owner", "TEXT"), ("lease_until", "REAL")):
+            if column not in columns:
+                # Database lama (sebelum ada lease)
+                self.conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {kind}")
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)"
+        )
+        self._lock = threading.Lock()
+
+    def _execute(self, sql, args=()):
+        with self._lock:
+            return self.conn.execute(sql, args)
+
+    def submit(self, kind: str, params: dict = None) -> str:
+        if kind not in _HANDLERS:
+            raise ValueError(f"Jenis job tidak dikenal: {kind}")
+        job_id = uuid.uuid4().hex[:12]
+        self._execute(
+            "INSERT INTO jobs (id, kind, params, created_at) VALUES (?, ?, ?, ?)",
+            (job_id, kind, json.dumps(params or {}), _now()),
+        )
+        return job_id
+
+    def get(self, job_id: str):
+        row = self._execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return dict(row) if row else None
+
+    def list(self, limit: int = 20) -> list:
+        rows = self._execute(
+            "SELECT * FROM jobs ORDER BY created_at DESC, rowid DESC LIMIT ?", (limit,)
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        Job yang masih antri langsung dibatalin; yang lagi jalan dikasih tanda,
+        handler-nya berhenti di laporan progress berikutnya.
+        """
+        with self._lock:
+            cur = self.conn.execute(
+                "UPDATE jobs SET status = 'cancelled', finished_at = ?, "
+                "message = 'Dibatalkan' WHERE id = ? AND status = 'queued'",
+                (_now(), job_id),
+            )
+            if cur.rowcount:
+                return True
+            cur = self.conn.execute(
+                "UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status = 'running'",
+                (job_id,),
+            )
+            return cur.rowcount > 0
+
+    def claim(self, pid: int, owner: str = None, lease: float = LEASE_SECONDS):
+        """
+        Ambil satu job antrian paling lama (atomik antar proses), atau None.
+        Job-nya dipegang `owner` (default token acak per claim) sampai
+        `lease` detik ke depan, perpanjang pake `heartbeat`.
+        """
+        owner = owner or f"{pid}-{uuid.uuid4().hex[:8]}"
+        with self._lock:
+            row = self.conn.execute(
+                "UPDATE jobs SET status = 'running', worker_pid = ?, lease_owner = ?, "
+                "lease_until = ?, started_at = ? "
+                "WHERE id = (SELECT id FROM jobs WHERE status = 'queued' "
+                "ORDER BY created_at, rowid LIMIT 1) AND status = 'queued' RETURNING *",
+                (pid, owner, time.time() + lease, _now()),
+            ).fetchone()
+        return dict(row) if row else None
+
+    def heartbeat(self, job_id: str, owner: str, lease: float = LEASE_SECONDS) -> bool:
+        """
+        Perpanjang lease job yang masih dipegang `owner`. False kalo job-nya
+        udah gak dipegang (selesai, atau udah diantriin ulang ke worker lain).
+        """
+        cur = self._execute(
+            "UPDATE jobs SET lease_until = ? "
+            "WHERE id = ? AND status = 'running' AND lease_owner = ?",
+            (time.time() + lease, job_id, owner),
+        )
+        return cur.rowcount > 0
+
+    def progress(self, job_id: str, fraction: float, message: str = None) -> bool:
+        """
+        Simpen progress, balikin True kalo job-nya diminta batal.
+        """
+        self._execute(
+            "UPDATE jobs SET progress = ?, message = COALESCE(?, message) WHERE id = ?",
+            (max(0.0, min(1.0, fraction)), message, job_id),
+        )
+        row = self._execute(
+            "SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)
+        ).fetchone()
+        return bool(row and row[0])
+
+    def finish(self, job_id: str, status: str, message: str = None, result_path=None):
+        self._execute(
+            "UPDATE jobs SET status = ?, message = COALESCE(?, message), "
+            "result_path = ?, finished_at = ?, "
+            "progress = CASE WHEN ? = 'done' THEN 1 ELSE progress END WHERE id = ?",
+            (status, message, result_path, _now(), status, job_id),
+        )
+
+    def requeue_orphans(self) -> int:
+        """
+        Job 'running' yang lease-nya lewat (worker mati / macet) atau PID
+        worker-nya udah gak hidup diantriin lagi. PID yang masih "hidup" gak
+        dipercaya (bisa aja udah dipake proses lain), lease tetep yang nentuin.
+        """
+        now = time.time()
+        rows = self._execute(
+            "SELECT id, worker_pid, lease_owner, lease_until FROM jobs WHERE status = 'running'"
+        ).fetchall()
+        orphans = [
+            row
+            for row in rows
+            if (row["lease_until"] or 0) < now or not _pid_alive(row["worker_pid"])
+        ]
+        requeued = 0
+        for row in orphans:
+            # Lease yang sama: kalo worker-nya barusan heartbeat, jangan diambil
+            cur = self._execute(
+                "UPDATE jobs SET status = 'queued', worker_pid = NULL, lease_owner = NULL, "
+                "lease_until = NULL, progress = 0, "
+                "message = 'Diantrikan ulang (worker mati / gak ada kabar)' "
+                "WHERE id = ? AND status = 'running' AND lease_owner IS ? AND lease_until IS ?",
+                (row["id"], row["lease_owner"], row["lease_until"]),
+            )
+            requeued += cur.rowcount
+        return requeued
+
+    def output_dir(self, job_id: str) -> str:
+        path = os.path.join(self.jobs_dir, job_id)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def close(self):
+        self.conn.close()
+
+
+class JobContext:
+    """
+    Yang dikasih ke handler: tempat output dan laporan progress.
+    """
+
+    __slots__ = ("store", "job_id", "out_dir")
+
+    def __init__(self, store: JobStore, job_id: str):
+        self.store = store
+        self.job_id = job_id
+        self.out_dir = store.output_dir(job_id)
+
+    def output_path(self, name: str) -> str:
+        return os.path.join(self.out_dir, name)
+
+    def progress(self, fraction: float, message: str = None):
+        if self.store.progress(self.job_id, fraction, message):
+            raise JobCancelled()
+
+
+def run_job(store: JobStore, job: dict):
+    """
+    Jalanin satu job yang udah di-claim, status akhirnya disimpen ke tabel.
+    """
+    ctx = JobContext(store, job["id"])
+    try:
+        handler = _HANDLERS[job["kind"]]
+        result = handler(json.loads(job["params"]), ctx)
+    except JobCancelled:
+        shutil.rmtree(ctx.out_dir, ignore_errors=True)
+        store.finish(job["id"], "cancelled", "Dibatalkan")
+    except Exception as e:
+        store.finish(job["id"], "failed", f"Error: {str(e)}")
+    else:
+        # Pesan terakhir dari handler (misal jumlah baris) dipertahanin
+        store.finish(job["id"], "done", None, result)
+
+
+def _heartbeat(store: JobStore, job: dict, done: threading.Event):
+    # Perpanjang lease selama handler masih jalan
+    while not done.wait(HEARTBEAT_SECONDS):
+        if not store.heartbeat(job["id"], job["lease_owner"]):
+            return
+
+
+def worker_loop(
+    db_path: str = DEFAULT_DB, stop=None, nice: int = WORKER_NICE, parent: int = None
+):
+    """
+    Loop satu proses worker: ambil job, jalanin, ulang. Berhenti kalo `stop`
+    (Event) di-set, atau kalo proses `parent` (PID) udah mati.
+    """
+    if nice:
+        try:
+            os.nice(nice)
+        except OSError:
+            pass
+    store = JobStore(db_path)
+    next_requeue = 0.0
+    while stop is None or not stop.is_set():
+        if parent is not None and os.getppid() != parent:
+            break  # App yang nyalain worker ini udah mati
+        if time.monotonic() >= next_requeue:
+            store.requeue_orphans()
+            next_requeue = time.monotonic() + REQUEUE_SECONDS
+        job = store.claim(os.getpid())
+        if job is None:
+            time.sleep(POLL_SECONDS)
+            continue
+        done = threading.Event()
+        beat = threading.Thread(target=_heartbeat, args=(store, job, done), daemon=True)
+        beat.start()
+        try:
+            run_job(store, job)
+        finally:
+            done.set()
+            beat.join()
+    store.close()
+
+
+def start_workers(n: int = 1, db_path: str = DEFAULT_DB) -> list:
+    """
+    Start `n` proses worker (`python jobs.py run`), ikut berhenti kalo
+    proses ini mati. Balikin list `subprocess.Popen`.
+    """
+    command = [
+        sys.executable, os.path.abspath(__file__), "run",
+        "--db", db_path, "--parent", str(os.getpid()),
+    ]
+    return [subprocess.Popen(command) for _ in range(n)]
+
+
+# --- Jenis Job ---
+
+
+def _count_rows(path: str) -> int:
+    count = 0
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            count += block.count(b"\n")
+    return max(count - path.endswith(".csv"), 1)
+
+
+def _version_store(ctx: JobContext):
+    # Snapshot versi disimpen sebelahan sama database job (data/versions)
+    import versions
+
+    return versions.VersionStore(
+        os.path.join(os.path.dirname(ctx.store.path) or ".", "versions")
+    )
+
+
+@job_kind("score")
+def score_job(params: dict, ctx: JobContext):
+    """
+    Import + skoring massal satu file (JSONL / CSV) lewat `pipeline`.
+    params: input (path), format ('jsonl' / 'csv' / 'parquet'), batch_size.
+    """
+    import pipeline
+
+    source = params["input"]
+    fmt = params.get("format", "jsonl")
+    if fmt in ("parquet", "arrow"):
+        import export
+
+        # Gagal di awal (pesan jelas), bukan abis semua baris diskoring
+        export._require_pyarrow()
+    _version_store(ctx).snapshot()
+    total = _count_rows(source)
+    done = 0
+
+    def on_batch(n):
+        nonlocal done
+        done += n
+        ctx.progress(done / total, f"{done}/{total} baris")
+
+    dest = ctx.output_path(f"hasil.{fmt}")
+    n = pipeline.run_pipeline(
+        source,
+        dest,
+        params.get("batch_size", pipeline.DEFAULT_BATCH_SIZE),
+        rejects=ctx.output_path("ditolak.jsonl"),
+        on_batch=on_batch,
+    )
+    ctx.progress(1.0, f"{n} baris berhasil diskoring")
+    return dest
+
+
+@job_kind("rescore")
+def rescore_job(params: dict, ctx: JobContext):
+    """
+    Skoring ulang hasil lama yang basi gara-gara tabel standar / rule diubah
+    (cuma baris yang kena, lihat `rescore`).
+    params: input (file hasil pipeline), format, batch_size, workers.
+    """
+    import pipeline
+    import rescore
+
+    source = params["input"]
+    fmt = params.get("format", "jsonl")
+    total = _count_rows(source)
+    done = 0
+
+    def on_batch(n):
+        nonlocal done
+        done += n
+        ctx.progress(done / total, f"{done}/{total} baris")
+
+    dest = ctx.output_path(f"hasil.{fmt}")
+    stats = rescore.rescore_file(
+        source,
+        dest,
+        params.get("batch_size", pipeline.DEFAULT_BATCH_SIZE),
+        params.get("workers", 1),
+        _version_store(ctx),
+        on_batch,
+    )
+    ctx.progress(
+        1.0,
+        f"{stats['z_rows'] + stats['rule_rows']} dari {stats['rows']} baris diskoring ulang",
+    )
+    return dest
+
+
+@job_kind("report")
+def report_job(params: dict, ctx: JobContext):
+    """
+    Laporan cetak per anak + ringkasan sesi (lihat `reports`).
+    params: input (data sesi, mentah / hasil pipeline), title, workers.
+    """
+    import pandas as pd
+
+    import pipeline
+    import reports
+
+    ctx.progress(0.0, "Baca data sesi")
+    df = pd.concat(pipeline.read_source(params["input"], 10000), ignore_index=True)
+    ctx.progress(0.1, f"Bikin laporan {len(df)} kunjungan")
+    index = reports.generate(
+        df, ctx.output_path("laporan"), params.get("workers", 1), params.get("title", "")
+    )
+    ctx.progress(1.0, "Laporan selesai")
+    return index
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Job latar")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_worker = sub.add_parser("worker", help="Jalanin proses worker")
+    p_worker.add_argument("--db", default=DEFAULT_DB)
+    p_worker.add_argument("--workers", type=int, default=1)
+
+    p_run = sub.add_parser("run", help="Satu proses worker (dipake `start_workers`)")
+    p_run.add_argument("--db", default=DEFAULT_DB)
+    p_run.add_argument("--parent", type=int, help="Berhenti kalo PID ini mati")
+
+    p_submit = sub.add_parser("submit", help="Masukin job ke antrian")
+    p_submit.add_argument("kind", choices=sorted(_HANDLERS))
+    p_submit.add_argument("--db", default=DEFAULT_DB)
+    p_submit.add_argument("--params", default="{}", help="Parameter job (JSON)")
+
+    p_list = sub.add_parser("list", help="Daftar job terakhir")
+    p_list.add_argument("--db", default=DEFAULT_DB)
+    args = parser.parse_args()
+
+    if args.command == "worker":
+        processes = start_workers(args.workers, args.db)
+        print(f"{len(processes)} worker jalan ({args.db}), Ctrl+C buat berhenti")
+        try:
+            for process in processes:
+                process.wait()
+        except KeyboardInterrupt:
+            for process in processes:
+                process.terminate()
+    elif args.command == "run":
+        try:
+            worker_loop(args.db, parent=args.parent)
+        except KeyboardInterrupt:
+            pass
+    elif args.command == "submit":
+        print(JobStore(args.db).submit(args.kind, json.loads(args.params)))
+    else:
+        for job in JobStore(args.db).list():
+            print(
+                f"{job['id']}  {job['kind']:8} {job['status']:9} "
+                f"{job['progress']:6.1%}  {job['message'] or ''}"
+            )
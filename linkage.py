@@ -0,0 +1,379 @@
+"""
+Record linkage: anak yang sama di register bulanan yang beda (nama beda
+ejaan, tanggal lahir salah ketik) dikasih satu `child_id` yang stabil, biar
+analisa longitudinal (`growth.py`, `quality.py`) dan hitungan prevalensi gak
+ngitung satu anak jadi beberapa.
+
+Caranya (gak ada perbandingan O(n²) antar semua baris):
+    1. Baris dipadatin jadi identitas unik (gender, posyandu, tanggal lahir,
+       nama ternormalisasi, nama orang tua). Register bulanan isinya anak
+       yang sama berulang, jadi identitasnya jauh lebih sedikit dari baris.
+    2. Blocking: pasangan kandidat cuma dibikin di dalam blok yang sama,
+       vectorized (numpy), dua lewatan:
+         a. (gender, posyandu, bulan lahir): nama mirip, tanggal lahir
+            boleh beda hari
+         b. (gender, posyandu, nama persis) dan (gender, posyandu, nama
+            orang tua): tanggal lahir salah ketik yang nyebrang bulan / tahun
+            (satu komponen beda, atau hari-bulan ketuker)
+       Blok yang lebih gede dari MAX_BLOCK dipecah lagi pake huruf depan nama.
+    3. Kemiripan nama: koefisien Dice trigram (trigram sama kayak
+       `registry.trigrams`), dihitung sekaligus buat semua pasangan pake
+       matriks sparse. Kalo nama orang tua ada di dua-duanya dan gak mirip,
+       pasangan ditolak (biar saudara kandung gak kegabung).
+    4. Pasangan yang cocok digabung pake connected components (union-find),
+       ID cluster = hash identitas terkecil di cluster, atau ID lama kalo
+       salah satu anggotanya udah pernah dapet ID (`known`).
+
+Contoh:
+    python linkage.py register_gabungan.jsonl hasil_linked.jsonl
+    python linkage.py --bench 1000000
+"""
+
+import argparse
+import hashlib
+import time
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
+
+import pipeline
+import registry
+
+# Dice trigram minimal buat dianggap anak yang sama
+NAME_MATCH_SAME_DOB = 0.6
+NAME_MATCH_NEAR_DOB = 0.7
+PARENT_MATCH = 0.7
+
+MAX_BLOCK = 500
+PAIR_CHUNK = 500000
+
+IDENTITY_COLUMNS = ["gender", "posyandu", "dob", "name", "parent"]
+
+
+def _codes(*arrays) -> np.ndarray:
+    """
+    Nomor grup (0..k-1) buat kombinasi nilai `arrays`.
+    """
+    code = np.zeros(len(arrays[0]), dtype=np.int64)
+    for values in arrays:
+        part, uniques = pd.factorize(values, use_na_sentinel=False)
+        code = code * max(len(uniques), 1) + part
+    return pd.factorize(code)[0]
+
+
+def _normalized(values) -> np.ndarray:
+    # registry.normalize cuma dipanggil sekali per nilai unik
+    codes, uniques = pd.factorize(pd.Series(values, dtype=object).fillna(""))
+    return np.array([registry.normalize(u) for u in uniques], dtype=object)[codes]
+
+
+def identities(df: pd.DataFrame):
+    """
+    Padatin `df` jadi identitas unik. Balikin (tabel identitas, nomor
+    identitas tiap baris).
+    """
+    n = len(df)
+
+    def column(name):
+        return df[name].to_numpy(dtype=object) if name in df.columns else np.full(n, None)
+
+    gender = pd.Series(column("gender")).map(pipeline.GENDER_CODES).fillna("").to_numpy()
+    dob = pd.to_datetime(pd.Series(column("dob")), errors="coerce", format="ISO8601")
+    rows = pd.DataFrame(
+        {
+            "gender": gender,
+            "posyandu": _normalized(column("posyandu")),
+            "dob": dob.to_numpy(dtype="datetime64[D]"),
+            "name": _normalized(column("nama")),
+            "parent": _normalized(column("nama_ortu")),
+        }
+    )
+    row_identity = _codes(*(rows[c].to_numpy() for c in IDENTITY_COLUMNS))
+    first = np.unique(row_identity, return_index=True)[1]
+    table = rows.iloc[first].reset_index(drop=True)
+    return table, row_identity
+
+
+def _trigram_matrix(names) -> tuple:
+    """
+    Matriks biner (nama x trigram) + jumlah trigram per nama. Trigram cuma
+    dihitung sekali per nama unik.
+    """
+    codes, uniques = pd.factorize(pd.Series(names, dtype=object))
+    vocabulary = {}
+    indices, indptr = [], [0]
+    for name in uniques:
+        indices.extend(vocabulary.setdefault(g, len(vocabulary)) for g in registry.trigrams(name))
+        indptr.append(len(indices))
+    data = np.ones(len(indices), dtype=np.float32)
+    matrix = sparse.csr_matrix(
+        (data, np.array(indices, dtype=np.int64), np.array(indptr, dtype=np.int64)),
+        shape=(len(uniques), max(len(vocabulary), 1)),
+    )[codes]
+    return matrix, np.diff(matrix.indptr)
+
+
+def dice(matrix, sizes, left, right) -> np.ndarray:
+    """
+    Koefisien Dice trigram buat pasangan (left[i], right[i]), per chunk biar
+    memorinya gak meledak.
+    """
+    out = np.zeros(len(left), dtype=np.float64)
+    for start in range(0, len(left), PAIR_CHUNK):
+        l, r = left[start : start + PAIR_CHUNK], right[start : start + PAIR_CHUNK]
+        shared = np.asarray(matrix[l].multiply(matrix[r]).sum(axis=1)).ravel()
+        total = sizes[l] + sizes[r]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            out[start : start + len(l)] = np.where(total > 0, 2 * shared / total, 0.0)
+    return out
+
+
+def block_pairs(block) -> tuple:
+    """
+    Semua pasangan (i, j), i != j, yang nomor bloknya sama, vectorized.
+    """
+    block = np.asarray(block)
+    order = np.argsort(block, kind="stable")
+    ordered = block[order]
+    starts = np.flatnonzero(np.r_[True, ordered[1:] != ordered[:-1]])
+    sizes = np.diff(np.r_[starts, len(order)])
+    end = np.repeat(starts + sizes, sizes)
+    position = np.arange(len(order))
+    count = end - position - 1
+    left = np.repeat(position, count)
+    offset = np.arange(len(left)) - np.repeat(np.cumsum(count) - count, count)
+    return order[left], order[left + 1 + offset]
+
+
+def _blocks(*keys, initial) -> np.ndarray:
+    # Blok kegedean dipecah lagi pake huruf depan nama
+    code = _codes(*keys)
+    big = np.bincount(code)[code] > MAX_BLOCK
+    if big.any():
+        code = _codes(code, np.where(big, initial, ""))
+    return code
+
+
+def _near_dob(a, b) -> np.ndarray:
+    """
+    Tanggal lahir yang kemungkinan salah ketik: cuma satu komponen
+    (tahun / bulan / hari) yang beda, atau hari sama bulan ketuker.
+    """
+    parts = []
+    for dates in (a, b):
+        dates = pd.DatetimeIndex(dates)
+        parts.append((dates.year.to_numpy(), dates.month.to_numpy(), dates.day.to_numpy()))
+    (y1, m1, d1), (y2, m2, d2) = parts
+    differ = (y1 != y2).astype(int) + (m1 != m2) + (d1 != d2)
+    swapped = (y1 == y2) & (m1 == d2) & (d1 == m2)
+    return (differ == 1) | swapped
+
+
+def match_pairs(table: pd.DataFrame, stats: dict = None) -> tuple:
+    """
+    Pasangan identitas yang dianggap anak yang sama (lihat docstring modul).
+    """
+    gender = table["gender"].to_numpy()
+    posyandu = table["posyandu"].to_numpy()
+    dob = table["dob"].to_numpy()
+    names = table["name"].to_numpy()
+    parents = table["parent"].to_numpy()
+    initial = np.array([n[:1] for n in names], dtype=object)
+    has_name = names != ""
+
+    # a. Bulan lahir sama
+    birth_month = dob.astype("datetime64[M]")
+    left_a, right_a = block_pairs(_blocks(gender, posyandu, birth_month, initial=initial))
+    lefts, rights = [left_a], [right_a]
+    # b. Nama / nama orang tua persis sama, tanggal lahir beda bulan / tahun
+    for key, valid in ((names, has_name), (parents, parents != "")):
+        block = np.where(valid, _blocks(gender, posyandu, key, initial=initial), -1 - np.arange(len(key)))
+        left_b, right_b = block_pairs(block)
+        cross = (birth_month[left_b] != birth_month[right_b]) & _near_dob(dob[left_b], dob[right_b])
+        lefts.append(left_b[cross])
+        rights.append(right_b[cross])
+    left, right = np.concatenate(lefts), np.concatenate(rights)
+    # Pasangan yang sama bisa ketemu di dua lewatan
+    pairs = np.unique(np.c_[np.minimum(left, right), np.maximum(left, right)], axis=0)
+    left, right = pairs[:, 0], pairs[:, 1]
+    keep = has_name[left] & has_name[right] & ~np.isnat(dob[left]) & ~np.isnat(dob[right])
+    left, right = left[keep], right[keep]
+
+    matrix, sizes = _trigram_matrix(names)
+    name_score = dice(matrix, sizes, left, right)
+    same_dob = dob[left] == dob[right]
+    near = same_dob | _near_dob(dob[left], dob[right]) | (birth_month[left] == birth_month[right])
+    match = np.where(same_dob, name_score >= NAME_MATCH_SAME_DOB, name_score >= NAME_MATCH_NEAR_DOB)
+    match &= near
+
+    # Nama orang tua (kalo ada dua-duanya) harus mirip juga
+    both_parents = (parents[left] != "") & (parents[right] != "")
+    check = np.flatnonzero(match & both_parents)
+    if len(check):
+        parent_matrix, parent_sizes = _trigram_matrix(parents)
+        parent_score = dice(parent_matrix, parent_sizes, left[check], right[check])
+        match[check[parent_score < PARENT_MATCH]] = False
+
+    if stats is not None:
+        stats.update(identities=len(table), candidate_pairs=len(left), matched_pairs=int(match.sum()))
+    return left[match], right[match]
+
+
+def _identity_hash(table: pd.DataFrame) -> np.ndarray:
+    text = (
+        table["gender"].astype(str)
+        + "|" + table["posyandu"].astype(str)
+        + "|" + table["dob"].astype(str)
+        + "|" + table["name"].astype(str)
+        + "|" + table["parent"].astype(str)
+    )
+    return np.array([hashlib.sha1(t.encode()).hexdigest()[:12] for t in text], dtype=object)
+
+
+def link(df: pd.DataFrame, known: pd.DataFrame = None, stats: dict = None) -> pd.Series:
+    """
+    `child_id` buat tiap baris `df` (kolom nama, dob, gender, opsional
+    posyandu dan nama_ortu). `known` = hasil link sebelumnya (baris dengan
+    kolom child_id): ID lamanya dipertahanin, jadi ID stabil antar run
+    walaupun ada register baru yang nambahin / nyambungin cluster.
+    """
+    table, row_identity = identities(df)
+    n = len(table)
+    left, right = match_pairs(table, stats)
+    graph = sparse.coo_matrix((np.ones(len(left), dtype=np.int8), (left, right)), shape=(n, n))
+    n_clusters, cluster = connected_components(graph, directed=False)
+
+    # Default: hash identitas terkecil di cluster (deterministik)
+    hashes = _identity_hash(table)
+    order = np.lexsort((hashes, cluster))
+    first = order[np.r_[True, cluster[order][1:] != cluster[order][:-1]]]
+    cluster_id = np.empty(n_clusters, dtype=object)
+    cluster_id[cluster[first]] = hashes[first]
+
+    if known is not None and len(known):
+        old_table, old_identity = identities(known)
+        old_ids = known["child_id"].to_numpy(dtype=object)
+        old = pd.Series(old_ids).groupby(old_identity).min()
+        old_hashes = pd.Series(old.to_numpy(), index=_identity_hash(old_table.iloc[old.index]))
+        previous = pd.Series(hashes).map(old_hashes).to_numpy()
+        # ID lama terkecil di cluster yang menang
+        has_old = pd.notna(previous)
+        if has_old.any():
+            chosen = pd.Series(previous[has_old]).groupby(cluster[has_old]).min()
+            cluster_id[chosen.index.to_numpy()] = chosen.to_numpy()
+
+    if stats is not None:
+        stats["children"] = n_clusters
+    return pd.Series(cluster_id[cluster[row_identity]], index=df.index, name="child_id")
+
+
+def bench(rows: int = 1000000, visits_per_child: int = 10, seed: int = 0) -> dict:
+    """
+    Register sintetis: tiap anak muncul `visits_per_child` kali, sebagian
+    nama salah ketik / beda ejaan dan tanggal lahir salah ketik.
+    """
+    rng = np.random.default_rng(seed)
+    first = ["budi", "siti", "agus", "dewi", "putri", "rizky", "nur", "ahmad", "ayu", "dimas",
+             "muhammad", "aisyah", "fajar", "nabila", "rafi", "zahra", "bayu", "intan"]
+    last = ["santoso", "rahayu", "wijaya", "lestari", "saputra", "hidayat", "pratama",
+            "susanti", "nugroho", "kurniawan", "permata", "ramadhan"]
+    children = rows // visits_per_child
+    a, b = rng.integers(0, len(first), children), rng.integers(0, len(last), children)
+    c = rng.integers(0, len(last), children)
+    names = np.array([f"{first[i]} {last[j]}" for i, j in zip(a, b)], dtype=object)
+    parents = np.array([f"ibu {first[(i + 7) % len(first)]} {last[j]}" for i, j in zip(a, c)], dtype=object)
+    dob = np.datetime64("2020-01-01") + rng.integers(0, 1800, children)
+    gender = rng.choice(["L", "P"], children)
+    posyandu = rng.integers(0, children // 100 + 1, children)
+
+    child = np.repeat(np.arange(children), visits_per_child)[:rows]
+    nama = names[child].copy()
+    dobs = dob[child].copy()
+
+    # 10% nama salah ketik (satu huruf diganti), 1% tanggal lahir salah ketik
+    typo = np.flatnonzero(rng.random(rows) < 0.10)
+    for i, pos in zip(typo, rng.integers(0, 100, len(typo))):
+        name = nama[i]
+        pos = pos % len(name)
+        if name[pos] != " ":
+            nama[i] = name[:pos] + ("y" if name[pos] == "i" else "i") + name[pos + 1 :]
+    # Salah ketik tanggal: hari / bulan / tahun meleset satu, atau hari-bulan ketuker
+    dob_typo = np.flatnonzero(rng.random(rows) < 0.01)
+    for i, kind in zip(dob_typo, rng.integers(0, 4, len(dob_typo))):
+        d = pd.Timestamp(dobs[i])
+        if kind == 0 or (kind == 1 and d.day > 28):
+            d = d.replace(day=d.day % 28 + 1)
+        elif kind == 1:
+            d = d.replace(month=d.month % 12 + 1)
+        elif kind == 2:
+            d = d.replace(year=d.year - 1)
+        elif d.day <= 12:
+            d = d.replace(month=d.day, day=d.month)
+        dobs[i] = np.datetime64(d.date())
+
+    df = pd.DataFrame(
+        {
+            "nama": nama,
+            "nama_ortu": parents[child],
+            "dob": pd.DatetimeIndex(dobs).strftime("%Y-%m-%d"),
+            "gender": gender[child],
+            "posyandu": [f"Posyandu {p}" for p in posyandu[child]],
+        }
+    )
+
+    stats = {}
+    start = time.perf_counter()
+    child_id = link(df, stats=stats)
+    seconds = time.perf_counter() - start
+
+    # Kualitas: anak yang pecah jadi >1 ID, ID yang isinya >1 anak
+    truth = pd.Series(child, index=df.index)
+    split = (truth.groupby(child_id.to_numpy()).nunique() > 1).sum()
+    fragmented = (child_id.groupby(child).nunique() > 1).sum()
+    return {
+        "rows": rows,
+        "seconds": seconds,
+        **stats,
+        "true_children": children,
+        "fragmented_children": int(fragmented),
+        "merged_ids": int(split),
+        "naive_pairs": rows * (rows - 1) // 2,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Record linkage anak antar register")
+    parser.add_argument("input", nargs="?", help="Register (JSONL / CSV)")
+    parser.add_argument("output", nargs="?", help="Output dengan kolom child_id (.csv / .jsonl)")
+    parser.add_argument("--known", help="Output link sebelumnya (biar ID-nya stabil)")
+    parser.add_argument("--bench", type=int, metavar="ROWS", help="Benchmark di data sintetis")
+    args = parser.parse_args()
+
+    if args.bench:
+        result = bench(args.bench)
+        print(f"{result['rows']} baris -> {result['identities']} identitas unik")
+        print(
+            f"  pasangan dibandingin: {result['candidate_pairs']} "
+            f"(tanpa blocking {result['naive_pairs']:.2e}), cocok {result['matched_pairs']}"
+        )
+        print(f"  {result['children']} ID (anak asli {result['true_children']}), {result['seconds']:.1f} detik")
+        print(
+            f"  anak pecah jadi >1 ID: {result['fragmented_children']}, "
+            f"ID isinya >1 anak: {result['merged_ids']}"
+        )
+    elif args.input and args.output:
+        df = pd.concat(pipeline.read_source(args.input, 100000), ignore_index=True)
+        known = None
+        if args.known:
+            known = pd.concat(pipeline.read_source(args.known, 100000), ignore_index=True)
+        stats = {}
+        df["child_id"] = link(df, known, stats)
+        if args.output.endswith(".csv"):
+            df.to_csv(args.output, index=False)
+        else:
+            df.to_json(args.output, orient="records", lines=True, force_ascii=False)
+        print(f"{len(df)} baris, {stats['children']} anak ({stats['identities']} identitas unik)")
+    else:
+        parser.error("butuh input + output, atau --bench")
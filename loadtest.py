@@ -0,0 +1,228 @@
+"""
+Load test end-to-end buat event `analyze_gizi` di app Gradio (`demo`).
+
+Request dikirim lewat Gradio client API (jalur yang sama kayak tombol
+"Analisa Status Gizi" di browser), open-loop: kedatangan request dijadwal
+sesuai `--rate` (per detik, Poisson) dan gak nunggu request sebelumnya
+selesai, dibatasi `--concurrency` client paralel (misal 50 kader).
+
+Latency dihitung dari jadwal kedatangan sampai jawaban diterima, jadi waktu
+ngantri di sisi client (kalo semua client lagi sibuk) ikut kehitung.
+
+Isi request bisa sintetis, atau replay file JSONL. Tiap baris:
+    {"nama": ..., "dob": "2023-01-01", "gender": "Laki-laki", "weight": 12.2,
+     "height": 87.1, "measure_mode": "Berdiri"}
+atau {"data": [nama, dob, gender, weight, height, measure_mode]}.
+
+Contoh (app dijalanin di proses ini juga, gak butuh network):
+    python loadtest.py --launch --requests 500 --concurrency 50 --rate 20
+    python loadtest.py --url http://127.0.0.1:7860 --replay kunjungan.jsonl
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+API_NAME = "/analyze_gizi"
+PERCENTILES = (50, 95, 99)
+
+# Nilai yang diterima komponen UI (Radio), bukan kode pipeline
+GENDER_LABELS = {"L": "Laki-laki", "P": "Perempuan"}
+MODE_LABELS = {"standing": "Berdiri", "recumbent": "Terlentang"}
+
+
+def _as_args(record) -> list:
+    if isinstance(record, dict) and "data" in record:
+        return list(record["data"])
+    return [
+        record.get("nama") or "Balita",
+        str(record.get("dob")),
+        GENDER_LABELS.get(record.get("gender"), record.get("gender")),
+        record.get("weight"),
+        record.get("height"),
+        MODE_LABELS.get(record.get("measure_mode"), record.get("measure_mode")),
+    ]
+
+
+def load_replay(path: str) -> list:
+    """
+    Baca file JSONL rekaman request jadi list argumen `analyze_gizi`.
+    """
+    requests = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                requests.append(_as_args(json.loads(line)))
+    return requests
+
+
+def synthetic_requests(n: int, seed: int = 0) -> list:
+    """
+    Request acak di sekitar contoh kasus app (umur 0-60 bulan, BB/TB wajar).
+    """
+    rng = np.random.default_rng(seed)
+    today = np.datetime64("today", "D")
+    ages = rng.integers(0, 60 * 30, n)
+    heights = np.round(rng.uniform(50, 110, n), 1)
+    weights = np.round(np.clip(heights * 0.14 + rng.normal(0, 1.5, n), 2, 30), 2)
+    requests = []
+    for i in range(n):
+        requests.append(
+            [
+                f"Balita {i}",
+                str(today - ages[i]),
+                "Laki-laki" if i % 2 else "Perempuan",
+                float(weights[i]),
+                float(heights[i]),
+                "Berdiri" if ages[i] >= 730 else "Terlentang",
+            ]
+        )
+    return requests
+
+
+def arrival_offsets(n: int, rate: float, seed: int = 0) -> np.ndarray:
+    """
+    Jadwal kedatangan (detik dari mulai). `rate` <= 0 artinya semua langsung
+    dikirim (closed-loop, sebanyak `concurrency`).
+    """
+    if rate <= 0:
+        return np.zeros(n)
+    gaps = np.random.default_rng(seed).exponential(1.0 / rate, n)
+    return np.cumsum(gaps) - gaps[0]
+
+
+def _is_error(result) -> bool:
+    # analyze_gizi nangkep exception sendiri dan balikin status 'Error: ...'
+    status = result[3] if len(result) > 3 else None
+    if isinstance(status, dict):
+        status = status.get("label")
+    return isinstance(status, str) and status.startswith("Error")
+
+
+def run(url: str, requests: list, concurrency: int = 10, rate: float = 0, seed: int = 0) -> dict:
+    """
+    Jalanin load test, balikin ringkasan (lihat `summarize`).
+    """
+    from gradio_client import Client
+
+    local = threading.local()
+
+    def client():
+        if not hasattr(local, "client"):
+            local.client = Client(url, verbose=False)
+        return local.client
+
+    offsets = arrival_offsets(len(requests), rate, seed)
+    n = len(requests)
+    latencies = np.full(n, np.nan)
+    errors = np.zeros(n, dtype=bool)
+    messages = {}
+
+    # Client dibikin dulu biar handshake config gak masuk latency
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(lambda _: client(), range(concurrency)))
+
+        def call(i):
+            scheduled = start + offsets[i]
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            if rate <= 0:
+                scheduled = time.perf_counter()
+            try:
+                result = client().predict(*requests[i], api_name=API_NAME)
+                errors[i] = _is_error(result)
+            except Exception as e:
+                errors[i] = True
+                messages.setdefault(type(e).__name__, str(e))
+            latencies[i] = time.perf_counter() - scheduled
+
+        start = time.perf_counter()
+        list(pool.map(call, range(n)))
+        wall = time.perf_counter() - start
+
+    return summarize(latencies, errors, wall, messages)
+
+
+def summarize(latencies, errors, wall: float, messages=None) -> dict:
+    latencies = np.asarray(latencies, dtype=np.float64)
+    done = latencies[~np.isnan(latencies)]
+    summary = {
+        "requests": int(len(latencies)),
+        "errors": int(np.sum(errors)),
+        "error_rate": float(np.mean(errors)) if len(latencies) else 0.0,
+        "wall_seconds": wall,
+        "throughput": float(len(done) / wall) if wall > 0 else 0.0,
+        "mean_ms": float(done.mean() * 1000) if len(done) else None,
+        "max_ms": float(done.max() * 1000) if len(done) else None,
+        "error_messages": messages or {},
+    }
+    for p in PERCENTILES:
+        summary[f"p{p}_ms"] = float(np.percentile(done, p) * 1000) if len(done) else None
+    return summary
+
+
+def format_summary(summary: dict) -> str:
+    lines = [
+        f"{summary['requests']} request dalam {summary['wall_seconds']:.2f} detik "
+        f"({summary['throughput']:.1f} req/detik)",
+        f"error: {summary['errors']} ({summary['error_rate']:.2%})",
+    ]
+    if summary["mean_ms"] is not None:
+        percentiles = "  ".join(f"p{p}={summary[f'p{p}_ms']:.0f}" for p in PERCENTILES)
+        lines.append(
+            f"latency (ms): {percentiles}  mean={summary['mean_ms']:.0f}  max={summary['max_ms']:.0f}"
+        )
+    for name, message in summary["error_messages"].items():
+        lines.append(f"  {name}: {message}")
+    return "\n".join(lines)
+
+
+def launch_local(port: int = 0):
+    """
+    Jalanin `app.demo` di proses ini (127.0.0.1), balikin URL-nya.
+    """
+    os.environ.setdefault("GRADIO_ANALYTICS_ENABLED", "False")
+    import app
+
+    app.demo.launch(
+        server_name="127.0.0.1",
+        server_port=port or None,
+        prevent_thread_lock=True,
+        quiet=True,
+    )
+    return app.demo.local_url.rstrip("/")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test endpoint analyze_gizi")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--url", default="http://127.0.0.1:7860", help="App yang udah jalan")
+    target.add_argument("--launch", action="store_true", help="Jalanin app di proses ini")
+    parser.add_argument("--replay", help="File JSONL rekaman request")
+    parser.add_argument("--requests", type=int, default=200, help="Jumlah request sintetis")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--rate", type=float, default=0, help="Request/detik (0 = secepatnya)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="Simpan ringkasan ke file JSON")
+    args = parser.parse_args()
+
+    url = launch_local() if args.launch else args.url.rstrip("/")
+    requests = load_replay(args.replay) if args.replay else synthetic_requests(args.requests, args.seed)
+
+    print(
+        f"{len(requests)} request ke {url}{API_NAME}, concurrency {args.concurrency}, "
+        f"rate {args.rate or 'maks'}"
+    )
+    summary = run(url, requests, args.concurrency, args.rate, args.seed)
+    print(format_summary(summary))
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
@@ -0,0 +1,396 @@
+"""
+Pipeline streaming buat skoring data pengukuran balita dalam jumlah besar.
+
+Alurnya: baca JSONL -> validasi -> koreksi umur/tinggi -> Z-score ->
+screening plausibilitas (lihat `quality`) -> label fuzzy -> sink.
+Tiap tahap itu generator yang nerima dan ngeluarin batch (pandas DataFrame),
+jadi input sepanjang apapun tetep jalan dengan memori konstan (cuma satu batch
+yang dipegang per tahap).
+
+Format satu baris input (field lain ikut diterusin ke output):
+    {"nama": "Budi", "dob": "2023-01-01", "gender": "L", "weight": 12.2,
+     "height": 87.1, "measure_mode": "standing", "visit_date": "2025-01-01"}
+
+Contoh:
+    python pipeline.py input.jsonl output.csv --batch-size 5000
+"""
+
+import argparse
+import itertools
+import json
+import sys
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+import quality
+import utils
+import versions
+from fuzzy_logic import fuzzy_system
+
+DEFAULT_BATCH_SIZE = 1000
+
+REQUIRED_FIELDS = ["dob", "gender", "weight", "height", "measure_mode"]
+
+# Input boleh pake label dari UI atau kode internal
+GENDER_CODES = {"L": "L", "P": "P", "Laki-laki": "L", "Perempuan": "P"}
+MODE_CODES = {
+    "recumbent": "recumbent",
+    "standing": "standing",
+    "Terlentang": "recumbent",
+    "Berdiri": "standing",
+}
+
+LABEL_UNSCORED = "Tidak Dapat Dianalisa"
+
+# Kolom ID / versi (hash hex, misal 12 karakter) dari CSV harus tetep teks,
+# jangan sampe kebaca angka ("012345678901" jadi int, "1234567890e1" jadi float)
+TEXT_COLUMNS = ["ref_version", "rule_version", "ref_standard", "child_id", "key"]
+
+
+# --- Source ---
+
+
+def read_jsonl(source, batch_size: int = DEFAULT_BATCH_SIZE):
+    """
+    Baca JSONL per batch. `source` bisa path, file object, atau '-' (stdin).
+    Baris yang bukan JSON object tetep dikirim dengan kolom 'error',
+    biar ketangkep di tahap validasi (gak diem-diem ilang).
+    """
+    close = False
+    if isinstance(source, str):
+        if source == "-":
+            f = sys.stdin
+        else:
+            f = open(source, encoding="utf-8")
+            close = True
+    else:
+        f = source
+
+    try:
+        while True:
+            lines = list(itertools.islice(f, batch_size))
+            if not lines:
+                break
+
+            records = []
+            for line in lines:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    record = None
+                if not isinstance(record, dict):
+                    record = {"error": "JSON tidak valid."}
+                records.append(record)
+
+            if records:
+                yield pd.DataFrame.from_records(records)
+    finally:
+        if close:
+            f.close()
+
+
+# --- Stages ---
+
+
+def _flag(error: pd.Series, condition, reason: str) -> pd.Series:
+    # Cuma isi alasan pertama, biar pesan error-nya gak numpuk
+    return error.mask(error.isna() & condition, reason)
+
+
+def validate(batches, on_reject=None):
+    """
+    Normalisasi dan validasi tiap batch (range sama kayak di `analyze_gizi`).
+    Baris yang gak valid dibuang dari aliran; kalo `on_reject` dikasih,
+    baris itu dikirim ke sana lengkap dengan kolom 'error'.
+    """
+    today = pd.Timestamp(date.today())
+
+    for batch in batches:
+        batch = batch.copy()
+        for field in REQUIRED_FIELDS + ["visit_date"]:
+            if field not in batch.columns:
+                batch[field] = None
+
+        if "error" in batch.columns:
+            error = batch["error"].astype(object)
+        else:
+            error = pd.Series(None, index=batch.index, dtype=object)
+
+        batch["gender"] = batch["gender"].map(GENDER_CODES)
+        batch["measure_mode"] = batch["measure_mode"].map(MODE_CODES)
+        batch["weight"] = pd.to_numeric(batch["weight"], errors="coerce")
+        batch["height"] = pd.to_numeric(batch["height"], errors="coerce")
+        batch["dob"] = pd.to_datetime(batch["dob"], errors="coerce", format="ISO8601")
+        visit_missing = batch["visit_date"].isna()
+        batch["visit_date"] = pd.to_datetime(
+            batch["visit_date"], errors="coerce", format="ISO8601"
+        ).mask(visit_missing, today)
+
+        error = _flag(error, batch["dob"].isna(), "Tanggal lahir tidak valid.")
+        error = _flag(error, batch["visit_date"].isna(), "Tanggal periksa tidak valid.")
+        error = _flag(error, batch["gender"].isna(), "Jenis kelamin tidak valid.")
+        error = _flag(
+            error, batch["measure_mode"].isna(), "Posisi pengukuran tidak valid."
+        )
+        error = _flag(
+            error,
+            ~batch["height"].between(10, 200),
+            "Tinggi badan tidak valid (Range: 10cm - 200cm).",
+        )
+        error = _flag(
+            error,
+            ~batch["weight"].between(1, 100),
+            "Berat badan tidak valid (Range: 1kg - 100kg).",
+        )
+
+        bad = error.notna()
+        if on_reject is not None and bad.any():
+            on_reject(batch[bad].assign(error=error[bad]))
+
+        good = batch[~bad]
+        if "error" in good.columns:
+            good = good.drop(columns="error")
+        if not good.empty:
+            yield good
+
+
+def correct(batches):
+    """
+    Hitung umur (bulan) dan tinggi terkoreksi per batch.
+    """
+    for batch in batches:
+        batch = batch.copy()
+        batch["age_months"] = utils.calculate_age_months_batch(
+            batch["dob"], batch["visit_date"]
+        )
+        batch["corrected_height"] = utils.correct_height_batch(
+            batch["age_months"].to_numpy(),
+            batch["height"].to_numpy(),
+            batch["measure_mode"].to_numpy(),
+        )
+        yield batch
+
+
+def z_scores(batches, standard=None):
+    """
+    Hitung IMT dan Z-score BB/U, TB/U, BB/TB, IMT/U per batch, plus versi
+    tabel standar yang dipake ('ref_version') dan nama standarnya
+    ('ref_standard'). `standard` = selector standar referensi (lihat
+    `utils.STANDARDS`), default PMK 2/2020.
+    """
+    ref_version = utils.get_reference(standard).version
+    ref_standard = utils.standard_name(standard)
+    for batch in batches:
+        z = utils.get_z_scores_batch(
+            batch["gender"].to_numpy(),
+            batch["age_months"].to_numpy(),
+            batch["weight"].to_numpy(),
+            batch["corrected_height"].to_numpy(),
+            standard,
+        )
+        yield batch.assign(**z, ref_version=ref_version, ref_standard=ref_standard)
+
+
+def fuzzy_label(batches, system=fuzzy_system):
+    """
+    Kasih skor dan label fuzzy per batch. Record yang Z-score-nya gak lengkap
+    (diluar jangkauan standar) atau gak lolos screening plausibilitas dapet
+    label 'Tidak Dapat Dianalisa'. Versi rule base dicatat di 'rule_version'.
+    """
+    for batch in batches:
+        ok = batch[["z_bb_u", "z_tb_u", "z_bb_tb"]].notna().all(axis=1).to_numpy()
+        if "plausible" in batch.columns:
+            ok &= batch["plausible"].to_numpy(dtype=bool)
+        score = np.full(len(batch), np.nan)
+        label = np.full(len(batch), LABEL_UNSCORED, dtype=object)
+        if ok.any():
+            score[ok], label[ok] = system.predict_batch(
+                batch["z_bb_u"].to_numpy()[ok],
+                batch["z_tb_u"].to_numpy()[ok],
+                batch["z_bb_tb"].to_numpy()[ok],
+            )
+        yield batch.assign(score=score, label=label, rule_version=system.version)
+
+
+def score(batches, on_reject=None, system=fuzzy_system, on_quarantine=None, standard=None):
+    """
+    Rangkaian lengkap validasi -> koreksi -> Z-score -> screening -> label fuzzy.
+    Baris yang gak wajar dikirim ke `on_quarantine` kalo dikasih (lihat
+    `quality.screen_stage`), kalo gak tetep di output tanpa skor. Batas umur
+    screening ngikutin jangkauan tabel `standard`.
+    """
+    checked = z_scores(correct(validate(batches, on_reject)), standard)
+    age_range = utils.get_reference(standard).age_range
+    return fuzzy_label(quality.screen_stage(checked, on_quarantine, age_range), system)
+
+
+# --- Sinks ---
+
+
+def _for_output(batch: pd.DataFrame) -> pd.DataFrame:
+    # Tanggal ditulis YYYY-MM-DD aja, gak perlu jam
+    batch = batch.copy()
+    for col in batch.columns:
+        if pd.api.types.is_datetime64_any_dtype(batch[col]):
+            batch[col] = batch[col].dt.strftime("%Y-%m-%d")
+    return batch
+
+
+def write_jsonl(batches, dest) -> int:
+    """
+    Tulis semua batch ke file JSONL. Returns: jumlah baris yang ditulis.
+    """
+    close = isinstance(dest, str)
+    f = open(dest, "w", encoding="utf-8") if close else dest
+    total = 0
+    try:
+        for batch in batches:
+            if not batch.empty:
+                f.write(_for_output(batch).to_json(orient="records", lines=True))
+            total += len(batch)
+    finally:
+        if close:
+            f.close()
+    return total
+
+
+def write_csv(batches, dest) -> int:
+    """
+    Tulis semua batch ke file CSV (header dari batch pertama).
+    Returns: jumlah baris yang ditulis.
+    """
+    close = isinstance(dest, str)
+    f = open(dest, "w", encoding="utf-8", newline="") if close else dest
+    total = 0
+    columns = None
+    try:
+        for batch in batches:
+            if columns is None:
+                columns = list(batch.columns)
+            _for_output(batch).reindex(columns=columns).to_csv(
+                f, header=total == 0, index=False
+            )
+            total += len(batch)
+    finally:
+        if close:
+            f.close()
+    return total
+
+
+def read_source(source, batch_size: int = DEFAULT_BATCH_SIZE):
+    """
+    Kayak `read_jsonl`, tapi path yang akhirannya '.csv' dibaca sebagai CSV.
+    """
+    if isinstance(source, str) and source.endswith(".csv"):
+        return pd.read_csv(
+            source, chunksize=batch_size, dtype={column: str for column in TEXT_COLUMNS}
+        )
+    return read_jsonl(source, batch_size)
+
+
+def _counted(batches, on_batch):
+    # Lapor jumlah baris input tiap batch (buat progress job latar)
+    for batch in batches:
+        on_batch(len(batch))
+        yield batch
+
+
+def run_pipeline(
+    source,
+    dest,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    rejects=None,
+    quarantine=None,
+    on_batch=None,
+    summary=None,
+    standard=None,
+) -> int:
+    """
+    Jalanin pipeline lengkap dari `source` (JSONL, atau CSV kalo '.csv') ke `dest`.
+    Format output dipilih dari ekstensi: '.csv' -> CSV, '.parquet' / '.arrow'
+    -> kolumnar (lihat modul `export`), selain itu JSONL.
+    Baris yang gak valid ditulis ke `rejects` (JSONL) kalo dikasih, baris
+    yang gak wajar (screening plausibilitas) ke `quarantine`.
+    `on_batch(n)` dipanggil tiap `n` baris input kebaca. Kalo `summary`
+    (`zsummary.SummaryTable`) dikasih, distribusi Z hasilnya diringkas ke situ.
+    `standard` = standar referensi buat Z-score (default PMK 2/2020).
+    """
+    reject_file = open(rejects, "w", encoding="utf-8") if rejects else None
+    quarantine_file = open(quarantine, "w", encoding="utf-8") if quarantine else None
+
+    def on_reject(batch):
+        write_jsonl([batch], reject_file)
+
+    def on_quarantine(batch):
+        write_jsonl([batch], quarantine_file)
+
+    try:
+        batches = read_source(source, batch_size)
+        if on_batch is not None:
+            batches = _counted(batches, on_batch)
+        scored = score(
+            batches,
+            on_reject=on_reject if reject_file else None,
+            on_quarantine=on_quarantine if quarantine_file else None,
+            standard=standard,
+        )
+        if summary is not None:
+            import zsummary
+
+            scored = zsummary.summarize_stage(scored, summary)
+        if isinstance(dest, str) and dest.endswith(".csv"):
+            return write_csv(scored, dest)
+        if isinstance(dest, str) and dest.endswith((".parquet", ".arrow")):
+            import export
+
+            if dest.endswith(".parquet"):
+                return export.write_parquet(scored, dest)
+            return export.write_arrow(scored, dest)
+        return write_jsonl(scored, dest)
+    finally:
+        if reject_file:
+            reject_file.close()
+        if quarantine_file:
+            quarantine_file.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Skoring massal data JSONL")
+    parser.add_argument("input", help="File JSONL / CSV input ('-' buat stdin)")
+    parser.add_argument(
+        "output", help="File output (.csv, .jsonl, .parquet, atau .arrow)"
+    )
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--rejects", help="File JSONL buat baris yang gak valid")
+    parser.add_argument("--quarantine", help="File JSONL buat baris yang gak wajar")
+    parser.add_argument("--summary", help="Simpan ringkasan distribusi Z ke CSV")
+    parser.add_argument(
+        "--standard",
+        help=f"Standar referensi: {', '.join(utils.STANDARDS.available())} (default PMK 2/2020)",
+    )
+    args = parser.parse_args()
+
+    # Snapshot versi tabel + rule yang dipake, buat skoring ulang nanti (rescore.py)
+    versions.VersionStore().snapshot(utils.get_reference(args.standard))
+    table = None
+    if args.summary:
+        import zsummary
+
+        table = zsummary.SummaryTable()
+    n = run_pipeline(
+        args.input,
+        args.output,
+        args.batch_size,
+        args.rejects,
+        args.quarantine,
+        summary=table,
+        standard=args.standard,
+    )
+    print(f"{n} record berhasil diproses.")
+    if table is not None:
+        table.report().to_csv(args.summary, index=False)
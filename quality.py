@@ -0,0 +1,157 @@
+"""
+Screening kualitas data (plausibilitas) buat data pengukuran dalam jumlah besar.
+
+Semua cek dikerjain vectorized (pandas/numpy) dalam satu lewatan, gak ada
+loop Python per baris. Tiap baris dapet kolom flag boolean, kolom
+'quality_issues' (penjelasan, dipisah '; '), dan 'plausible'.
+
+Flag yang dicek:
+    - flag_z_extreme       : Z-score diluar batas implausibel WHO
+    - flag_age             : umur diluar jangkauan tabel standar yang dipake
+                             (default 0-60 bulan)
+    - flag_visit_before_dob: tanggal periksa sebelum tanggal lahir
+    - flag_height_decrease : tinggi turun dibanding kunjungan sebelumnya
+    - flag_duplicate       : pengukuran dobel (anak + tanggal periksa sama)
+"""
+
+import numpy as np
+import pandas as pd
+
+# Batas Z-score implausibel (WHO Child Growth Standards / WHO Anthro)
+Z_LIMITS = {
+    "z_bb_u": (-6.0, 5.0),
+    "z_tb_u": (-6.0, 6.0),
+    "z_bb_tb": (-5.0, 5.0),
+    "z_imt_u": (-5.0, 5.0),
+}
+
+# Jangkauan umur default (balita); standar lain bawa jangkauannya sendiri
+# (`ReferenceTables.age_range`, misal 61-228 bulan buat WHO 2007 5-19 tahun)
+AGE_RANGE_MONTHS = (0, 60)
+
+# Toleransi error ukur sebelum tinggi yang turun dianggap gak wajar
+HEIGHT_DECREASE_TOLERANCE_CM = 0.5
+
+# Identitas anak kalo gak ada kolom 'child_id'
+CHILD_KEY_COLUMNS = ["nama", "dob", "gender"]
+
+FLAG_REASONS = {
+    "flag_z_extreme": "Z-score ekstrem (diluar batas WHO)",
+    "flag_age": "Umur diluar jangkauan standar",
+    "flag_visit_before_dob": "Tanggal periksa sebelum tanggal lahir",
+    "flag_height_decrease": "Tinggi badan turun dari kunjungan sebelumnya",
+    "flag_duplicate": "Pengukuran dobel (anak dan tanggal periksa sama)",
+}
+
+
+def _child_keys(df: pd.DataFrame) -> list:
+    if "child_id" in df.columns:
+        return ["child_id"]
+    return [c for c in CHILD_KEY_COLUMNS if c in df.columns]
+
+
+def screen(df: pd.DataFrame, age_range: tuple = None) -> pd.DataFrame:
+    """
+    Hitung flag plausibilitas buat semua baris `df` (index sama kayak `df`).
+    Butuh kolom hasil pipeline: dob, visit_date, age_months, corrected_height,
+    z_bb_u, z_tb_u, z_bb_tb (kolom yang gak ada, cek-nya di-skip).
+    `age_range` = (min, max) bulan, default AGE_RANGE_MONTHS.
+    """
+    flags = pd.DataFrame(index=df.index)
+    false = pd.Series(False, index=df.index)
+
+    # 1. Z-score ekstrem
+    flags["flag_z_extreme"] = _z_extreme(df)
+
+    # 2. Umur diluar jangkauan balita
+    if "age_months" in df.columns:
+        low, high = age_range or AGE_RANGE_MONTHS
+        flags["flag_age"] = (df["age_months"] < low) | (df["age_months"] > high)
+    else:
+        flags["flag_age"] = false
+
+    # 3. Tanggal periksa sebelum lahir
+    if {"dob", "visit_date"}.issubset(df.columns):
+        flags["flag_visit_before_dob"] = df["visit_date"] < df["dob"]
+    else:
+        flags["flag_visit_before_dob"] = false
+
+    keys = _child_keys(df)
+    if keys and "visit_date" in df.columns:
+        # 4. Pengukuran dobel: baris pertama dianggap asli, sisanya dobel
+        flags["flag_duplicate"] = df.duplicated(subset=keys + ["visit_date"], keep="first")
+
+        # 5. Tinggi turun antar kunjungan (urut per anak per tanggal)
+        height_col = "corrected_height" if "corrected_height" in df.columns else "height"
+        ordered = df[keys + ["visit_date", height_col]][~flags["flag_duplicate"]]
+        ordered = ordered.sort_values(keys + ["visit_date"], kind="stable")
+        previous = ordered.groupby(keys, sort=False, dropna=False)[height_col].shift()
+        dropped = ordered[height_col] < previous - HEIGHT_DECREASE_TOLERANCE_CM
+        flags["flag_height_decrease"] = dropped.reindex(df.index, fill_value=False)
+    else:
+        flags["flag_duplicate"] = false
+        flags["flag_height_decrease"] = false
+
+    return _summarize(flags)
+
+
+def _z_extreme(df: pd.DataFrame) -> pd.Series:
+    z_extreme = pd.Series(False, index=df.index)
+    for col, (low, high) in Z_LIMITS.items():
+        if col in df.columns:
+            z_extreme |= (df[col] < low) | (df[col] > high)
+    return z_extreme
+
+
+def _summarize(flags: pd.DataFrame) -> pd.DataFrame:
+    flags = flags[list(FLAG_REASONS)].fillna(False).astype(bool)
+
+    # Penjelasan: gabung alasan tiap flag yang nyala (masih vectorized per kolom)
+    issues = pd.Series("", index=flags.index, dtype=object)
+    for col, reason in FLAG_REASONS.items():
+        issues = issues + np.where(flags[col], reason + "; ", "")
+    flags["quality_issues"] = issues.str.rstrip("; ")
+    flags["plausible"] = ~flags[list(FLAG_REASONS)].any(axis=1)
+    return flags
+
+
+def rescreen_z(df: pd.DataFrame, age_range: tuple = None) -> pd.DataFrame:
+    """
+    Update flag Z-score ekstrem (plus 'quality_issues' dan 'plausible') abis
+    Z-score dihitung ulang. Flag lain (dobel, tinggi turun) dipertahanin,
+    soalnya butuh konteks baris lain yang udah gak ada di sini.
+    """
+    if not set(FLAG_REASONS).issubset(df.columns):
+        columns = list(FLAG_REASONS) + ["quality_issues", "plausible"]
+        return df.drop(columns=columns, errors="ignore").join(screen(df, age_range))
+    flags = df[list(FLAG_REASONS)].copy()
+    flags["flag_z_extreme"] = _z_extreme(df)
+    return df.assign(**_summarize(flags))
+
+
+def split(df: pd.DataFrame, age_range: tuple = None):
+    """
+    Pisahin `df` jadi (baris wajar, baris karantina) lengkap dengan kolom flag.
+    """
+    screened = df.join(screen(df, age_range))
+    return screened[screened["plausible"]], screened[~screened["plausible"]]
+
+
+def screen_stage(batches, on_quarantine=None, age_range: tuple = None):
+    """
+    Tahap pipeline: tambah kolom flag ke tiap batch.
+    Kalo `on_quarantine` dikasih, baris yang gak wajar dikirim ke sana dan
+    dibuang dari aliran; kalo gak, baris tetep lanjut (tahap fuzzy nge-skip).
+
+    Cek dobel / tinggi turun cuma dalam satu batch (biar memori tetep konstan);
+    buat cek lintas seluruh data pake `screen` langsung di DataFrame penuh.
+    """
+    for batch in batches:
+        if on_quarantine is None:
+            yield batch.join(screen(batch, age_range))
+            continue
+        clean, quarantined = split(batch, age_range)
+        if not quarantined.empty:
+            on_quarantine(quarantined)
+        if not clean.empty:
+            yield clean
@@ -0,0 +1,420 @@
+"""
+Representasi ringkas tabel standar antropometri (std_age.csv / std_height.csv).
+
+Daripada nyimpen DataFrame pandas (kolom 'gender' dan 'index_type' dtype
+object, index, metadata), semua nilai SD disimpen di satu blok numpy yang
+contiguous:
+    - gender dan index_type jadi kode kategori (int kecil)
+    - `keys`   : array 1D umur (bulan) / tinggi (cm), urut per (gender, index)
+    - `values` : array 2D (baris, 7 kolom REF_COLUMNS), stride baris tetap
+    - `bounds` : [kode gender, kode index] -> (awal, akhir) baris di blok
+    - `age_range`: (umur min, umur max) bulan tabel BB/U, PB/U, TB/U, dipake
+      screening plausibilitas (`quality.screen`)
+Satu (gender, index) = satu potongan (view) dari blok itu, gak ada copy.
+
+Versi tabel = hash isi semua slot (`version`), dicatat di tiap hasil skoring
+biar ketauan hasil mana yang basi kalo CSV standar dikoreksi (lihat rescore.py).
+
+Beberapa standar (misal PMK 2/2020 buat balita, WHO 2007 5-19 tahun buat
+program sekolah) bisa jalan bareng lewat `StandardRegistry`: tiap standar
+didaftarin pake nama + versi, tabelnya baru dibaca pas pertama dipake.
+
+Cek ukuran memori: python reference.py
+"""
+
+import argparse
+import hashlib
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+REF_COLUMNS = ["sd_n3", "sd_n2", "sd_n1", "median", "sd_p1", "sd_p2", "sd_p3"]
+
+# Index yang nentuin jangkauan umur standar (`age_range`). IMT/U sengaja gak
+# ikut: di PMK 2/2020 tabelnya sampe 228 bulan padahal BB/U, TB/U cuma 0-60.
+AGE_RANGE_INDEXES = ("BB_U", "PB_U", "TB_U")
+
+# Nama file per standar di folder `StandardRegistry.discover`
+AGE_FILE = "std_age.csv"
+HEIGHT_FILE = "std_height.csv"
+
+
+class ReferenceRow:
+    """
+    Satu baris tabel standar (dipake jalur per-record / scalar).
+    """
+
+    __slots__ = ("key",) + tuple(REF_COLUMNS)
+
+    def __init__(self, key, values):
+        self.key = key
+        for name, value in zip(REF_COLUMNS, values):
+            setattr(self, name, value)
+
+    def __repr__(self):
+        return f"ReferenceRow(key={self.key}, median={self.median})"
+
+
+class ReferenceTables:
+    """
+    Semua tabel standar dalam satu blok float contiguous (lihat docstring modul).
+    """
+
+    __slots__ = ("genders", "index_types", "keys", "values", "bounds", "age_range", "_version")
+
+    def __init__(self, genders, index_types, keys, values, bounds, age_range=None):
+        self.genders = {g: i for i, g in enumerate(genders)}
+        self.index_types = {t: i for i, t in enumerate(index_types)}
+        self.keys = keys
+        self.values = values
+        self.bounds = bounds
+        self.age_range = age_range
+        self._version = None
+
+    @classmethod
+    def from_frames(cls, df_age: pd.DataFrame, df_height: pd.DataFrame, dtype=np.float64):
+        """
+        Bangun dari DataFrame hasil `pd.read_csv` (format std_age / std_height).
+        """
+        frames = [
+            df_age.rename(columns={"age_months": "key"}),
+            df_height.rename(columns={"height_cm": "key"}),
+        ]
+        df = pd.concat(frames, ignore_index=True)
+        df["gender"] = df["gender"].astype("category")
+        df["index_type"] = df["index_type"].astype("category")
+        genders = list(df["gender"].cat.categories)
+        index_types = list(df["index_type"].cat.categories)
+
+        g_codes = df["gender"].cat.codes.to_numpy()
+        i_codes = df["index_type"].cat.codes.to_numpy()
+        key = df["key"].to_numpy(dtype=np.float64)
+        order = np.lexsort((key, i_codes, g_codes))
+
+        keys = np.ascontiguousarray(key[order])
+        values = np.ascontiguousarray(df[REF_COLUMNS].to_numpy(dtype=dtype)[order])
+
+        bounds = np.zeros((len(genders), len(index_types), 2), dtype=np.int32)
+        pair = g_codes[order].astype(np.int64) * len(index_types) + i_codes[order]
+        for p in np.unique(pair):
+            g, i = divmod(int(p), len(index_types))
+            bounds[g, i] = np.searchsorted(pair, [p, p + 1])
+
+        core = df_age[df_age["index_type"].isin(AGE_RANGE_INDEXES)]
+        ages = pd.to_numeric((core if len(core) else df_age)["age_months"], errors="coerce").dropna()
+        age_range = (float(ages.min()), float(ages.max())) if len(ages) else None
+        return cls(genders, index_types, keys, values, bounds, age_range)
+
+    @classmethod
+    def from_csv(cls, std_age_file: str, std_height_file: str = None, dtype=np.float64):
+        """
+        Baca dari CSV. `std_height_file` boleh None buat standar yang cuma
+        punya tabel per umur (misal WHO 2007 5-19 tahun).
+        """
+        if std_height_file is None:
+            df_height = pd.DataFrame(columns=["gender", "index_type", "height_cm"] + REF_COLUMNS)
+        else:
+            df_height = pd.read_csv(std_height_file)
+        return cls.from_frames(pd.read_csv(std_age_file), df_height, dtype)
+
+    @classmethod
+    def load(cls, file):
+        """
+        Baca snapshot hasil `save` (file .npz).
+        """
+        with np.load(file) as data:
+            # Snapshot lama belum nyimpen age_range
+            age_range = tuple(data["age_range"].tolist()) if "age_range" in data.files else None
+            return cls(
+                data["genders"].tolist(),
+                data["index_types"].tolist(),
+                data["keys"],
+                data["values"],
+                data["bounds"],
+                age_range,
+            )
+
+    def save(self, file):
+        np.savez(
+            file,
+            genders=np.array(list(self.genders)),
+            index_types=np.array(list(self.index_types)),
+            keys=self.keys,
+            values=self.values,
+            bounds=self.bounds,
+            **({"age_range": np.array(self.age_range)} if self.age_range else {}),
+        )
+
+    def slots(self):
+        """
+        Semua (gender, index_type) yang ada isinya, urut nama.
+        """
+        return [
+            (g, t)
+            for g in sorted(self.genders)
+            for t in sorted(self.index_types)
+            if len(self.table(g, t)[0])
+        ]
+
+    @property
+    def version(self) -> str:
+        """
+        Hash isi tabel (12 digit hex). Gak tergantung urutan kategori / dtype.
+        """
+        if self._version is None:
+            h = hashlib.sha256()
+            for g, t in self.slots():
+                keys, values = self.table(g, t)
+                h.update(f"{g}|{t}|{len(keys)}|".encode())
+                h.update(np.ascontiguousarray(keys, dtype=np.float64).tobytes())
+                h.update(np.ascontiguousarray(values, dtype=np.float64).tobytes())
+            self._version = h.hexdigest()[:12]
+        return self._version
+
+    def changed_slots(self, other) -> dict:
+        """
+        Bandingin tabel ini (lama) sama `other` (baru). Balikin
+        (gender, index_type) -> (keys gabungan terurut, mask key yang barisnya
+        beda / cuma ada di salah satu). Slot yang sama persis gak ikut.
+        """
+        changed = {}
+        slots = sorted(set(self.slots()) | set(other.slots()))
+        for g, t in slots:
+            k_old, v_old = self.table(g, t)
+            k_new, v_new = other.table(g, t)
+            keys = np.union1d(k_old, k_new)
+            mask = np.ones(len(keys), dtype=bool)
+            common, i_old, i_new = np.intersect1d(k_old, k_new, return_indices=True)
+            a = v_old[i_old].astype(np.float64)
+            b = v_new[i_new].astype(np.float64)
+            same = ((a == b) | (np.isnan(a) & np.isnan(b))).all(axis=1)
+            mask[np.searchsorted(keys, common[same])] = False
+            if mask.any():
+                changed[(g, t)] = (keys, mask)
+        return changed
+
+    def table(self, gender: str, index_type: str):
+        """
+        (keys, values) satu gender + index, keys terurut. Kosong kalo gak ada.
+        """
+        g = self.genders.get(gender)
+        i = self.index_types.get(index_type)
+        if g is None or i is None:
+            return self.keys[:0], self.values[:0]
+        start, stop = self.bounds[g, i]
+        return self.keys[start:stop], self.values[start:stop]
+
+    def row(self, gender: str, index_type: str, key):
+        """
+        Baris yang key-nya persis `key`, atau None.
+        """
+        keys, values = self.table(gender, index_type)
+        pos = int(np.searchsorted(keys, key))
+        if pos < len(keys) and keys[pos] == key:
+            return ReferenceRow(keys[pos], values[pos])
+        return None
+
+    def row_interp(self, gender: str, index_type: str, key):
+        """
+        Kayak `row`, tapi kalo gak ada yang persis, interpolasi linear dari
+        tetangga bawah dan atas. None kalo `key` diluar tabel.
+        """
+        keys, values = self.table(gender, index_type)
+        pos = int(np.searchsorted(keys, key))
+        if pos < len(keys) and keys[pos] == key:
+            return ReferenceRow(keys[pos], values[pos])
+        if pos == 0 or pos == len(keys):
+            return None
+        k1, k2 = keys[pos - 1], keys[pos]
+        y1, y2 = values[pos - 1], values[pos]
+        return ReferenceRow(key, y1 + (y2 - y1) * ((key - k1) / (k2 - k1)))
+
+    @property
+    def nbytes(self) -> int:
+        return self.keys.nbytes + self.values.nbytes + self.bounds.nbytes
+
+
+class StandardRegistry:
+    """
+    Standar referensi per (nama, versi) -> `ReferenceTables`, dibaca lazy.
+
+    Selector standar (dipake `utils.get_z_scores` dkk):
+        None             -> standar default
+        'nama'           -> versi terakhir yang didaftarin buat nama itu
+        'nama@versi'     -> versi tertentu
+        (nama, versi)    -> sama kayak 'nama@versi'
+    Standar yang gak pernah dipake gak makan memori / waktu startup.
+    """
+
+    def __init__(self):
+        self._loaders = {}
+        self._tables = {}
+        self._default = None
+        self._lock = threading.Lock()
+
+    def register(self, name: str, version: str, loader, default: bool = False):
+        """
+        Daftarin standar. `loader()` balikin `ReferenceTables`, baru dipanggil
+        pas standar ini pertama kali dipake.
+        """
+        key = (name, str(version))
+        with self._lock:
+            self._loaders[key] = loader
+            self._tables.pop(key, None)
+            if default or self._default is None:
+                self._default = key
+
+    def register_csv(
+        self, name: str, version: str, std_age_file: str, std_height_file: str = None, **kwargs
+    ):
+        self.register(
+            name, version, lambda: ReferenceTables.from_csv(std_age_file, std_height_file), **kwargs
+        )
+
+    def discover(self, root: str) -> list:
+        """
+        Daftarin semua `root/<nama>/<versi>/std_age.csv` (+ std_height.csv
+        kalo ada). Cuma list folder, CSV-nya belum dibaca.
+        """
+        found = []
+        if not os.path.isdir(root):
+            return found
+        for name in sorted(os.listdir(root)):
+            name_dir = os.path.join(root, name)
+            if not os.path.isdir(name_dir):
+                continue
+            for version in sorted(os.listdir(name_dir)):
+                age_file = os.path.join(name_dir, version, AGE_FILE)
+                if not os.path.isfile(age_file):
+                    continue
+                height_file = os.path.join(name_dir, version, HEIGHT_FILE)
+                if not os.path.isfile(height_file):
+                    height_file = None
+                self.register_csv(name, version, age_file, height_file)
+                found.append(f"{name}@{version}")
+        return found
+
+    def resolve(self, standard=None) -> tuple:
+        """
+        Selector -> (nama, versi). ValueError kalo gak ada yang cocok.
+        """
+        if standard is None:
+            if self._default is None:
+                raise ValueError("Belum ada standar referensi yang didaftarin.")
+            return self._default
+        if isinstance(standard, tuple):
+            name, version = standard[0], str(standard[1])
+        else:
+            name, _, version = str(standard).partition("@")
+        if version:
+            key = (name, version)
+            if key in self._loaders:
+                return key
+        else:
+            versions = [key for key in self._loaders if key[0] == name]
+            if versions:
+                return versions[-1]
+        raise ValueError(
+            f"Standar '{standard}' gak ada. Yang tersedia: {', '.join(self.available())}"
+        )
+
+    def get(self, standard=None) -> ReferenceTables:
+        key = self.resolve(standard)
+        tables = self._tables.get(key)
+        if tables is None:
+            with self._lock:
+                tables = self._tables.get(key)
+                if tables is None:
+                    tables = self._tables[key] = self._loaders[key]()
+        return tables
+
+    def available(self) -> list:
+        return [f"{name}@{version}" for name, version in self._loaders]
+
+    def loaded(self) -> list:
+        return [f"{name}@{version}" for name, version in self._tables]
+
+
+def _rss() -> int:
+    # Resident set size proses ini (byte), dari /proc (Linux); None kalo gak ada
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _worker_rss(kind: str, std_age_file: str, std_height_file: str, snapshot: str):
+    """
+    Kenaikan RSS proses worker (fresh) gara-gara megang tabel standar:
+    'dataframes' = baca CSV jadi DataFrame, 'compact' = load blok ringkas.
+    """
+    before = _rss()
+    if kind == "dataframes":
+        held = (pd.read_csv(std_age_file), pd.read_csv(std_height_file))
+    else:
+        held = ReferenceTables.load(snapshot)
+    after = _rss()
+    del held
+    return None if before is None or after is None else after - before
+
+
+def memory_report(std_age_file: str, std_height_file: str, worker_rss: bool = True) -> dict:
+    """
+    Ukuran tabel standar, dalam byte:
+        - dataframes / compact_float64 / compact_float32: ukuran data tabelnya
+          aja (DataFrame deep vs `nbytes` blok numpy), bukan memori proses
+        - rss_dataframes / rss_compact: kenaikan RSS proses worker baru
+          (spawn) pas megang tabel versi DataFrame vs blok ringkas. Ikut
+          ngitung buffer parser CSV, allocator, dll, jadi angkanya kasar
+          (granularitas page). None kalo RSS gak bisa dibaca (non-Linux) atau
+          `worker_rss` False.
+    """
+    df_age = pd.read_csv(std_age_file)
+    df_height = pd.read_csv(std_height_file)
+    compact = ReferenceTables.from_frames(df_age, df_height)
+    report = {
+        "dataframes": int(
+            df_age.memory_usage(deep=True).sum() + df_height.memory_usage(deep=True).sum()
+        ),
+        "compact_float64": compact.nbytes,
+        "compact_float32": ReferenceTables.from_frames(df_age, df_height, np.float32).nbytes,
+        "rss_dataframes": None,
+        "rss_compact": None,
+    }
+    if worker_rss:
+        context = multiprocessing.get_context("spawn")
+        with tempfile.TemporaryDirectory() as tmp:
+            snapshot = os.path.join(tmp, "ref.npz")
+            compact.save(snapshot)
+            for kind in ("dataframes", "compact"):
+                # Proses baru tiap pengukuran biar gak kecampur sisa yang lain
+                with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                    report[f"rss_{kind}"] = pool.submit(
+                        _worker_rss, kind, std_age_file, std_height_file, snapshot
+                    ).result()
+    return report
+
+
+if __name__ == "__main__":
+    import utils
+
+    parser = argparse.ArgumentParser(description="Ukuran memori tabel standar")
+    parser.add_argument("--age", default=utils.STD_AGE_FILE)
+    parser.add_argument("--height", default=utils.STD_HEIGHT_FILE)
+    args = parser.parse_args()
+
+    report = memory_report(args.age, args.height)
+    print("Ukuran data tabel:")
+    for name in ("dataframes", "compact_float64", "compact_float32"):
+        size = report[name]
+        print(f"  {name:16}: {size / 1024:8.1f} KiB ({size / report['dataframes']:.0%})")
+    print("Kenaikan RSS proses worker:")
+    for name in ("rss_dataframes", "rss_compact"):
+        size = report[name]
+        print(f"  {name:16}: " + ("-" if size is None else f"{size / 1024:8.1f} KiB"))
@@ -0,0 +1,356 @@
+"""
+Pencarian riwayat kunjungan (tab "Riwayat Data") pake index trigram.
+
+Sumber datanya jurnal lokal dari `capture.py`. Yang disimpen di memori cuma:
+    - posting list trigram -> id dokumen (array int32), buat nama anak dan
+      nama orang tua (index terpisah)
+    - tanggal lahir -> id dokumen
+    - id dokumen -> byte offset baris di jurnal (record lengkap dibaca dari
+      file cuma buat hasil yang ditampilin)
+Index di-update incremental: `refresh` cuma baca baris jurnal yang baru
+ditambahin sejak refresh terakhir (dipanggil abis simpan data). Index awal
+(beberapa detik buat ratusan ribu kunjungan) dibikin di thread latar pas app
+start (`start_background_refresh`); selama itu pencarian tetep jalan di
+bagian yang udah ke-index, lock-nya dilepas tiap REFRESH_CHUNK baris.
+
+Kemiripan nama pake trigram kayak pg_trgm:
+    - word similarity : shared / |trigram query|, seberapa banyak query
+                        ketemu di nama (buat filter, jadi 'budy' tetep
+                        nemu 'Budi Santoso')
+    - similarity      : shared / (|trigram query| + |trigram nama| - shared),
+                        buat urutan kalo word similarity-nya sama
+
+Benchmark: python registry.py --records 300000
+"""
+
+import argparse
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+import unicodedata
+from array import array
+from collections import defaultdict
+from datetime import date, datetime
+from functools import lru_cache
+
+import numpy as np
+
+import capture
+
+DEFAULT_LIMIT = 20
+# Jumlah baris jurnal per pegangan lock waktu refresh
+REFRESH_CHUNK = 5000
+# Batas minimal word similarity (sama kayak default pg_trgm)
+SIMILARITY_THRESHOLD = 0.6
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+_ISO_DATE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+_DATE_PATTERNS = [
+    (re.compile(r"^\d{4}-\d{1,2}-\d{1,2}$"), "%Y-%m-%d"),
+    (re.compile(r"^\d{1,2}[/-]\d{1,2}[/-]\d{4}$"), "%d-%m-%Y"),
+]
+
+
+def normalize(text) -> str:
+    """
+    Huruf kecil, tanpa aksen, selain huruf/angka jadi spasi.
+    """
+    text = str(text or "")
+    if not text.isascii():
+        text = unicodedata.normalize("NFKD", text)
+        text = "".join(c for c in text if not unicodedata.combining(c))
+    return _NON_ALNUM.sub(" ", text.lower()).strip()
+
+
+@lru_cache(maxsize=65536)
+def trigrams(text) -> frozenset:
+    """
+    Trigram per kata, diawali dua spasi dan diakhiri satu spasi (kayak pg_trgm).
+    Di-cache karena nama (terutama nama orang tua) banyak yang berulang.
+    """
+    return frozenset(
+        padded[i : i + 3]
+        for padded in (f"  {word} " for word in normalize(text).split())
+        for i in range(len(padded) - 2)
+    )
+
+
+def parse_date(token: str):
+    """
+    '2023-01-05', '05-01-2023' atau '05/01/2023' -> '2023-01-05', selain itu None.
+    """
+    if _ISO_DATE.match(token):
+        try:
+            return date.fromisoformat(token).isoformat()
+        except ValueError:
+            return None
+    for pattern, fmt in _DATE_PATTERNS:
+        if pattern.match(token):
+            try:
+                return datetime.strptime(token.replace("/", "-"), fmt).date().isoformat()
+            except ValueError:
+                return None
+    return None
+
+
+class TrigramIndex:
+    """
+    Inverted index trigram -> id dokumen, bisa ditambah satu-satu.
+    """
+
+    __slots__ = ("postings", "sizes")
+
+    def __init__(self):
+        self.postings = defaultdict(lambda: array("i"))
+        self.sizes = array("H")
+
+    def add(self, doc_id: int, text):
+        grams = trigrams(str(text or ""))
+        postings = self.postings
+        for gram in grams:
+            postings[gram].append(doc_id)
+        while len(self.sizes) < doc_id:
+            self.sizes.append(0)
+        self.sizes.append(min(len(grams), 65535))
+
+    def similarity(self, grams: set, n_docs: int):
+        """
+        (ids, word similarity, similarity) semua dokumen yang punya minimal
+        satu trigram sama dengan query.
+        """
+        lists = [
+            np.frombuffer(self.postings[g], dtype=np.int32)
+            for g in grams
+            if g in self.postings
+        ]
+        if not lists:
+            return np.empty(0, dtype=np.int64), np.empty(0), np.empty(0)
+        shared = np.bincount(np.concatenate(lists), minlength=n_docs)
+        ids = np.flatnonzero(shared)
+        shared = shared[ids]
+        sizes = np.frombuffer(self.sizes, dtype=np.uint16)[ids]
+        return ids, shared / len(grams), shared / (len(grams) + sizes - shared)
+
+
+class VisitRegistry:
+    """
+    Index pencarian di atas jurnal kunjungan.
+    """
+
+    def __init__(self, journal_path: str = capture.DEFAULT_JOURNAL):
+        self.journal_path = journal_path
+        self.offsets = array("q")
+        self.names = TrigramIndex()
+        self.parents = TrigramIndex()
+        self.by_dob = defaultdict(lambda: array("i"))
+        self._indexed_to = 0
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        # Nyala kalo index awal udah selesai dibikin
+        self.ready = threading.Event()
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def _add(self, record: dict, offset: int):
+        doc_id = len(self.offsets)
+        self.offsets.append(offset)
+        self.names.add(doc_id, record.get("nama"))
+        self.parents.add(doc_id, record.get("nama_ortu"))
+        dob = parse_date(str(record.get("dob") or ""))
+        if dob:
+            self.by_dob[dob].append(doc_id)
+
+    def refresh(self) -> int:
+        """
+        Index baris jurnal yang baru (sejak refresh terakhir). Balikin jumlahnya.
+        """
+        if not os.path.exists(self.journal_path):
+            self.ready.set()
+            return 0
+        added = 0
+        with self._refresh_lock, open(self.journal_path, "rb") as f:
+            f.seek(self._indexed_to)
+            while True:
+                lines = f.readlines(REFRESH_CHUNK * 256)
+                if not lines:
+                    break
+                complete = True
+                with self._lock:
+                    offset = self._indexed_to
+                    for raw in lines:
+                        if not raw.endswith(b"\n"):
+                            complete = False
+                            break  # Baris yang lagi ditulis, tunggu refresh berikutnya
+                        try:
+                            record = json.loads(raw)
+                        except ValueError:
+                            record = None
+                        if isinstance(record, dict):
+                            self._add(record, offset)
+                            added += 1
+                        offset += len(raw)
+                    self._indexed_to = offset
+                if not complete:
+                    break
+        self.ready.set()
+        return added
+
+    def start_background_refresh(self) -> threading.Thread:
+        """
+        Bikin index awal di thread latar (dipanggil pas app start), biar
+        pencarian pertama gak nunggu beberapa detik.
+        """
+        thread = threading.Thread(target=self.refresh, daemon=True)
+        thread.start()
+        return thread
+
+    def _read(self, doc_ids) -> list:
+        records = []
+        with open(self.journal_path, "rb") as f:
+            for doc_id in doc_ids:
+                f.seek(self.offsets[doc_id])
+                records.append(json.loads(f.readline()))
+        return records
+
+    def search(
+        self,
+        query: str,
+        limit: int = DEFAULT_LIMIT,
+        threshold: float = SIMILARITY_THRESHOLD,
+    ) -> list:
+        """
+        Cari kunjungan berdasarkan nama anak / nama orang tua (boleh sebagian
+        atau salah ketik) dan/atau tanggal lahir. Hasilnya record jurnal plus
+        kolom 'skor' (0-1), urut dari yang paling mirip lalu kunjungan terbaru.
+        """
+        tokens = str(query or "").split()
+        dobs = {parse_date(t) for t in tokens} - {None}
+        text = " ".join(t for t in tokens if parse_date(t) is None)
+        grams = trigrams(text)
+
+        with self._lock:
+            n_docs = len(self.offsets)
+            score = tiebreak = candidates = None
+            if grams:
+                # Skor dokumen = yang paling mirip antara nama anak dan nama ortu
+                score = np.zeros(n_docs)
+                tiebreak = np.zeros(n_docs)
+                for index in (self.names, self.parents):
+                    ids, word_sim, sim = index.similarity(grams, n_docs)
+                    score[ids] = np.maximum(score[ids], word_sim)
+                    tiebreak[ids] = np.maximum(tiebreak[ids], sim)
+                candidates = np.flatnonzero(score >= threshold)
+
+            if dobs:
+                dob_ids = [
+                    np.frombuffer(self.by_dob[d], dtype=np.int32)
+                    for d in dobs
+                    if d in self.by_dob
+                ]
+                dob_ids = np.concatenate(dob_ids) if dob_ids else np.empty(0, dtype=np.int64)
+                if candidates is None:
+                    candidates = dob_ids
+                else:
+                    candidates = np.intersect1d(candidates, dob_ids)
+
+            if candidates is None or len(candidates) == 0:
+                return []
+
+            if score is None:
+                scores = tiebreaks = np.ones(len(candidates))
+            else:
+                scores, tiebreaks = score[candidates], tiebreak[candidates]
+            # Skor tertinggi dulu, terus nama yang paling mirip utuh,
+            # terus yang paling baru dicatat (id gede)
+            order = np.lexsort((-candidates, -tiebreaks, -scores))[:limit]
+            top = candidates[order]
+            records = self._read(top.tolist())
+
+        for record, s in zip(records, scores[order]):
+            record["skor"] = round(float(s), 2)
+        return records
+
+
+def bench(records: int = 300000, queries: int = 200, seed: int = 0) -> dict:
+    """
+    Ukur waktu bikin index dan latency pencarian di jurnal sintetis.
+    """
+    rng = np.random.default_rng(seed)
+    first = ["budi", "siti", "agus", "dewi", "putri", "rizky", "nur", "ahmad", "ayu", "dimas"]
+    last = ["santoso", "rahayu", "wijaya", "lestari", "saputra", "hidayat", "pratama", "susanti"]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        journal = capture.Journal(os.path.join(tmp, "journal.jsonl"))
+        names = [
+            f"{first[a]} {last[b]} {c}"
+            for a, b, c in zip(
+                rng.integers(0, len(first), records),
+                rng.integers(0, len(last), records),
+                rng.integers(0, 5000, records),
+            )
+        ]
+        days = rng.integers(0, 1800, records)
+        journal.append_many(
+            {
+                "nama": name,
+                "nama_ortu": f"ibu {last[i % len(last)]}",
+                "dob": str(np.datetime64("2020-01-01") + days[i]),
+                "visit_date": "2025-01-01",
+                "status": "Gizi Baik",
+            }
+            for i, name in enumerate(names)
+        )
+
+        registry = VisitRegistry(journal.path)
+        start = time.perf_counter()
+        registry.refresh()
+        build = time.perf_counter() - start
+
+        latencies = []
+        for i in rng.integers(0, records, queries):
+            # Salah ketik satu huruf di nama depan
+            query = names[i].replace("u", "o", 1) if "u" in names[i] else names[i][:-1]
+            start = time.perf_counter()
+            registry.search(query)
+            latencies.append(time.perf_counter() - start)
+
+        journal.append({"nama": "anak baru", "dob": "2024-02-02"})
+        start = time.perf_counter()
+        registry.refresh()
+        incremental = time.perf_counter() - start
+
+    latencies = np.array(latencies) * 1000
+    return {
+        "records": records,
+        "build_seconds": build,
+        "incremental_ms": incremental * 1000,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+        "max_ms": float(latencies.max()),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pencarian riwayat kunjungan")
+    parser.add_argument("query", nargs="?", help="Kata kunci (kosong = benchmark)")
+    parser.add_argument("--journal", default=capture.DEFAULT_JOURNAL)
+    parser.add_argument("--records", type=int, default=300000, help="Ukuran benchmark")
+    args = parser.parse_args()
+
+    if args.query:
+        registry = VisitRegistry(args.journal)
+        registry.refresh()
+        for record in registry.search(args.query):
+            print(record["skor"], record.get("nama"), record.get("dob"), record.get("visit_date"))
+    else:
+        result = bench(args.records)
+        print(f"{result['records']} record, bikin index {result['build_seconds']:.1f} detik")
+        print(f"  tambah 1 record : {result['incremental_ms']:.2f} ms")
+        print(
+            f"  cari (ms)       : p50={result['p50_ms']:.1f}  p95={result['p95_ms']:.1f}  "
+            f"max={result['max_ms']:.1f}"
+        )
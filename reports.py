@@ -0,0 +1,475 @@
+"""
+Laporan cetak akhir sesi posyandu: satu file HTML per anak (Z-score, label
+fuzzy, rekomendasi, grafik mini) plus index ringkasan sesi. HTML statis
+dengan SVG inline, jadi bisa dibuka / dicetak tanpa internet, tanpa JS.
+
+Biar cepet buat ratusan anak:
+    - kerangka grafik (kurva SD, grid, sumbu) per (jenis grafik, gender,
+      cara ukur) dirender sekali jadi template SVG (`ChartTemplate`); tiap
+      anak cuma nambahin titiknya
+    - template dikirim sekali ke tiap proses worker (initializer), anak
+      dibagi per chunk ke ProcessPoolExecutor, tiap worker nulis file
+      laporannya sendiri
+
+Input: file hasil pipeline (JSONL / CSV). Kalo belum ada kolom label, data
+mentahnya diskoring dulu lewat `pipeline.score`. Kunjungan yang ditolak
+validasi atau gak lolos screening kualitas didaftar di index ("data tidak
+lengkap / perlu dicek"), jadi gak ada anak yang ilang diam-diam.
+
+Contoh:
+    python reports.py sesi_posyandu.jsonl laporan/ --workers 4 --title "Posyandu Melati"
+    python reports.py --bench 500
+"""
+
+import argparse
+import html
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+import pipeline
+import quality
+import registry
+import utils
+from fuzzy_logic import get_recommendation
+
+CHART_WIDTH = 300
+CHART_HEIGHT = 200
+CHART_MARGIN = (10, 10, 28, 36)  # atas, kanan, bawah, kiri
+
+SD_LINES = [
+    ("sd_n3", "#d62728", 1),
+    ("sd_n2", "#ff7f0e", 1),
+    ("median", "#2ca02c", 2),
+    ("sd_p2", "#ff7f0e", 1),
+    ("sd_p3", "#d62728", 1),
+]
+
+LABEL_COLORS = {
+    "Gizi Buruk": "#d62728",
+    "Gizi Kurang": "#ff7f0e",
+    "Gizi Baik": "#2ca02c",
+    "Gizi Lebih": "#1f77b4",
+}
+
+Z_ROWS = [
+    ("z_bb_u", "BB/U (Berat/Umur)", "Indikator Berat Badan"),
+    ("z_tb_u", "TB/U (Tinggi/Umur)", "Indikator Stunting"),
+    ("z_bb_tb", "BB/TB (Berat/Tinggi)", "Indikator Wasting"),
+    ("z_imt_u", "IMT/U (IMT/Umur)", "Indikator Gizi Lebih"),
+]
+
+# Batas Z buat ringkasan prevalensi sesi
+PREVALENCE = [
+    ("z_tb_u", "Stunting (TB/U < -2 SD)"),
+    ("z_bb_tb", "Wasting (BB/TB < -2 SD)"),
+    ("z_bb_u", "Underweight (BB/U < -2 SD)"),
+]
+
+CHUNK_SIZE = 50
+
+STYLE = """
+body { font-family: sans-serif; margin: 2em; color: #222; }
+h1 { font-size: 1.4em; margin-bottom: 0.2em; }
+table { border-collapse: collapse; margin: 0.8em 0; }
+td, th { border: 1px solid #ccc; padding: 4px 8px; text-align: left; }
+.label { display: inline-block; padding: 4px 10px; color: #fff; border-radius: 4px; }
+.charts { display: flex; flex-wrap: wrap; gap: 12px; }
+.charts figure { margin: 0; }
+.charts figcaption { font-size: 0.85em; text-align: center; }
+.note { color: #a33; }
+@media print { a { color: inherit; text-decoration: none; } }
+"""
+
+
+def _fmt(value, digits: int = 2) -> str:
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return "-"
+    if isinstance(value, (float, np.floating)):
+        return f"{value:.{digits}f}"
+    return html.escape(str(value))
+
+
+def _date(value) -> str:
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return "-"
+    return pd.Timestamp(value).strftime("%Y-%m-%d")
+
+
+class ChartTemplate:
+    """
+    Kerangka satu grafik mini (kurva SD + grid + sumbu) yang udah jadi SVG.
+    `render(x, y)` cuma nambahin titik anak.
+    """
+
+    __slots__ = ("svg", "x_range", "y_range")
+
+    def __init__(self, x, curves: dict, x_label: str, y_label: str):
+        x = np.asarray(x, dtype=np.float64)
+        low = min(np.min(curves["sd_n3"]), np.min(curves["median"]))
+        high = max(np.max(curves["sd_p3"]), np.max(curves["median"]))
+        pad = (high - low) * 0.05
+        self.x_range = (float(x.min()), float(x.max()))
+        self.y_range = (float(low - pad), float(high + pad))
+
+        top, right, bottom, left = CHART_MARGIN
+        parts = [
+            f'<svg xmlns="http://www.w3.org/2000/svg" width="{CHART_WIDTH}" '
+            f'height="{CHART_HEIGHT}" viewBox="0 0 {CHART_WIDTH} {CHART_HEIGHT}">',
+            f'<rect x="{left}" y="{top}" width="{CHART_WIDTH - left - right}" '
+            f'height="{CHART_HEIGHT - top - bottom}" fill="#fafafa" stroke="#999"/>',
+        ]
+        for tick in np.linspace(*self.x_range, 5):
+            px, _ = self._xy(tick, self.y_range[0])
+            parts.append(
+                f'<line x1="{px:.1f}" y1="{top}" x2="{px:.1f}" y2="{CHART_HEIGHT - bottom}" '
+                f'stroke="#e5e5e5"/><text x="{px:.1f}" y="{CHART_HEIGHT - bottom + 12}" '
+                f'font-size="9" text-anchor="middle">{tick:.0f}</text>'
+            )
+        for tick in np.linspace(*self.y_range, 5):
+            _, py = self._xy(self.x_range[0], tick)
+            parts.append(
+                f'<line x1="{left}" y1="{py:.1f}" x2="{CHART_WIDTH - right}" y2="{py:.1f}" '
+                f'stroke="#e5e5e5"/><text x="{left - 3}" y="{py + 3:.1f}" font-size="9" '
+                f'text-anchor="end">{tick:.0f}</text>'
+            )
+        for key, color, width in SD_LINES:
+            px, py = self._xy(x, np.asarray(curves[key], dtype=np.float64))
+            coords = " ".join(f"{a:.1f},{b:.1f}" for a, b in zip(px, py))
+            parts.append(
+                f'<polyline points="{coords}" fill="none" stroke="{color}" stroke-width="{width}"/>'
+            )
+        parts.append(
+            f'<text x="{(left + CHART_WIDTH - right) / 2}" y="{CHART_HEIGHT - 3}" '
+            f'font-size="10" text-anchor="middle">{x_label}</text>'
+            f'<text x="10" y="{(top + CHART_HEIGHT - bottom) / 2}" font-size="10" '
+            f'text-anchor="middle" transform="rotate(-90 10 {(top + CHART_HEIGHT - bottom) / 2})">'
+            f"{y_label}</text>"
+        )
+        self.svg = "".join(parts)
+
+    def _xy(self, x, y):
+        top, right, bottom, left = CHART_MARGIN
+        (x0, x1), (y0, y1) = self.x_range, self.y_range
+        px = left + (np.asarray(x) - x0) / (x1 - x0) * (CHART_WIDTH - left - right)
+        py = CHART_HEIGHT - bottom - (np.asarray(y) - y0) / (y1 - y0) * (CHART_HEIGHT - top - bottom)
+        return px, py
+
+    def render(self, x, y) -> str:
+        """
+        SVG lengkap dengan titik anak (kunjungan terakhir ditebelin). Titik
+        diluar rentang grafik di-clip ke pinggir.
+        """
+        x = np.clip(np.asarray(x, dtype=np.float64), *self.x_range)
+        y = np.clip(np.asarray(y, dtype=np.float64), *self.y_range)
+        ok = ~(np.isnan(x) | np.isnan(y))
+        px, py = self._xy(x[ok], y[ok])
+        parts = [self.svg]
+        if len(px) > 1:
+            coords = " ".join(f"{a:.1f},{b:.1f}" for a, b in zip(px, py))
+            parts.append(f'<polyline points="{coords}" fill="none" stroke="#333" stroke-dasharray="3,2"/>')
+        for i, (a, b) in enumerate(zip(px, py)):
+            radius = 4 if i == len(px) - 1 else 2.5
+            parts.append(f'<circle cx="{a:.1f}" cy="{b:.1f}" r="{radius}" fill="#111"/>')
+        parts.append("</svg>")
+        return "".join(parts)
+
+
+def build_templates(standard=None) -> dict:
+    """
+    Semua template grafik: (jenis, gender[, cara ukur]) -> `ChartTemplate`.
+    """
+    templates = {}
+
+    def add(key, data, x_key, x_label, y_label):
+        # Standar yang gak punya tabel ini (atau file-nya gak ada) di-skip
+        if data is not None and len(data[x_key]):
+            templates[key] = ChartTemplate(data[x_key], data, x_label, y_label)
+
+    for gender in ("L", "P"):
+        add(("tb_u", gender), utils.get_growth_chart_data(gender, standard), "age",
+            "Umur (bulan)", "Tinggi (cm)")
+        add(("bb_u", gender), utils.get_weight_chart_data(gender, standard), "age",
+            "Umur (bulan)", "Berat (kg)")
+        for mode in ("recumbent", "standing"):
+            add(("bb_tb", gender, mode), utils.get_wfh_chart_data(gender, mode, standard),
+                "height", "Tinggi (cm)", "Berat (kg)")
+    return templates
+
+
+def _charts(visits: pd.DataFrame, templates: dict) -> list:
+    last = visits.iloc[-1]
+    gender = last["gender"]
+    # Grafik BB/TB ngikutin tabel yang dipake Z-score (BB/PB < 24 bulan)
+    mode = "recumbent" if last["age_months"] < 24 else "standing"
+    charts = []
+    for key, caption, x_col, y_col in (
+        (("tb_u", gender), "Tinggi menurut umur", "age_months", "corrected_height"),
+        (("bb_u", gender), "Berat menurut umur", "age_months", "weight"),
+        (("bb_tb", gender, mode), "Berat menurut tinggi", "corrected_height", "weight"),
+    ):
+        template = templates.get(key)
+        if template is not None:
+            svg = template.render(visits[x_col].to_numpy(dtype=float), visits[y_col].to_numpy(dtype=float))
+            charts.append(f"<figure>{svg}<figcaption>{caption}</figcaption></figure>")
+    return charts
+
+
+def render_child(visits: pd.DataFrame, templates: dict, title: str = "") -> str:
+    """
+    HTML laporan satu anak. `visits` = kunjungan anak itu (urut tanggal),
+    yang dilaporin kunjungan terakhir, grafiknya semua kunjungan.
+    """
+    last = visits.iloc[-1]
+    label = last.get("label")
+    color = next((c for prefix, c in LABEL_COLORS.items() if str(label).startswith(prefix)), "#777")
+    gender = "Laki-laki" if last["gender"] == "L" else "Perempuan"
+
+    identity = [
+        ("Nama", _fmt(last.get("nama"))),
+        ("Nama orang tua", _fmt(last.get("nama_ortu"))),
+        ("Jenis kelamin", gender),
+        ("Tanggal lahir", _date(last.get("dob"))),
+        ("Tanggal periksa", _date(last.get("visit_date"))),
+        ("Umur", f"{_fmt(last.get('age_months'), 0)} bulan"),
+        ("Berat", f"{_fmt(last.get('weight'), 1)} kg"),
+        ("Tinggi (terkoreksi)", f"{_fmt(last.get('corrected_height'), 1)} cm"),
+    ]
+    rows = "".join(f"<tr><th>{k}</th><td>{v}</td></tr>" for k, v in identity)
+    z_rows = "".join(
+        f"<tr><td>{name}</td><td>{_fmt(last.get(col))}</td><td>{note}</td></tr>"
+        for col, name, note in Z_ROWS
+    )
+    issues = last.get("quality_issues")
+    note = f'<p class="note">Catatan data: {html.escape(str(issues))}</p>' if issues else ""
+
+    return (
+        '<!DOCTYPE html><html lang="id"><head><meta charset="utf-8">'
+        f"<title>Laporan {_fmt(last.get('nama'))}</title><style>{STYLE}</style></head><body>"
+        f'<p><a href="index.html">&larr; Ringkasan sesi</a> {html.escape(title)}</p>'
+        f"<h1>{_fmt(last.get('nama'))}</h1><table>{rows}</table>"
+        f'<h2>Status gizi</h2><p><span class="label" style="background:{color}">'
+        f"{_fmt(label)}</span> skor {_fmt(last.get('score'))}/100</p>"
+        f"<p><b>Rekomendasi:</b> {html.escape(get_recommendation(label)) or '-'}</p>{note}"
+        f"<table><tr><th>Indeks</th><th>Z-score</th><th>Keterangan</th></tr>{z_rows}</table>"
+        f'<h2>Grafik pertumbuhan</h2><div class="charts">{"".join(_charts(visits, templates))}</div>'
+        "</body></html>"
+    )
+
+
+def _file_name(number: int, nama) -> str:
+    slug = "-".join(registry.normalize(nama).split())[:40] or "anak"
+    return f"{number:04d}-{slug}.html"
+
+
+# Template + folder output per proses worker (diisi `_init_worker`)
+_WORKER = {}
+
+
+def _init_worker(templates: dict, out_dir: str, title: str):
+    _WORKER.update(templates=templates, out_dir=out_dir, title=title)
+
+
+def _render_chunk(chunk) -> list:
+    """
+    Tulis laporan buat satu chunk [(nomor, kunjungan anak)], balikin baris
+    ringkasan buat index.
+    """
+    summary = []
+    for number, visits in chunk:
+        last = visits.iloc[-1]
+        name = _file_name(number, last.get("nama"))
+        with open(os.path.join(_WORKER["out_dir"], name), "w", encoding="utf-8") as f:
+            f.write(render_child(visits, _WORKER["templates"], _WORKER["title"]))
+        summary.append({"file": name, **{k: last.get(k) for k in INDEX_COLUMNS}})
+    return summary
+
+
+INDEX_COLUMNS = ["nama", "gender", "age_months", "z_bb_u", "z_tb_u", "z_bb_tb", "score", "label"]
+PROBLEM_COLUMNS = ["nama", "nama_ortu", "visit_date", "alasan"]
+
+
+def problem_rows(df: pd.DataFrame, rejects: list = ()) -> pd.DataFrame:
+    """
+    Kunjungan yang perlu dicek petugas: baris yang ditolak validasi
+    (`rejects`, kolom 'error') plus baris yang gak lolos screening kualitas
+    ('plausible' False, alasannya dari 'quality_issues').
+    """
+    parts = [
+        batch.assign(alasan=batch["error"]).reindex(columns=PROBLEM_COLUMNS) for batch in rejects
+    ]
+    if "plausible" in df.columns:
+        flagged = df[df["plausible"].eq(False)]
+        issues = flagged.get("quality_issues", pd.Series("", index=flagged.index))
+        parts.append(flagged.assign(alasan=issues).reindex(columns=PROBLEM_COLUMNS))
+    parts = [part for part in parts if not part.empty]
+    if not parts:
+        return pd.DataFrame(columns=PROBLEM_COLUMNS)
+    return pd.concat(parts, ignore_index=True)
+
+
+def render_index(summary: pd.DataFrame, title: str = "", problems: pd.DataFrame = None) -> str:
+    """
+    Ringkasan sesi: jumlah per label, prevalensi, daftar anak + link laporan,
+    plus daftar kunjungan yang datanya tidak lengkap / perlu dicek.
+    """
+    n = len(summary)
+    counts = summary["label"].value_counts()
+    label_rows = "".join(
+        f"<tr><td>{html.escape(str(label))}</td><td>{count}</td><td>{count / n:.0%}</td></tr>"
+        for label, count in counts.items()
+    )
+    prevalence_rows = "".join(
+        f"<tr><td>{name}</td><td>{int((summary[col] < -2).sum())}</td>"
+        f"<td>{(summary[col] < -2).sum() / max(summary[col].notna().sum(), 1):.0%}</td></tr>"
+        for col, name in PREVALENCE
+    )
+    # Yang perlu dirujuk ditaruh paling atas
+    order = summary.assign(_urgent=~summary["label"].astype(str).str.startswith("Gizi Buruk"))
+    order = order.sort_values(["_urgent", "nama"], kind="stable")
+    child_rows = "".join(
+        f'<tr><td><a href="{r.file}">{_fmt(r.nama)}</a></td><td>{_fmt(r.gender)}</td>'
+        f"<td>{_fmt(r.age_months, 0)}</td><td>{_fmt(r.z_bb_u)}</td><td>{_fmt(r.z_tb_u)}</td>"
+        f"<td>{_fmt(r.z_bb_tb)}</td><td>{_fmt(r.label)}</td></tr>"
+        for r in order.itertuples()
+    )
+    problems = problems if problems is not None else pd.DataFrame(columns=PROBLEM_COLUMNS)
+    problem_section = ""
+    if len(problems):
+        problem_rows_html = "".join(
+            f"<tr><td>{_fmt(r.nama)}</td><td>{_fmt(r.nama_ortu)}</td>"
+            f"<td>{_date(r.visit_date)}</td><td>{_fmt(r.alasan)}</td></tr>"
+            for r in problems.itertuples()
+        )
+        problem_section = (
+            '<h2 class="note">Data tidak lengkap / perlu dicek</h2>'
+            "<table><tr><th>Nama</th><th>Orang tua</th><th>Tanggal periksa</th><th>Alasan</th></tr>"
+            f"{problem_rows_html}</table>"
+        )
+    checked = f", {len(problems)} data perlu dicek" if len(problems) else ""
+    return (
+        '<!DOCTYPE html><html lang="id"><head><meta charset="utf-8">'
+        f"<title>Ringkasan sesi {html.escape(title)}</title><style>{STYLE}</style></head><body>"
+        f"<h1>Ringkasan sesi {html.escape(title)}</h1>"
+        f"<p>{n} anak{checked}, dibuat {date.today():%Y-%m-%d}</p>"
+        f"<table><tr><th>Status gizi</th><th>Jumlah</th><th>%</th></tr>{label_rows}</table>"
+        f"<table><tr><th>Indikator</th><th>Jumlah</th><th>%</th></tr>{prevalence_rows}</table>"
+        "<table><tr><th>Nama</th><th>L/P</th><th>Umur (bln)</th><th>BB/U</th><th>TB/U</th>"
+        f"<th>BB/TB</th><th>Status</th></tr>{child_rows}</table>{problem_section}</body></html>"
+    )
+
+
+def _children(df: pd.DataFrame) -> list:
+    """
+    [(nomor, kunjungan satu anak urut tanggal)], urut nama.
+    """
+    keys = quality._child_keys(df) or ["nama"]
+    df = df.assign(_date=pd.to_datetime(df["visit_date"])).sort_values(keys + ["_date"], kind="stable")
+    groups = [visits.drop(columns="_date") for _, visits in df.groupby(keys, sort=False, dropna=False)]
+    groups.sort(key=lambda v: registry.normalize(v.iloc[-1].get("nama")))
+    return list(enumerate(groups, start=1))
+
+
+def generate(
+    df: pd.DataFrame, out_dir: str, workers: int = 1, title: str = "", standard=None
+) -> str:
+    """
+    Tulis laporan per anak + index.html ke `out_dir`. `df` = hasil pipeline
+    (kalo belum ada kolom label, diskoring dulu). Balikin path index.
+    """
+    rejects = []
+    if "label" not in df.columns:
+        scored = list(pipeline.score([df], on_reject=rejects.append, standard=standard))
+        # Semua baris ditolak: index tetep dibikin, isinya daftar yang perlu dicek
+        df = pd.concat(scored, ignore_index=True) if scored else df.iloc[:0]
+    problems = problem_rows(df, rejects)
+    os.makedirs(out_dir, exist_ok=True)
+    templates = build_templates(standard)
+    children = _children(df) if len(df) else []
+    chunks = [children[i : i + CHUNK_SIZE] for i in range(0, len(children), CHUNK_SIZE)]
+
+    summary = []
+    if workers == 1:
+        _init_worker(templates, out_dir, title)
+        for chunk in chunks:
+            summary.extend(_render_chunk(chunk))
+    else:
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(templates, out_dir, title)
+        ) as pool:
+            for part in pool.map(_render_chunk, chunks):
+                summary.extend(part)
+
+    index = os.path.join(out_dir, "index.html")
+    with open(index, "w", encoding="utf-8") as f:
+        summary = pd.DataFrame(summary, columns=["file"] + INDEX_COLUMNS)
+        f.write(render_index(summary, title, problems))
+    return index
+
+
+def bench(children: int = 500, workers: int = 1, seed: int = 0) -> dict:
+    """
+    Waktu bikin laporan satu sesi sintetis (`children` anak, sekali timbang).
+    """
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(
+        {
+            "nama": [f"Anak {i}" for i in range(children)],
+            "nama_ortu": [f"Ibu {i}" for i in range(children)],
+            "dob": (np.datetime64("2020-06-01") + rng.integers(0, 1700, children)).astype(str),
+            "gender": rng.choice(["L", "P"], children),
+            "measure_mode": "standing",
+            "visit_date": "2025-06-01",
+        }
+    )
+    age = utils.calculate_age_months_batch(df["dob"], df["visit_date"])
+    df["height"] = np.round(50 + 1.6 * age - 0.012 * age**2 + rng.normal(0, 3, children), 1)
+    df["weight"] = np.round(3.3 + 0.25 * age - 0.0012 * age**2 + rng.normal(0, 1, children), 1)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        scored = pd.concat(pipeline.score([df]), ignore_index=True)
+        scoring = time.perf_counter() - start
+        generate(scored, tmp, workers)
+        total = time.perf_counter() - start
+        files = len(os.listdir(tmp))
+        size = sum(os.path.getsize(os.path.join(tmp, f)) for f in os.listdir(tmp))
+    return {
+        "children": children,
+        "files": files,
+        "scoring_seconds": scoring,
+        "seconds": total,
+        "kib_per_child": size / 1024 / max(files, 1),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Laporan cetak per anak + ringkasan sesi")
+    parser.add_argument("input", nargs="?", help="Data sesi (JSONL / CSV, mentah atau hasil pipeline)")
+    parser.add_argument("out_dir", nargs="?", help="Folder output")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--title", default="", help="Judul sesi (misal nama posyandu)")
+    parser.add_argument("--standard", help="Standar referensi (default PMK 2/2020)")
+    parser.add_argument("--bench", type=int, metavar="ANAK", help="Benchmark sesi sintetis")
+    args = parser.parse_args()
+
+    if args.bench:
+        result = bench(args.bench, args.workers)
+        print(
+            f"{result['children']} anak -> {result['files']} file, {result['seconds']:.2f} detik "
+            f"(skoring {result['scoring_seconds']:.2f} detik), "
+            f"{result['kib_per_child']:.1f} KiB per file"
+        )
+    elif args.input and args.out_dir:
+        df = pd.concat(pipeline.read_source(args.input, 10000), ignore_index=True)
+        if os.path.exists(args.out_dir) and not os.path.isdir(args.out_dir):
+            parser.error(f"{args.out_dir} bukan folder")
+        index = generate(df, args.out_dir, args.workers, args.title, args.standard)
+        print(f"Laporan ditulis ke {index}")
+    else:
+        parser.error("butuh input + out_dir, atau --bench")
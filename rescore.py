@@ -0,0 +1,403 @@
+"""
+Skoring ulang incremental kalo tabel standar (dataset/std_*.csv) dikoreksi
+atau rule fuzzy diubah.
+
+Tiap hasil pipeline nyatet 'ref_version' dan 'rule_version', isi versinya
+disimpen di `versions.VersionStore`. Dari versi lama dan versi sekarang:
+    - tabel standar: dicari key (umur / slot tinggi 0.5 cm) per (gender,
+      index_type) yang barisnya berubah. Hasil yang lookup-nya kena key itu
+      (buat BB/PB dan BB/TB yang diinterpolasi: key itu atau tetangganya)
+      dihitung ulang Z-score, flag Z ekstrem, dan label fuzzy-nya.
+    - rule base: rule yang ditambah / dihapus / term-nya diubah cuma bisa
+      nyala di daerah input tertentu (`rule_supports`). Diluar daerah itu
+      aktivasinya nol di versi lama maupun baru, jadi skornya pasti sama.
+      Yang diinferensi ulang cuma hasil yang Z-score-nya masuk daerah itu,
+      plus yang labelnya geser karena batas label diubah.
+Hasil yang gak kena cuma diganti kolom versinya (nilainya terbukti sama).
+Versi lama yang snapshot-nya gak ada: semua barisnya dihitung ulang.
+
+Tiap baris dibandingin sama standar yang dicatat di kolom 'ref_standard'
+(misal WHO 2007 buat anak sekolah), bukan selalu standar default. Hasil
+lama yang belum punya kolom itu dianggap pake standar default.
+
+Baris yang kena dihitung di proses worker per batch (ProcessPoolExecutor),
+urutan output tetep sama kayak input.
+
+Contoh:
+    python rescore.py hasil.jsonl hasil_baru.jsonl --workers 4
+"""
+
+import argparse
+import os
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import pipeline
+import quality
+import utils
+import versions
+from fuzzy_logic import MalnutritionFuzzySystem, fuzzy_system
+
+# Skor disimpen 2 desimal, label-nya dari skor sebelum dibulatin
+_SCORE_ROUNDING = 0.005
+
+# Sistem fuzzy per proses worker (diisi sekali lewat initializer)
+_SYSTEM = None
+
+
+def _touches(keys, changed, x, interp: bool) -> np.ndarray:
+    """
+    Mask nilai `x` yang lookup-nya make key yang berubah.
+    `keys` = gabungan key versi lama dan baru, `changed` = mask-nya.
+    """
+    pos = np.searchsorted(keys, x)
+    inside = pos < len(keys)
+    exact = np.zeros(len(x), dtype=bool)
+    exact[inside] = keys[pos[inside]] == x[inside]
+    hit = np.zeros(len(x), dtype=bool)
+    hit[exact] = changed[pos[exact]]
+    if interp:
+        # Diantara dua key: kena kalo salah satu tetangganya berubah
+        # (termasuk key yang baru ditambah / dihapus diantaranya)
+        between = ~exact & inside & (pos > 0)
+        hit[between] = changed[pos[between] - 1] | changed[pos[between]]
+    return hit
+
+
+class ReferenceDiff:
+    """
+    Key tabel standar yang berubah antara versi lama dan `new`.
+    `old` None (snapshot gak ada) = semua dianggap berubah.
+    """
+
+    def __init__(self, old, new):
+        self.full = old is None
+        self.changed = {} if old is None else old.changed_slots(new)
+
+    def affected(self, gender, age_months, corrected_height) -> np.ndarray:
+        gender = np.asarray(gender)
+        if self.full:
+            return np.ones(len(gender), dtype=bool)
+        hit = np.zeros(len(gender), dtype=bool)
+        if not self.changed:
+            return hit
+
+        age_months = np.asarray(age_months, dtype=np.float64)
+        corrected_height = np.asarray(corrected_height, dtype=np.float64)
+
+        # Pemilihan tabel sama persis kayak get_z_scores_batch
+        index_len = np.where(age_months < 24, "PB_U", "TB_U")
+        lookup_height = np.round(corrected_height * 2) / 2
+        index_wfh = np.where(age_months < 24, "BB_PB", "BB_TB")
+        index_wfh[(index_wfh == "BB_TB") & (lookup_height < 65.0)] = "BB_PB"
+
+        for g in np.unique(gender):
+            is_g = gender == g
+            lookups = [
+                ("BB_U", is_g, age_months, False),
+                ("IMT_U", is_g, age_months, False),
+                ("PB_U", is_g & (index_len == "PB_U"), age_months, False),
+                ("TB_U", is_g & (index_len == "TB_U"), age_months, False),
+                ("BB_PB", is_g & (index_wfh == "BB_PB"), lookup_height, True),
+                ("BB_TB", is_g & (index_wfh == "BB_TB"), lookup_height, True),
+            ]
+            for index_type, mask, x, interp in lookups:
+                if (g, index_type) in self.changed and mask.any():
+                    keys, changed = self.changed[(g, index_type)]
+                    hit[mask] |= _touches(keys, changed, x[mask], interp)
+        return hit
+
+
+class RuleDiff:
+    """
+    Daerah input yang hasil inferensinya bisa beda antara rule base lama
+    (`old_spec`) dan `new` (MalnutritionFuzzySystem).
+    `old_spec` None (snapshot gak ada) = semua dianggap berubah.
+    """
+
+    def __init__(self, old_spec, new: MalnutritionFuzzySystem):
+        self.new = new
+        self.old = None
+        self.boxes = []
+        self.full = old_spec is None
+        if self.full:
+            return
+
+        old = MalnutritionFuzzySystem(old_spec)
+        self.old = old
+        if _universes(old.spec) != _universes(new.spec):
+            self.full = True
+            return
+
+        old_rules = list(zip(old.rule_signatures(), old.rule_supports()))
+        new_rules = list(zip(new.rule_signatures(), new.rule_supports()))
+        removed = Counter(s for s, _ in old_rules) - Counter(s for s, _ in new_rules)
+        added = Counter(s for s, _ in new_rules) - Counter(s for s, _ in old_rules)
+        self.boxes = [box for s, box in old_rules if s in removed and box] + [
+            box for s, box in new_rules if s in added and box
+        ]
+
+        self.limits = []
+        if old.spec["labels"] != new.spec["labels"]:
+            self.limits = [
+                limit
+                for limit, _ in old.spec["labels"] + new.spec["labels"]
+                if limit is not None
+            ]
+
+    def affected(self, batch: pd.DataFrame) -> np.ndarray:
+        # Baris tanpa skor (Z gak lengkap / gak wajar) gak kena rule
+        score = batch["score"].to_numpy(dtype=np.float64)
+        scored = ~np.isnan(score)
+        if self.full:
+            return scored
+
+        z = {
+            name: np.clip(batch[f"z_{name}"].to_numpy(dtype=np.float64), -5, 5)
+            for name in ("bb_u", "tb_u", "bb_tb")
+        }
+        hit = np.zeros(len(batch), dtype=bool)
+        for box in self.boxes:
+            inside = np.ones(len(batch), dtype=bool)
+            for name, (lo, hi) in box.items():
+                inside &= (z[name] > lo) & (z[name] < hi)
+            hit |= inside
+
+        if self.limits:
+            bb_tb = z["bb_tb"]
+            hit |= self.old.labels_batch(score, bb_tb) != self.new.labels_batch(score, bb_tb)
+            for limit in self.limits:
+                hit |= np.abs(score - limit) <= _SCORE_ROUNDING
+        return hit & scored
+
+
+def _universes(spec: dict):
+    out = spec["consequent"]
+    antecedents = {name: var["universe"] for name, var in spec["antecedents"].items()}
+    return antecedents, out["name"], out["universe"]
+
+
+def stored_standards(batch: pd.DataFrame) -> np.ndarray:
+    """
+    Nama kanonik standar tiap baris (kolom 'ref_standard'); kosong / gak ada
+    kolomnya = standar default.
+    """
+    default = utils.standard_name()
+    if "ref_standard" not in batch.columns:
+        return np.full(len(batch), default, dtype=object)
+    values = batch["ref_standard"].astype(object)
+    return values.where(values.notna() & (values != ""), default).to_numpy()
+
+
+def _stamp(rows: pd.DataFrame, standards: np.ndarray) -> pd.DataFrame:
+    # Versi + nama standar terbaru per baris
+    current = {name: utils.get_reference(name).version for name in pd.unique(standards)}
+    ref_version = np.array([current[name] for name in standards], dtype=object)
+    return rows.assign(ref_version=ref_version, ref_standard=standards)
+
+
+def recompute(rows: pd.DataFrame, full, system=fuzzy_system) -> pd.DataFrame:
+    """
+    Hitung ulang baris hasil pipeline. Baris yang `full`-nya True dihitung
+    dari Z-score (pake standar di 'ref_standard'), sisanya cuma inferensi
+    fuzzy (Z-score-nya tetep).
+    """
+    full = np.asarray(full, dtype=bool)
+    standards = stored_standards(rows)
+    if full.any():
+        parts = [rows[~full]]
+        for name in pd.unique(standards[full]):
+            part = rows[full & (standards == name)]
+            z = utils.get_z_scores_batch(
+                part["gender"].to_numpy(),
+                part["age_months"].to_numpy(),
+                part["weight"].to_numpy(),
+                part["corrected_height"].to_numpy(),
+                name,
+            )
+            age_range = utils.get_reference(name).age_range
+            parts.append(quality.rescreen_z(part.assign(**z), age_range))
+        rows = pd.concat(parts).loc[rows.index]
+    rows = next(pipeline.fuzzy_label([rows], system))
+    return _stamp(rows, standards)
+
+
+def _init_worker(spec):
+    global _SYSTEM
+    _SYSTEM = MalnutritionFuzzySystem(spec)
+
+
+def _recompute_in_worker(item):
+    rows, full = item
+    return recompute(rows, full, _SYSTEM)
+
+
+class _Done:
+    # Pengganti Future buat batch yang gak perlu dikirim ke worker
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def result(self):
+        return self.value
+
+
+def rescore(batches, system=fuzzy_system, store=None, workers: int = 1, stats=None):
+    """
+    Tahap pipeline: batch hasil skoring lama -> batch yang udah up to date
+    sama tabel standar tiap baris ('ref_standard', default `utils.REF`) dan
+    `system`. Tabel standar yang dipake di-snapshot ke `store`. Kalo `stats` (dict) dikasih,
+    diisi jumlah 'rows', 'z_rows' (Z-score dihitung ulang), 'rule_rows'
+    (cuma inferensi ulang) dan 'unchanged'.
+    """
+    store = store or versions.VersionStore()
+    stats = stats if stats is not None else {}
+    for key in ("rows", "z_rows", "rule_rows", "unchanged"):
+        stats.setdefault(key, 0)
+
+    ref_diffs, rule_diffs, saved = {}, {}, set()
+
+    def stored_versions(batch, column):
+        if column not in batch.columns:
+            return np.full(len(batch), None, dtype=object)
+        # Versi selalu dibandingin sebagai teks, walau sumbernya sempet kebaca angka
+        values = batch[column]
+        return values.astype(str).where(values.notna(), None).to_numpy()
+
+    def plan(batch, standards):
+        full = np.zeros(len(batch), dtype=bool)
+        old_ref = stored_versions(batch, "ref_version")
+        for name in pd.unique(standards):
+            tables = utils.get_reference(name)
+            if tables.version not in saved:
+                store.save_reference(tables)
+                saved.add(tables.version)
+            in_standard = standards == name
+            for version in pd.unique(old_ref[in_standard]):
+                if version == tables.version:
+                    continue
+                if (name, version) not in ref_diffs:
+                    old = store.reference(version) if version is not None else None
+                    ref_diffs[(name, version)] = ReferenceDiff(old, tables)
+                mask = in_standard & (old_ref == version)
+                sub = batch[mask]
+                full[mask] = ref_diffs[(name, version)].affected(
+                    sub["gender"].to_numpy(),
+                    sub["age_months"].to_numpy(),
+                    sub["corrected_height"].to_numpy(),
+                )
+
+        rule = np.zeros(len(batch), dtype=bool)
+        old_rule = stored_versions(batch, "rule_version")
+        for version in pd.unique(old_rule):
+            if version == system.version:
+                continue
+            if version not in rule_diffs:
+                old = store.rules(version) if version is not None else None
+                rule_diffs[version] = RuleDiff(old, system)
+            mask = (old_rule == version) & ~full
+            if mask.any():
+                rule[mask] = rule_diffs[version].affected(batch[mask])
+        return full, rule
+
+    def merge(batch, affected, rows):
+        out = _stamp(batch, stored_standards(batch)).assign(rule_version=system.version)
+        if not affected.any():
+            return out
+        return pd.concat([out[~affected], rows])[out.columns].loc[out.index]
+
+    pool = None
+    if workers > 1:
+        pool = ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(system.spec,)
+        )
+    # Batch yang lagi dikerjain dibatesin biar memori tetep konstan
+    pending = deque()
+    try:
+        for batch in batches:
+            full, rule = plan(batch, stored_standards(batch))
+            affected = full | rule
+            stats["rows"] += len(batch)
+            stats["z_rows"] += int(full.sum())
+            stats["rule_rows"] += int(rule.sum())
+            stats["unchanged"] += int((~affected).sum())
+
+            item = (batch[affected], full[affected])
+            if not affected.any():
+                future = _Done(None)
+            elif pool is None:
+                future = _Done(recompute(*item, system))
+            else:
+                future = pool.submit(_recompute_in_worker, item)
+            pending.append((batch, affected, future))
+
+            while len(pending) > max(workers, 1) * 2:
+                batch, affected, future = pending.popleft()
+                yield merge(batch, affected, future.result())
+        while pending:
+            batch, affected, future = pending.popleft()
+            yield merge(batch, affected, future.result())
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+
+def rescore_file(
+    source,
+    dest,
+    batch_size: int = pipeline.DEFAULT_BATCH_SIZE,
+    workers: int = 1,
+    store=None,
+    on_batch=None,
+) -> dict:
+    """
+    Skoring ulang file hasil pipeline (JSONL, atau CSV kalo '.csv') ke `dest`
+    (format dari ekstensi, sama kayak `pipeline.run_pipeline`).
+    Balikin statistik dari `rescore`.
+    """
+    store = store or versions.VersionStore()
+    store.snapshot(utils.REF, fuzzy_system.spec)
+    stats = {}
+    batches = pipeline.read_source(source, batch_size)
+    if on_batch is not None:
+        batches = pipeline._counted(batches, on_batch)
+    updated = rescore(batches, fuzzy_system, store, workers, stats)
+
+    if isinstance(dest, str) and dest.endswith(".csv"):
+        pipeline.write_csv(updated, dest)
+    elif isinstance(dest, str) and dest.endswith((".parquet", ".arrow")):
+        import export
+
+        if dest.endswith(".parquet"):
+            export.write_parquet(updated, dest)
+        else:
+            export.write_arrow(updated, dest)
+    else:
+        pipeline.write_jsonl(updated, dest)
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Skoring ulang hasil yang basi")
+    parser.add_argument("input", help="File hasil pipeline (JSONL / CSV)")
+    parser.add_argument("output", help="File output (.csv, .jsonl, .parquet, atau .arrow)")
+    parser.add_argument("--batch-size", type=int, default=pipeline.DEFAULT_BATCH_SIZE)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--versions", default=versions.DEFAULT_DIR, help="Folder snapshot versi")
+    args = parser.parse_args()
+
+    stats = rescore_file(
+        args.input,
+        args.output,
+        args.batch_size,
+        args.workers,
+        versions.VersionStore(args.versions),
+    )
+    print(
+        f"{stats['rows']} baris: {stats['z_rows']} Z-score dihitung ulang, "
+        f"{stats['rule_rows']} inferensi ulang, {stats['unchanged']} tetap"
+    )
@@ -0,0 +1,223 @@
+"""
+Skrining cepat pakai tabel batas SD (-3 SD, -2 SD, +2 SD) yang udah dihitung
+duluan, buat kader di meja timbang yang cuma perlu tau anak masuk pita mana,
+bukan nilai Z-score persisnya.
+
+Tabel batas dibikin dari kolom sd_n3, sd_n2, sd_p2 di CSV standar:
+    - BB/U          : batas berat (kg) per gender per umur (bulan)
+    - PB/U, TB/U    : batas panjang/tinggi (cm) per gender per umur
+    - BB/PB, BB/TB  : batas berat (kg) per gender per slot tinggi 0.5 cm
+                      (celah di tabel diisi interpolasi, sama kayak get_z_scores)
+Tiap tabel disimpen rapat (dense) dengan langkah tetap, jadi lookup-nya
+tinggal hitung index, gak perlu searching.
+
+Klasifikasinya langsung bandingin nilai ukur ke garis SD di tabel (kayak baca
+KMS), jadi di sekitar garis bisa beda tipis sama pita dari Z-score rumus
+`_calculate_z` yang cuma pake jarak median ke SD-1.
+
+Semua fungsi nerima `standard` (selector, lihat `utils.get_reference`);
+default-nya standar default / `utils.REF`.
+
+Cetak tabel buat job aid:
+    python screening.py --out tabel_batas/
+    python screening.py --standard who2007 --out tabel_batas_5_19/
+"""
+
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+import utils
+
+CUTOFF_COLUMNS = ["sd_n3", "sd_n2", "sd_p2"]
+
+# Kode pita hasil skrining (-1 = diluar jangkauan tabel / data gak lengkap)
+BAND_UNKNOWN = -1
+BAND_LABELS = ["< -3 SD", "-3 SD s/d < -2 SD", "-2 SD s/d +2 SD", "> +2 SD"]
+
+# index_type -> (langkah key, nama key buat tabel cetak, satuan nilai)
+TABLE_SPECS = {
+    "BB_U": (1.0, "Umur (bulan)", "kg"),
+    "PB_U": (1.0, "Umur (bulan)", "cm"),
+    "TB_U": (1.0, "Umur (bulan)", "cm"),
+    "BB_PB": (0.5, "Panjang badan (cm)", "kg"),
+    "BB_TB": (0.5, "Tinggi badan (cm)", "kg"),
+}
+
+
+class CutoffTable:
+    """
+    Tabel batas SD rapat: baris ke-i buat key = start + i * step.
+    """
+
+    __slots__ = ("gender", "index_type", "start", "step", "cutoffs")
+
+    def __init__(self, gender, index_type, start, step, cutoffs):
+        self.gender = gender
+        self.index_type = index_type
+        self.start = start
+        self.step = step
+        self.cutoffs = cutoffs
+
+    @property
+    def keys(self) -> np.ndarray:
+        return self.start + self.step * np.arange(len(self.cutoffs))
+
+    def lookup(self, x) -> np.ndarray:
+        """
+        Batas (N, 3) buat tiap nilai key `x`; NaN kalo diluar tabel.
+        """
+        x = np.asarray(x, dtype=np.float64)
+        pos = np.round((x - self.start) / self.step)
+        inside = (pos >= 0) & (pos < len(self.cutoffs))
+        out = np.full((len(x), len(CUTOFF_COLUMNS)), np.nan)
+        out[inside] = self.cutoffs[pos[inside].astype(np.int64)]
+        return out
+
+
+def build_cutoff_table(gender: str, index_type: str, standard=None) -> CutoffTable:
+    step = TABLE_SPECS[index_type][0]
+    keys, _ = utils.ref_table(gender, index_type, standard)
+    if len(keys) == 0:
+        empty = np.empty((0, len(CUTOFF_COLUMNS)))
+        return CutoffTable(gender, index_type, 0.0, step, empty)
+
+    grid = np.arange(keys[0], keys[-1] + step / 2, step)
+    columns = [utils.REF_COLUMNS.index(c) for c in CUTOFF_COLUMNS]
+    dense = utils.lookup_ref(gender, index_type, grid, standard)
+    return CutoffTable(gender, index_type, float(keys[0]), step, dense[:, columns].copy())
+
+
+# Cache per (standar, versi tabel, gender, index_type), dibikin pas pertama
+# dipake. Versi ikut di key, jadi `utils.REF` yang diganti / CSV yang
+# dikoreksi langsung dapet tabel batas baru.
+_CUTOFFS = {}
+
+
+def cutoff_table(gender: str, index_type: str, standard=None) -> CutoffTable:
+    name = utils.standard_name(standard)
+    version = utils.get_reference(standard).version
+    key = (name, version, gender, index_type)
+    if key not in _CUTOFFS:
+        # Tabel versi lama standar yang sama gak bakal dipake lagi
+        for old in [k for k in _CUTOFFS if k[0] == name and k[1] != version]:
+            del _CUTOFFS[old]
+        _CUTOFFS[key] = build_cutoff_table(gender, index_type, standard)
+    return _CUTOFFS[key]
+
+
+def classify(value, cutoffs) -> np.ndarray:
+    """
+    Pita (kode 0-3) dari perbandingan langsung `value` ke batas (N, 3).
+    """
+    value = np.asarray(value, dtype=np.float64)
+    sd_n3, sd_n2, sd_p2 = cutoffs[:, 0], cutoffs[:, 1], cutoffs[:, 2]
+    band = np.select(
+        [value < sd_n3, value < sd_n2, value > sd_p2],
+        [0, 1, 3],
+        default=2,
+    ).astype(np.int8)
+    unknown = np.isnan(value) | np.isnan(cutoffs).any(axis=1)
+    band[unknown] = BAND_UNKNOWN
+    return band
+
+
+def screen_batch(gender, age_months, weight, corrected_height, standard=None) -> dict:
+    """
+    Skrining banyak anak sekaligus. Input sama kayak `utils.get_z_scores_batch`.
+
+    Returns:
+        Dictionary array kode pita int8 'bb_u', 'tb_u', 'bb_tb'
+        (lihat BAND_LABELS, -1 = gak bisa diskrining).
+    """
+    gender = np.asarray(gender)
+    age_months = np.asarray(age_months, dtype=np.float64)
+    weight = np.asarray(weight, dtype=np.float64)
+    corrected_height = np.asarray(corrected_height, dtype=np.float64)
+
+    n = len(gender)
+    bands = {
+        name: np.full(n, BAND_UNKNOWN, dtype=np.int8) for name in ("bb_u", "tb_u", "bb_tb")
+    }
+
+    # Pemilihan tabel sama persis kayak get_z_scores (termasuk fallback stunting parah)
+    index_len = np.where(age_months < 24, "PB_U", "TB_U")
+    lookup_height = np.round(corrected_height * 2) / 2
+    index_wfh = np.where(age_months < 24, "BB_PB", "BB_TB")
+    index_wfh[(index_wfh == "BB_TB") & (lookup_height < 65.0)] = "BB_PB"
+
+    for g in np.unique(gender):
+        is_g = gender == g
+
+        table = cutoff_table(g, "BB_U", standard)
+        bands["bb_u"][is_g] = classify(weight[is_g], table.lookup(age_months[is_g]))
+
+        for index_type in ("PB_U", "TB_U"):
+            mask = is_g & (index_len == index_type)
+            table = cutoff_table(g, index_type, standard)
+            bands["tb_u"][mask] = classify(corrected_height[mask], table.lookup(age_months[mask]))
+
+        for index_type in ("BB_PB", "BB_TB"):
+            mask = is_g & (index_wfh == index_type)
+            table = cutoff_table(g, index_type, standard)
+            bands["bb_tb"][mask] = classify(weight[mask], table.lookup(lookup_height[mask]))
+
+    return bands
+
+
+def band_labels(bands) -> np.ndarray:
+    """
+    Ubah kode pita jadi teks (kode -1 jadi None).
+    """
+    labels = np.array(BAND_LABELS + [None], dtype=object)
+    return labels[np.asarray(bands)]
+
+
+def job_aid_table(gender: str, index_type: str, standard=None) -> pd.DataFrame:
+    """
+    Tabel batas siap cetak buat satu gender + index.
+    """
+    _, key_name, unit = TABLE_SPECS[index_type]
+    table = cutoff_table(gender, index_type, standard)
+    columns = [f"{c} ({unit})" for c in ("-3 SD", "-2 SD", "+2 SD")]
+    df = pd.DataFrame(np.round(table.cutoffs, 1), columns=columns)
+    keys = table.keys
+    df.insert(0, key_name, keys.astype(np.int64) if table.step == 1 else keys)
+    return df.dropna()
+
+
+def export_tables(out_dir: str, ages=None, standard=None) -> list:
+    """
+    Tulis tabel batas semua gender + index ke `out_dir` (satu CSV per tabel),
+    tabel per umur dipotong ke rentang `ages` (default jangkauan umur
+    standarnya). Balikin list path file.
+    """
+    ages = ages or utils.get_reference(standard).age_range or (0, 60)
+    os.makedirs(out_dir, exist_ok=True)
+    paths = []
+    for gender in ("L", "P"):
+        for index_type in TABLE_SPECS:
+            df = job_aid_table(gender, index_type, standard)
+            if TABLE_SPECS[index_type][0] == 1:
+                df = df[df.iloc[:, 0].between(*ages)]
+            path = os.path.join(out_dir, f"batas_{index_type}_{gender}.csv")
+            df.to_csv(path, index=False)
+            paths.append(path)
+    return paths
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export tabel batas SD buat job aid")
+    parser.add_argument("--out", default="tabel_batas")
+    parser.add_argument("--standard", help="Standar referensi (nama / nama@versi), default standar default")
+    parser.add_argument("--max-age", type=int, help="Default batas atas umur standarnya")
+    args = parser.parse_args()
+
+    ages = None
+    if args.max_age is not None:
+        low = (utils.get_reference(args.standard).age_range or (0, 60))[0]
+        ages = (low, args.max_age)
+    for path in export_tables(args.out, ages, args.standard):
+        print(path)
@@ -1,53 +1,160 @@
 import os
+import io
 import csv
+import sys
+import argparse
+
+# Header sama kayak dataset/std_age.csv biar hasilnya bisa langsung dipake
+HEADER = [
+    "gender",
+    "index_type",
+    "age_months",
+    "sd_n3",
+    "sd_n2",
+    "sd_n1",
+    "median",
+    "sd_p1",
+    "sd_p2",
+    "sd_p3",
+]
+INDEX_TYPE = "IMT_U"
+# Kolom nilai SD (sd_n3 ... sd_p3) setelah kolom tahun dan bulan
+N_VALUES = len(HEADER) - 3
+
+
+def convert(input_path, gender):
+    """
+    Ubah tabel IMT/U format 'tahun bulan nilai...' jadi baris format std_age.csv.
+    """
+    processed_rows = []
+
+    with open(input_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+
+            parts = line.split()
+
+            if len(parts) != 2 + N_VALUES:
+                print(f"Skipping malformed line: {line}")
+                continue
+
+            try:
+                year = int(parts[0])
+                month = int(parts[1])
+                rest_values = [str(float(v)) for v in parts[2:]]
+
+                total_months = year * 12 + month
+
+                new_row = [gender, INDEX_TYPE, str(total_months)] + rest_values
+                processed_rows.append(new_row)
+
+            except ValueError as e:
+                print(f"Error parsing line '{line}': {e}")
+                continue
+
+    return processed_rows
+
+
+def _csv_line(row):
+    out = io.StringIO()
+    csv.writer(out, lineterminator='\n').writerow(row)
+    return out.getvalue()
+
+
+def merge_into(std_age_path, rows, gender):
+    """
+    Gabung baris IMT/U ke std_age.csv. Baris lama dengan gender + umur yang
+    sama diganti di tempatnya; umur baru diselipin setelah baris blok ini
+    dengan umur terdekat di bawahnya. Baris lain (termasuk baris kosong
+    pemisah antar blok) ditulis ulang apa adanya, jadi layout file gak berubah.
+    """
+    with open(std_age_path, 'r', encoding='utf-8', newline='') as f:
+        lines = f.readlines()
+    if lines and not lines[-1].endswith('\n'):
+        lines[-1] += '\n'
+
+    # umur -> posisi baris blok IMT/U gender ini (baris 0 = header)
+    positions = {}
+    for i, line in enumerate(lines[1:], start=1):
+        row = next(csv.reader([line]), [])
+        if len(row) > 2 and row[0] == gender and row[1] == INDEX_TYPE:
+            positions[int(row[2])] = i
+
+    after = {}  # posisi baris -> baris baru yang diselipin setelahnya
+    appended = []
+    for row in sorted(rows, key=lambda r: int(r[2])):
+        age = int(row[2])
+        if age in positions:
+            lines[positions[age]] = _csv_line(row)
+            continue
+        below = [a for a in positions if a < age]
+        if below:
+            after.setdefault(positions[max(below)], []).append(_csv_line(row))
+        elif positions:
+            after.setdefault(positions[min(positions)] - 1, []).append(_csv_line(row))
+        else:
+            appended.append(_csv_line(row))
+
+    merged = []
+    for i, line in enumerate(lines):
+        merged.append(line)
+        merged.extend(after.get(i, []))
+    if appended:
+        # Blok baru ditaruh di akhir, dipisah satu baris kosong kayak blok lain
+        if merged and merged[-1].strip():
+            merged.append('\n')
+        merged.extend(appended)
+
+    with open(std_age_path, 'w', newline='', encoding='utf-8') as f:
+        f.writelines(merged)
+
 
 def main():
     script_dir = os.path.dirname(os.path.abspath(__file__))
-    input_path = os.path.join(script_dir, 'imtu_ym.txt')
-    output_path = os.path.join(script_dir, 'imtu_ym.o.txt')
+    std_age_path = os.path.join(os.path.dirname(script_dir), 'dataset', 'std_age.csv')
 
-    print(f"Reading from {input_path}")
-    print(f"Writing to {output_path}")
+    parser = argparse.ArgumentParser(description="Konversi tabel IMT/U tahun/bulan")
+    parser.add_argument('--gender', choices=['L', 'P'], required=True)
+    parser.add_argument('--input', default=os.path.join(script_dir, 'imtu_ym.txt'))
+    parser.add_argument('--output', default=os.path.join(script_dir, 'imtu_ym.o.csv'))
+    parser.add_argument(
+        '--merge',
+        action='store_true',
+        help="Langsung gabung ke dataset/std_age.csv (diload utils sebagai IMT_U)",
+    )
+    args = parser.parse_args()
 
-    processed_rows = []
+    print(f"Reading from {args.input}")
 
     try:
-        with open(input_path, 'r', encoding='utf-8') as f:
-            for line in f:
-                line = line.strip()
-                if not line:
-                    continue
-                
-                parts = line.split()
-                
-                if len(parts) < 2:
-                    print(f"Skipping malformed line: {line}")
-                    continue
-
-                try:
-                    year = int(parts[0])
-                    month = int(parts[1])
-                    rest_values = parts[2:]
-                    
-                    total_months = year * 12 + month
-                    
-                    new_row = [str(total_months)] + rest_values
-                    processed_rows.append(new_row)
-                    
-                except ValueError as e:
-                    print(f"Error parsing line '{line}': {e}")
-                    continue
-        
-        with open(output_path, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.writer(f)
-            writer.writerows(processed_rows)
-            
-        print("Conversion complete.")
+        processed_rows = convert(args.input, args.gender)
+
+        if not processed_rows:
+            # Misal masih file placeholder: jangan sampe std_age.csv ketimpa
+            print(f"Error: gak ada baris IMT/U yang kebaca dari {args.input}, gak ada yang ditulis.")
+            return 1
+
+        if args.merge:
+            print(f"Merging into {std_age_path}")
+            merge_into(std_age_path, processed_rows, args.gender)
+        else:
+            print(f"Writing to {args.output}")
+            with open(args.output, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.writer(f)
+                writer.writerow(HEADER)
+                writer.writerows(processed_rows)
+
+        print(f"Conversion complete ({len(processed_rows)} rows).")
 
     except FileNotFoundError:
-        print(f"Error: The file {input_path} was not found.")
+        print(f"Error: The file {args.input} was not found.")
+        return 1
     except Exception as e:
         print(f"An unexpected error occurred: {e}")
+        return 1
+    return 0
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
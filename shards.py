@@ -0,0 +1,346 @@
+"""
+Penyimpanan pusat yang dipecah per wilayah (shard): satu file SQLite
+(`capture.CentralStore`) per kecamatan / posyandu, bukan satu file buat
+satu provinsi.
+
+    - Routing: record masuk ke shard sesuai kolom `shard_by` ('region'
+      atau 'posyandu'), nama shard = nama wilayah yang dinormalisasi.
+      Record tanpa wilayah masuk shard '_tanpa_wilayah'. Sync dari banyak
+      kecamatan gak rebutan lock satu file lagi.
+    - Dedup tetep jalan per shard: record yang dikirim ulang punya wilayah
+      yang sama, jadi pasti mendarat di shard yang sama.
+    - Query agregat (jumlah per label, prevalensi) dikerjain per shard di
+      proses worker (ProcessPoolExecutor) terus digabung. Shard paling gede
+      dijalanin duluan, jadi latency-nya ngikut shard terbesar, bukan total
+      data. Kunjungan yang belum ada statusnya diskoring dulu lewat
+      `pipeline` (fuzzy_system.predict_batch).
+
+`ShardedStore` interface-nya sama kayak `CentralStore`, jadi bisa langsung
+dipake `capture.sync` / `capture.make_server`.
+
+Contoh:
+    python shards.py migrate pusat.db --root data/shards --shard-by region
+    python shards.py aggregate --root data/shards --workers 4
+    python shards.py bench --visits 200000 --shards 20
+"""
+
+import argparse
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import capture
+import pipeline
+from fuzzy_logic import status_label
+from registry import normalize
+
+DEFAULT_ROOT = os.path.join(os.path.dirname(__file__), "data", "shards")
+SHARD_KEYS = ("region", "posyandu")
+UNASSIGNED = "_tanpa_wilayah"
+
+# Kolom yang dibaca buat skoring kunjungan yang belum ada statusnya
+# (nama ikut biar cek dobel di `quality` bisa bedain anak)
+SCORE_COLUMNS = ["nama", "gender", "dob", "weight", "height", "measure_mode", "visit_date"]
+
+
+def shard_name(value) -> str:
+    """
+    'Kec. Cibinong' -> 'kec_cibinong'. Kosong -> '_tanpa_wilayah'.
+    """
+    name = normalize(value).replace(" ", "_")
+    return name or UNASSIGNED
+
+
+def _date_filter(visit_from=None, visit_to=None):
+    # Tanggal disimpen 'YYYY-MM-DD', jadi bisa dibandingin sebagai teks
+    clauses, args = [], []
+    if visit_from:
+        clauses.append("visit_date >= ?")
+        args.append(str(visit_from))
+    if visit_to:
+        clauses.append("visit_date <= ?")
+        args.append(str(visit_to))
+    return clauses, args
+
+
+def shard_summary(path: str, visit_from=None, visit_to=None, batch_size: int = 10000) -> dict:
+    """
+    Ringkasan satu shard: {'rows': n, 'counts': {label: n}}.
+    Dijalanin di proses worker, koneksinya read-only sendiri.
+    """
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        clauses, args = _date_filter(visit_from, visit_to)
+        where = " AND ".join(clauses) or "1"
+        # Status dari app ada suffix skornya ('Gizi Baik (63.41/100)'), jadi
+        # dinormalisasi dulu biar satu label satu bucket
+        counts = Counter()
+        for status, n in conn.execute(
+            f"SELECT status, COUNT(*) FROM visits WHERE {where} "
+            "AND status IS NOT NULL AND status != '' GROUP BY status",
+            args,
+        ):
+            counts[status_label(status)] += n
+
+        # Yang belum ada statusnya diskoring di sini
+        unscored = pd.read_sql_query(
+            f"SELECT {', '.join(SCORE_COLUMNS)} FROM visits WHERE {where} "
+            "AND (status IS NULL OR status = '')",
+            conn,
+            params=args,
+            chunksize=batch_size,
+        )
+        rejected = 0
+
+        def on_reject(batch):
+            nonlocal rejected
+            rejected += len(batch)
+
+        for batch in pipeline.score(unscored, on_reject=on_reject):
+            counts.update(batch["label"].value_counts().to_dict())
+        if rejected:
+            counts[pipeline.LABEL_UNSCORED] += rejected
+    finally:
+        conn.close()
+    return {"rows": int(sum(counts.values())), "counts": dict(counts)}
+
+
+def _summary_in_worker(item):
+    name, path, visit_from, visit_to = item
+    return name, shard_summary(path, visit_from, visit_to)
+
+
+def merge_summaries(summaries: dict) -> dict:
+    """
+    Gabung ringkasan per shard jadi total + prevalensi tiap label.
+    """
+    counts = Counter()
+    for summary in summaries.values():
+        counts.update(summary["counts"])
+    total = sum(counts.values())
+    return {
+        "rows": total,
+        "counts": dict(counts.most_common()),
+        "prevalence": {label: n / total for label, n in counts.most_common()} if total else {},
+        "shards": summaries,
+    }
+
+
+class ShardedStore:
+    """
+    Kumpulan `CentralStore` per wilayah di satu folder (lihat docstring modul).
+    """
+
+    def __init__(self, root: str = DEFAULT_ROOT, shard_by: str = "region"):
+        if shard_by not in SHARD_KEYS:
+            raise ValueError(f"shard_by harus salah satu dari {SHARD_KEYS}")
+        self.root = root
+        self.shard_by = shard_by
+        self._stores = {}
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.root, f"{name}.db")
+
+    def shards(self) -> list:
+        return sorted(f[:-3] for f in os.listdir(self.root) if f.endswith(".db"))
+
+    def _size(self, name: str) -> int:
+        # Tulisan terakhir bisa masih di file WAL
+        path = self.path(name)
+        wal = f"{path}-wal"
+        return os.path.getsize(path) + (os.path.getsize(wal) if os.path.exists(wal) else 0)
+
+    def shard_for(self, record: dict) -> str:
+        return shard_name(record.get(self.shard_by))
+
+    def _store(self, name: str) -> capture.CentralStore:
+        with self._lock:
+            if name not in self._stores:
+                self._stores[name] = capture.CentralStore(self.path(name))
+            return self._stores[name]
+
+    def bulk_insert(self, records: list) -> dict:
+        """
+        Pecah batch per shard, tiap shard satu transaksi sendiri.
+        """
+        groups = defaultdict(list)
+        for record in records:
+            groups[self.shard_for(record)].append(record)
+        result = {"inserted": 0, "duplicates": 0}
+        for name, group in groups.items():
+            for key, n in self._store(name).bulk_insert(group).items():
+                result[key] += n
+        return result
+
+    def count(self) -> int:
+        return sum(self._store(name).count() for name in self.shards())
+
+    def aggregate(self, workers: int = None, visit_from=None, visit_to=None) -> dict:
+        """
+        Jumlah kunjungan per label + prevalensi, total dan per shard
+        (lihat `merge_summaries`). Shard dikerjain paralel di `workers` proses.
+        """
+        workers = workers or os.cpu_count() or 1
+        # Shard gede duluan biar gak ada yang nyangkut sendirian di akhir
+        names = sorted(self.shards(), key=self._size, reverse=True)
+        items = [(name, self.path(name), visit_from, visit_to) for name in names]
+
+        if workers == 1 or len(items) <= 1:
+            results = [_summary_in_worker(item) for item in items]
+        else:
+            with ProcessPoolExecutor(max_workers=min(workers, len(items))) as pool:
+                results = list(pool.map(_summary_in_worker, items))
+        return merge_summaries(dict(sorted(results)))
+
+    def close(self):
+        with self._lock:
+            for store in self._stores.values():
+                store.close()
+            self._stores.clear()
+
+
+def migrate(db_path: str, store: ShardedStore, batch_size: int = capture.DEFAULT_SYNC_BATCH) -> int:
+    """
+    Pindahin isi satu `CentralStore` (satu file) ke shard-shard. Aman diulang.
+    """
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    conn.row_factory = sqlite3.Row
+    moved = 0
+    try:
+        # SELECT * biar file lama yang belum punya kolom baru (misal nama_ortu) tetep bisa
+        cursor = conn.execute("SELECT * FROM visits")
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            store.bulk_insert([dict(row) for row in rows])
+            moved += len(rows)
+    finally:
+        conn.close()
+    return moved
+
+
+def bench(visits: int = 200000, shards: int = 20, workers: int = None, seed: int = 0) -> dict:
+    """
+    Bandingin waktu agregat satu file vs dipecah per wilayah (ukuran wilayah
+    timpang, 30% kunjungan belum ada statusnya jadi harus diskoring, separuh
+    status format app kayak 'Gizi Baik (63.41/100)').
+    """
+    rng = np.random.default_rng(seed)
+    sizes = rng.zipf(1.5, shards).astype(np.float64)
+    regions = rng.choice(shards, visits, p=sizes / sizes.sum())
+    days = rng.integers(0, 60 * 30, visits)
+    heights = np.round(rng.uniform(50, 110, visits), 1)
+    weights = np.round(np.clip(heights * 0.14 + rng.normal(0, 1.5, visits), 2, 30), 2)
+    labels = np.array(["Gizi Baik", "Gizi Kurang", "Gizi Buruk", "Gizi Lebih"])
+    status = labels[rng.integers(0, len(labels), visits)].astype(object)
+    # Separuh disimpen dari app (status tampilan, ada skornya)
+    from_app = rng.random(visits) < 0.5
+    scores = np.round(rng.uniform(0, 100, visits), 2)
+    status[from_app] = [f"{s} ({v}/100)" for s, v in zip(status[from_app], scores[from_app])]
+    status[rng.random(visits) < 0.3] = None
+    records = [
+        {
+            "key": f"v{i}",
+            "nama": f"Balita {i}",
+            "dob": str(np.datetime64("2020-01-01") + int(days[i])),
+            "gender": "L" if i % 2 else "P",
+            "weight": float(weights[i]),
+            "height": float(heights[i]),
+            "measure_mode": "standing",
+            "visit_date": "2025-01-01",
+            "region": f"Kecamatan {regions[i]}",
+            "status": status[i],
+        }
+        for i in range(visits)
+    ]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        single = capture.CentralStore(os.path.join(tmp, "pusat.db"))
+        single.bulk_insert(records)
+        single.close()
+        start = time.perf_counter()
+        one = shard_summary(os.path.join(tmp, "pusat.db"))
+        single_seconds = time.perf_counter() - start
+
+        store = ShardedStore(os.path.join(tmp, "shards"))
+        store.bulk_insert(records)
+        start = time.perf_counter()
+        sharded = store.aggregate(workers)
+        sharded_seconds = time.perf_counter() - start
+
+        largest = max(sharded["shards"], key=lambda n: sharded["shards"][n]["rows"])
+        start = time.perf_counter()
+        shard_summary(store.path(largest))
+        largest_seconds = time.perf_counter() - start
+        store.close()
+
+    return {
+        "visits": visits,
+        "shards": len(sharded["shards"]),
+        "largest_rows": sharded["shards"][largest]["rows"],
+        "single_seconds": single_seconds,
+        "sharded_seconds": sharded_seconds,
+        "largest_seconds": largest_seconds,
+        "same_counts": one["counts"] == sharded["counts"],
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Penyimpanan pusat per wilayah")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_migrate = sub.add_parser("migrate", help="Pecah satu file SQLite jadi shard")
+    p_migrate.add_argument("db")
+    p_migrate.add_argument("--root", default=DEFAULT_ROOT)
+    p_migrate.add_argument("--shard-by", default="region", choices=SHARD_KEYS)
+
+    p_agg = sub.add_parser("aggregate", help="Jumlah per label + prevalensi")
+    p_agg.add_argument("--root", default=DEFAULT_ROOT)
+    p_agg.add_argument("--workers", type=int, default=None)
+    p_agg.add_argument("--from", dest="visit_from", help="Tanggal periksa mulai (YYYY-MM-DD)")
+    p_agg.add_argument("--to", dest="visit_to", help="Tanggal periksa sampai (YYYY-MM-DD)")
+    p_agg.add_argument("--per-shard", action="store_true", help="Tampilin rincian per shard")
+
+    p_bench = sub.add_parser("bench", help="Bandingin agregat satu file vs per shard")
+    p_bench.add_argument("--visits", type=int, default=200000)
+    p_bench.add_argument("--shards", type=int, default=20)
+    p_bench.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    if args.command == "migrate":
+        store = ShardedStore(args.root, args.shard_by)
+        n = migrate(args.db, store)
+        print(f"{n} kunjungan dipindah ke {len(store.shards())} shard di {args.root}")
+        store.close()
+
+    elif args.command == "aggregate":
+        result = ShardedStore(args.root).aggregate(args.workers, args.visit_from, args.visit_to)
+        print(f"{result['rows']} kunjungan di {len(result['shards'])} shard")
+        for label, n in result["counts"].items():
+            print(f"  {label:28} {n:8}  ({result['prevalence'][label]:.1%})")
+        if args.per_shard:
+            for name, summary in result["shards"].items():
+                print(f"{name}: {summary['rows']} kunjungan")
+                for label, n in sorted(summary["counts"].items()):
+                    print(f"  {label:28} {n:8}")
+
+    else:
+        result = bench(args.visits, args.shards, args.workers)
+        print(
+            f"{result['visits']} kunjungan, {result['shards']} shard "
+            f"(terbesar {result['largest_rows']} kunjungan)"
+        )
+        print(f"  satu file          : {result['single_seconds']:.2f} detik")
+        print(f"  per shard (paralel): {result['sharded_seconds']:.2f} detik")
+        print(f"  shard terbesar     : {result['largest_seconds']:.2f} detik")
+        print(f"  hasil sama         : {result['same_counts']}")
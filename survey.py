@@ -0,0 +1,293 @@
+"""
+Estimasi prevalensi stunting / wasting / underweight buat survei gizi
+kabupaten, pake bobot sampling dan desain klaster (posyandu), plus interval
+kepercayaan dari cluster bootstrap.
+
+Estimator: prevalensi = sum(bobot * indikator) / sum(bobot), cuma dari anak
+yang Z-score indeksnya ada dan masih dalam batas WHO (`quality.Z_LIMITS`).
+
+Bootstrap (Rao-Wu, n-1): tiap replikasi ngambil ulang n_h - 1 klaster
+dengan pengembalian di tiap strata h, bobot klaster dikali
+(jumlah terambil) * n_h / (n_h - 1). Strata yang klasternya cuma satu gak
+nyumbang variasi.
+
+Biar cepet:
+    - data anak dipadatin dulu jadi total per klaster (pembilang + penyebut
+      per indikator per domain), jadi ukuran bootstrap cuma tergantung
+      jumlah klaster, bukan jumlah anak
+    - satu blok replikasi = matriks hitungan multinomial (replikasi x
+      klaster), estimasinya satu perkalian matriks
+    - blok replikasi dibagi ke ProcessPoolExecutor; seed tiap blok tetap
+      (SeedSequence.spawn), jadi hasilnya sama berapapun jumlah worker-nya
+
+Contoh:
+    python survey.py hasil_survei.jsonl --weight bobot --cluster posyandu \\
+        --strata kecamatan --by kecamatan --replicates 10000 --workers 4
+    python survey.py --bench 100000
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import pipeline
+import quality
+
+# Indikator: (kolom Z, batas) -> anak dihitung kalo Z < batas
+INDICATORS = {
+    "stunting": ("z_tb_u", -2.0),
+    "severe_stunting": ("z_tb_u", -3.0),
+    "wasting": ("z_bb_tb", -2.0),
+    "severe_wasting": ("z_bb_tb", -3.0),
+    "underweight": ("z_bb_u", -2.0),
+    "severe_underweight": ("z_bb_u", -3.0),
+}
+
+DEFAULT_REPLICATES = 10000
+BLOCK_SIZE = 500
+CONFIDENCE = 0.95
+
+# Domain kalo estimasinya gak dipecah (`by` None)
+ALL = "Semua"
+
+
+class ClusterTotals:
+    """
+    Data survei yang udah dipadatin per klaster.
+
+    numerator / denominator: (klaster, indikator x domain) total bobot anak
+    yang kena indikator / yang Z-nya valid. `stratum`: kode strata tiap
+    klaster. `counts`: jumlah anak (tanpa bobot) yang Z-nya valid per kolom.
+    """
+
+    def __init__(self, numerator, denominator, stratum, counts, columns):
+        self.numerator = numerator
+        self.denominator = denominator
+        self.stratum = stratum
+        self.counts = counts
+        self.columns = columns
+
+    @property
+    def n_clusters(self) -> int:
+        return len(self.stratum)
+
+    def estimate(self, factors=None) -> np.ndarray:
+        """
+        Prevalensi per kolom. `factors` (replikasi x klaster) = pengali bobot
+        klaster tiap replikasi; None = estimasi titik.
+        """
+        if factors is None:
+            num, den = self.numerator.sum(axis=0), self.denominator.sum(axis=0)
+        else:
+            num, den = factors @ self.numerator, factors @ self.denominator
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(den > 0, num / den, np.nan)
+
+
+def cluster_totals(
+    df: pd.DataFrame, weight: str = None, cluster: str = "posyandu", strata: str = None, by: str = None
+) -> ClusterTotals:
+    """
+    Padatin hasil skoring (`df`, kolom z_* dari pipeline) jadi `ClusterTotals`.
+    Bobot kosong / gak ada kolomnya = 1; klaster kosong = satu klaster sendiri.
+    """
+    n = len(df)
+    w = np.ones(n) if weight is None else pd.to_numeric(df[weight], errors="coerce").to_numpy()
+    w = np.where(np.isnan(w) | (w < 0), 0.0, w)
+
+    cluster_values = df[cluster].astype(object).where(df[cluster].notna(), "-")
+    stratum_values = df[strata].astype(object) if strata else pd.Series("-", index=df.index)
+    cluster_code, clusters = pd.factorize(
+        pd.MultiIndex.from_arrays([stratum_values.astype(str), cluster_values.astype(str)])
+    )
+    stratum_code = pd.factorize(clusters.get_level_values(0))[0]
+    domain_code, domains = pd.factorize(
+        df[by].astype(object).fillna("-").astype(str) if by else pd.Series(ALL, index=df.index)
+    )
+
+    n_clusters, n_domains = len(clusters), len(domains)
+    columns, num_parts, den_parts, count_parts = [], [], [], []
+    for name, (column, cutoff) in INDICATORS.items():
+        if column not in df.columns:
+            continue
+        z = pd.to_numeric(df[column], errors="coerce").to_numpy(dtype=np.float64)
+        low, high = quality.Z_LIMITS.get(column, (-np.inf, np.inf))
+        valid = ~np.isnan(z) & (z >= low) & (z <= high)
+        hit = valid & (z < cutoff)
+        # Satu bincount buat semua (klaster, domain) sekaligus
+        cell = cluster_code * n_domains + domain_code
+        size = n_clusters * n_domains
+        num_parts.append(np.bincount(cell, weights=w * hit, minlength=size).reshape(n_clusters, n_domains))
+        den_parts.append(np.bincount(cell, weights=w * valid, minlength=size).reshape(n_clusters, n_domains))
+        count_parts.append(np.bincount(domain_code[valid], minlength=n_domains))
+        columns.extend((domain, name) for domain in domains)
+
+    if not columns:
+        raise ValueError("Gak ada kolom Z-score (z_tb_u / z_bb_tb / z_bb_u) di data.")
+    return ClusterTotals(
+        np.hstack(num_parts),
+        np.hstack(den_parts),
+        stratum_code,
+        np.concatenate(count_parts),
+        columns,
+    )
+
+
+def _replicate_factors(stratum: np.ndarray, replicates: int, rng) -> np.ndarray:
+    """
+    Pengali bobot klaster Rao-Wu (n-1) buat `replicates` replikasi.
+    """
+    factors = np.ones((replicates, len(stratum)))
+    for h in np.unique(stratum):
+        members = np.flatnonzero(stratum == h)
+        n_h = len(members)
+        if n_h < 2:
+            continue
+        draws = rng.multinomial(n_h - 1, np.full(n_h, 1.0 / n_h), size=replicates)
+        factors[:, members] = draws * (n_h / (n_h - 1))
+    return factors
+
+
+# Data klaster per proses worker (diisi `_init_worker`)
+_WORKER = {}
+
+
+def _init_worker(totals: ClusterTotals):
+    _WORKER["totals"] = totals
+
+
+def _bootstrap_block(item) -> np.ndarray:
+    seed, replicates = item
+    totals = _WORKER["totals"]
+    factors = _replicate_factors(totals.stratum, replicates, np.random.default_rng(seed))
+    return totals.estimate(factors)
+
+
+def bootstrap(
+    totals: ClusterTotals, replicates: int = DEFAULT_REPLICATES, workers: int = 1, seed: int = 0
+) -> np.ndarray:
+    """
+    Estimasi (replikasi x kolom) dari cluster bootstrap. Replikasi dibagi
+    per blok BLOCK_SIZE, seed tiap blok diturunin dari `seed`.
+    """
+    sizes = [min(BLOCK_SIZE, replicates - start) for start in range(0, replicates, BLOCK_SIZE)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    items = list(zip(seeds, sizes))
+    if workers == 1:
+        _init_worker(totals)
+        blocks = [_bootstrap_block(item) for item in items]
+    else:
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(totals,)
+        ) as pool:
+            blocks = list(pool.map(_bootstrap_block, items))
+    return np.vstack(blocks)
+
+
+def prevalence(
+    df: pd.DataFrame,
+    weight: str = None,
+    cluster: str = "posyandu",
+    strata: str = None,
+    by: str = None,
+    replicates: int = DEFAULT_REPLICATES,
+    workers: int = 1,
+    seed: int = 0,
+    confidence: float = CONFIDENCE,
+) -> pd.DataFrame:
+    """
+    Prevalensi tertimbang + interval kepercayaan persentil bootstrap per
+    (domain, indikator). Kolom hasil: n (anak, tanpa bobot), weighted_n,
+    prevalence, se, ci_low, ci_high, deff (design effect = varians
+    bootstrap / varians sampel acak sederhana).
+    """
+    totals = cluster_totals(df, weight, cluster, strata, by)
+    point = totals.estimate()
+    replicated = bootstrap(totals, replicates, workers, seed) if replicates else None
+
+    alpha = (1 - confidence) / 2
+    out = pd.DataFrame(totals.columns, columns=[by or "domain", "indicator"])
+    out["n"] = totals.counts
+    out["weighted_n"] = totals.denominator.sum(axis=0)
+    out["prevalence"] = point
+    if replicated is not None:
+        with np.errstate(invalid="ignore"):
+            se = np.nanstd(replicated, axis=0, ddof=1)
+            low, high = np.nanquantile(replicated, [alpha, 1 - alpha], axis=0)
+            srs = point * (1 - point) / np.maximum(totals.counts, 1)
+            deff = np.where(srs > 0, se**2 / srs, np.nan)
+        out["se"], out["ci_low"], out["ci_high"], out["deff"] = se, low, high, deff
+    return out
+
+
+def bench(children: int = 100000, clusters: int = 1000, replicates: int = 10000, workers: int = 1) -> dict:
+    """
+    Survei sintetis: `children` anak di `clusters` posyandu (20 kecamatan),
+    prevalensi beda-beda per klaster biar ada efek desain.
+    """
+    rng = np.random.default_rng(0)
+    cluster = rng.integers(0, clusters, children)
+    shift = rng.normal(0, 0.4, clusters)[cluster]
+    df = pd.DataFrame(
+        {
+            "posyandu": cluster,
+            "kecamatan": cluster % 20,
+            "bobot": rng.uniform(0.5, 2.0, clusters)[cluster],
+            "z_tb_u": np.round(rng.normal(-1.1, 1.2, children) + shift, 2),
+            "z_bb_tb": np.round(rng.normal(-0.4, 1.1, children) + shift / 2, 2),
+            "z_bb_u": np.round(rng.normal(-0.9, 1.1, children) + shift, 2),
+        }
+    )
+    start = time.perf_counter()
+    result = prevalence(
+        df, "bobot", "posyandu", "kecamatan", replicates=replicates, workers=workers
+    )
+    seconds = time.perf_counter() - start
+    return {
+        "children": children,
+        "clusters": clusters,
+        "replicates": replicates,
+        "seconds": seconds,
+        "result": result,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prevalensi survei gizi + bootstrap CI")
+    parser.add_argument("input", nargs="?", help="Data survei (JSONL / CSV, mentah atau hasil pipeline)")
+    parser.add_argument("--weight", help="Kolom bobot sampling (default semua 1)")
+    parser.add_argument("--cluster", default="posyandu", help="Kolom klaster")
+    parser.add_argument("--strata", help="Kolom strata (misal kecamatan)")
+    parser.add_argument("--by", help="Pecah estimasi per kolom ini (misal kecamatan)")
+    parser.add_argument("--replicates", type=int, default=DEFAULT_REPLICATES)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="Simpan hasil ke CSV")
+    parser.add_argument("--bench", type=int, metavar="ANAK", help="Benchmark survei sintetis")
+    args = parser.parse_args()
+
+    if args.bench:
+        info = bench(args.bench, replicates=args.replicates, workers=args.workers)
+        print(
+            f"{info['children']} anak, {info['clusters']} klaster, {info['replicates']} replikasi: "
+            f"{info['seconds']:.2f} detik"
+        )
+        result = info["result"]
+    elif args.input:
+        df = pd.concat(pipeline.read_source(args.input, 100000), ignore_index=True)
+        if "z_tb_u" not in df.columns:
+            df = pd.concat(pipeline.score([df]), ignore_index=True)
+        result = prevalence(
+            df, args.weight, args.cluster, args.strata, args.by, args.replicates, args.workers, args.seed
+        )
+    else:
+        parser.error("butuh input, atau --bench")
+
+    if args.out:
+        result.to_csv(args.out, index=False)
+    with pd.option_context("display.max_rows", 200, "display.width", 160):
+        print(result.round(4).to_string(index=False))
@@ -0,0 +1,166 @@
+import json
+import os
+import tempfile
+import threading
+import unittest
+from datetime import date
+from unittest import mock
+
+import alerts
+
+
+def _visit(weight, visit_date, nama="Budi", height=80.0, **extra):
+    return {
+        "nama": nama,
+        "dob": date(2023, 1, 1),
+        "gender": "Laki-laki",
+        "weight": weight,
+        "height": height,
+        "measure_mode": "Terlentang",
+        "visit_date": visit_date,
+        **extra,
+    }
+
+
+class TestAlertDetector(unittest.TestCase):
+
+    def setUp(self):
+        self.detector = alerts.AlertDetector()
+
+    def test_new_severe_case_alerts_once(self):
+        first = self.detector.process([_visit(7.0, "2024-06-01")])
+        self.assertEqual([a["type"] for a in first], ["severe"])
+        self.assertLessEqual(first[0]["z_bb_tb"], -3)
+        self.assertEqual(first[0]["child"]["nama"], "Budi")
+
+        # Masih severe di kunjungan berikutnya: bukan kasus baru
+        again = self.detector.process([_visit(7.1, "2024-07-01")])
+        self.assertEqual(again, [])
+
+    def test_deterioration_between_visits(self):
+        self.assertEqual(self.detector.process([_visit(10.5, "2024-06-01")]), [])
+        result = self.detector.process([_visit(9.2, "2024-07-01")])
+        types = {a["type"] for a in result}
+        self.assertIn("deterioration", types)
+        alert = next(a for a in result if a["type"] == "deterioration")
+        self.assertEqual(alert["previous"]["visit_date"], "2024-06-01")
+        self.assertIn("Berat turun", alert["reason"])
+
+    def test_resent_visit_and_other_children_are_ignored(self):
+        visit = _visit(10.5, "2024-06-01", key="abc")
+        self.detector.process([visit])
+        self.assertEqual(self.detector.process([visit]), [])
+        self.assertEqual(self.detector.process([_visit(9.2, "2024-07-01", nama="Siti")]), [])
+
+    def test_implausibly_low_z_still_alerts(self):
+        # 17 bulan, 6 kg / 80 cm: BB/TB dibawah -5 SD, ditandain gak wajar
+        result = self.detector.process([_visit(6.0, "2024-06-01")])
+        self.assertEqual([a["type"] for a in result], ["severe_unverified"])
+        self.assertLess(result[0]["z_bb_tb"], -5)
+        self.assertIn("Z-score ekstrem", result[0]["quality_issues"])
+        self.assertIn("ukur ulang", result[0]["reason"])
+
+        # Hasil ukur ulang yang wajar dan masih severe tetep dianggap kasus baru
+        confirmed = self.detector.process([_visit(7.0, "2024-06-02")])
+        self.assertEqual([a["type"] for a in confirmed], ["severe"])
+
+    def test_impossible_dates_are_skipped(self):
+        visit = _visit(6.0, "2022-06-01")
+        self.assertEqual(self.detector.process([visit]), [])
+
+    def test_memory_is_bounded(self):
+        detector = alerts.AlertDetector(window=2, max_children=3)
+        visits = [
+            _visit(10.5, f"2024-{m:02d}-01", nama=f"Anak {i}") for i in range(5) for m in (1, 2, 3)
+        ]
+        detector.process(visits)
+        self.assertEqual(len(detector), 3)
+        self.assertTrue(all(len(h) <= 2 for h in detector.children.values()))
+
+
+class TestAlertStream(unittest.TestCase):
+
+    def test_file_sink(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "alerts.jsonl")
+            stream = alerts.AlertStream(alerts.make_sink(path))
+            stream.submit(_visit(10.5, "2024-06-01"))
+            stream.submit(_visit(7.0, "2024-07-01"))
+            stream.flush()
+            stream.close()
+            with open(path, encoding="utf-8") as f:
+                published = [json.loads(line) for line in f]
+        self.assertEqual({a["type"] for a in published}, {"severe", "deterioration"})
+        self.assertTrue(all("detected_at" in a for a in published))
+        self.assertEqual(stream.stats["visits"], 2)
+        self.assertLess(max(stream.latencies), 1.0)
+
+    def test_webhook_sink(self):
+        server = alerts.make_receiver(port=0)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            url = f"http://127.0.0.1:{server.server_address[1]}/"
+            stream = alerts.AlertStream(alerts.make_sink(url))
+            stream.submit(_visit(7.0, "2024-06-01"))
+            stream.flush()
+            stream.close()
+        finally:
+            server.shutdown()
+            server.server_close()
+        self.assertEqual([a["type"] for a in server.received], ["severe"])
+
+    def test_failed_sink_retries_then_spools(self):
+        class FlakySink:
+            def __init__(self, failures):
+                self.failures, self.calls, self.published = failures, 0, []
+
+            def publish(self, batch):
+                self.calls += 1
+                if self.calls <= self.failures:
+                    raise OSError("webhook mati")
+                self.published.extend(batch)
+
+        with tempfile.TemporaryDirectory() as tmp, mock.patch.object(alerts, "PUBLISH_BACKOFF", 0):
+            # Gagal sekali: kekirim di percobaan kedua
+            sink = FlakySink(1)
+            stream = alerts.AlertStream(sink, spool=alerts.FileSink(os.path.join(tmp, "s1.jsonl")))
+            with self.assertLogs("alerts", "ERROR"):
+                stream.submit(_visit(7.0, "2024-06-01"))
+                stream.flush()
+            stream.close()
+            self.assertEqual([a["type"] for a in sink.published], ["severe"])
+            self.assertEqual(stream.stats["spooled"], 0)
+
+            # Mati terus: alert masuk spool, gak ilang
+            spool = os.path.join(tmp, "s2.jsonl")
+            stream = alerts.AlertStream(FlakySink(99), spool=alerts.FileSink(spool))
+            with self.assertLogs("alerts", "ERROR"):
+                stream.submit(_visit(7.0, "2024-06-01"))
+                stream.flush()
+            stream.close()
+            with open(spool, encoding="utf-8") as f:
+                self.assertEqual([json.loads(line)["type"] for line in f], ["severe"])
+            self.assertEqual((stream.stats["alerts"], stream.stats["spooled"]), (1, 1))
+
+    def test_history_not_recorded_when_alert_is_lost(self):
+        class DeadSink:
+            def publish(self, batch):
+                raise OSError("mati")
+
+        with mock.patch.object(alerts, "PUBLISH_BACKOFF", 0):
+            stream = alerts.AlertStream(DeadSink(), spool=DeadSink())
+            with self.assertLogs("alerts", "ERROR"):
+                stream.submit(_visit(7.0, "2024-06-01"))
+                stream.flush()
+            stream.close()
+        self.assertEqual(stream.stats["errors"], 1)
+        self.assertEqual(len(stream.detector), 0)
+
+        # Kunjungan berikutnya masih dianggap kasus severe baru
+        again = stream.detector.process([_visit(7.1, "2024-07-01")])
+        self.assertEqual([a["type"] for a in again], ["severe"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from datetime import date
+from unittest import mock
+
+import app
+import capture
+import shards
+
+
+class TestSimpanData(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.journal = capture.Journal(os.path.join(self.tmp.name, "journal.jsonl"))
+        patches = [
+            mock.patch.object(app, "journal", self.journal),
+            mock.patch.object(app.registry.ready, "is_set", return_value=False),
+            mock.patch.object(app, "alert_stream", None),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _simpan(self, nama, posyandu, region):
+        return app.simpan_data(
+            nama, "Ibu Sri", date(2023, 1, 1), "Laki-laki", 12.2, 87.1, "Berdiri",
+            "Gizi Baik (63.41/100)", "", posyandu, region,
+        )
+
+    def test_saved_record_lands_in_region_shard(self):
+        self.assertIn("tersimpan", self._simpan("Budi", "Posyandu Melati", "Kec. Cibinong"))
+        self._simpan("Siti", " ", "")
+
+        store = shards.ShardedStore(os.path.join(self.tmp.name, "shards"))
+        capture.sync(self.journal, store)
+        self.assertEqual(store.shards(), ["_tanpa_wilayah", "kec_cibinong"])
+        store.close()
+        conn = sqlite3.connect(store.path("kec_cibinong"))
+        row = conn.execute("SELECT nama, nama_ortu, posyandu, status FROM visits").fetchone()
+        conn.close()
+        self.assertEqual(row, ("Budi", "Ibu Sri", "Posyandu Melati", "Gizi Baik"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+
+import capture
+import pipeline
+
+
+class TestCapture(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.journal = capture.Journal(os.path.join(self.tmp.name, "journal.jsonl"))
+        self.store = capture.CentralStore(os.path.join(self.tmp.name, "pusat.db"))
+        self.visit = {"nama": "Budi", "dob": "2023-01-01", "gender": "Laki-laki",
+                      "weight": 12.2, "height": 87.1, "measure_mode": "Berdiri",
+                      "visit_date": "2025-01-01"}
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp.cleanup()
+
+    def test_sync_in_batches_and_advance_cursor(self):
+        keys = self.journal.append_many([self.visit] * 7)
+        self.assertEqual(len(set(keys)), 7)
+
+        stats = capture.sync(self.journal, self.store, batch_size=3)
+        self.assertEqual((stats["sent"], stats["batches"], stats["inserted"]), (7, 3, 7))
+        self.assertEqual(self.journal.pending_count(), 0)
+
+        # Gak ada yang baru, sync berikutnya gak kirim apa-apa
+        self.assertEqual(capture.sync(self.journal, self.store)["sent"], 0)
+
+    def test_resync_is_deduplicated_by_key(self):
+        self.journal.append_many([self.visit] * 5)
+        capture.sync(self.journal, self.store)
+        self.journal.ack(0)  # Pura-pura ack-nya hilang, semua dikirim ulang
+
+        stats = capture.sync(self.journal, self.store)
+        self.assertEqual((stats["inserted"], stats["duplicates"]), (0, 5))
+        self.assertEqual(self.store.count(), 5)
+
+    def test_partial_last_line_is_not_consumed(self):
+        self.journal.append(self.visit)
+        with open(self.journal.path, "a", encoding="utf-8") as f:
+            f.write('{"key": "setengah", "nama": "Ter')
+
+        capture.sync(self.journal, self.store)
+        self.assertEqual(self.store.count(), 1)
+        self.assertLess(self.journal.cursor(), os.path.getsize(self.journal.path))
+
+    def test_parent_name_is_stored(self):
+        self.journal.append(dict(self.visit, nama_ortu="Ibu Sri"))
+        capture.sync(self.journal, self.store)
+        row = self.store.conn.execute("SELECT nama_ortu FROM visits").fetchone()
+        self.assertEqual(row[0], "Ibu Sri")
+
+        # Database lama tanpa kolom nama_ortu dapet kolomnya pas dibuka
+        old_path = os.path.join(self.tmp.name, "lama.db")
+        conn = sqlite3.connect(old_path)
+        conn.execute("CREATE TABLE visits (key TEXT PRIMARY KEY, nama, received_at TEXT)")
+        conn.close()
+        old = capture.CentralStore(old_path)
+        self.assertEqual(old.bulk_insert([dict(self.visit, key="a", nama_ortu="Ibu Sri")])["inserted"], 1)
+        self.assertEqual(old.conn.execute("SELECT nama_ortu FROM visits").fetchone()[0], "Ibu Sri")
+        old.close()
+
+    def test_sync_cli_routes_shards_by_posyandu(self):
+        self.journal.append_many(
+            [dict(self.visit, posyandu="Melati", region="Kec. A"),
+             dict(self.visit, posyandu="Mawar", region="Kec. A")]
+        )
+        root = os.path.join(self.tmp.name, "shards")
+        subprocess.run(
+            [sys.executable, capture.__file__, "sync", "--journal", self.journal.path,
+             "--shards", root, "--shard-by", "posyandu"],
+            check=True, capture_output=True,
+        )
+        self.assertEqual(sorted(f for f in os.listdir(root) if f.endswith(".db")), ["mawar.db", "melati.db"])
+
+    def test_journal_is_pipeline_input(self):
+        self.journal.append(self.visit)
+        scored = list(pipeline.score(pipeline.read_jsonl(self.journal.path)))
+        self.assertEqual(scored[0]["label"].iloc[0], "Gizi Baik")
+
+    def test_http_store(self):
+        server = capture.make_server(self.store, port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            client = capture.HttpStore(f"http://127.0.0.1:{server.server_address[1]}")
+            self.journal.append_many([self.visit] * 4)
+            stats = capture.sync(self.journal, client, batch_size=2)
+        finally:
+            server.shutdown()
+            server.server_close()
+        self.assertEqual((stats["batches"], stats["inserted"]), (2, 4))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,132 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+import cohort_charts
+
+SD_NAMES = {name for _, name, _, _ in cohort_charts.SD_LINES}
+
+
+def _raw(n, seed=0):
+    rng = np.random.default_rng(seed)
+    days = rng.integers(30, 1800, n)
+    return pd.DataFrame(
+        {
+            "nama": [f"Anak {i}" for i in range(n)],
+            "dob": [str(np.datetime64("2020-01-01") + int(d)) for d in days],
+            "gender": "L",
+            "weight": np.round(rng.uniform(5, 20, n), 1),
+            "height": np.round(rng.uniform(55, 110, n), 1),
+            "measure_mode": "standing",
+            "visit_date": "2025-01-01",
+        }
+    )
+
+
+def _cohort_traces(fig):
+    # Trace posisi anak (selain kurva SD)
+    return [t for t in fig.data if t.name not in SD_NAMES]
+
+
+class TestCohortCharts(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _load(self, df, name="kohort.csv"):
+        path = os.path.join(self.tmp.name, name)
+        if name.endswith(".csv"):
+            df.to_csv(path, index=False)
+        else:
+            df.to_json(path, orient="records", lines=True)
+        return cohort_charts.load_cohort(path, batch_size=4000)
+
+    def test_load_cohort_validates_and_corrects(self):
+        df = pd.DataFrame(
+            [
+                {"nama": "a", "dob": "2023-01-01", "gender": "L", "weight": 10,
+                 "height": 80, "measure_mode": "standing", "visit_date": "2024-06-01"},
+                {"nama": "b", "dob": "2021-01-01", "gender": "Perempuan", "weight": 12,
+                 "height": 90, "measure_mode": "recumbent", "visit_date": "2024-06-01"},
+                {"nama": "c", "dob": "bukan tanggal", "gender": "L", "weight": 10,
+                 "height": 80, "measure_mode": "standing", "visit_date": "2024-06-01"},
+                {"nama": "d", "dob": "2023-01-01", "gender": "L", "weight": -1,
+                 "height": 80, "measure_mode": "standing", "visit_date": "2024-06-01"},
+            ]
+        )
+        for name in ("kohort.csv", "kohort.jsonl"):
+            cohort = self._load(df, name)
+            self.assertEqual(list(cohort.columns), cohort_charts.COHORT_COLUMNS)
+            self.assertEqual(cohort["gender"].tolist(), ["L", "P"])
+            self.assertEqual(cohort["age_months"].tolist(), [17, 41])
+            # Berdiri < 24 bulan ditambah 0.7, terlentang >= 24 bulan dikurang 0.7
+            np.testing.assert_allclose(cohort["corrected_height"], [80.7, 89.3])
+
+    def test_empty_cohort(self):
+        cohort = self._load(_raw(0))
+        self.assertEqual(len(cohort), 0)
+        self.assertEqual(list(cohort.columns), cohort_charts.COHORT_COLUMNS)
+
+    def test_trace_type_follows_cohort_size(self):
+        svg, webgl = cohort_charts.SVG_MAX_POINTS, cohort_charts.WEBGL_MAX_POINTS
+        cases = [
+            (svg, ["scatter"]),
+            (svg + 1, ["scattergl"]),
+            (webgl, ["scattergl"]),
+            (webgl + 1, ["heatmap", "scattergl"]),
+        ]
+        for n, expected in cases:
+            with self.subTest(n=n):
+                cohort = self._load(_raw(n, seed=n))
+                self.assertEqual(len(cohort), n)
+                fig = cohort_charts.cohort_weight_chart(cohort, "L")
+                traces = _cohort_traces(fig)
+                self.assertEqual([t.type for t in traces], expected)
+                if len(traces) == 1:
+                    self.assertEqual(len(traces[0].x), n)
+
+        sample = _cohort_traces(fig)[1]
+        self.assertEqual(len(sample.x), cohort_charts.SAMPLE_POINTS)
+        heatmap = _cohort_traces(fig)[0]
+        self.assertEqual(np.nansum(np.array(heatmap.z, dtype=float)), webgl + 1)
+
+    def test_payload_bounded_for_large_cohort(self):
+        rng = np.random.default_rng(1)
+        n = 50000
+        cohort = pd.DataFrame(
+            {
+                "gender": "L",
+                "measure_mode": "standing",
+                "age_months": rng.integers(0, 61, n),
+                "corrected_height": rng.uniform(50, 115, n),
+                "weight": rng.uniform(3, 25, n),
+            }
+        )
+        bins_x, bins_y = cohort_charts.DENSITY_BINS
+        for chart in (
+            cohort_charts.cohort_height_chart(cohort, "L"),
+            cohort_charts.cohort_weight_chart(cohort, "L"),
+            cohort_charts.cohort_wfh_chart(cohort, "L", "standing"),
+        ):
+            traces = _cohort_traces(chart)
+            self.assertEqual([t.type for t in traces], ["heatmap", "scattergl"])
+            heatmap, sample = traces
+            self.assertEqual(np.array(heatmap.z).shape, (bins_y, bins_x))
+            self.assertEqual(len(sample.x), cohort_charts.SAMPLE_POINTS)
+            points = sum(len(t.x) for t in traces) + np.array(heatmap.z).size
+            self.assertLessEqual(points, bins_x + bins_y + bins_x * bins_y + cohort_charts.SAMPLE_POINTS)
+
+        # Ukuran JSON ke browser gak ikut naik sama jumlah anak
+        small = cohort_charts.cohort_weight_chart(cohort.head(cohort_charts.WEBGL_MAX_POINTS + 1), "L")
+        large = cohort_charts.cohort_weight_chart(cohort, "L")
+        self.assertLess(len(large.to_json()), 1.2 * len(small.to_json()))
+
+
+if __name__ == "__main__":
+    unittest.main()
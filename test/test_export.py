@@ -0,0 +1,55 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+
+import pipeline
+
+try:
+    import pyarrow  # noqa: F401
+    import pyarrow.dataset as ds
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+
+@unittest.skipUnless(HAS_PYARROW, "pyarrow tidak terinstall")
+class TestExport(unittest.TestCase):
+
+    def _scored(self):
+        records = []
+        for i, (visit, region) in enumerate(
+            [("2025-01-10", "Garut"), ("2025-01-20", "Bandung"), ("2025-02-03", "Garut")]
+        ):
+            records.append({"nama": f"Anak {i}", "dob": "2023-01-01", "gender": "L",
+                            "weight": 12.2, "height": 87.1, "measure_mode": "standing",
+                            "visit_date": visit, "region": region})
+        source = io.StringIO("\n".join(json.dumps(r) for r in records))
+        return pipeline.score(pipeline.read_jsonl(source, batch_size=2))
+
+    def test_partitioned_dataset(self):
+        import export
+
+        with tempfile.TemporaryDirectory() as tmp:
+            n = export.write_parquet_dataset(self._scored(), tmp)
+            self.assertEqual(n, 3)
+            self.assertTrue(os.path.isdir(os.path.join(tmp, "visit_month=2025-01", "region=Garut")))
+
+            dataset = ds.dataset(tmp, format="parquet", partitioning="hive")
+            table = dataset.to_table(filter=ds.field("region") == "Garut")
+            self.assertEqual(table.num_rows, 2)
+            self.assertEqual(table.column("label").to_pylist(), ["Gizi Baik", "Gizi Baik"])
+
+    def test_parquet_row_group_per_batch(self):
+        import export
+        import pyarrow.parquet as pq
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "hasil.parquet")
+            self.assertEqual(export.write_parquet(self._scored(), path), 3)
+            self.assertEqual(pq.ParquetFile(path).metadata.num_row_groups, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
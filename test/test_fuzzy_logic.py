@@ -0,0 +1,151 @@
+import json
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+import tuning
+from fuzzy_logic import (
+    DEFAULT_SPEC,
+    MalnutritionFuzzySystem,
+    fuzzy_system,
+    get_recommendation,
+    status_label,
+)
+
+
+class TestFuzzyLogic(unittest.TestCase):
+
+    def test_batch_matches_skfuzzy(self):
+        # Versi vectorized harus sama kayak hasil skfuzzy per kasus
+        rng = np.random.default_rng(0)
+        cases = np.round(rng.uniform(-6, 6, (200, 3)), 2)
+        cases = np.vstack([cases, [[0, 0, 0], [-3, -3, -3], [5, 5, 5], [-2.5, 1, 2]]])
+        scores, labels = fuzzy_system.predict_batch(cases[:, 0], cases[:, 1], cases[:, 2])
+
+        for i, (bb_u, tb_u, bb_tb) in enumerate(cases):
+            score, label = fuzzy_system.predict(bb_u, tb_u, bb_tb)
+            self.assertAlmostEqual(scores[i], score, places=2)
+            self.assertEqual(labels[i], label)
+
+    def test_spec_from_json(self):
+        spec = json.loads(json.dumps(DEFAULT_SPEC))
+        system = MalnutritionFuzzySystem(spec)
+        self.assertEqual(system.predict(0, 0, 0), fuzzy_system.predict(0, 0, 0))
+
+    def test_custom_rules(self):
+        # Cuma satu rule: semua yang BB/TB normal jadi Gizi Baik
+        spec = json.loads(json.dumps(DEFAULT_SPEC))
+        spec["rules"] = [{"if": {"bb_tb": "normal"}, "then": "gizi_baik"}]
+        system = MalnutritionFuzzySystem(spec)
+        score, label = system.predict(-4, -4, 0)
+        self.assertEqual(label, "Gizi Baik")
+        self.assertEqual(system.predict_batch([-4], [-4], [0])[1][0], "Gizi Baik")
+
+
+    def test_recommendation_per_label(self):
+        self.assertTrue(get_recommendation("Gizi Buruk").startswith("SEGERA RUJUK"))
+        self.assertIn("PMT", get_recommendation("Gizi Kurang"))
+        self.assertEqual(get_recommendation("Tidak Dapat Dianalisa"), "")
+        self.assertEqual(get_recommendation(None), "")
+
+    def test_status_label_strips_display_score(self):
+        self.assertEqual(status_label("Gizi Baik (63.41/100)"), "Gizi Baik")
+        self.assertEqual(status_label("Gizi Buruk (Sangat Kurus) (8/100)"), "Gizi Buruk (Sangat Kurus)")
+        self.assertEqual(status_label("Gizi Buruk (Sangat Kurus)"), "Gizi Buruk (Sangat Kurus)")
+        self.assertIsNone(status_label(None))
+
+    def test_explain_matches_skfuzzy_rule_firing(self):
+        rng = np.random.default_rng(4)
+        cases = np.round(rng.uniform(-4, 4, (60, 3)), 2)
+        scores, labels, explanation = fuzzy_system.predict_batch(
+            cases[:, 0], cases[:, 1], cases[:, 2], explain=True
+        )
+        plain_scores, plain_labels = fuzzy_system.predict_batch(cases[:, 0], cases[:, 1], cases[:, 2])
+        np.testing.assert_array_equal(scores, plain_scores)
+        np.testing.assert_array_equal(labels, plain_labels)
+        self.assertEqual(explanation["memberships"].shape, (60, len(fuzzy_system.terms)))
+        self.assertEqual(explanation["strengths"].shape, (60, len(fuzzy_system.rule_names())))
+
+        rules = list(fuzzy_system.system.rules)
+        for i, (bb_u, tb_u, bb_tb) in enumerate(cases):
+            fuzzy_system.predict(bb_u, tb_u, bb_tb)
+            firing = [float(rule.aggregate_firing[fuzzy_system.simulation]) for rule in rules]
+            np.testing.assert_allclose(explanation["strengths"][i], firing, atol=1e-9)
+
+    def test_explain_single_case(self):
+        result = fuzzy_system.explain(-2.3, -2.6, -1.2)
+        self.assertEqual((result["score"], result["label"]), fuzzy_system.predict(-2.3, -2.6, -1.2))
+        self.assertAlmostEqual(result["memberships"]["tb_u"]["pendek"], 0.9)
+        self.assertEqual(result["memberships"]["tb_u"]["normal"], 0.0)
+        rule, strength = result["rules"][0]
+        self.assertIn("tb_u pendek", rule)
+        self.assertAlmostEqual(strength, min(result["memberships"]["tb_u"]["pendek"],
+                                             result["memberships"]["bb_tb"]["normal"]))
+        self.assertTrue(all(s > 0 for _, s in result["rules"]))
+
+
+class TestTuning(unittest.TestCase):
+
+    def test_sweep_reports_baseline(self):
+        rng = np.random.default_rng(1)
+        z = rng.normal(-1, 1.5, (300, 3))
+        _, labels = fuzzy_system.predict_batch(z[:, 0], z[:, 1], z[:, 2])
+        cases = tuning.pd.DataFrame(
+            {"z_bb_u": z[:, 0], "z_tb_u": z[:, 1], "z_bb_tb": z[:, 2],
+             "label": tuning.base_label(labels)}
+        )
+
+        candidates = tuning.generate_candidates(n=4, jitter=0.3, seed=2)
+        results = tuning.run_sweep(candidates, cases, workers=1)
+
+        self.assertEqual(len(results), 4)
+        baseline = next(r for r in results if r["candidate"] == 0)
+        self.assertEqual(baseline["accuracy"], 1.0)
+        self.assertEqual(np.sum(baseline["confusion"]), 300)
+
+    def test_rule_set_candidates_are_evaluated(self):
+        rng = np.random.default_rng(5)
+        z = rng.normal(-1, 1.5, (300, 3))
+        _, labels = fuzzy_system.predict_batch(z[:, 0], z[:, 1], z[:, 2])
+        cases = tuning.pd.DataFrame(
+            {"z_bb_u": z[:, 0], "z_tb_u": z[:, 1], "z_bb_tb": z[:, 2],
+             "label": tuning.base_label(labels)}
+        )
+
+        # Varian acak: breakpoint gak digeser, cuma rule-nya yang beda
+        candidates = tuning.generate_candidates(n=6, jitter=0, seed=3, rule_changes=3)
+        for spec in candidates[1:]:
+            self.assertEqual(spec["antecedents"], DEFAULT_SPEC["antecedents"])
+            self.assertNotEqual(spec["rules"], DEFAULT_SPEC["rules"])
+
+        # Rule set alternatif dari folder: anak yang semua normal jadi gizi lebih
+        swapped = json.loads(json.dumps(DEFAULT_SPEC))
+        normal = {"bb_tb": "normal", "tb_u": "normal", "bb_u": "normal"}
+        position = next(i for i, r in enumerate(swapped["rules"]) if r["if"] == normal)
+        swapped["rules"][position]["then"] = "gizi_lebih"
+        with tempfile.TemporaryDirectory() as tmp:
+            for name, spec in (("a_dasar.json", DEFAULT_SPEC), ("b_tukar.json", swapped)):
+                with open(os.path.join(tmp, name), "w", encoding="utf-8") as f:
+                    json.dump(spec, f)
+            loaded = tuning.load_candidate_specs([tmp])
+        self.assertEqual([os.path.basename(p) for p, _ in loaded], ["a_dasar.json", "b_tukar.json"])
+
+        sources = ["acak"] * len(candidates) + [p for p, _ in loaded]
+        results = tuning.run_sweep(candidates + [s for _, s in loaded], cases, workers=1, sources=sources)
+        by_source = {os.path.basename(r["source"]): r for r in results if r["source"] != "acak"}
+        self.assertEqual(by_source["a_dasar.json"]["accuracy"], 1.0)
+        self.assertLess(by_source["b_tukar.json"]["accuracy"], 1.0)
+        self.assertEqual(by_source["b_tukar.json"]["spec"]["rules"][position]["then"], "gizi_lebih")
+        self.assertTrue(any(r["accuracy"] < 1.0 for r in results if r["source"] == "acak"))
+
+    def test_perturb_keeps_breakpoints_sorted(self):
+        spec = tuning.perturb_spec(DEFAULT_SPEC, 0.5, np.random.default_rng(0))
+        for var in spec["antecedents"].values():
+            for _, params in var["terms"].values():
+                self.assertEqual(params, sorted(params))
+
+
+if __name__ == '__main__':
+    unittest.main()
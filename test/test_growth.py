@@ -0,0 +1,92 @@
+import unittest
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+import growth
+import pipeline
+
+
+def _visits(weights, nama="Budi", start_height=75.0):
+    return pd.DataFrame(
+        {
+            "nama": nama,
+            "dob": "2023-01-01",
+            "gender": "L",
+            "weight": weights,
+            "height": [start_height + i for i in range(len(weights))],
+            "measure_mode": "recumbent",
+            "visit_date": [f"2024-{m + 1:02d}-10" for m in range(len(weights))],
+        }
+    )
+
+
+def _scored(raw):
+    return pd.concat(pipeline.score([raw]), ignore_index=True)
+
+
+class TestGrowth(unittest.TestCase):
+
+    def test_two_t_rule(self):
+        # Umur 12-23 bulan, KBM 200 g: naik, tidak naik, tidak naik, naik
+        scored = _scored(_visits([9.0, 9.4, 9.5, 9.5, 10.0]))
+        metrics = growth.trajectory(scored)
+        self.assertEqual(metrics["growth_status"].tolist(), [None, "N", "T", "T", "N"])
+        self.assertEqual(metrics["t_streak"].tolist(), [0, 0, 1, 2, 0])
+        self.assertEqual(metrics["flag_2t"].tolist(), [False, False, False, True, False])
+        self.assertAlmostEqual(metrics["weight_gain_g"].iloc[1], 400)
+        self.assertEqual(metrics["kbm_g"].iloc[1], 200)
+
+    def test_missed_month_breaks_chain(self):
+        raw = _visits([9.0, 9.1, 9.2])
+        raw.loc[2, "visit_date"] = "2024-06-10"
+        metrics = growth.trajectory(_scored(raw))
+        self.assertEqual(metrics["growth_status"].tolist(), [None, "T", None])
+        self.assertEqual(metrics["t_streak"].tolist(), [0, 1, 0])
+
+    def test_lines_crossed(self):
+        crossed = growth.lines_crossed([-1.5, -1.9, 0.5, np.nan], [-2.1, -1.95, 2.5, 0.0])
+        self.assertEqual(crossed[:3].tolist(), [-1, 0, 2])
+        self.assertTrue(np.isnan(crossed[3]))
+
+    def test_incremental_matches_bulk(self):
+        rng = np.random.default_rng(0)
+        raw = pd.concat(
+            [
+                _visits(np.round(8 + np.cumsum(rng.normal(0.15, 0.25, 8)), 2), f"Anak {i}")
+                for i in range(20)
+            ],
+            ignore_index=True,
+        )
+        scored = _scored(raw.sample(frac=1, random_state=0))
+        bulk = growth.trajectory(scored)
+
+        tracker = growth.GrowthTracker()
+        ordered = scored.sort_values("visit_date", kind="stable")
+        rows = []
+        for index, visit in ordered.iterrows():
+            rows.append(pd.Series(tracker.add(visit["nama"], visit.to_dict()), name=index))
+        incremental = pd.DataFrame(rows)[growth.METRIC_COLUMNS].reindex(scored.index)
+
+        self.assertEqual(len(tracker), 20)
+        self.assertEqual(bulk["growth_status"].tolist(), incremental["growth_status"].tolist())
+        numeric = [c for c in growth.METRIC_COLUMNS if c != "growth_status"]
+        np.testing.assert_allclose(
+            bulk[numeric].to_numpy(dtype=float), incremental[numeric].to_numpy(dtype=float)
+        )
+
+    def test_add_measurement_and_order(self):
+        tracker = growth.GrowthTracker()
+        tracker.add_measurement("a", "L", date(2023, 1, 1), 9.0, 75, "recumbent", date(2024, 1, 10))
+        metrics = tracker.add_measurement(
+            "a", "L", date(2023, 1, 1), 9.1, 76, "recumbent", date(2024, 2, 10)
+        )
+        self.assertEqual(metrics["growth_status"], "T")
+        self.assertAlmostEqual(metrics["height_velocity"], 1 / (31 / growth.DAYS_PER_MONTH))
+        with self.assertRaises(ValueError):
+            tracker.add_measurement("a", "L", date(2023, 1, 1), 9.1, 76, "recumbent", date(2024, 1, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
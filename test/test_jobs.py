@@ -0,0 +1,126 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import jobs
+
+
+@jobs.job_kind("test_progress")
+def _progress_job(params, ctx):
+    for i in range(params["steps"]):
+        ctx.progress((i + 1) / params["steps"], f"langkah {i + 1}")
+    return None
+
+
+class TestJobs(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = jobs.JobStore(os.path.join(self.tmp.name, "jobs.db"))
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp.cleanup()
+
+    def test_claim_in_submit_order(self):
+        first = self.store.submit("test_progress", {"steps": 1})
+        second = self.store.submit("test_progress", {"steps": 1})
+        self.assertEqual(self.store.claim(123)["id"], first)
+        self.assertEqual(self.store.claim(123)["id"], second)
+        self.assertIsNone(self.store.claim(123))
+        with self.assertRaises(ValueError):
+            self.store.submit("gak_ada")
+
+    def test_run_reports_progress(self):
+        job_id = self.store.submit("test_progress", {"steps": 4})
+        jobs.run_job(self.store, self.store.claim(os.getpid()))
+        job = self.store.get(job_id)
+        self.assertEqual((job["status"], job["progress"], job["message"]), ("done", 1.0, "langkah 4"))
+
+    def test_cancel_queued_and_running(self):
+        queued = self.store.submit("test_progress", {"steps": 3})
+        self.assertTrue(self.store.cancel(queued))
+        self.assertEqual(self.store.get(queued)["status"], "cancelled")
+
+        running = self.store.submit("test_progress", {"steps": 3})
+        job = self.store.claim(os.getpid())
+        self.assertTrue(self.store.cancel(running))
+        jobs.run_job(self.store, job)
+        self.assertEqual(self.store.get(running)["status"], "cancelled")
+        self.assertFalse(self.store.cancel(running))
+
+    def test_orphaned_job_is_requeued_after_restart(self):
+        job_id = self.store.submit("test_progress", {"steps": 1})
+        self.store.claim(2**22 + 12345)  # PID yang gak mungkin hidup
+        reopened = jobs.JobStore(self.store.path)
+        self.assertEqual(reopened.requeue_orphans(), 1)
+        self.assertEqual(reopened.get(job_id)["status"], "queued")
+        reopened.close()
+
+    def test_expired_lease_is_requeued_even_if_pid_alive(self):
+        job_id = self.store.submit("test_progress", {"steps": 1})
+        job = self.store.claim(os.getpid())
+        self.assertEqual(self.store.requeue_orphans(), 0)
+
+        # Heartbeat cuma dari pemegang lease
+        self.assertTrue(self.store.heartbeat(job_id, job["lease_owner"]))
+        self.assertFalse(self.store.heartbeat(job_id, "worker-lain"))
+
+        # PID-nya masih hidup (bisa aja PID dipake ulang), tapi lease udah lewat
+        self.store.heartbeat(job_id, job["lease_owner"], lease=-1)
+        self.assertEqual(self.store.requeue_orphans(), 1)
+        self.assertEqual(self.store.get(job_id)["status"], "queued")
+        self.assertFalse(self.store.heartbeat(job_id, job["lease_owner"]))
+
+    def test_worker_process_runs_jobs(self):
+        # Jenis job yang gak ada di proses worker -> gagal, tapi tetep diproses
+        self.store._execute(
+            "INSERT INTO jobs (id, kind, params, created_at) VALUES ('x1', 'gak_ada', '{}', ?)",
+            (jobs._now(),),
+        )
+        processes = jobs.start_workers(1, self.store.path)
+        try:
+            for _ in range(100):
+                if self.store.get("x1")["status"] in jobs.FINISHED:
+                    break
+                time.sleep(0.1)
+        finally:
+            for process in processes:
+                process.terminate()
+                process.wait()
+        job = self.store.get("x1")
+        self.assertEqual(job["status"], "failed")
+        self.assertNotEqual(job["worker_pid"], os.getpid())
+
+    def test_score_job(self):
+        source = os.path.join(self.tmp.name, "data.jsonl")
+        record = {"nama": "Budi", "dob": "2023-01-01", "gender": "L", "weight": 12.2,
+                  "height": 87.1, "measure_mode": "standing", "visit_date": "2025-01-01"}
+        with open(source, "w", encoding="utf-8") as f:
+            f.write((json.dumps(record) + "\n") * 5)
+        job_id = self.store.submit("score", {"input": source, "format": "csv", "batch_size": 2})
+        jobs.run_job(self.store, self.store.claim(os.getpid()))
+
+        job = self.store.get(job_id)
+        self.assertEqual(job["status"], "done")
+        with open(job["result_path"], encoding="utf-8") as f:
+            self.assertEqual(len(f.read().splitlines()), 6)
+
+    def test_parquet_job_without_pyarrow_fails_early(self):
+        import export
+
+        job_id = self.store.submit("score", {"input": "gak-ada.jsonl", "format": "parquet"})
+        with mock.patch("importlib.util.find_spec", return_value=None):
+            self.assertFalse(export.available())
+        with mock.patch.dict("sys.modules", {"pyarrow": None}):
+            jobs.run_job(self.store, self.store.claim(os.getpid()))
+        job = self.store.get(job_id)
+        self.assertEqual(job["status"], "failed")
+        self.assertIn("pip install pyarrow", job["message"])
+
+
+if __name__ == "__main__":
+    unittest.main()
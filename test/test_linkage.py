@@ -0,0 +1,103 @@
+import itertools
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+import linkage
+import pipeline
+
+
+def _register(rows):
+    return pd.DataFrame(rows, columns=["nama", "nama_ortu", "dob", "gender", "posyandu"])
+
+
+class TestLinkage(unittest.TestCase):
+
+    def test_block_pairs_matches_brute_force(self):
+        block = np.random.default_rng(0).integers(0, 7, 60)
+        left, right = linkage.block_pairs(block)
+        got = {tuple(sorted(p)) for p in zip(left.tolist(), right.tolist())}
+        expected = {
+            (i, j) for i, j in itertools.combinations(range(len(block)), 2) if block[i] == block[j]
+        }
+        self.assertEqual(got, expected)
+        self.assertEqual(len(left), len(expected))
+
+    def test_links_spelling_variants_and_dob_typos(self):
+        df = _register(
+            [
+                ["Budi Santoso", "Ibu Sri Wahyuni", "2023-03-14", "L", "Posyandu Melati"],
+                ["budi  santosa", "Ibu Sri Wahyuni", "2023-03-14", "Laki-laki", "posyandu melati"],
+                ["Budy Santoso", "Ibu Sri Wahyuni", "2023-03-15", "L", "Posyandu Melati"],
+                ["Budi Santoso", "Ibu Sri Wahyuni", "2022-03-14", "L", "Posyandu Melati"],
+                ["Budi Santoso", "Ibu Sri Wahyuni", "2023-14-03", "L", "Posyandu Melati"],
+            ]
+        )
+        df.loc[4, "dob"] = "2023-03-41"  # gak valid: tetep dapet ID sendiri
+        child_id = linkage.link(df)
+        self.assertEqual(child_id.iloc[:4].nunique(), 1)
+        self.assertNotEqual(child_id.iloc[4], child_id.iloc[0])
+
+    def test_keeps_different_children_apart(self):
+        df = _register(
+            [
+                # Kembar: tanggal lahir sama, nama beda
+                ["Hasan Basri", "Ibu Aminah", "2023-05-01", "L", "Posyandu Mawar"],
+                ["Husein Basri", "Ibu Aminah", "2023-05-01", "L", "Posyandu Mawar"],
+                # Nama sama, ibu beda
+                ["Siti Aisyah", "Ibu Rahma Dewi", "2022-08-10", "P", "Posyandu Mawar"],
+                ["Siti Aisyah", "Ibu Kartini Lestari", "2022-08-10", "P", "Posyandu Mawar"],
+                # Posyandu beda
+                ["Siti Aisyah", "Ibu Rahma Dewi", "2022-08-10", "P", "Posyandu Anggrek"],
+            ]
+        )
+        self.assertEqual(linkage.link(df).nunique(), 5)
+
+    def test_ids_are_stable(self):
+        first = _register(
+            [
+                ["Agus Pratama", "Ibu Ani", "2021-01-20", "L", "Posyandu Mawar"],
+                ["Dewi Lestari", "Ibu Sari", "2021-02-11", "P", "Posyandu Mawar"],
+            ]
+        )
+        ids = linkage.link(first)
+        shuffled = pd.concat([first.iloc[::-1], first], ignore_index=True)
+        self.assertEqual(set(linkage.link(shuffled)), set(ids))
+
+        # Register baru nyambung ke anak lama: ID lama yang dipake
+        known = first.assign(child_id=["anak-1", "anak-2"])
+        new = pd.concat(
+            [first, _register([["Agus Pratam", "Ibu Ani", "2021-01-20", "L", "Posyandu Mawar"]])],
+            ignore_index=True,
+        )
+        relinked = linkage.link(new, known=known)
+        self.assertEqual(relinked.tolist(), ["anak-1", "anak-2", "anak-1"])
+
+    def test_known_ids_survive_csv_round_trip(self):
+        # ID hex yang kebetulan angka semua / ada satu 'e' gak boleh jadi angka
+        known = _register(
+            [
+                ["Agus Pratama", "Ibu Ani", "2021-01-20", "L", "Posyandu Mawar"],
+                ["Dewi Lestari", "Ibu Sari", "2021-02-11", "P", "Posyandu Mawar"],
+            ]
+        ).assign(child_id=["001234567890", "123456789e10"])
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "known.csv")
+            known.to_csv(path, index=False)
+            loaded = pd.concat(pipeline.read_source(path), ignore_index=True)
+        self.assertEqual(loaded["child_id"].tolist(), ["001234567890", "123456789e10"])
+        relinked = linkage.link(known.drop(columns="child_id"), known=loaded)
+        self.assertEqual(relinked.tolist(), ["001234567890", "123456789e10"])
+
+    def test_bench_quality(self):
+        result = linkage.bench(20000)
+        self.assertLess(result["candidate_pairs"], 20 * result["identities"])
+        self.assertLessEqual(result["fragmented_children"], result["true_children"] * 0.01)
+        self.assertLessEqual(result["merged_ids"], result["true_children"] * 0.01)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+import json
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+import loadtest
+
+
+class TestLoadTest(unittest.TestCase):
+
+    def test_replay_accepts_fields_and_raw_args(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "rekaman.jsonl")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(json.dumps({"nama": "Budi", "dob": "2023-01-01", "gender": "L",
+                                    "weight": 12.2, "height": 87.1,
+                                    "measure_mode": "standing"}) + "\n\n")
+                f.write(json.dumps({"data": ["Asep", "2023-01-01", "Laki-laki", 8.0,
+                                             75.0, "Berdiri"]}) + "\n")
+            requests = loadtest.load_replay(path)
+
+        self.assertEqual(requests[0], ["Budi", "2023-01-01", "Laki-laki", 12.2, 87.1, "Berdiri"])
+        self.assertEqual(requests[1][0], "Asep")
+
+    def test_arrival_rate(self):
+        offsets = loadtest.arrival_offsets(20000, rate=50, seed=1)
+        self.assertEqual(offsets[0], 0)
+        self.assertTrue(np.all(np.diff(offsets) >= 0))
+        self.assertAlmostEqual(len(offsets) / offsets[-1], 50, delta=2)
+        self.assertFalse(loadtest.arrival_offsets(5, rate=0).any())
+
+    def test_summary(self):
+        latencies = np.array([0.1] * 98 + [1.0, 2.0])
+        errors = np.zeros(100, dtype=bool)
+        errors[:5] = True
+        summary = loadtest.summarize(latencies, errors, wall=10.0)
+        self.assertAlmostEqual(summary["p50_ms"], 100)
+        self.assertAlmostEqual(summary["error_rate"], 0.05)
+        self.assertAlmostEqual(summary["throughput"], 10)
+        self.assertGreater(summary["p99_ms"], summary["p95_ms"])
+
+    def test_app_error_status_counts_as_error(self):
+        self.assertTrue(loadtest._is_error([None, None, [], {"label": "Error: x"}]))
+        self.assertFalse(loadtest._is_error([24, 87.1, [], {"label": "Gizi Baik (80/100)"}]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import io
+import json
+import unittest
+
+import pipeline
+
+
+def _jsonl(records):
+    return io.StringIO("\n".join(json.dumps(r) for r in records) + "\n")
+
+
+class TestPipeline(unittest.TestCase):
+
+    def setUp(self):
+        self.records = [
+            {"nama": "Budi", "dob": "2023-01-01", "gender": "Laki-laki", "weight": 12.2,
+             "height": 87.1, "measure_mode": "Berdiri", "visit_date": "2025-01-01"},
+            {"nama": "Asep", "dob": "2023-01-01", "gender": "L", "weight": 8.0,
+             "height": 75.0, "measure_mode": "standing", "visit_date": "2025-01-01"},
+            {"nama": "Rusak", "dob": "2023-01-01", "gender": "P", "weight": 300,
+             "height": 75.0, "measure_mode": "standing", "visit_date": "2025-01-01"},
+        ]
+
+    def test_batches_respect_batch_size(self):
+        sizes = [len(b) for b in pipeline.read_jsonl(_jsonl(self.records * 3), batch_size=4)]
+        self.assertEqual(sizes, [4, 4, 1])
+
+    def test_invalid_rows_are_rejected(self):
+        rejected = []
+        scored = pipeline.score(
+            pipeline.read_jsonl(_jsonl(self.records + ["bukan object"]), batch_size=2),
+            on_reject=rejected.append,
+        )
+        names = [n for batch in scored for n in batch["nama"]]
+        self.assertEqual(names, ["Budi", "Asep"])
+        errors = [e for batch in rejected for e in batch["error"]]
+        self.assertEqual(len(errors), 2)
+        self.assertIn("Berat badan tidak valid (Range: 1kg - 100kg).", errors)
+
+    def test_jsonl_sink(self):
+        out = io.StringIO()
+        n = pipeline.write_jsonl(pipeline.score(pipeline.read_jsonl(_jsonl(self.records))), out)
+        self.assertEqual(n, 2)
+        rows = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(rows[0]["dob"], "2023-01-01")
+        self.assertEqual(rows[0]["z_bb_u"], 0.0)
+        self.assertEqual(rows[0]["label"], "Gizi Baik")
+        self.assertTrue(rows[1]["label"].startswith("Gizi Buruk"))
+
+    def test_csv_sink(self):
+        out = io.StringIO()
+        n = pipeline.write_csv(pipeline.score(pipeline.read_jsonl(_jsonl(self.records), 1)), out)
+        lines = out.getvalue().splitlines()
+        self.assertEqual(n, 2)
+        self.assertEqual(len(lines), 3)
+        self.assertTrue(lines[0].startswith("nama,dob,gender"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+import unittest
+
+import pandas as pd
+
+import quality
+
+
+class TestQuality(unittest.TestCase):
+
+    def setUp(self):
+        ts = pd.Timestamp
+        self.df = pd.DataFrame({
+            "nama": ["Budi", "Budi", "Budi", "Siti", "Rina", "Dodi"],
+            "gender": ["L", "L", "L", "P", "P", "L"],
+            "dob": [ts("2023-01-01")] * 3 + [ts("2022-05-01"), ts("2024-03-01"), ts("2018-01-01")],
+            "visit_date": [ts("2025-01-01"), ts("2025-02-01"), ts("2025-02-01"),
+                           ts("2025-01-01"), ts("2024-01-01"), ts("2025-01-01")],
+            "age_months": [24, 25, 25, 32, -2, 84],
+            "corrected_height": [87.0, 85.0, 85.0, 90.0, 60.0, 120.0],
+            "z_bb_u": [0.0, 0.1, 0.1, -7.0, 0.0, None],
+            "z_tb_u": [0.0, -0.5, -0.5, 0.0, 0.0, None],
+            "z_bb_tb": [0.0, 0.3, 0.3, 0.0, 0.0, None],
+        })
+
+    def test_flags(self):
+        flags = quality.screen(self.df)
+        self.assertEqual(flags["plausible"].tolist(), [True, False, False, False, False, False])
+        self.assertTrue(flags.loc[1, "flag_height_decrease"])
+        self.assertTrue(flags.loc[2, "flag_duplicate"])
+        self.assertFalse(flags.loc[2, "flag_height_decrease"])
+        self.assertTrue(flags.loc[3, "flag_z_extreme"])
+        self.assertTrue(flags.loc[4, "flag_visit_before_dob"])
+        self.assertTrue(flags.loc[5, "flag_age"])
+        self.assertEqual(flags.loc[0, "quality_issues"], "")
+        self.assertEqual(flags.loc[5, "quality_issues"], "Umur diluar jangkauan standar")
+
+    def test_stage_quarantine(self):
+        quarantined = []
+        clean = list(quality.screen_stage([self.df], on_quarantine=quarantined.append))
+        self.assertEqual(len(clean[0]), 1)
+        self.assertEqual(len(quarantined[0]), 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,147 @@
+import os
+import tempfile
+import unittest
+from datetime import date
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+import pipeline
+import utils
+from reference import REF_COLUMNS, ReferenceTables, StandardRegistry, memory_report
+
+
+def _write_age_table(path, ages, median):
+    # Tabel umur doang (kayak WHO 2007 5-19 tahun), SD +-1 kg per langkah
+    rows = [
+        ["L", "BB_U", age] + [median + k for k in (-3, -2, -1, 0, 1, 2, 3)]
+        for age in ages
+    ]
+    pd.DataFrame(rows, columns=["gender", "index_type", "age_months"] + REF_COLUMNS).to_csv(
+        path, index=False
+    )
+
+
+class TestReferenceTables(unittest.TestCase):
+
+    def test_tables_are_views_of_one_block(self):
+        keys, values = utils.REF.table("L", "BB_TB")
+        self.assertTrue(np.shares_memory(values, utils.REF.values))
+        self.assertTrue(values.flags["C_CONTIGUOUS"])
+        self.assertTrue(np.all(np.diff(keys) > 0))
+        self.assertEqual(len(utils.REF.table("X", "BB_U")[0]), 0)
+
+    def test_row_lookup(self):
+        row = utils.REF.row("L", "BB_U", 0)
+        self.assertEqual((row.sd_n3, row.median, row.sd_p3), (2.1, 3.3, 5.0))
+        self.assertIsNone(utils.REF.row("L", "BB_U", 999))
+        with self.assertRaises(AttributeError):
+            row.extra = 1  # __slots__
+
+    def test_row_interp_between_neighbours(self):
+        keys, values = utils.REF.table("L", "BB_PB")
+        mid = (keys[0] + keys[1]) / 2
+        row = utils.REF.row_interp("L", "BB_PB", mid)
+        self.assertAlmostEqual(row.median, (values[0, 3] + values[1, 3]) / 2)
+        self.assertIsNone(utils.REF.row_interp("L", "BB_PB", keys[0] - 1))
+
+    def test_compact_is_smaller(self):
+        report = memory_report(utils.STD_AGE_FILE, utils.STD_HEIGHT_FILE)
+        self.assertLess(report["compact_float64"], report["dataframes"] / 2)
+        self.assertLess(report["compact_float32"], report["compact_float64"])
+        self.assertIsInstance(utils.REF, ReferenceTables)
+        if report["rss_dataframes"] is not None:
+            self.assertLess(report["rss_compact"], report["rss_dataframes"])
+
+    def test_legacy_frames_are_cached(self):
+        with mock.patch.object(utils.pd, "read_csv", wraps=utils.pd.read_csv) as read_csv:
+            first = utils.DF_AGE
+            self.assertIs(utils.DF_AGE, first)
+            self.assertIs(utils.DF_HEIGHT, utils.DF_HEIGHT)
+        self.assertLessEqual(read_csv.call_count, 2)
+        self.assertIn("age_months", first.columns)
+
+
+class TestStandardRegistry(unittest.TestCase):
+
+    def test_lazy_load_and_selectors(self):
+        calls = []
+
+        def loader(tag):
+            def load():
+                calls.append(tag)
+                return utils.REF
+            return load
+
+        registry = StandardRegistry()
+        registry.register("pmk", "2020", loader("pmk"))
+        registry.register("who", "2007", loader("who-2007"))
+        registry.register("who", "2025", loader("who-2025"))
+        self.assertEqual(calls, [])
+        self.assertEqual(registry.loaded(), [])
+
+        self.assertEqual(registry.resolve(), ("pmk", "2020"))
+        self.assertEqual(registry.resolve("who"), ("who", "2025"))
+        self.assertEqual(registry.resolve("who@2007"), ("who", "2007"))
+        self.assertEqual(registry.resolve(("who", 2007)), ("who", "2007"))
+        with self.assertRaises(ValueError):
+            registry.resolve("who@1999")
+
+        registry.get("who@2007")
+        registry.get("who@2007")
+        self.assertEqual(calls, ["who-2007"])
+        self.assertEqual(registry.loaded(), ["who@2007"])
+
+    def test_discover_and_select_in_z_scores(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            folder = os.path.join(tmp, "who-2007", "2007")
+            os.makedirs(folder)
+            _write_age_table(os.path.join(folder, "std_age.csv"), range(61, 229), 20.0)
+            registry = StandardRegistry()
+            self.assertEqual(registry.discover(tmp), ["who-2007@2007"])
+            utils.STANDARDS.register_csv(
+                "test-who-2007", "2007", os.path.join(folder, "std_age.csv")
+            )
+
+            args = ("L", date(2018, 1, 1), 22.0, 120.0, "standing", date(2024, 1, 1))
+            self.assertIsNone(utils.get_z_scores(*args)["z_bb_u"])
+            school = utils.get_z_scores(*args, standard="test-who-2007")
+            self.assertEqual(school["z_bb_u"], 2.0)
+            self.assertIsNone(school["z_bb_tb"])
+
+            chart = utils.get_weight_chart_data("L", standard="test-who-2007@2007")
+            self.assertEqual(chart["age"], [])
+            chart = utils.get_weight_chart_data("L", "test-who-2007@2007", age_range=(61, 229))
+            self.assertEqual((chart["age"][0], chart["age"][-1]), (61, 228))
+            self.assertEqual(chart["median"][0], 20.0)
+            self.assertEqual(utils.get_reference().version, utils.REF.version)
+            self.assertNotEqual(
+                utils.get_reference("test-who-2007").version, utils.REF.version
+            )
+
+    def test_screening_uses_standard_age_range(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            age_file = os.path.join(tmp, "std_age.csv")
+            _write_age_table(age_file, range(61, 229), 20.0)
+            tables = ReferenceTables.from_csv(age_file)
+            self.assertEqual(tables.age_range, (61.0, 228.0))
+            tables.save(os.path.join(tmp, "snap.npz"))
+            self.assertEqual(ReferenceTables.load(os.path.join(tmp, "snap.npz")).age_range, (61.0, 228.0))
+            utils.STANDARDS.register_csv("test-school", "2007", age_file)
+
+            visit = pd.DataFrame(
+                [{"nama": "Rina", "dob": "2016-01-01", "gender": "L", "weight": 22.0,
+                  "height": 120.0, "measure_mode": "standing", "visit_date": "2024-01-01"}]
+            )
+            quarantined = []
+            list(pipeline.score([visit], on_quarantine=quarantined.append, standard="test-school"))
+            self.assertEqual(quarantined, [])
+
+            default = pd.concat(pipeline.score([visit]), ignore_index=True)
+            self.assertTrue(default.loc[0, "flag_age"])
+        self.assertEqual(utils.get_reference().age_range, (0.0, 60.0))
+
+
+if __name__ == "__main__":
+    unittest.main()
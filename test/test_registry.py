@@ -0,0 +1,85 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import capture
+import registry as registry_module
+from registry import VisitRegistry, parse_date, trigrams
+
+
+class TestRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.journal = capture.Journal(os.path.join(self.tmp.name, "journal.jsonl"))
+        self.journal.append_many([
+            {"nama": "Budi Santoso", "nama_ortu": "Siti Rahayu", "dob": "2023-01-05"},
+            {"nama": "Budi", "nama_ortu": "Ani", "dob": "2023-03-05"},
+            {"nama": "Bagus Pratama", "nama_ortu": "Ani", "dob": "2023-03-05"},
+        ])
+        self.registry = VisitRegistry(self.journal.path)
+        self.registry.refresh()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def names(self, query):
+        return [r["nama"] for r in self.registry.search(query)]
+
+    def test_trigrams_and_dates(self):
+        self.assertEqual(trigrams("Budi"), {"  b", " bu", "bud", "udi", "di "})
+        self.assertEqual(trigrams("BÚDI!"), trigrams("budi"))
+        self.assertEqual(parse_date("05/01/2023"), "2023-01-05")
+        self.assertIsNone(parse_date("31/02/2023"))
+
+    def test_misspelled_and_partial_names(self):
+        self.assertEqual(self.names("budy"), ["Budi", "Budi Santoso"])
+        self.assertEqual(self.names("rahayo"), ["Budi Santoso"])
+        self.assertEqual(self.names("xyz"), [])
+
+    def test_birth_date_filter(self):
+        self.assertEqual(self.names("05-01-2023"), ["Budi Santoso"])
+        self.assertEqual(self.names("budi 2023-03-05"), ["Budi"])
+
+    def test_incremental_refresh(self):
+        self.assertEqual(self.registry.refresh(), 0)
+        self.journal.append({"nama": "Dewi Lestari", "dob": "2022-12-01"})
+        self.assertEqual(self.registry.refresh(), 1)
+        self.assertEqual(len(self.registry), 4)
+        self.assertEqual(self.names("dewi"), ["Dewi Lestari"])
+
+    def test_background_build_does_not_block_search(self):
+        self.journal.append_many(
+            {"nama": f"Anak {i}", "dob": "2022-01-01"} for i in range(400)
+        )
+        registry = VisitRegistry(self.journal.path)
+        self.assertFalse(registry.ready.is_set())
+
+        # Index lambat (2 ms per baris): search gak nunggu sampe index kelar,
+        # cuma nunggu potongan (REFRESH_CHUNK) yang lagi jalan
+        add = registry._add
+
+        def slow_add(record, offset):
+            time.sleep(0.002)
+            add(record, offset)
+
+        with mock.patch.object(registry_module, "REFRESH_CHUNK", 1), mock.patch.object(
+            registry, "_add", slow_add
+        ):
+            thread = registry.start_background_refresh()
+            while len(registry) < 50:
+                thread.join(0.01)
+            start = time.perf_counter()
+            self.assertEqual([r["nama"] for r in registry.search("budi santoso")], ["Budi Santoso"])
+            self.assertLess(time.perf_counter() - start, 0.3)
+            self.assertFalse(registry.ready.is_set())
+            thread.join(10)
+
+        self.assertTrue(registry.ready.is_set())
+        self.assertEqual(len(registry), 403)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+import os
+import re
+import tempfile
+import unittest
+import xml.etree.ElementTree as ET
+
+import pandas as pd
+
+import pipeline
+import reports
+from fuzzy_logic import get_recommendation
+
+
+def _session():
+    base = {"dob": "2023-01-01", "measure_mode": "recumbent", "visit_date": "2024-06-10"}
+    return pd.DataFrame(
+        [
+            {**base, "nama": "Budi", "gender": "L", "weight": 10.2, "height": 78.0,
+             "visit_date": "2024-05-10"},
+            {**base, "nama": "Budi", "gender": "L", "weight": 10.5, "height": 79.0},
+            {**base, "nama": "Siti <Aisyah>", "gender": "P", "weight": 6.5, "height": 76.0},
+            {**base, "nama": "Ayu", "gender": "P", "weight": 9.0, "height": 75.5},
+        ]
+    )
+
+
+class TestReports(unittest.TestCase):
+
+    def test_generate_files_and_index(self):
+        scored = pd.concat(pipeline.score([_session()]), ignore_index=True)
+        with tempfile.TemporaryDirectory() as tmp:
+            index = reports.generate(scored, tmp, workers=2, title="Posyandu Melati")
+            files = sorted(os.listdir(tmp))
+            pages = {}
+            for name in files:
+                with open(os.path.join(tmp, name), encoding="utf-8") as f:
+                    pages[name] = f.read()
+
+        self.assertEqual(os.path.basename(index), "index.html")
+        self.assertEqual(len(files), 4)
+        children = [f for f in files if f != "index.html"]
+        self.assertEqual(children, ["0001-ayu.html", "0002-budi.html", "0003-siti-aisyah.html"])
+
+        siti = pages["0003-siti-aisyah.html"]
+        self.assertIn("Siti &lt;Aisyah&gt;", siti)
+        self.assertIn(get_recommendation("Gizi Buruk"), siti)
+        svgs = re.findall(r"<svg.*?</svg>", siti)
+        self.assertEqual(len(svgs), 3)
+        for svg in svgs:
+            ET.fromstring(svg)
+
+        # Dua kunjungan Budi: dua titik, yang terakhir lebih gede
+        budi = re.findall(r"<svg.*?</svg>", pages["0002-budi.html"])[0]
+        self.assertEqual(len(re.findall(r"<circle", budi)), 2)
+        self.assertIn("2024-06-10", pages["0002-budi.html"])
+
+        # Anak yang perlu dirujuk paling atas di index
+        index_html = pages["index.html"]
+        links = re.findall(r'href="(\d{4}-[^"]+)"', index_html)
+        self.assertEqual(links[0], "0003-siti-aisyah.html")
+        self.assertEqual(set(links), set(children))
+        self.assertIn("3 anak", index_html)
+
+    def test_raw_input_is_scored(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            reports.generate(_session(), tmp)
+            self.assertEqual(len(os.listdir(tmp)), 4)
+
+    def test_rejected_and_flagged_visits_are_listed(self):
+        session = pd.concat(
+            [
+                _session(),
+                pd.DataFrame(
+                    [
+                        # Berat gak valid: ditolak validasi
+                        {"nama": "Rina", "nama_ortu": "Ibu Wati", "dob": "2023-02-01",
+                         "gender": "P", "weight": 0, "height": 70.0,
+                         "measure_mode": "recumbent", "visit_date": "2024-06-10"},
+                        # Z-score ekstrem: gak lolos screening
+                        {"nama": "Dodi", "dob": "2023-01-01", "gender": "L", "weight": 4.0,
+                         "height": 80.0, "measure_mode": "recumbent", "visit_date": "2024-06-10"},
+                    ]
+                ),
+            ],
+            ignore_index=True,
+        )
+        with tempfile.TemporaryDirectory() as tmp:
+            with open(reports.generate(session, tmp), encoding="utf-8") as f:
+                index_html = f.read()
+        section = index_html.split("Data tidak lengkap / perlu dicek")[1]
+        self.assertIn("Rina", section)
+        self.assertIn("Ibu Wati", section)
+        self.assertIn("Berat badan tidak valid", section)
+        self.assertIn("Dodi", section)
+        self.assertIn("Z-score ekstrem", section)
+        self.assertIn("2 data perlu dicek", index_html)
+
+        # Semua baris ditolak: index tetep jadi, isinya cuma daftar yang perlu dicek
+        with tempfile.TemporaryDirectory() as tmp:
+            with open(reports.generate(session.iloc[[-2]], tmp), encoding="utf-8") as f:
+                self.assertIn("Rina", f.read().split("Data tidak lengkap / perlu dicek")[1])
+
+        # Gender ikut di-escape
+        summary = pd.DataFrame(
+            [{"file": "a.html", "nama": "A", "gender": "<b>", "age_months": 1, "z_bb_u": 0.0,
+              "z_tb_u": 0.0, "z_bb_tb": 0.0, "score": 60.0, "label": "Gizi Baik"}]
+        )
+        self.assertIn("&lt;b&gt;", reports.render_index(summary))
+        self.assertNotIn("<b>", reports.render_index(summary))
+
+    def test_bench_under_a_minute(self):
+        result = reports.bench(100)
+        self.assertEqual(result["files"], 101)
+        self.assertLess(result["seconds"], 60)
+
+
+if __name__ == "__main__":
+    unittest.main()
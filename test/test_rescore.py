@@ -0,0 +1,178 @@
+import copy
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+import pipeline
+import rescore
+import utils
+import versions
+from fuzzy_logic import DEFAULT_SPEC, MalnutritionFuzzySystem, fuzzy_system
+from reference import REF_COLUMNS, ReferenceTables
+
+RESULT_COLUMNS = ["z_bb_u", "z_tb_u", "z_bb_tb", "z_imt_u", "plausible", "score", "label"]
+
+
+def _records(n=3000, seed=0):
+    rng = np.random.default_rng(seed)
+    days = rng.integers(0, 60 * 30, n)
+    heights = np.round(rng.uniform(50, 110, n), 1)
+    return pd.DataFrame(
+        {
+            "nama": [f"Anak {i}" for i in range(n)],
+            "dob": [str(np.datetime64("2020-01-01") + int(d)) for d in days],
+            "visit_date": "2025-01-01",
+            "gender": np.where(rng.random(n) < 0.5, "L", "P"),
+            "weight": np.round(np.clip(heights * 0.14 + rng.normal(0, 1.5, n), 2, 30), 2),
+            "height": heights,
+            "measure_mode": "standing",
+        }
+    )
+
+
+def _score(records, system=fuzzy_system):
+    return pd.concat(pipeline.score([records], system=system))
+
+
+class TestRescore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = versions.VersionStore(self.tmp.name)
+        self.store.snapshot(utils.REF, fuzzy_system.spec)
+        self.records = _records()
+        self.stored = _score(self.records)
+        self.ref = utils.REF
+
+    def tearDown(self):
+        utils.REF = self.ref
+        self.tmp.cleanup()
+
+    def _rescore(self, system=fuzzy_system):
+        stats = {}
+        out = pd.concat(rescore.rescore([self.stored], system, self.store, stats=stats))
+        return out, stats
+
+    def _assert_same_as_full(self, out, system=fuzzy_system):
+        expected = _score(self.records, system)
+        pd.testing.assert_frame_equal(
+            out[RESULT_COLUMNS].reset_index(drop=True),
+            expected[RESULT_COLUMNS].reset_index(drop=True),
+        )
+        self.assertTrue((out["ref_version"] == utils.REF.version).all())
+        self.assertTrue((out["rule_version"] == system.version).all())
+
+    def test_version_changes_with_content(self):
+        values = self.ref.values.copy()
+        values[0, 3] += 0.1
+        changed = ReferenceTables(
+            list(self.ref.genders), list(self.ref.index_types), self.ref.keys, values, self.ref.bounds
+        )
+        self.assertNotEqual(changed.version, self.ref.version)
+        self.assertEqual(self.store.reference(self.ref.version).version, self.ref.version)
+        self.assertEqual(self.ref.changed_slots(self.ref), {})
+        slots = self.ref.changed_slots(changed)
+        self.assertEqual(len(slots), 1)
+        keys, mask = next(iter(slots.values()))
+        self.assertEqual(keys[mask].tolist(), [self.ref.keys[0]])
+
+    def test_nothing_changed(self):
+        out, stats = self._rescore()
+        self.assertEqual(stats["unchanged"], len(self.stored))
+        pd.testing.assert_frame_equal(out, self.stored)
+
+    def test_reference_correction_only_touches_slot(self):
+        # Koreksi median BB/U laki-laki umur 30 bulan dan satu slot BB/TB
+        values = self.ref.values.copy()
+        keys, _ = self.ref.table("L", "BB_U")
+        start = self.ref.bounds[self.ref.genders["L"], self.ref.index_types["BB_U"], 0]
+        values[start + int(np.searchsorted(keys, 30)), 3] += 0.3
+        keys, _ = self.ref.table("P", "BB_TB")
+        start = self.ref.bounds[self.ref.genders["P"], self.ref.index_types["BB_TB"], 0]
+        values[start + int(np.searchsorted(keys, 90.0)), 3] -= 0.2
+        utils.REF = ReferenceTables(
+            list(self.ref.genders), list(self.ref.index_types), self.ref.keys, values, self.ref.bounds
+        )
+
+        out, stats = self._rescore()
+        self.assertGreater(stats["z_rows"], 0)
+        self.assertLess(stats["z_rows"], len(self.stored) * 0.1)
+        self._assert_same_as_full(out)
+
+    def test_rule_change_only_touches_region(self):
+        spec = copy.deepcopy(DEFAULT_SPEC)
+        spec["antecedents"]["bb_tb"]["terms"]["gemuk"][1] = [1.5, 2.5, 5, 5]
+        spec["labels"][1][0] = 55
+        system = MalnutritionFuzzySystem(spec)
+
+        out, stats = self._rescore(system)
+        self.assertEqual(stats["z_rows"], 0)
+        self.assertGreater(stats["rule_rows"], 0)
+        self.assertGreater(stats["unchanged"], 0)
+        self._assert_same_as_full(out, system)
+
+    def test_unknown_version_recomputes_everything(self):
+        stored = self.stored.assign(ref_version="gak-ada", rule_version=None)
+        out = pd.concat(rescore.rescore([stored], fuzzy_system, self.store))
+        self._assert_same_as_full(out)
+
+    def test_numeric_looking_versions_from_csv(self):
+        # Hash hex yang isinya angka semua / ada satu 'e' gak boleh kebaca angka
+        tables = ReferenceTables(
+            list(self.ref.genders), list(self.ref.index_types), self.ref.keys,
+            self.ref.values, self.ref.bounds, self.ref.age_range,
+        )
+        tables._version = "012345678901"
+        utils.REF = tables
+        system = MalnutritionFuzzySystem(DEFAULT_SPEC)
+        system.version = "1234567890e1"
+
+        path = os.path.join(self.tmp.name, "hasil.csv")
+        _score(self.records, system).to_csv(path, index=False)
+        stats = {}
+        out = pd.concat(rescore.rescore(pipeline.read_source(path), system, self.store, stats=stats))
+        self.assertEqual(stats["unchanged"], len(self.records))
+        self.assertTrue((out["ref_version"] == "012345678901").all())
+        self.assertTrue((out["rule_version"] == "1234567890e1").all())
+
+    def test_rows_scored_with_other_standard(self):
+        age_file = os.path.join(self.tmp.name, "std_age.csv")
+
+        def write_school_table(median):
+            rows = [
+                [g, "BB_U", age] + [median + k for k in (-3, -2, -1, 0, 1, 2, 3)]
+                for g in ("L", "P")
+                for age in range(61, 229)
+            ]
+            columns = ["gender", "index_type", "age_months"] + REF_COLUMNS
+            pd.DataFrame(rows, columns=columns).to_csv(age_file, index=False)
+            utils.STANDARDS.register_csv("test-rescore-school", "2007", age_file)
+
+        write_school_table(20.0)
+        school = self.records.head(200).assign(dob="2016-01-01", weight=21.0, height=120.0)
+        stored = pd.concat(pipeline.score([school], standard="test-rescore-school"))
+        self.assertTrue((stored["ref_standard"] == "test-rescore-school@2007").all())
+        self.assertTrue((stored["z_bb_u"] == 1.0).all())
+
+        stats = {}
+        out = pd.concat(rescore.rescore([stored], fuzzy_system, self.store, stats=stats))
+        self.assertEqual(stats["unchanged"], len(stored))
+        pd.testing.assert_frame_equal(out[RESULT_COLUMNS], stored[RESULT_COLUMNS])
+
+        # Tabel sekolah dikoreksi: dihitung ulang pake tabel sekolah, bukan PMK
+        write_school_table(20.5)
+        stats = {}
+        out = pd.concat(rescore.rescore([stored], fuzzy_system, self.store, stats=stats))
+        self.assertEqual(stats["z_rows"], len(stored))
+        self.assertTrue((out["z_bb_u"] == 0.5).all())
+        self.assertTrue((out["ref_standard"] == "test-rescore-school@2007").all())
+        self.assertTrue(
+            (out["ref_version"] == utils.get_reference("test-rescore-school").version).all()
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
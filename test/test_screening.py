@@ -0,0 +1,90 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+import screening
+import utils
+from reference import REF_COLUMNS, ReferenceTables
+
+
+class TestScreening(unittest.TestCase):
+
+    def test_bands_against_table_lines(self):
+        # BB/U laki-laki umur 0: -3 SD 2.1, -2 SD 2.5, +2 SD 4.4
+        bands = screening.screen_batch(
+            ["L"] * 5, [0, 0, 0, 0, 999], [2.0, 2.3, 3.3, 4.5, 10.0], [50.0] * 5
+        )
+        self.assertEqual(bands["bb_u"].tolist(), [0, 1, 2, 3, -1])
+        self.assertEqual(screening.band_labels(bands["bb_u"])[[0, 4]].tolist(), ["< -3 SD", None])
+
+    def test_height_slots_fill_gaps(self):
+        table = screening.cutoff_table("L", "BB_PB")
+        self.assertEqual(table.step, 0.5)
+        self.assertFalse(np.isnan(table.cutoffs).any())
+        self.assertEqual(len(table.lookup([table.start - 10.0])), 1)
+        self.assertTrue(np.isnan(table.lookup([table.start - 10.0])).all())
+
+    def test_severe_stunting_uses_length_table(self):
+        # Umur >= 24 bulan tapi tinggi < 65 cm: BB/TB pake tabel BB/PB
+        bands = screening.screen_batch(["P"], [30], [5.0], [60.0])
+        self.assertNotEqual(bands["bb_tb"][0], screening.BAND_UNKNOWN)
+
+    def test_cutoffs_follow_standard_and_ref_override(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            age_file = os.path.join(tmp, "std_age.csv")
+
+            def register(median):
+                rows = [
+                    [g, "BB_U", age] + [median + k for k in (-3, -2, -1, 0, 1, 2, 3)]
+                    for g in ("L", "P")
+                    for age in range(61, 229)
+                ]
+                columns = ["gender", "index_type", "age_months"] + REF_COLUMNS
+                pd.DataFrame(rows, columns=columns).to_csv(age_file, index=False)
+                utils.STANDARDS.register_csv("test-screening-school", "2007", age_file)
+
+            register(20.0)
+            bands = screening.screen_batch(["L"], [100], [17.5], [130.0], "test-screening-school")
+            self.assertEqual(bands["bb_u"].tolist(), [1])
+            self.assertEqual(screening.screen_batch(["L"], [100], [17.5], [130.0])["bb_u"].tolist(), [-1])
+
+            # CSV dikoreksi -> versi tabel baru, batasnya gak basi
+            register(22.0)
+            bands = screening.screen_batch(["L"], [100], [17.5], [130.0], "test-screening-school")
+            self.assertEqual(bands["bb_u"].tolist(), [0])
+
+            paths = screening.export_tables(tmp, standard="test-screening-school")
+            df = pd.read_csv(os.path.join(tmp, "batas_BB_U_L.csv"))
+            self.assertEqual(df.iloc[:, 0].tolist(), list(range(61, 229)))
+            self.assertEqual(df.iloc[0, 1], 19.0)
+            self.assertEqual(len(paths), 10)
+
+        ref = utils.REF
+        try:
+            values = ref.values.copy()
+            values[:, REF_COLUMNS.index("sd_n3")] -= 100
+            utils.REF = ReferenceTables(
+                list(ref.genders), list(ref.index_types), ref.keys, values, ref.bounds, ref.age_range
+            )
+            bands = screening.screen_batch(["L"], [0], [2.0], [50.0])
+            self.assertEqual(bands["bb_u"].tolist(), [1])
+        finally:
+            utils.REF = ref
+        self.assertEqual(screening.screen_batch(["L"], [0], [2.0], [50.0])["bb_u"].tolist(), [0])
+
+    def test_export(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = screening.export_tables(tmp)
+            self.assertEqual(len(paths), 10)
+            with open(os.path.join(tmp, "batas_BB_U_L.csv"), encoding="utf-8") as f:
+                lines = f.read().splitlines()
+        self.assertEqual(lines[0], "Umur (bulan),-3 SD (kg),-2 SD (kg),+2 SD (kg)")
+        self.assertEqual(lines[1], "0,2.1,2.5,4.4")
+        self.assertEqual(len(lines), 62)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+import os
+import tempfile
+import unittest
+
+import capture
+import shards
+
+
+def _visit(i, region, status=None):
+    return {
+        "key": f"v{i}",
+        "nama": f"Balita {i}",
+        "dob": "2023-01-01",
+        "gender": "L" if i % 2 else "P",
+        "weight": 8 + (i % 70) / 10,
+        "height": 70 + (i % 200) / 10,
+        "measure_mode": "standing",
+        "visit_date": f"2025-0{1 + i % 3}-01",
+        "region": region,
+        "status": status,
+    }
+
+
+class TestShards(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = shards.ShardedStore(os.path.join(self.tmp.name, "shards"))
+        regions = ["Kec. Cibinong", "Kec. Bojonggede", None]
+        self.visits = [
+            _visit(i, regions[i % 3], "Gizi Baik" if i % 4 == 0 else None) for i in range(300)
+        ]
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp.cleanup()
+
+    def test_routes_by_region_and_dedups_per_shard(self):
+        result = self.store.bulk_insert(self.visits)
+        self.assertEqual(result, {"inserted": 300, "duplicates": 0})
+        self.assertEqual(
+            self.store.shards(), ["_tanpa_wilayah", "kec_bojonggede", "kec_cibinong"]
+        )
+        again = self.store.bulk_insert(self.visits[:50])
+        self.assertEqual(again, {"inserted": 0, "duplicates": 50})
+        self.assertEqual(self.store.count(), 300)
+
+    def test_aggregate_matches_single_store(self):
+        self.store.bulk_insert(self.visits)
+        single_path = os.path.join(self.tmp.name, "pusat.db")
+        single = capture.CentralStore(single_path)
+        single.bulk_insert(self.visits)
+        single.close()
+        expected = shards.shard_summary(single_path)
+
+        for workers in (1, 2):
+            result = self.store.aggregate(workers)
+            self.assertEqual(result["rows"], 300)
+            self.assertEqual(result["counts"], expected["counts"])
+            self.assertAlmostEqual(sum(result["prevalence"].values()), 1.0)
+            self.assertEqual(sum(s["rows"] for s in result["shards"].values()), 300)
+
+        january = self.store.aggregate(1, "2025-01-01", "2025-01-31")
+        self.assertEqual(january["rows"], 100)
+
+    def test_migrate_single_store(self):
+        single_path = os.path.join(self.tmp.name, "pusat.db")
+        single = capture.CentralStore(single_path)
+        single.bulk_insert(self.visits)
+        single.close()
+        self.assertEqual(shards.migrate(single_path, self.store), 300)
+        self.assertEqual(shards.migrate(single_path, self.store), 300)
+        self.assertEqual(self.store.count(), 300)
+
+    def test_app_statuses_are_normalized(self):
+        statuses = [
+            "Gizi Baik (63.41/100)",
+            "Gizi Baik (71.2/100)",
+            "Gizi Baik",
+            "Gizi Buruk (Sangat Kurus) (12.5/100)",
+            "Gizi Buruk (Sangat Kurus)",
+            "Gizi Kurang (40.0/100)",
+        ]
+        visits = [_visit(i, "Kec. Cibinong", status) for i, status in enumerate(statuses)]
+        self.store.bulk_insert(visits)
+        result = self.store.aggregate(1)
+        self.assertEqual(
+            result["counts"],
+            {"Gizi Baik": 3, "Gizi Buruk (Sangat Kurus)": 2, "Gizi Kurang": 1},
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+import survey
+
+
+def _survey():
+    return pd.DataFrame(
+        {
+            "posyandu": ["A", "A", "B", "B", "C", "C", "D", "D"],
+            "kecamatan": ["X", "X", "X", "X", "Y", "Y", "Y", "Y"],
+            "bobot": [1.0, 1.0, 2.0, 2.0, 1.0, 1.0, 3.0, 3.0],
+            "z_tb_u": [-2.5, 0.1, -3.2, -1.0, np.nan, -2.1, 0.5, -7.0],
+            "z_bb_tb": [0.0, 0.2, -2.4, 0.3, 1.0, -0.5, 0.4, 0.1],
+            "z_bb_u": [-1.0, -0.4, -2.2, -0.8, 0.3, -2.6, 0.2, -0.1],
+        }
+    )
+
+
+class TestSurvey(unittest.TestCase):
+
+    def test_weighted_prevalence(self):
+        result = survey.prevalence(_survey(), "bobot", replicates=0).set_index("indicator")
+        # z_tb_u: NaN sama -7 (di luar batas WHO) gak dihitung
+        stunting = result.loc["stunting"]
+        self.assertEqual(stunting["n"], 6)
+        self.assertAlmostEqual(stunting["weighted_n"], 1 + 1 + 2 + 2 + 1 + 3)
+        self.assertAlmostEqual(stunting["prevalence"], (1 + 2 + 1) / 10)
+        self.assertAlmostEqual(result.loc["severe_stunting", "prevalence"], 2 / 10)
+        self.assertAlmostEqual(result.loc["wasting", "prevalence"], 2 / 14)
+        self.assertNotIn("se", result.columns)
+
+    def test_domains(self):
+        result = survey.prevalence(_survey(), "bobot", by="kecamatan", replicates=0)
+        underweight = result[result["indicator"] == "underweight"].set_index("kecamatan")
+        self.assertAlmostEqual(underweight.loc["X", "prevalence"], 2 / 6)
+        self.assertAlmostEqual(underweight.loc["Y", "prevalence"], 1 / 8)
+
+    def test_bootstrap_matches_naive_resampling(self):
+        rng = np.random.default_rng(3)
+        df = pd.DataFrame(
+            {
+                "posyandu": rng.integers(0, 30, 600),
+                "bobot": rng.uniform(0.5, 2, 600),
+                "z_tb_u": rng.normal(-1, 1.2, 600),
+            }
+        )
+        df["kecamatan"] = df["posyandu"] % 3
+        result = survey.prevalence(df, "bobot", strata="kecamatan", replicates=4000, seed=1)
+        stunting = result.set_index("indicator").loc["stunting"]
+
+        # Bootstrap naif: resample klaster per strata, gabungin data anaknya
+        members = {
+            h: [(g["z_tb_u"].to_numpy() < -2, g["bobot"].to_numpy()) for _, g in group.groupby("posyandu")]
+            for h, group in df.groupby("kecamatan")
+        }
+        naive = []
+        for _ in range(1500):
+            hits, weights = [], []
+            for clusters in members.values():
+                n_h = len(clusters)
+                for pick in rng.integers(0, n_h, n_h - 1):
+                    hits.append(clusters[pick][0])
+                    weights.append(clusters[pick][1] * n_h / (n_h - 1))
+            naive.append(np.average(np.concatenate(hits), weights=np.concatenate(weights)))
+        self.assertAlmostEqual(stunting["se"], np.std(naive, ddof=1), delta=0.15 * stunting["se"])
+        self.assertLess(stunting["ci_low"], stunting["prevalence"])
+        self.assertGreater(stunting["ci_high"], stunting["prevalence"])
+
+    def test_same_result_for_any_worker_count(self):
+        df = _survey()
+        one = survey.prevalence(df, "bobot", strata="kecamatan", replicates=1200, workers=1)
+        two = survey.prevalence(df, "bobot", strata="kecamatan", replicates=1200, workers=2)
+        pd.testing.assert_frame_equal(one, two)
+
+    def test_bench_runs_in_seconds(self):
+        result = survey.bench(20000, 200, replicates=2000)
+        self.assertLess(result["seconds"], 30)
+        self.assertEqual(len(result["result"]), len(survey.INDICATORS))
+
+
+if __name__ == "__main__":
+    unittest.main()
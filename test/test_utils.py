@@ -1,7 +1,15 @@
 
 import unittest
+import numpy as np
 from datetime import date
 from utils import calculate_age_months, correct_height, get_z_scores, _calculate_z
+from utils import (
+    calculate_age_months_batch,
+    correct_height_batch,
+    get_z_scores_batch,
+    lookup_ref,
+    ref_table,
+)
 
 class TestUtils(unittest.TestCase):
     
@@ -48,9 +56,50 @@ class TestUtils(unittest.TestCase):
             )
             self.assertEqual(result['age_months'], 0)
             self.assertEqual(result['z_bb_u'], 0.0)
+            # IMT = 3.3 / 0.5^2 = 13.2, sedikit di bawah median IMT/U (13.4)
+            self.assertEqual(result['imt'], 13.2)
+            self.assertEqual(result['z_imt_u'], -0.17)
             
         except RuntimeError:
             self.skipTest("Reference data not loaded, skipping integration test.")
 
+    def test_batch_matches_single(self):
+        # Versi batch harus sama persis sama versi per-record
+        cases = [
+            ('L', date(2023, 1, 1), 3.3, 50.0, 'recumbent', date(2023, 1, 1)),
+            ('L', date(2023, 1, 31), 4.0, 53.0, 'standing', date(2023, 2, 28)),
+            ('P', date(2022, 5, 10), 8.0, 75.0, 'standing', date(2024, 6, 1)),
+            ('L', date(2021, 1, 1), 9.0, 69.5, 'standing', date(2024, 1, 1)),
+            ('P', date(2020, 3, 3), 15.0, 104.3, 'recumbent', date(2024, 12, 2)),
+            ('L', date(2010, 1, 1), 30.0, 135.0, 'standing', date(2024, 1, 1)),
+        ]
+        gender, dob, weight, height, mode, visit = map(list, zip(*cases))
+        age = calculate_age_months_batch(dob, visit)
+        corrected = correct_height_batch(age, height, mode)
+        z = get_z_scores_batch(gender, age, weight, corrected)
+
+        for i, case in enumerate(cases):
+            expected = get_z_scores(*case)
+            self.assertEqual(age[i], expected['age_months'])
+            self.assertAlmostEqual(corrected[i], expected['corrected_height'])
+            self.assertEqual(z['imt'][i], expected['imt'])
+            for key in ('z_bb_u', 'z_tb_u', 'z_bb_tb', 'z_imt_u'):
+                if expected[key] is None:
+                    self.assertTrue(np.isnan(z[key][i]))
+                else:
+                    self.assertEqual(z[key][i], expected[key])
+    def test_lookup_ref_follows_index_rule(self):
+        # Index umur harus persis, index tinggi badan diinterpolasi
+        keys, values = ref_table('L', 'BB_U')
+        ref = lookup_ref('L', 'BB_U', [keys[12], keys[12] + 0.5])
+        np.testing.assert_array_equal(ref[0], values[12])
+        self.assertTrue(np.isnan(ref[1]).all())
+
+        keys, values = ref_table('L', 'BB_TB')
+        middle = (keys[10] + keys[11]) / 2
+        ref = lookup_ref('L', 'BB_TB', [middle, keys[-1] + 1])
+        np.testing.assert_allclose(ref[0], (values[10] + values[11]) / 2)
+        self.assertTrue(np.isnan(ref[1]).all())
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,118 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+import pipeline
+import zsummary
+
+
+def _raw(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(
+        {
+            "nama": [f"Anak {i}" for i in range(n)],
+            "dob": "2023-01-01",
+            "gender": rng.choice(["L", "P"], n),
+            "weight": np.round(rng.normal(11, 1.8, n), 1),
+            "height": np.round(rng.normal(84, 5, n), 1),
+            "measure_mode": "recumbent",
+            "visit_date": rng.choice(["2024-05-10", "2024-06-10"], n),
+            "region": rng.choice(["Kecamatan A", "Kecamatan B", None], n),
+        }
+    )
+
+
+class TestZSummary(unittest.TestCase):
+
+    def test_matches_exact_statistics(self):
+        rng = np.random.default_rng(1)
+        values = np.round(rng.normal(-0.8, 1.3, 5000), 2)
+        values[:3] = [-7.5, 6.8, np.nan]
+        summary = zsummary.ZSummary().add(values)
+        valid = values[~np.isnan(values)]
+
+        self.assertEqual(summary.n, len(valid))
+        self.assertAlmostEqual(summary.mean, valid.mean(), places=10)
+        self.assertAlmostEqual(summary.sd, valid.std(ddof=1), places=10)
+        self.assertEqual(summary.share_below(-2), (valid < -2).mean())
+        self.assertEqual(summary.share_below(-3), (valid < -3).mean())
+        for q in (0.0001, 0.03, 0.5, 0.97, 0.9999):
+            expected = np.percentile(valid, q * 100, method="inverted_cdf")
+            self.assertAlmostEqual(summary.quantile(q), expected, places=9)
+
+    def test_unrounded_error_bound(self):
+        values = np.random.default_rng(2).normal(0, 1, 2000)
+        summary = zsummary.ZSummary().add(values)
+        for q in (0.03, 0.5, 0.97):
+            expected = np.percentile(values, q * 100, method="inverted_cdf")
+            self.assertLessEqual(abs(summary.quantile(q) - expected), zsummary.BIN_WIDTH / 2 + 1e-9)
+
+    def test_merge_and_roundtrip(self):
+        values = np.round(np.random.default_rng(3).normal(0, 2, 3000), 2)
+        whole = zsummary.ZSummary().add(values)
+        merged = zsummary.ZSummary()
+        for chunk in np.array_split(values, 7):
+            part = zsummary.ZSummary().add(chunk)
+            merged.merge(zsummary.ZSummary.from_dict(json.loads(json.dumps(part.to_dict()))))
+
+        np.testing.assert_array_equal(merged.counts, whole.counts)
+        self.assertEqual((merged.n, merged.min, merged.max), (whole.n, whole.min, whole.max))
+        self.assertAlmostEqual(merged.mean, whole.mean, places=12)
+        self.assertAlmostEqual(merged.sd, whole.sd, places=12)
+
+    def test_pipeline_summary_matches_parallel_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            source = os.path.join(tmp, "in.jsonl")
+            dest = os.path.join(tmp, "out.jsonl")
+            _raw(600).to_json(source, orient="records", lines=True)
+
+            table = zsummary.SummaryTable()
+            pipeline.run_pipeline(source, dest, batch_size=100, summary=table)
+            from_file = zsummary.summarize_file(dest, workers=2, batch_size=90)
+            scored = pd.concat(pipeline.read_source(dest, 1000), ignore_index=True)
+
+        report = table.report()
+        pd.testing.assert_frame_equal(report, from_file.report(), check_exact=False)
+        self.assertEqual(set(report["region"]), {"Kecamatan A", "Kecamatan B", zsummary.UNKNOWN})
+        self.assertEqual(set(report["visit_month"]), {"2024-05", "2024-06"})
+        self.assertEqual(report.groupby("index")["n"].sum()["z_bb_u"], scored["z_bb_u"].notna().sum())
+
+        row = report.query("region == 'Kecamatan A' and visit_month == '2024-06' and index == 'z_tb_u'")
+        part = scored[(scored["region"] == "Kecamatan A") & scored["visit_date"].astype(str).str.startswith("2024-06")]
+        self.assertAlmostEqual(row["below_minus2"].iloc[0], (part["z_tb_u"].dropna() < -2).mean())
+
+    def test_parallel_file_reads_bounded_chunks(self):
+        scored = pd.concat(pipeline.score([_raw(400)]), ignore_index=True)
+        chunks = [scored.iloc[i : i + 20] for i in range(0, len(scored), 20)]
+        state = {"produced": 0, "merged": 0, "ahead": 0}
+
+        def read_source(source, batch_size):
+            for chunk in chunks:
+                state["produced"] += 1
+                state["ahead"] = max(state["ahead"], state["produced"] - state["merged"])
+                yield chunk
+
+        merge = zsummary.SummaryTable.merge
+
+        def counting_merge(table, other):
+            state["merged"] += 1
+            return merge(table, other)
+
+        with mock.patch.object(zsummary.pipeline, "read_source", read_source), mock.patch.object(
+            zsummary.SummaryTable, "merge", counting_merge
+        ):
+            table = zsummary.summarize_file("gak-dipake.jsonl", workers=2)
+
+        self.assertEqual(state["merged"], len(chunks))
+        self.assertLessEqual(state["ahead"], 2 * 2)
+        whole = zsummary.SummaryTable().add_batch(scored)
+        pd.testing.assert_frame_equal(table.report(), whole.report(), check_exact=False)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,284 @@
+"""
+Harness buat tuning breakpoint membership function / rule sistem fuzzy
+terhadap data berlabel (keputusan klinisi).
+
+Tiap kandidat itu satu spesifikasi (format sama kayak `fuzzy_logic.DEFAULT_SPEC`):
+varian acak dari spesifikasi dasar (breakpoint digeser, dan/atau rule-nya
+diubah: consequent ditukar, rule dibuang / ditambah), dan/atau file JSON
+rule set alternatif yang disiapin sendiri (`--specs`, boleh folder / glob).
+Kandidat dievaluasi paralel di beberapa proses; tiap proses load data kasus
+sekali aja, terus skoring semua kasus pake `predict_batch` (vectorized).
+
+Format data kasus (CSV): kolom z_bb_u, z_tb_u, z_bb_tb, label.
+Kalo kolom Z-score gak ada, data mentah (dob, gender, weight, height,
+measure_mode, visit_date) dihitung dulu lewat `pipeline`.
+
+Contoh:
+    python tuning.py kasus.csv --candidates 300 --jitter 0.25 --out hasil.json
+    python tuning.py kasus.csv --candidates 200 --rule-changes 3
+    python tuning.py kasus.csv --candidates 1 --specs "kandidat/*.json"
+"""
+
+import argparse
+import copy
+import glob
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import pipeline
+from fuzzy_logic import DEFAULT_SPEC, MalnutritionFuzzySystem, load_spec
+
+CLASSES = ["Gizi Buruk", "Gizi Kurang", "Gizi Baik", "Gizi Lebih"]
+
+# Data kasus per proses worker (diisi sekali lewat initializer)
+_CASES = None
+
+
+def base_label(labels) -> np.ndarray:
+    """
+    Samain label ke 4 kelas dasar, misal 'Gizi Buruk (Sangat Kurus)' -> 'Gizi Buruk'.
+    """
+    labels = pd.Series(labels, dtype=object).astype(str)
+    return labels.str.replace(r"\s*\(.*\)$", "", regex=True).str.strip().to_numpy()
+
+
+def load_cases(path: str) -> pd.DataFrame:
+    """
+    Load data kasus berlabel, hasilnya kolom z_bb_u, z_tb_u, z_bb_tb, label.
+    """
+    df = pd.read_csv(path)
+    if not {"z_bb_u", "z_tb_u", "z_bb_tb"}.issubset(df.columns):
+        scored = pipeline.z_scores(pipeline.correct(pipeline.validate([df])))
+        df = pd.concat(list(scored), ignore_index=True)
+
+    df = df.dropna(subset=["z_bb_u", "z_tb_u", "z_bb_tb", "label"])
+    return pd.DataFrame(
+        {
+            "z_bb_u": df["z_bb_u"].to_numpy(dtype=np.float64),
+            "z_tb_u": df["z_tb_u"].to_numpy(dtype=np.float64),
+            "z_bb_tb": df["z_bb_tb"].to_numpy(dtype=np.float64),
+            "label": base_label(df["label"]),
+        }
+    )
+
+
+def confusion_matrix(expected, predicted) -> np.ndarray:
+    """
+    Confusion matrix 4x4 (baris = label klinisi, kolom = prediksi), urutan CLASSES.
+    Label diluar CLASSES diabaikan.
+    """
+    index = {name: i for i, name in enumerate(CLASSES)}
+    e = np.array([index.get(v, -1) for v in expected])
+    p = np.array([index.get(v, -1) for v in predicted])
+    ok = (e >= 0) & (p >= 0)
+    matrix = np.zeros((len(CLASSES), len(CLASSES)), dtype=np.int64)
+    np.add.at(matrix, (e[ok], p[ok]), 1)
+    return matrix
+
+
+def evaluate(spec: dict, cases: pd.DataFrame) -> dict:
+    """
+    Evaluasi satu kandidat spesifikasi: akurasi dan confusion matrix.
+    """
+    system = MalnutritionFuzzySystem(spec)
+    _, labels = system.predict_batch(cases["z_bb_u"], cases["z_tb_u"], cases["z_bb_tb"])
+    matrix = confusion_matrix(cases["label"], base_label(labels))
+    total = matrix.sum()
+    return {
+        "accuracy": float(np.trace(matrix) / total) if total else 0.0,
+        "confusion": matrix.tolist(),
+    }
+
+
+def _init_worker(cases):
+    global _CASES
+    _CASES = cases
+
+
+def _evaluate_in_worker(item):
+    i, spec = item
+    result = evaluate(spec, _CASES)
+    result["candidate"] = i
+    return result
+
+
+def perturb_spec(
+    spec: dict, jitter: float, rng: np.random.Generator, consequent: bool = False
+) -> dict:
+    """
+    Bikin varian spesifikasi dengan menggeser breakpoint membership function
+    secara acak (N(0, jitter)). Urutan breakpoint tiap term tetep dijaga.
+    """
+    spec = copy.deepcopy(spec)
+    variables = list(spec["antecedents"].values())
+    if consequent:
+        variables.append(spec["consequent"])
+
+    for var in variables:
+        universe = np.arange(*var["universe"])
+        lo, hi = universe.min(), universe.max()
+        scale = jitter * (hi - lo) / 10
+        for term in var["terms"].values():
+            params = np.asarray(term[1], dtype=np.float64)
+            # Breakpoint yang nempel di ujung universe gak digeser
+            edge = np.isclose(params, lo) | np.isclose(params, hi)
+            moved = params + rng.normal(0, scale, len(params)) * ~edge
+            term[1] = np.round(np.sort(np.clip(moved, lo, hi)), 2).tolist()
+    return spec
+
+
+def _random_rule(spec: dict, rng: np.random.Generator) -> dict:
+    # 1-2 antecedent acak (AND), consequent acak
+    names = list(spec["antecedents"])
+    picked = rng.choice(len(names), size=int(rng.integers(1, 3)), replace=False)
+    condition = {}
+    for i in sorted(picked):
+        terms = list(spec["antecedents"][names[i]]["terms"])
+        condition[names[i]] = terms[int(rng.integers(len(terms)))]
+    outputs = list(spec["consequent"]["terms"])
+    return {"if": condition, "then": outputs[int(rng.integers(len(outputs)))]}
+
+
+def mutate_rules(spec: dict, changes: int, rng: np.random.Generator) -> dict:
+    """
+    Bikin varian rule set: `changes` kali ubah acak, tiap kali salah satu dari
+    tukar consequent satu rule, buang satu rule, atau tambah rule baru.
+    Minimal satu rule tetep ada.
+    """
+    spec = copy.deepcopy(spec)
+    rules = spec["rules"]
+    outputs = list(spec["consequent"]["terms"])
+    for _ in range(changes):
+        action = rng.choice(["swap", "drop", "add"])
+        if action == "swap" and rules:
+            rule = rules[int(rng.integers(len(rules)))]
+            others = [o for o in outputs if o != rule["then"]]
+            rule["then"] = others[int(rng.integers(len(others)))]
+        elif action == "drop" and len(rules) > 1:
+            del rules[int(rng.integers(len(rules)))]
+        else:
+            rules.append(_random_rule(spec, rng))
+    return spec
+
+
+def generate_candidates(
+    base_spec: dict = DEFAULT_SPEC,
+    n: int = 100,
+    jitter: float = 0.2,
+    seed: int = 0,
+    consequent: bool = False,
+    rule_changes: int = 0,
+) -> list:
+    """
+    Kandidat pertama selalu `base_spec` (baseline), sisanya varian acak:
+    breakpoint digeser `jitter` (0 = gak digeser), terus kalo `rule_changes`
+    > 0 rule set-nya diubah 1..rule_changes kali (lihat `mutate_rules`).
+    """
+    rng = np.random.default_rng(seed)
+    candidates = [copy.deepcopy(base_spec)]
+    for _ in range(n - 1):
+        spec = perturb_spec(base_spec, jitter, rng, consequent) if jitter else copy.deepcopy(base_spec)
+        if rule_changes:
+            spec = mutate_rules(spec, int(rng.integers(1, rule_changes + 1)), rng)
+        candidates.append(spec)
+    return candidates
+
+
+def load_candidate_specs(patterns) -> list:
+    """
+    Load file spesifikasi kandidat dari list path / folder / glob.
+    Balikin list (path, spec), urut per path.
+    """
+    paths = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            pattern = os.path.join(pattern, "*.json")
+        matched = sorted(glob.glob(pattern))
+        if not matched:
+            raise FileNotFoundError(f"Gak ada file spesifikasi yang cocok: {pattern}")
+        paths.extend(matched)
+    return [(path, load_spec(path)) for path in paths]
+
+
+def run_sweep(candidates: list, cases: pd.DataFrame, workers: int = None, sources: list = None) -> list:
+    """
+    Evaluasi semua kandidat paralel. Hasilnya diurutin dari akurasi tertinggi,
+    tiap hasil bawa index 'candidate', 'spec'-nya, dan 'source' (asal
+    kandidat, dari `sources` kalo dikasih).
+    """
+    workers = workers or os.cpu_count() or 1
+    items = list(enumerate(candidates))
+
+    if workers == 1:
+        _init_worker(cases)
+        results = [_evaluate_in_worker(item) for item in items]
+    else:
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(cases,)
+        ) as pool:
+            chunksize = max(1, len(items) // (workers * 4))
+            results = list(pool.map(_evaluate_in_worker, items, chunksize=chunksize))
+
+    for result in results:
+        result["spec"] = candidates[result["candidate"]]
+        result["source"] = sources[result["candidate"]] if sources else None
+    return sorted(results, key=lambda r: r["accuracy"], reverse=True)
+
+
+def format_report(results: list, top: int = 5) -> str:
+    lines = []
+    for result in results[:top]:
+        source = f" ({result['source']})" if result.get("source") else ""
+        lines.append(f"Kandidat #{result['candidate']}{source}: akurasi {result['accuracy']:.2%}")
+        lines.append("  " + " | ".join(f"{c:>11}" for c in ["klinisi\\pred"] + CLASSES))
+        for name, row in zip(CLASSES, result["confusion"]):
+            lines.append("  " + " | ".join(f"{v:>11}" for v in [name] + row))
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tuning rule set sistem fuzzy")
+    parser.add_argument("cases", help="CSV kasus berlabel")
+    parser.add_argument("--spec", help="Spesifikasi dasar (JSON), default DEFAULT_SPEC")
+    parser.add_argument("--candidates", type=int, default=100)
+    parser.add_argument("--jitter", type=float, default=0.2)
+    parser.add_argument("--consequent", action="store_true", help="Ikut geser term output")
+    parser.add_argument(
+        "--rule-changes", type=int, default=0,
+        help="Maksimal perubahan rule (tukar consequent / buang / tambah) per kandidat acak",
+    )
+    parser.add_argument(
+        "--specs", nargs="+", default=[],
+        help="File / folder / glob spesifikasi kandidat tambahan (JSON)",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--top", type=int, default=5)
+    parser.add_argument("--out", help="Simpan semua hasil ke file JSON")
+    args = parser.parse_args()
+
+    base = load_spec(args.spec) if args.spec else DEFAULT_SPEC
+    try:
+        extra = load_candidate_specs(args.specs)
+    except FileNotFoundError as e:
+        parser.error(str(e))
+    cases = load_cases(args.cases)
+    candidates = generate_candidates(
+        base, args.candidates, args.jitter, args.seed, args.consequent, args.rule_changes
+    )
+    sources = [args.spec or "DEFAULT_SPEC"] + ["acak"] * (len(candidates) - 1)
+    for path, spec in extra:
+        candidates.append(spec)
+        sources.append(path)
+    results = run_sweep(candidates, cases, args.workers, sources)
+
+    print(f"{len(candidates)} kandidat x {len(cases)} kasus")
+    print(format_report(results, args.top))
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
@@ -1,12 +1,21 @@
+import numpy as np
 import pandas as pd
 from datetime import date
 from dateutil.relativedelta import relativedelta
 import os
 
+from reference import REF_COLUMNS, ReferenceTables, StandardRegistry
+
 # --- Konstanta ---
 DATA_DIR = os.path.join(os.path.dirname(__file__), "dataset")
 STD_AGE_FILE = os.path.join(DATA_DIR, "std_age.csv")
 STD_HEIGHT_FILE = os.path.join(DATA_DIR, "std_height.csv")
+# Standar tambahan (misal WHO 2007 5-19 tahun): <nama>/<versi>/std_age.csv
+# (+ std_height.csv kalo ada), kedaftar otomatis tanpa ubah kode
+STANDARDS_DIR = os.path.join(DATA_DIR, "standards")
+
+DEFAULT_STANDARD = "kemenkes-pmk2"
+DEFAULT_STANDARD_VERSION = "2020"
 
 
 # --- Load Data ---
@@ -21,15 +30,64 @@ def load_data():
         ) from e
 
 
-# Load data sekali aja di level modul biar gak bolak-balik baca file (I/O)
-try:
-    DF_AGE, DF_HEIGHT = load_data()
-except FileNotFoundError:
-    # Boleh import tanpa data buat testing kalo perlu, tapi kasih warning
-    print(
-        f"Warning: Data files not found in {DATA_DIR}. Functions depending on data will fail."
-    )
-    DF_AGE, DF_HEIGHT = None, None
+# Tabel standar dibaca sekali pas pertama dipake (bukan pas import), disimpen
+# sebagai blok numpy ringkas (lihat reference.py), bukan DataFrame, biar tiap
+# proses worker gak bawa overhead pandas buat beberapa ribu angka. Standar
+# yang gak pernah dipake gak dibaca sama sekali.
+STANDARDS = StandardRegistry()
+STANDARDS.register(
+    DEFAULT_STANDARD,
+    DEFAULT_STANDARD_VERSION,
+    lambda: ReferenceTables.from_frames(*load_data()),
+    default=True,
+)
+STANDARDS.discover(STANDARDS_DIR)
+
+
+def get_reference(standard=None) -> ReferenceTables:
+    """
+    Tabel standar buat `standard` (selector, lihat `StandardRegistry`).
+    `utils.REF = ...` masih bisa dipake buat ganti standar default.
+    """
+    if "REF" in globals() and (
+        standard is None or STANDARDS.resolve(standard) == STANDARDS.resolve()
+    ):
+        return globals()["REF"]
+    return STANDARDS.get(standard)
+
+
+def standard_name(standard=None) -> str:
+    """
+    Nama kanonik 'nama@versi' buat selector `standard`, dicatat di hasil
+    skoring ('ref_standard') biar rescore tau standar mana yang dipake.
+    """
+    name, version = STANDARDS.resolve(standard)
+    return f"{name}@{version}"
+
+
+def _reference(standard=None, required: bool = True):
+    # Kalo file standar gak ada: error buat hitung Z-score, None buat grafik
+    try:
+        ref = get_reference(standard)
+    except FileNotFoundError:
+        ref = None
+    if ref is None and required:
+        raise RuntimeError("Reference data not loaded.")
+    return ref
+
+
+def __getattr__(name):
+    # REF = tabel standar default (lazy, None kalo file-nya gak ada)
+    if name == "REF":
+        return _reference(required=False)
+    # DF_AGE / DF_HEIGHT lama masih bisa diakses: CSV-nya dibaca sekali pas
+    # pertama diakses, abis itu disimpen di modul (gak dibaca ulang tiap akses)
+    if name in ("DF_AGE", "DF_HEIGHT"):
+        df_age, df_height = load_data()
+        globals().update(DF_AGE=df_age, DF_HEIGHT=df_height)
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 # --- Logika Utama ---
 
@@ -60,6 +118,14 @@ def correct_height(age_months: int, height: float, measure_mode: str) -> float:
     return corrected_height
 
 
+def calculate_imt(weight, height):
+    """
+    Hitung IMT (Indeks Massa Tubuh / BMI) = berat (kg) / tinggi (m)^2.
+    Bisa dipake buat angka tunggal maupun array numpy.
+    """
+    return weight / (height / 100) ** 2
+
+
 def _calculate_z(value: float, median: float, sd_neg1: float, sd_pos1: float) -> float:
     """
     Fungsi bantuan buat hitung Z-score individu pake rumus.
@@ -87,9 +153,10 @@ def get_z_scores(
     height: float,
     measure_mode: str,
     visit_date: date = date.today(),
+    standard=None,
 ) -> dict:
     """
-    Hitung Z-score buat BB/U, TB/U (atau PB/U), dan BB/TB (atau BB/PB).
+    Hitung Z-score buat BB/U, TB/U (atau PB/U), BB/TB (atau BB/PB), dan IMT/U.
 
     Args:
         gender: 'L' atau 'P'
@@ -98,64 +165,53 @@ def get_z_scores(
         height: Tinggi dalam cm
         measure_mode: 'recumbent' atau 'standing'
         visit_date: Tanggal kunjungan (default hari ini)
+        standard: Standar referensi (default PMK 2/2020, lihat `STANDARDS`)
 
     Returns:
         Dictionary berisi Z-scores dan metadata:
         {
             'age_months': int,
             'corrected_height': float,
+            'imt': float,
             'z_bb_u': float,
             'z_tb_u': float,
-            'z_bb_tb': float
+            'z_bb_tb': float,
+            'z_imt_u': float
         }
     """
-    if DF_AGE is None or DF_HEIGHT is None:
-        raise RuntimeError("Reference data not loaded.")
+    ref = _reference(standard)
 
     age_months = calculate_age_months(dob, visit_date)
     corrected_height = correct_height(age_months, height, measure_mode)
 
     # --- 1. BB/U (Berat-per-Umur) ---
-    # Filter by gender, index_type='BB_U', dan umur
+    # Lookup by gender, index_type='BB_U', dan umur
     # umur di std_age.csv biasanya sampe 60 bulan buat balita.
 
-    row_bb_u = DF_AGE[
-        (DF_AGE["gender"] == gender)
-        & (DF_AGE["index_type"] == "BB_U")
-        & (DF_AGE["age_months"] == age_months)
-    ]
+    row_bb_u = ref.row(gender, "BB_U", age_months)
 
     z_bb_u = None
-    if not row_bb_u.empty:
-        median = row_bb_u.iloc[0]["median"]
-        sd_n1 = row_bb_u.iloc[0]["sd_n1"]
-        sd_p1 = row_bb_u.iloc[0]["sd_p1"]
-        z_bb_u = _calculate_z(weight, median, sd_n1, sd_p1)
+    if row_bb_u is not None:
+        z_bb_u = _calculate_z(weight, row_bb_u.median, row_bb_u.sd_n1, row_bb_u.sd_p1)
 
     # --- 2. TB/U atau PB/U (Tinggi-per-Umur) ---
     # PB_U buat 0-24 bulan, TB_U buat 24+ bulan biasanya di standar.
     # Standarnya ganti nama index pas 24 bulan.
-    # Cek struktur CSV dari `view_file` sebelumnya.
     # std_age.csv punya 'PB_U' (0-24) dan 'TB_U' (24-60+).
 
     index_type_len = "PB_U" if age_months < 24 else "TB_U"
 
-    row_tb_u = DF_AGE[
-        (DF_AGE["gender"] == gender)
-        & (DF_AGE["index_type"] == index_type_len)
-        & (DF_AGE["age_months"] == age_months)
-    ]
+    row_tb_u = ref.row(gender, index_type_len, age_months)
 
     z_tb_u = None
-    if not row_tb_u.empty:
-        median = row_tb_u.iloc[0]["median"]
-        sd_n1 = row_tb_u.iloc[0]["sd_n1"]
-        sd_p1 = row_tb_u.iloc[0]["sd_p1"]
+    if row_tb_u is not None:
         # Kita pake tinggi yang udah dikoreksi buat asesmen umur
         # Sebenernya biasanya PB diukur buat <24, TB buat >=24.
         # Koreksinya itu buat standardisasi "panjang terukur" jadi "panjang" atau "tinggi terukur" jadi "tinggi".
         # Kalo kita punya corrected_height, kita pake itu aja biar engga ribet
-        z_tb_u = _calculate_z(corrected_height, median, sd_n1, sd_p1)
+        z_tb_u = _calculate_z(
+            corrected_height, row_tb_u.median, row_tb_u.sd_n1, row_tb_u.sd_p1
+        )
 
     # --- 3. BB/TB atau BB/PB (Berat-per-Tinggi) ---
     # Ini pake std_height.csv
@@ -176,137 +232,109 @@ def get_z_scores(
         index_type_wfh = "BB_PB"
 
     # Penanganan Data Hilang (Contoh: Gap laki-laki 68.5-71.0cm)
-    # Daripada cuma lookup biasa, kita coba lookup dulu, kalau kosong baru interpolasi.
-
-    # 1. Coba Pencarian Persis (Exact Match)
-    row_bb_tb = DF_HEIGHT[
-        (DF_HEIGHT["gender"] == gender)
-        & (DF_HEIGHT["index_type"] == index_type_wfh)
-        & (DF_HEIGHT["height_cm"] == lookup_height)
-    ]
+    # Coba pencarian persis (exact match) dulu, kalau kosong baru interpolasi
+    # linear dari tetangga terdekat (atas dan bawah).
+    row_bb_tb = ref.row_interp(gender, index_type_wfh, lookup_height)
 
     z_bb_tb = None
-    ref_median, ref_sd_n1, ref_sd_p1 = None, None, None
-
-    if not row_bb_tb.empty:
-        ref_median = row_bb_tb.iloc[0]["median"]
-        ref_sd_n1 = row_bb_tb.iloc[0]["sd_n1"]
-        ref_sd_p1 = row_bb_tb.iloc[0]["sd_p1"]
-    else:
-        # 2. Coba Interpolasi
-        # Filter berdasarkan gender/tipe yang sesuai dulu
-        df_subset = DF_HEIGHT[
-            (DF_HEIGHT["gender"] == gender)
-            & (DF_HEIGHT["index_type"] == index_type_wfh)
-        ].sort_values("height_cm")
-
-        # Cari tetangga terdekat (atas dan bawah)
-        lower = df_subset[df_subset["height_cm"] < lookup_height].tail(1)
-        upper = df_subset[df_subset["height_cm"] > lookup_height].head(1)
-
-        if not lower.empty and not upper.empty:
-            # Ambil nilai
-
-            h1 = lower.iloc[0]["height_cm"]
-            h2 = upper.iloc[0]["height_cm"]
-
-            # Fungsi bantu interpolasi linear
-            def interp(col: str) -> float:
-                y1 = lower.iloc[0][col]
-                y2 = upper.iloc[0][col]
-                return y1 + (y2 - y1) * ((lookup_height - h1) / (h2 - h1))
-
-            ref_median = interp("median")
-            ref_sd_n1 = interp("sd_n1")
-            ref_sd_p1 = interp("sd_p1")
-
-    if ref_median is not None:
-        z_bb_tb = _calculate_z(weight, ref_median, ref_sd_n1, ref_sd_p1)
+    if row_bb_tb is not None:
+        z_bb_tb = _calculate_z(weight, row_bb_tb.median, row_bb_tb.sd_n1, row_bb_tb.sd_p1)
+
+    # --- 4. IMT/U (Indeks Massa Tubuh per Umur) ---
+    # IMT dihitung dari tinggi yang udah dikoreksi, lookup-nya per umur kayak BB/U
+    imt = calculate_imt(weight, corrected_height)
+
+    row_imt_u = ref.row(gender, "IMT_U", age_months)
+
+    z_imt_u = None
+    if row_imt_u is not None:
+        z_imt_u = _calculate_z(imt, row_imt_u.median, row_imt_u.sd_n1, row_imt_u.sd_p1)
 
     return {
         "age_months": age_months,
         "corrected_height": corrected_height,
+        "imt": round(imt, 2),
         "z_bb_u": round(z_bb_u, 2) if z_bb_u is not None else None,
         "z_tb_u": round(z_tb_u, 2) if z_tb_u is not None else None,
         "z_bb_tb": round(z_bb_tb, 2) if z_bb_tb is not None else None,
+        "z_imt_u": round(z_imt_u, 2) if z_imt_u is not None else None,
     }
 
 
-def get_growth_chart_data(gender: str):
+def _chart_data(keys, values, key_name: str, columns) -> dict:
+    data = {key_name: keys.tolist()}
+    for col in columns:
+        data[col] = values[:, REF_COLUMNS.index(col)].tolist()
+    return data
+
+
+def _age_slice(ref, gender: str, index_type: str, low: int, high: int):
+    # Potongan tabel umur low <= umur < high (keys umur dibalikin jadi int)
+    keys, values = ref.table(gender, index_type)
+    mask = (keys >= low) & (keys < high)
+    return keys[mask].astype(np.int64), values[mask]
+
+
+CHART_COLUMNS = ["sd_n3", "sd_n2", "median", "sd_p2", "sd_p3"]
+
+# Rentang umur grafik (bulan, low <= umur < high), default balita 0-60 bulan.
+# Standar anak sekolah (WHO 2007) misalnya pake (61, 229).
+CHART_AGE_RANGE = (0, 61)
+
+
+def get_growth_chart_data(gender: str, standard=None, age_range=CHART_AGE_RANGE):
     """
     Ambil data kurva pertumbuhan TB/U (Height-for-Age) standar WHO.
     Menggunakan PB_U untuk 0-24 bulan dan TB_U untuk 24-60 bulan.
     """
-    if DF_AGE is None:
+    ref = _reference(standard, required=False)
+    if ref is None:
         return None
 
-    # Filter data berdasarkan gender
-    # Kita ambil range 0-60 bulan standard
-
-    # 0-24 bulan pake PB_U
-    df_0_24 = DF_AGE[
-        (DF_AGE["gender"] == gender)
-        & (DF_AGE["index_type"] == "PB_U")
-        & (DF_AGE["age_months"] >= 0)
-        & (DF_AGE["age_months"] < 24)
-    ].sort_values("age_months")
-
-    # 24-60 bulan pake TB_U
-    df_24_60 = DF_AGE[
-        (DF_AGE["gender"] == gender)
-        & (DF_AGE["index_type"] == "TB_U")
-        & (DF_AGE["age_months"] >= 24)
-        & (DF_AGE["age_months"] <= 60)
-    ].sort_values("age_months")
+    # 0-24 bulan pake PB_U, 24-60 bulan pake TB_U, terus digabung
+    low, high = age_range
+    keys_0_24, values_0_24 = _age_slice(ref, gender, "PB_U", low, min(high, 24))
+    keys_24_60, values_24_60 = _age_slice(ref, gender, "TB_U", max(low, 24), high)
 
-    # Gabung
-    df_final = pd.concat([df_0_24, df_24_60])
-
-    return {
-        "age": df_final["age_months"].tolist(),
-        "sd_n3": df_final["sd_n3"].tolist(),
-        "sd_n2": df_final["sd_n2"].tolist(),
-        "sd_n1": df_final["sd_n1"].tolist(),  # Optional
-        "median": df_final["median"].tolist(),
-        "sd_p1": df_final["sd_p1"].tolist(),  # Optional
-        "sd_p2": df_final["sd_p2"].tolist(),
-        "sd_p3": df_final["sd_p3"].tolist(),
-    }
+    return _chart_data(
+        np.concatenate([keys_0_24, keys_24_60]),
+        np.concatenate([values_0_24, values_24_60]),
+        "age",
+        REF_COLUMNS,  # sd_n1 & sd_p1 opsional
+    )
 
 
-def get_weight_chart_data(gender: str):
+def get_weight_chart_data(gender: str, standard=None, age_range=CHART_AGE_RANGE):
     """
     Ambil data kurva pertumbuhan BB/U (Weight-for-Age) standar WHO.
     """
-    if DF_AGE is None:
+    ref = _reference(standard, required=False)
+    if ref is None:
         return None
 
-    # Filter data berdasarkan gender dan index BB_U
-    # Range 0-60 bulan standard
+    keys, values = _age_slice(ref, gender, "BB_U", *age_range)
+    return _chart_data(keys, values, "age", CHART_COLUMNS)
 
-    df_bb_u = DF_AGE[
-        (DF_AGE["gender"] == gender)
-        & (DF_AGE["index_type"] == "BB_U")
-        & (DF_AGE["age_months"] >= 0)
-        & (DF_AGE["age_months"] <= 60)
-    ].sort_values("age_months")
 
-    return {
-        "age": df_bb_u["age_months"].tolist(),
-        "sd_n3": df_bb_u["sd_n3"].tolist(),
-        "sd_n2": df_bb_u["sd_n2"].tolist(),
-        "median": df_bb_u["median"].tolist(),
-        "sd_p2": df_bb_u["sd_p2"].tolist(),
-        "sd_p3": df_bb_u["sd_p3"].tolist(),
-    }
+def get_imt_chart_data(gender: str, standard=None, age_range=CHART_AGE_RANGE):
+    """
+    Ambil data kurva pertumbuhan IMT/U (BMI-for-Age) standar WHO, 0-60 bulan.
+    """
+    ref = _reference(standard, required=False)
+    if ref is None:
+        return None
+
+    keys, values = _age_slice(ref, gender, "IMT_U", *age_range)
+    return _chart_data(keys, values, "age", CHART_COLUMNS)
 
 
-def get_wfh_chart_data(gender: str, mode: str):
+def get_wfh_chart_data(gender: str, mode: str, standard=None):
     """
     Ambil data kurva pertumbuhan BB/PB atau BB/TB (Weight-for-Height/Length) standar WHO.
     mode: 'recumbent' (Terlentang) atau 'standing' (Berdiri)
     """
-    if DF_HEIGHT is None:
+    ref = _reference(standard, required=False)
+    if ref is None:
         return None
 
     # Tentukan Index Type berdasarkan mode
@@ -320,15 +348,194 @@ def get_wfh_chart_data(gender: str, mode: str):
 
     index_type = "BB_PB" if mode == "recumbent" else "BB_TB"
 
-    df_wfh = DF_HEIGHT[
-        (DF_HEIGHT["gender"] == gender) & (DF_HEIGHT["index_type"] == index_type)
-    ].sort_values("height_cm")
+    keys, values = ref.table(gender, index_type)
+    return _chart_data(keys, values, "height", CHART_COLUMNS)
+
+
+# --- Versi Batch (Vectorized) ---
+# Dipake buat pipeline / bulk scoring. Logikanya sama persis kayak versi
+# per-record di atas, cuma semua dihitung pake array numpy sekaligus.
+
+# Index yang key-nya tinggi badan: nilai di antara dua baris diinterpolasi
+INTERP_INDEXES = ("BB_PB", "BB_TB")
+
+
+def ref_table(gender: str, index_type: str, standard=None):
+    """
+    Ambil tabel lookup (keys, values) buat satu gender + index_type.
+    keys = age_months (std_age) atau height_cm (std_height), udah terurut.
+    """
+    return _reference(standard).table(gender, index_type)
+
+
+def lookup_ref(gender: str, index_type: str, x, standard=None) -> np.ndarray:
+    """
+    Baris referensi (N, REF_COLUMNS) buat tiap key `x`, aturannya sama kayak
+    `get_z_scores_batch`: index tinggi badan diinterpolasi, index umur harus
+    persis. Yang gak ketemu jadi NaN.
+    """
+    keys, values = ref_table(gender, index_type, standard)
+    x = np.asarray(x, dtype=np.float64)
+    if index_type in INTERP_INDEXES:
+        return _lookup_interp(keys, values, x)
+    return _lookup_exact(keys, values, x)
+
+
+def _lookup_exact(keys, values, x):
+    """
+    Cari baris yang key-nya persis sama dengan x. Yang gak ketemu jadi NaN.
+    """
+    out = np.full((len(x), values.shape[1]), np.nan)
+    if len(keys) == 0:
+        return out
+    pos = np.clip(np.searchsorted(keys, x, side="left"), 0, len(keys) - 1)
+    found = keys[pos] == x
+    out[found] = values[pos[found]]
+    return out
+
+
+def _lookup_interp(keys, values, x):
+    """
+    Sama kayak `_lookup_exact`, tapi kalo gak ada yang persis, interpolasi
+    linear dari tetangga bawah dan atas (kayak di `get_z_scores`).
+    """
+    out = np.full((len(x), values.shape[1]), np.nan)
+    if len(keys) == 0:
+        return out
+    pos = np.searchsorted(keys, x, side="left")
+    inside = pos < len(keys)
+    exact = np.zeros(len(x), dtype=bool)
+    exact[inside] = keys[pos[inside]] == x[inside]
+    out[exact] = values[pos[exact]]
+
+    between = ~exact & (pos > 0) & inside
+    lo, hi = pos[between] - 1, pos[between]
+    frac = (x[between] - keys[lo]) / (keys[hi] - keys[lo])
+    out[between] = values[lo] + (values[hi] - values[lo]) * frac[:, None]
+    return out
+
+
+def _calculate_z_batch(value, median, sd_neg1, sd_pos1):
+    """
+    Versi vectorized dari `_calculate_z`. Ref yang NaN hasilnya NaN.
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        below = (value - median) / (median - sd_neg1)
+        above = (value - median) / (sd_pos1 - median)
+    below = np.where(median - sd_neg1 == 0, 0.0, below)
+    above = np.where(sd_pos1 - median == 0, 0.0, above)
+    z = np.where(value < median, below, np.where(value > median, above, 0.0))
+    return np.where(np.isnan(median), np.nan, z)
+
+
+def calculate_age_months_batch(dob, visit_date) -> np.ndarray:
+    """
+    Versi vectorized dari `calculate_age_months` (hasilnya sama kayak relativedelta).
+    """
+    dob = pd.DatetimeIndex(pd.to_datetime(dob))
+    visit = pd.DatetimeIndex(pd.to_datetime(visit_date))
+
+    # Kalo kunjungan sebelum lahir, relativedelta ngitung kebalik terus dinegatifin
+    swap = np.asarray(visit < dob)
+    start = dob.where(~swap, visit)
+    end = visit.where(~swap, dob)
+
+    months = (end.year - start.year) * 12 + (end.month - start.month)
+    # Belum genap sebulan kalo tanggalnya belum nyampe (tanggal akhir bulan di-clip)
+    anchor_day = np.minimum(start.day, end.days_in_month)
+    months = np.asarray(months - (end.day < anchor_day), dtype=np.int64)
+    return np.where(swap, -months, months)
+
+
+def correct_height_batch(age_months, height, measure_mode) -> np.ndarray:
+    """
+    Versi vectorized dari `correct_height`.
+    """
+    age_months = np.asarray(age_months)
+    height = np.asarray(height, dtype=np.float64)
+    measure_mode = np.asarray(measure_mode)
+
+    corrected = height.copy()
+    corrected[(measure_mode == "standing") & (age_months < 24)] += 0.7
+    corrected[(measure_mode == "recumbent") & (age_months >= 24)] -= 0.7
+    return corrected
+
+
+def get_z_scores_batch(gender, age_months, weight, corrected_height, standard=None) -> dict:
+    """
+    Hitung Z-score BB/U, TB/U, BB/TB, dan IMT/U buat banyak record sekaligus.
+
+    Beda sama `get_z_scores`, input di sini udah berupa umur (bulan) dan
+    tinggi yang udah dikoreksi (lihat `calculate_age_months_batch` dan
+    `correct_height_batch`), biar tiap tahap pipeline bisa dipisah.
+
+    Returns:
+        Dictionary berisi array numpy 'imt', 'z_bb_u', 'z_tb_u', 'z_bb_tb',
+        'z_imt_u' (dibulatkan 2 desimal, NaN kalo diluar jangkauan standar).
+    """
+    tables = _reference(standard)
+
+    gender = np.asarray(gender)
+    age_months = np.asarray(age_months, dtype=np.float64)
+    weight = np.asarray(weight, dtype=np.float64)
+    corrected_height = np.asarray(corrected_height, dtype=np.float64)
+
+    n = len(gender)
+    z_bb_u = np.full(n, np.nan)
+    z_tb_u = np.full(n, np.nan)
+    z_bb_tb = np.full(n, np.nan)
+    z_imt_u = np.full(n, np.nan)
+
+    # IMT dari tinggi terkoreksi, lookup-nya bareng BB/U (key umur yang sama)
+    imt = calculate_imt(weight, corrected_height)
+
+    index_len = np.where(age_months < 24, "PB_U", "TB_U")
+
+    # Logika fallback stunting parah sama kayak `get_z_scores`
+    lookup_height = np.round(corrected_height * 2) / 2
+    index_wfh = np.where(age_months < 24, "BB_PB", "BB_TB")
+    index_wfh[(index_wfh == "BB_TB") & (lookup_height < 65.0)] = "BB_PB"
+
+    median_i = REF_COLUMNS.index("median")
+    sd_n1_i = REF_COLUMNS.index("sd_n1")
+    sd_p1_i = REF_COLUMNS.index("sd_p1")
+
+    for g in np.unique(gender):
+        is_g = gender == g
+
+        for index_type, value, out in (
+            ("BB_U", weight, z_bb_u),
+            ("IMT_U", imt, z_imt_u),
+        ):
+            keys, values = tables.table(g, index_type)
+            ref = _lookup_exact(keys, values, age_months[is_g])
+            out[is_g] = _calculate_z_batch(
+                value[is_g], ref[:, median_i], ref[:, sd_n1_i], ref[:, sd_p1_i]
+            )
+
+        for index_type in ("PB_U", "TB_U"):
+            mask = is_g & (index_len == index_type)
+            keys, values = tables.table(g, index_type)
+            ref = _lookup_exact(keys, values, age_months[mask])
+            z_tb_u[mask] = _calculate_z_batch(
+                corrected_height[mask],
+                ref[:, median_i],
+                ref[:, sd_n1_i],
+                ref[:, sd_p1_i],
+            )
+
+        for index_type in INTERP_INDEXES:
+            mask = is_g & (index_wfh == index_type)
+            keys, values = tables.table(g, index_type)
+            ref = _lookup_interp(keys, values, lookup_height[mask])
+            z_bb_tb[mask] = _calculate_z_batch(
+                weight[mask], ref[:, median_i], ref[:, sd_n1_i], ref[:, sd_p1_i]
+            )
 
     return {
-        "height": df_wfh["height_cm"].tolist(),
-        "sd_n3": df_wfh["sd_n3"].tolist(),
-        "sd_n2": df_wfh["sd_n2"].tolist(),
-        "median": df_wfh["median"].tolist(),
-        "sd_p2": df_wfh["sd_p2"].tolist(),
-        "sd_p3": df_wfh["sd_p3"].tolist(),
+        "imt": np.round(imt, 2),
+        "z_bb_u": np.round(z_bb_u, 2),
+        "z_tb_u": np.round(z_tb_u, 2),
+        "z_bb_tb": np.round(z_bb_tb, 2),
+        "z_imt_u": np.round(z_imt_u, 2),
     }
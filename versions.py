@@ -0,0 +1,86 @@
+"""
+Snapshot versi tabel standar dan rule base fuzzy yang pernah dipake skoring.
+
+Tiap hasil pipeline nyatet kolom 'ref_version' (hash tabel standar, lihat
+`ReferenceTables.version`) dan 'rule_version' (hash spesifikasi fuzzy, lihat
+`fuzzy_logic.spec_version`). Isi versinya disimpen di sini:
+    data/versions/ref-<versi>.npz     blok tabel standar
+    data/versions/rules-<versi>.json  spesifikasi fuzzy
+biar pas CSV standar / rule diubah, `rescore.py` bisa bandingin versi lama
+sama yang sekarang dan cuma ngitung ulang hasil yang kena.
+"""
+
+import json
+import os
+
+from reference import ReferenceTables
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+DEFAULT_DIR = os.path.join(DATA_DIR, "versions")
+
+
+class VersionStore:
+    """
+    Folder snapshot versi. File-nya gak pernah diubah setelah ditulis
+    (nama = hash isi), jadi aman dibaca barengan dari banyak proses.
+    """
+
+    def __init__(self, root: str = DEFAULT_DIR):
+        self.root = root
+
+    def _path(self, kind: str, version: str) -> str:
+        ext = "npz" if kind == "ref" else "json"
+        return os.path.join(self.root, f"{kind}-{version}.{ext}")
+
+    def _write(self, path: str, write):
+        if os.path.exists(path):
+            return
+        os.makedirs(self.root, exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            write(f)
+        os.replace(tmp, path)
+
+    def save_reference(self, ref: ReferenceTables) -> str:
+        self._write(self._path("ref", ref.version), ref.save)
+        return ref.version
+
+    def save_rules(self, spec: dict) -> str:
+        from fuzzy_logic import spec_version
+
+        version = spec_version(spec)
+        text = json.dumps(spec, ensure_ascii=False, indent=2).encode("utf-8")
+        self._write(self._path("rules", version), lambda f: f.write(text))
+        return version
+
+    def snapshot(self, ref: ReferenceTables = None, spec: dict = None) -> tuple:
+        """
+        Simpen versi yang lagi dipake (default: `utils.REF` dan `fuzzy_system`).
+        Balikin (ref_version, rule_version).
+        """
+        if ref is None:
+            import utils
+
+            ref = utils.REF
+        if spec is None:
+            from fuzzy_logic import fuzzy_system
+
+            spec = fuzzy_system.spec
+        return self.save_reference(ref), self.save_rules(spec)
+
+    def reference(self, version: str):
+        """
+        Tabel standar versi `version`, atau None kalo snapshot-nya gak ada.
+        """
+        path = self._path("ref", str(version))
+        return ReferenceTables.load(path) if os.path.exists(path) else None
+
+    def rules(self, version: str):
+        """
+        Spesifikasi fuzzy versi `version`, atau None kalo snapshot-nya gak ada.
+        """
+        path = self._path("rules", str(version))
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
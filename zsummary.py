@@ -0,0 +1,326 @@
+"""
+Ringkasan distribusi Z-score (BB/U, TB/U, BB/TB) per wilayah per bulan buat
+laporan surveilans, tanpa harus nyimpen semua data di memori.
+
+Tiap distribusi (`ZSummary`) isinya:
+    - histogram bin tetap lebar 0.01 SD dari -6 sampai +6 (1201 bin, satu
+      bin per nilai Z yang udah dibulatin 2 desimal sama pipeline), plus
+      hitungan dibawah / diatas rentang dan min / max persisnya
+    - momen: n, mean, M2 (jumlah kuadrat selisih), digabung pake rumus Chan
+Gabung dua ringkasan (`merge`) = jumlahin histogram (integer) + gabung
+momen, jadi ringkasan per chunk yang dihitung paralel bisa digabung dan
+hasilnya sama kayak dihitung sekaligus.
+
+Batas error:
+    - jumlah, proporsi < -2 SD / < -3 SD, persentil: persis buat Z yang
+      dibulatin 2 desimal (output pipeline). Buat Z mentah yang gak
+      dibulatin, persentil melenceng maksimal 0.005 SD (setengah lebar bin)
+      dan proporsi cuma salah di nilai yang jaraknya < 0.005 dari batas.
+    - mean, SD: persis sampai pembulatan float (gak tergantung bin).
+    - persentil yang jatuh diluar -6..+6 dikasih min / max.
+
+Contoh:
+    python zsummary.py hasil.jsonl --workers 4 --out ringkasan_z.csv
+"""
+
+import argparse
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import pipeline
+
+Z_COLUMNS = ["z_bb_u", "z_tb_u", "z_bb_tb"]
+
+BIN_WIDTH = 0.01
+Z_RANGE = 6.0
+N_BINS = int(round(2 * Z_RANGE / BIN_WIDTH)) + 1
+
+PERCENTILES = (3, 15, 50, 85, 97)
+
+# Wilayah / bulan yang kosong dikelompokin di sini
+UNKNOWN = "-"
+
+
+class ZSummary:
+    """
+    Ringkasan satu distribusi Z-score (lihat docstring modul).
+    """
+
+    __slots__ = ("counts", "below", "above", "n", "mean", "m2", "min", "max")
+
+    def __init__(self):
+        self.counts = np.zeros(N_BINS, dtype=np.int64)
+        self.below = 0
+        self.above = 0
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def add(self, values) -> "ZSummary":
+        """
+        Tambah banyak nilai sekaligus (NaN diabaikan).
+        """
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return self
+
+        index = np.round((values + Z_RANGE) / BIN_WIDTH).astype(np.int64)
+        inside = (index >= 0) & (index < N_BINS)
+        self.counts += np.bincount(index[inside], minlength=N_BINS)
+        self.below += int((index < 0).sum())
+        self.above += int((index >= N_BINS).sum())
+
+        other = ZSummary()
+        other.n = len(values)
+        other.mean = float(values.mean())
+        other.m2 = float(((values - other.mean) ** 2).sum())
+        self._merge_moments(other)
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        return self
+
+    def _merge_moments(self, other):
+        n = self.n + other.n
+        if n == 0:
+            return
+        delta = other.mean - self.mean
+        self.mean += delta * other.n / n
+        self.m2 += other.m2 + delta**2 * self.n * other.n / n
+        self.n = n
+
+    def merge(self, other: "ZSummary") -> "ZSummary":
+        self.counts += other.counts
+        self.below += other.below
+        self.above += other.above
+        self._merge_moments(other)
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    @property
+    def sd(self) -> float:
+        return float(np.sqrt(self.m2 / (self.n - 1))) if self.n > 1 else np.nan
+
+    def share_below(self, threshold: float) -> float:
+        """
+        Proporsi nilai < `threshold` (threshold kelipatan 0.01).
+        """
+        if self.n == 0:
+            return np.nan
+        edge = int(round((threshold + Z_RANGE) / BIN_WIDTH))
+        edge = min(max(edge, 0), N_BINS)
+        return (self.below + int(self.counts[:edge].sum())) / self.n
+
+    def quantile(self, q: float) -> float:
+        """
+        Kuantil `q` (0-1), definisi 'inverted CDF': nilai terkecil yang
+        kumulatifnya >= q * n.
+        """
+        if self.n == 0:
+            return np.nan
+        target = max(int(np.ceil(q * self.n)), 1)
+        if target <= self.below:
+            return self.min
+        cumulative = self.below + np.cumsum(self.counts)
+        index = int(np.searchsorted(cumulative, target))
+        if index >= N_BINS:
+            return self.max
+        return round(index * BIN_WIDTH - Z_RANGE, 2)
+
+    def report(self) -> dict:
+        row = {
+            "n": self.n,
+            "mean": self.mean if self.n else np.nan,
+            "sd": self.sd,
+            "below_minus2": self.share_below(-2),
+            "below_minus3": self.share_below(-3),
+        }
+        for p in PERCENTILES:
+            row[f"p{p}"] = self.quantile(p / 100)
+        return row
+
+    def to_dict(self) -> dict:
+        """
+        Bentuk JSON (histogram disimpen sparse), buat dikirim / disimpen.
+        """
+        nonzero = np.flatnonzero(self.counts)
+        return {
+            "bins": nonzero.tolist(),
+            "counts": self.counts[nonzero].tolist(),
+            "below": self.below,
+            "above": self.above,
+            "n": self.n,
+            "mean": self.mean,
+            "m2": self.m2,
+            "min": self.min if self.n else None,
+            "max": self.max if self.n else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ZSummary":
+        summary = cls()
+        summary.counts[data["bins"]] = data["counts"]
+        summary.below, summary.above = data["below"], data["above"]
+        summary.n, summary.mean, summary.m2 = data["n"], data["mean"], data["m2"]
+        if data["n"]:
+            summary.min, summary.max = data["min"], data["max"]
+        return summary
+
+
+def _grouped_summaries(values, code: np.ndarray, n_groups: int) -> list:
+    """
+    `ZSummary` per grup sekaligus (`code` = nomor grup tiap baris), tanpa
+    motong batch per grup: histogram satu `bincount` di (grup, bin).
+    """
+    values = np.asarray(values, dtype=np.float64)
+    valid = ~np.isnan(values)
+    values, code = values[valid], code[valid]
+
+    # Slot 0 = dibawah rentang, slot terakhir = diatas rentang
+    width = N_BINS + 2
+    index = np.clip(np.round((values + Z_RANGE) / BIN_WIDTH) + 1, 0, width - 1).astype(np.int64)
+    counts = np.bincount(code * width + index, minlength=n_groups * width)
+    counts = counts.reshape(n_groups, width)
+
+    n = np.bincount(code, minlength=n_groups)
+    with np.errstate(invalid="ignore"):
+        mean = np.bincount(code, weights=values, minlength=n_groups) / n
+    m2 = np.bincount(code, weights=(values - mean[code]) ** 2, minlength=n_groups)
+    low = np.full(n_groups, np.inf)
+    high = np.full(n_groups, -np.inf)
+    np.minimum.at(low, code, values)
+    np.maximum.at(high, code, values)
+
+    summaries = []
+    for g in range(n_groups):
+        summary = ZSummary()
+        summary.counts = counts[g, 1:-1].copy()
+        summary.below, summary.above = int(counts[g, 0]), int(counts[g, -1])
+        summary.n = int(n[g])
+        if summary.n:
+            summary.mean, summary.m2 = float(mean[g]), float(m2[g])
+            summary.min, summary.max = float(low[g]), float(high[g])
+        summaries.append(summary)
+    return summaries
+
+
+class SummaryTable:
+    """
+    `ZSummary` per (wilayah, bulan kunjungan, kolom Z).
+    """
+
+    def __init__(self, group_by: str = "region"):
+        self.group_by = group_by
+        self.summaries = {}
+
+    def __len__(self):
+        return len(self.summaries)
+
+    def get(self, key) -> ZSummary:
+        if key not in self.summaries:
+            self.summaries[key] = ZSummary()
+        return self.summaries[key]
+
+    def add_batch(self, batch: pd.DataFrame) -> "SummaryTable":
+        """
+        Tambah satu batch hasil pipeline (butuh visit_date + kolom Z).
+        """
+        if batch.empty:
+            return self
+        if self.group_by in batch.columns:
+            group = batch[self.group_by].astype(object).where(batch[self.group_by].notna(), UNKNOWN)
+        else:
+            group = pd.Series(UNKNOWN, index=batch.index, dtype=object)
+        # Dikelompokin per datetime64[M], jadi string cuma buat yang unik
+        month = pd.to_datetime(batch["visit_date"], errors="coerce").to_numpy().astype("datetime64[M]")
+
+        group_code, groups = pd.factorize(group.astype(str).to_numpy())
+        month_code, months = pd.factorize(month, use_na_sentinel=False)
+        combined, code = np.unique(group_code * len(months) + month_code, return_inverse=True)
+        names = [
+            (
+                groups[c // len(months)],
+                UNKNOWN if np.isnat(months[c % len(months)]) else str(months[c % len(months)]),
+            )
+            for c in combined
+        ]
+        for column in Z_COLUMNS:
+            if column in batch.columns:
+                for name, summary in zip(names, _grouped_summaries(batch[column], code, len(names))):
+                    if summary.n:
+                        self.get((*name, column)).merge(summary)
+        return self
+
+    def merge(self, other: "SummaryTable") -> "SummaryTable":
+        for key, summary in other.summaries.items():
+            self.get(key).merge(summary)
+        return self
+
+    def report(self) -> pd.DataFrame:
+        rows = [
+            {self.group_by: g, "visit_month": m, "index": column, **summary.report()}
+            for (g, m, column), summary in sorted(self.summaries.items())
+        ]
+        return pd.DataFrame(rows)
+
+
+def summarize_stage(batches, table: SummaryTable):
+    """
+    Tahap pipeline: batch diterusin apa adanya, sambil diringkas ke `table`.
+    """
+    for batch in batches:
+        table.add_batch(batch)
+        yield batch
+
+
+def _summarize_chunk(item):
+    batch, group_by = item
+    return SummaryTable(group_by).add_batch(batch)
+
+
+def summarize_file(
+    source, group_by: str = "region", workers: int = 1, batch_size: int = 50000
+) -> SummaryTable:
+    """
+    Ringkas file hasil pipeline (JSONL / CSV) per chunk, paralel di `workers`
+    proses, terus digabung. Chunk yang lagi dikerjain dibatesin (2 per
+    worker), jadi file-nya gak kebaca semua ke memori.
+    """
+    table = SummaryTable(group_by)
+    items = ((batch, group_by) for batch in pipeline.read_source(source, batch_size))
+    if workers == 1:
+        for item in items:
+            table.merge(_summarize_chunk(item))
+        return table
+    # Jangan pake pool.map: dia ngabisin generator-nya dulu sebelum hasil pertama
+    pending = deque()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for item in items:
+            pending.append(pool.submit(_summarize_chunk, item))
+            while len(pending) >= workers * 2:
+                table.merge(pending.popleft().result())
+        while pending:
+            table.merge(pending.popleft().result())
+    return table
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ringkasan distribusi Z-score")
+    parser.add_argument("input", help="File hasil pipeline (JSONL / CSV)")
+    parser.add_argument("--group-by", default="region", help="Kolom wilayah (region / posyandu)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--out", help="Simpan laporan ke CSV")
+    args = parser.parse_args()
+
+    report = summarize_file(args.input, args.group_by, args.workers).report()
+    if args.out:
+        report.to_csv(args.out, index=False)
+    with pd.option_context("display.max_rows", 50, "display.width", 160):
+        print(report.round(3).to_string(index=False))